@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Asyncio Front-End for the Analytics Database
+
+Lets asyncio-based hooks and tools use the analytics database without
+blocking the event loop on disk I/O. Queries run on a bounded thread pool,
+each worker thread reading through its own read-only connection. Concurrent
+insert_session calls are collected by a writer task and committed together
+in one transaction on the single writer connection.
+
+Usage:
+    from analytics_async import AsyncAnalyticsDB
+
+    async with AsyncAnalyticsDB() as db:
+        await db.insert_session(checkpoint_data)
+        stats = await db.get_session_stats(days=30)
+"""
+
+import asyncio
+import sqlite3
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from analytics_db import ThreadSafeAnalyticsDB
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class AsyncAnalyticsDB:
+    """Awaitable wrapper around ThreadSafeAnalyticsDB
+
+    Every public AnalyticsDB method is available as a coroutine of the same
+    name and signature. insert_session is batched: calls made while a write
+    is in flight are queued (up to max_pending, after which callers wait) and
+    written by the next insert_sessions transaction of up to max_batch
+    sessions.
+
+    The database is opened on first use or by ``async with``. aclose() stops
+    accepting calls, writes everything already queued, waits for running
+    queries and closes the connections.
+    """
+
+    # Methods that must not be exposed through __getattr__
+    _NOT_WRAPPED = frozenset({'close'})
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        profile: str = 'default',
+        max_workers: int = 4,
+        max_batch: int = 500,
+        max_pending: int = 10000
+    ):
+        """Configure the front-end (no I/O happens until open())
+
+        Args:
+            db_path: Path to SQLite database file. If None, uses default location
+            profile: Connection profile name from AnalyticsDB.PROFILES
+            max_workers: Threads (and read connections) for queries
+            max_batch: Most sessions written per insert transaction
+            max_pending: Queued insert_session calls before callers wait
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+
+        self.db_path = db_path
+        self.profile = profile
+        self.max_workers = max_workers
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+
+        self.db: Optional[ThreadSafeAnalyticsDB] = None
+        self.batches = 0
+        self.batched_inserts = 0
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._open_lock = asyncio.Lock()
+        self._closing = False
+
+    async def open(self) -> 'AsyncAnalyticsDB':
+        """Open the database and start the insert writer task
+
+        Safe to call more than once.
+
+        Returns:
+            self
+        """
+        async with self._open_lock:
+            if self._closing:
+                raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+            if self.db is not None:
+                return self
+
+            executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix='analytics-db-reader'
+            )
+            loop = asyncio.get_running_loop()
+            try:
+                # Connecting may run migrations, so keep it off the loop too
+                self.db = await loop.run_in_executor(
+                    executor,
+                    functools.partial(ThreadSafeAnalyticsDB, db_path=self.db_path, profile=self.profile)
+                )
+            except BaseException:
+                executor.shutdown(wait=False)
+                raise
+
+            self._executor = executor
+            self._pending = asyncio.Queue(maxsize=self.max_pending)
+            self._writer_task = asyncio.create_task(self._write_batches())
+            return self
+
+    async def _run(self, func, *args, **kwargs):
+        """Run a blocking database call on the executor
+
+        Args:
+            func: Bound ThreadSafeAnalyticsDB method
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Whatever func returns
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def _ensure_open(self):
+        """Open on first use and reject calls after aclose()"""
+        if self._closing:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        if self.db is None:
+            await self.open()
+
+    def __getattr__(self, name: str):
+        """Expose public AnalyticsDB methods as coroutines
+
+        Args:
+            name: Attribute name
+
+        Returns:
+            Coroutine function calling the method on the executor
+        """
+        if name.startswith('_') or name in self._NOT_WRAPPED:
+            raise AttributeError(name)
+
+        method = getattr(ThreadSafeAnalyticsDB, name, None)
+        if not callable(method):
+            raise AttributeError(name)
+
+        @functools.wraps(method)
+        async def call(*args, **kwargs):
+            await self._ensure_open()
+            return await self._run(getattr(self.db, name), *args, **kwargs)
+
+        return call
+
+    async def insert_session(self, checkpoint_data: Dict[str, Any]) -> bool:
+        """Queue a session for the next batched insert and wait for it
+
+        Args:
+            checkpoint_data: Checkpoint JSON data
+
+        Returns:
+            True if successful, False otherwise
+        """
+        await self._ensure_open()
+
+        future = asyncio.get_running_loop().create_future()
+        await self._pending.put((checkpoint_data, future))
+        return await future
+
+    async def _write_batches(self):
+        """Writer task: drain queued inserts into insert_sessions transactions"""
+        while True:
+            item = await self._pending.get()
+            if item is None:
+                return
+
+            batch: List[Tuple[Dict[str, Any], asyncio.Future]] = [item]
+            stop = False
+            while len(batch) < self.max_batch and not self._pending.empty():
+                item = self._pending.get_nowait()
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            await self._write_batch(batch)
+
+            if stop:
+                return
+
+    async def _write_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        """Write one batch and resolve the callers' futures
+
+        Args:
+            batch: (checkpoint_data, future) pairs
+        """
+        try:
+            results = await self._run(self.db.insert_sessions, [data for data, _ in batch])
+        except Exception as e:
+            logger.error(f"Batched insert failed: {e}")
+            results = [False] * len(batch)
+
+        self.batches += 1
+        self.batched_inserts += len(batch)
+
+        for (_, future), result in zip(batch, results):
+            # The caller may have been cancelled; its session is still written
+            if not future.done():
+                future.set_result(result)
+
+    async def aclose(self):
+        """Write queued inserts, wait for running queries and close"""
+        async with self._open_lock:
+            if self._closing:
+                return
+            self._closing = True
+
+        if self.db is None:
+            return
+
+        await self._pending.put(None)
+        await self._writer_task
+
+        # Only reachable by a caller that queued behind the stop marker
+        while not self._pending.empty():
+            item = self._pending.get_nowait()
+            if item is not None and not item[1].done():
+                item[1].set_exception(sqlite3.ProgrammingError("Cannot operate on a closed database."))
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._executor.shutdown)
+        await loop.run_in_executor(None, self.db.close)
+
+    async def __aenter__(self) -> 'AsyncAnalyticsDB':
+        """Async context manager entry"""
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit"""
+        await self.aclose()
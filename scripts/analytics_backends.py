@@ -0,0 +1,906 @@
+#!/usr/bin/env python3
+"""
+Alternative Storage Backends for the Analytics Database
+
+AnalyticsBackend (analytics_db.py) is the interface the dashboard, badges
+and exports use; AnalyticsDB is its SQLite implementation. This module adds:
+
+- MemoryAnalyticsBackend: plain Python structures, nothing on disk. For
+  tests and ephemeral runs that do not need a database file.
+- LogAnalyticsBackend: append-only JSON Lines segment files replayed into
+  memory on open. An insert is one buffered write (plus an fsync unless
+  sync=False), so high-rate writers avoid SQLite's index and trigger
+  maintenance. Full segments are sealed and periodically compacted into one.
+
+Both keep running totals on insert, so lifetime stats and the project
+breakdown are O(1) per project; windows and recent sessions use a timeline
+kept sorted by timestamp. A rewritten checkpoint (same session_id, new
+content hash) replaces its session: the old record is subtracted from the
+totals before the new one is added. Distributions, time series, decision search and
+retention are only available from AnalyticsDB.
+
+Usage:
+    from analytics_backends import open_backend
+
+    db = open_backend('memory')
+    db = open_backend('log', '/path/to/stats.log', sync=False)
+    db = open_backend('sqlite', '/path/to/stats.db', profile='ingest')
+
+    db.insert_sessions_bulk(many_checkpoints)
+    stats = db.get_session_stats(days=30)
+    db.compact()                    # Log backend: merge sealed segments
+"""
+
+import os
+import json
+import bisect
+import threading
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from analytics_db import AnalyticsBackend, AnalyticsDB, from_epoch_ms, to_epoch_ms, _iso_from_ms
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class MemoryAnalyticsBackend(AnalyticsBackend):
+    """Analytics backend holding every session in memory
+
+    Sessions are kept as records (SESSION_FIELDS plus file_changes and
+    decisions lists); lifetime, per-day, per-project and per-file totals are
+    updated as each record is added or replaced. Safe to share between
+    threads.
+    """
+
+    # Per-day running totals, in the order _daily_values returns them
+    _DAILY_FIELDS = (
+        'total_sessions', 'successful_sessions', 'total_files_changed',
+        'total_decisions', 'total_resume_points', 'total_problems',
+        'total_tokens_saved', 'sum_duration', 'duration_count'
+    )
+
+    def __init__(self):
+        """Create an empty store"""
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        """Drop every session and total"""
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        # (timestamp_ms, insertion sequence, session_id), kept sorted
+        self._timeline: List[Tuple[int, int, str]] = []
+        self._totals: Dict[str, Any] = {key: 0 for key in self.AGGREGATE_COUNTER_KEYS}
+        self._totals['first_session'] = None
+        self._totals['last_session'] = None
+        # day -> totals in _DAILY_FIELDS order (like sessions_daily)
+        self._days: Dict[int, List[int]] = {}
+        # Insertion ordered, so ties in the breakdown keep first-seen order;
+        # a project left without sessions by a rewrite keeps its entry
+        self._projects: Dict[str, Dict[str, Any]] = {}
+        # (project_name, file_path) -> [changes, sessions, last_day]
+        self._files: Dict[Tuple[str, str], List[int]] = {}
+
+    def _to_record(self, checkpoint_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert checkpoint data into a session record
+
+        Args:
+            checkpoint_data: Checkpoint JSON data
+
+        Returns:
+            Record with SESSION_FIELDS, file_changes ([path, type] pairs) and
+            decisions ([text, timestamp_ms] pairs)
+        """
+        if not checkpoint_data.get('session_id'):
+            raise ValueError("Checkpoint has no session_id")
+
+        session_row, file_rows, decision_rows = self._prepare_session(checkpoint_data)
+
+        record = dict(zip(self.SESSION_FIELDS, session_row))
+        record['file_changes'] = [[path, change_type] for _, path, change_type in file_rows]
+        record['decisions'] = [[text, timestamp_ms] for _, text, timestamp_ms in decision_rows]
+        return record
+
+    def _apply(self, record: Dict[str, Any], keep_sorted: bool = True):
+        """Add a record to the store and its running totals
+
+        Args:
+            record: Session record from _to_record (not yet stored)
+            keep_sorted: Insert into the timeline in order; when False the
+                caller sorts the timeline once it has added every record
+        """
+        session_id = record['session_id']
+        timestamp_ms = record['timestamp_ms']
+        success = bool(record['checkpoint_success'])
+
+        self._sessions[session_id] = record
+        entry = (timestamp_ms, len(self._sessions), session_id)
+        if keep_sorted and self._timeline and entry < self._timeline[-1]:
+            bisect.insort(self._timeline, entry)
+        else:
+            self._timeline.append(entry)
+
+        totals = self._totals
+        totals['total_sessions'] += 1
+        totals['total_files_changed'] += record['files_changed']
+        totals['total_decisions'] += record['decisions_logged']
+        totals['total_resume_points'] += record['resume_points_generated']
+        if success:
+            totals['successful_sessions'] += 1
+            totals['successful_files_changed'] += record['files_changed']
+            totals['successful_decisions'] += record['decisions_logged']
+        if totals['first_session'] is None or timestamp_ms < totals['first_session']:
+            totals['first_session'] = timestamp_ms
+        if totals['last_session'] is None or timestamp_ms > totals['last_session']:
+            totals['last_session'] = timestamp_ms
+
+        project = self._projects.get(record['project_name'])
+        if project is None:
+            project = self._projects[record['project_name']] = {
+                'total_sessions': 0,
+                'successful_sessions': 0,
+                'total_files_changed': 0,
+                'total_decisions': 0,
+                'first_session_ms': timestamp_ms,
+                'last_session_ms': timestamp_ms
+            }
+        if project['total_sessions'] == 0:
+            project['first_session_ms'] = project['last_session_ms'] = timestamp_ms
+            totals['total_projects'] += 1
+        project['total_sessions'] += 1
+        project['successful_sessions'] += success
+        project['total_files_changed'] += record['files_changed']
+        project['total_decisions'] += record['decisions_logged']
+        project['first_session_ms'] = min(project['first_session_ms'], timestamp_ms)
+        project['last_session_ms'] = max(project['last_session_ms'], timestamp_ms)
+
+        day = timestamp_ms // self.MS_PER_DAY
+        daily = self._days.get(day)
+        if daily is None:
+            daily = self._days[day] = [0] * len(self._DAILY_FIELDS)
+        for i, value in enumerate(self._daily_values(record)):
+            daily[i] += value
+
+        self._count_files(self._files, record)
+
+    def _unapply(self, record: Dict[str, Any]):
+        """Remove a stored record from the store and its running totals
+
+        The reverse of _apply, for a session about to be replaced. First and
+        last timestamps the record defined are looked up again in the
+        timeline.
+
+        Args:
+            record: Stored session record
+        """
+        session_id = record['session_id']
+        timestamp_ms = record['timestamp_ms']
+        success = bool(record['checkpoint_success'])
+
+        del self._sessions[session_id]
+        index = bisect.bisect_left(self._timeline, (timestamp_ms,))
+        while self._timeline[index][2] != session_id:
+            index += 1
+        del self._timeline[index]
+
+        totals = self._totals
+        totals['total_sessions'] -= 1
+        totals['total_files_changed'] -= record['files_changed']
+        totals['total_decisions'] -= record['decisions_logged']
+        totals['total_resume_points'] -= record['resume_points_generated']
+        if success:
+            totals['successful_sessions'] -= 1
+            totals['successful_files_changed'] -= record['files_changed']
+            totals['successful_decisions'] -= record['decisions_logged']
+        totals['first_session'] = self._timeline[0][0] if self._timeline else None
+        totals['last_session'] = self._timeline[-1][0] if self._timeline else None
+
+        project_name = record['project_name']
+        project = self._projects[project_name]
+        project['total_sessions'] -= 1
+        project['successful_sessions'] -= success
+        project['total_files_changed'] -= record['files_changed']
+        project['total_decisions'] -= record['decisions_logged']
+        if project['total_sessions'] == 0:
+            totals['total_projects'] -= 1
+        else:
+            if timestamp_ms == project['first_session_ms']:
+                project['first_session_ms'] = next(
+                    ts for ts, _, other in self._timeline
+                    if self._sessions[other]['project_name'] == project_name
+                )
+            if timestamp_ms == project['last_session_ms']:
+                project['last_session_ms'] = next(
+                    ts for ts, _, other in reversed(self._timeline)
+                    if self._sessions[other]['project_name'] == project_name
+                )
+
+        day = timestamp_ms // self.MS_PER_DAY
+        daily = self._days[day]
+        for i, value in enumerate(self._daily_values(record)):
+            daily[i] -= value
+        if daily[0] == 0:
+            del self._days[day]
+
+        self._uncount_files(record)
+
+    @staticmethod
+    def _daily_values(record: Dict[str, Any]) -> Tuple[int, ...]:
+        """Get what a record adds to its day's totals (_DAILY_FIELDS order)"""
+        duration = record['duration_seconds']
+        return (
+            1,
+            1 if record['checkpoint_success'] else 0,
+            record['files_changed'],
+            record['decisions_logged'],
+            record['resume_points_generated'],
+            record['problems_encountered'],
+            record['tokens_estimated'],
+            duration or 0,
+            0 if duration is None else 1
+        )
+
+    def _count_files(self, files: Dict[Tuple[str, str], List[int]], record: Dict[str, Any]):
+        """Add a record's file changes to per-file totals
+
+        Args:
+            files: (project_name, file_path) -> [changes, sessions, last_day]
+            record: Session record
+        """
+        project_name = record['project_name']
+        day = record['timestamp_ms'] // self.MS_PER_DAY
+        seen = set()
+
+        for path, _ in record['file_changes']:
+            entry = files.get((project_name, path))
+            if entry is None:
+                entry = files[(project_name, path)] = [0, 0, day]
+            entry[0] += 1
+            if path not in seen:
+                seen.add(path)
+                entry[1] += 1
+            if day > entry[2]:
+                entry[2] = day
+
+    def _uncount_files(self, record: Dict[str, Any]):
+        """Subtract a stored record's file changes from the per-file totals
+
+        Args:
+            record: Stored session record, already removed from the timeline
+        """
+        project_name = record['project_name']
+        day = record['timestamp_ms'] // self.MS_PER_DAY
+        seen = set()
+
+        for path, _ in record['file_changes']:
+            entry = self._files[(project_name, path)]
+            entry[0] -= 1
+            if path not in seen:
+                seen.add(path)
+                entry[1] -= 1
+
+        for path in seen:
+            entry = self._files[(project_name, path)]
+            if entry[0] == 0:
+                del self._files[(project_name, path)]
+            elif entry[2] == day:
+                # The latest change may have been this record's
+                entry[2] = next(
+                    ts // self.MS_PER_DAY for ts, _, other in reversed(self._timeline)
+                    if self._sessions[other]['project_name'] == project_name
+                    and any(changed == path for changed, _ in self._sessions[other]['file_changes'])
+                )
+
+    def _commit(self, records: List[Dict[str, Any]]):
+        """Make a group of new or replacing records durable, then visible
+
+        Args:
+            records: Records to store, with distinct session ids; a record
+                whose session is stored replaces it
+        """
+        for record in records:
+            stored = self._sessions.get(record['session_id'])
+            if stored is not None:
+                self._unapply(stored)
+            self._apply(record)
+
+    def _insert_or_ignore(
+        self,
+        checkpoint_data: Dict[str, Any],
+        pending: Dict[str, Dict[str, Any]]
+    ) -> str:
+        """Convert one checkpoint and queue it unless it is stored unchanged
+
+        Args:
+            checkpoint_data: Checkpoint JSON data
+            pending: Records of the current batch by session id
+
+        Returns:
+            'inserted', 'updated' (content changed), 'skipped' (unchanged
+            duplicate) or 'errors' (not convertible)
+        """
+        try:
+            record = self._to_record(checkpoint_data)
+        except Exception as e:
+            logger.debug(f"Could not convert checkpoint: {e}")
+            return 'errors'
+
+        session_id = record['session_id']
+        stored = pending.get(session_id) or self._sessions.get(session_id)
+        if stored is None:
+            status = 'inserted'
+        elif stored.get('content_hash') == record['content_hash']:
+            logger.debug(f"Session {session_id} already exists, skipping")
+            return 'skipped'
+        else:
+            status = 'updated'
+
+        pending[session_id] = record
+        return status
+
+    def insert_session(self, checkpoint_data: Dict[str, Any]) -> bool:
+        """Insert a session record from checkpoint data
+
+        A stored session with the same session_id is replaced if the
+        checkpoint's content hash differs and kept otherwise.
+
+        Args:
+            checkpoint_data: Checkpoint JSON data
+
+        Returns:
+            True if inserted or updated, False otherwise
+        """
+        with self._lock:
+            session_id = checkpoint_data.get('session_id')
+            stored = self._sessions.get(session_id)
+            if stored is not None and stored.get('content_hash') == self._content_hash(checkpoint_data):
+                logger.warning(f"Session {session_id} already exists, skipping")
+                return False
+
+            try:
+                self._commit([self._to_record(checkpoint_data)])
+                logger.info(f"Session {session_id} {'updated' if stored else 'inserted'} successfully")
+                return True
+
+            except Exception as e:
+                logger.error(f"Failed to insert session: {e}")
+                return False
+
+    def insert_sessions_bulk(
+        self,
+        checkpoints: Iterable[Dict[str, Any]],
+        batch_size: int = 1000
+    ) -> Dict[str, int]:
+        """Insert many sessions, committing once per batch
+
+        Args:
+            checkpoints: Iterable of checkpoint JSON data
+            batch_size: Number of checkpoints per commit
+
+        Returns:
+            Dictionary with inserted, updated, skipped and errors counts
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        counts = {'inserted': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
+        processed = 0
+        pending: Dict[str, Dict[str, Any]] = {}
+
+        with self._lock:
+            try:
+                for checkpoint_data in checkpoints:
+                    counts[self._insert_or_ignore(checkpoint_data, pending)] += 1
+
+                    processed += 1
+                    if processed % batch_size == 0:
+                        self._commit(list(pending.values()))
+                        pending = {}
+
+                self._commit(list(pending.values()))
+
+            except OSError as e:
+                logger.error(f"Bulk insert failed: {e}")
+                raise
+
+        logger.info(
+            f"Bulk insert complete: {counts['inserted']} inserted, {counts['updated']} updated, "
+            f"{counts['skipped']} skipped, {counts['errors']} errors"
+        )
+        return counts
+
+    def insert_sessions(self, checkpoints: Iterable[Dict[str, Any]]) -> List[bool]:
+        """Insert several sessions with a single commit
+
+        Args:
+            checkpoints: Iterable of checkpoint JSON data
+
+        Returns:
+            One flag per checkpoint: True if inserted or updated, False if
+            it was an unchanged duplicate, could not be converted or the
+            commit failed
+        """
+        checkpoints = list(checkpoints)
+        pending: Dict[str, Dict[str, Any]] = {}
+
+        with self._lock:
+            try:
+                results = [
+                    self._insert_or_ignore(checkpoint_data, pending) in ('inserted', 'updated')
+                    for checkpoint_data in checkpoints
+                ]
+                self._commit(list(pending.values()))
+                logger.info(f"Inserted or updated {sum(results)} of {len(results)} sessions")
+                return results
+
+            except OSError as e:
+                logger.error(f"Failed to insert sessions: {e}")
+                return [False] * len(checkpoints)
+
+    def _records_between(self, start_ms: int, end_ms: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get the records with start_ms <= timestamp_ms < end_ms
+
+        Args:
+            start_ms: First timestamp included
+            end_ms: First timestamp excluded (None for no upper bound)
+
+        Returns:
+            Records, oldest first
+        """
+        start = bisect.bisect_left(self._timeline, (start_ms,))
+        end = len(self._timeline) if end_ms is None else bisect.bisect_left(self._timeline, (end_ms,))
+        return [self._sessions[entry[2]] for entry in self._timeline[start:end]]
+
+    @staticmethod
+    def _cutoff_ms(days: int) -> int:
+        return to_epoch_ms(datetime.now() - timedelta(days=days))
+
+    def get_session_stats(self, days: int = 30) -> Dict[str, Any]:
+        """Get session statistics for the last N days
+
+        Args:
+            days: Number of days to include
+
+        Returns:
+            Dictionary of statistics
+        """
+        cutoff_ms = self._cutoff_ms(days)
+        cutoff_day = cutoff_ms // self.MS_PER_DAY
+        sums = [0] * len(self._DAILY_FIELDS)
+
+        with self._lock:
+            # Whole days from the daily totals, the cutoff day from its records
+            rows = [daily for day, daily in self._days.items() if day > cutoff_day]
+            rows.extend(
+                self._daily_values(record)
+                for record in self._records_between(cutoff_ms, (cutoff_day + 1) * self.MS_PER_DAY)
+            )
+            for row in rows:
+                for i, value in enumerate(row):
+                    sums[i] += value
+
+        totals = dict(zip(self._DAILY_FIELDS, sums))
+
+        stats = {
+            'period_days': days,
+            'total_sessions': totals['total_sessions'],
+            'successful_sessions': totals['successful_sessions'],
+            'total_files_changed': totals['total_files_changed'],
+            'total_decisions': totals['total_decisions'],
+            'total_resume_points': totals['total_resume_points'],
+            'total_problems': totals['total_problems'],
+            'avg_duration_seconds': (
+                totals['sum_duration'] / totals['duration_count'] if totals['duration_count'] else 0
+            ),
+            'total_tokens_saved': totals['total_tokens_saved']
+        }
+
+        # Calculate success rate
+        if stats['total_sessions'] > 0:
+            stats['success_rate'] = (
+                stats['successful_sessions'] / stats['total_sessions']
+            ) * 100
+        else:
+            stats['success_rate'] = 0.0
+
+        # Calculate time saved
+        stats['time_saved_minutes'] = self._calculate_time_saved_from_stats(stats)
+        stats['time_saved_hours'] = stats['time_saved_minutes'] / 60
+
+        return stats
+
+    def get_aggregate_stats(self) -> Dict[str, Any]:
+        """Get lifetime aggregate statistics from the running totals
+
+        Returns:
+            Dictionary of aggregate metrics
+        """
+        with self._lock:
+            totals = dict(self._totals)
+
+        stats = {
+            'total_sessions': totals['total_sessions'],
+            'successful_sessions': totals['successful_sessions'],
+            'total_files_changed': totals['total_files_changed'],
+            'total_decisions': totals['total_decisions'],
+            'total_resume_points': totals['total_resume_points'],
+            'first_session': _iso_from_ms(totals['first_session']),
+            'last_session': _iso_from_ms(totals['last_session']),
+            'total_projects': totals['total_projects']
+        }
+
+        # Calculate success rate
+        if stats['total_sessions'] > 0:
+            stats['success_rate'] = (
+                stats['successful_sessions'] / stats['total_sessions']
+            ) * 100
+        else:
+            stats['success_rate'] = 0.0
+
+        # Calculate time saved
+        stats['time_saved_hours'] = self._time_saved_hours_from_totals(totals)
+
+        return stats
+
+    def get_project_breakdown(self) -> List[Dict[str, Any]]:
+        """Get statistics broken down by project
+
+        Returns:
+            List of project statistics, most sessions first
+        """
+        with self._lock:
+            totals = [
+                (name, dict(project)) for name, project in self._projects.items()
+                if project['total_sessions']
+            ]
+
+        projects = []
+        for name, project in sorted(totals, key=lambda item: -item[1]['total_sessions']):
+            projects.append({
+                'project_name': name,
+                'total_sessions': project['total_sessions'],
+                'successful_sessions': project['successful_sessions'],
+                'total_files_changed': project['total_files_changed'],
+                'total_decisions': project['total_decisions'],
+                'first_session': _iso_from_ms(project['first_session_ms']),
+                'last_session': _iso_from_ms(project['last_session_ms']),
+                'success_rate': project['successful_sessions'] / project['total_sessions'] * 100
+            })
+
+        return projects
+
+    def get_hot_files(
+        self,
+        project: Optional[str] = None,
+        days: Optional[int] = None,
+        top_k: int = 20
+    ) -> List[Dict[str, Any]]:
+        """Get the most frequently changed files
+
+        Lifetime rankings read the per-file running totals; a window counts
+        the file changes of its sessions.
+
+        Args:
+            project: Only files of this project (None for all projects)
+            days: Only changes in the last N days (None for all time)
+            top_k: Maximum number of files to return
+
+        Returns:
+            List of dictionaries (project_name, file_path, changes, sessions
+            that changed the file, last_changed date), most changes first
+        """
+        with self._lock:
+            if days is None:
+                files = {key: list(entry) for key, entry in self._files.items()}
+            else:
+                files = {}
+                for record in self._records_between(self._cutoff_ms(days)):
+                    self._count_files(files, record)
+
+        ranked = sorted(
+            (
+                (key, entry) for key, entry in files.items()
+                if project is None or key[0] == project
+            ),
+            key=lambda item: (-item[1][0], item[0][1])
+        )
+
+        return [
+            {
+                'project_name': project_name,
+                'file_path': path,
+                'changes': changes,
+                'sessions': sessions,
+                'last_changed': from_epoch_ms(last_day * self.MS_PER_DAY).date().isoformat()
+            }
+            for (project_name, path), (changes, sessions, last_day) in ranked[:top_k]
+        ]
+
+    def get_recent_sessions(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """Get the most recent sessions
+
+        Args:
+            limit: Maximum number of sessions to return
+
+        Returns:
+            List of session dictionaries, newest first ('timestamp' is a datetime)
+        """
+        with self._lock:
+            entries = self._timeline[-limit:][::-1] if limit > 0 else []
+            records = [self._sessions[entry[2]] for entry in entries]
+
+        return [
+            {
+                'session_id': record['session_id'],
+                'timestamp': from_epoch_ms(record['timestamp_ms']),
+                'project_name': record['project_name'],
+                'files_changed': record['files_changed'],
+                'decisions_logged': record['decisions_logged'],
+                'checkpoint_success': bool(record['checkpoint_success'])
+            }
+            for record in records
+        ]
+
+    def get_dashboard_snapshot(self, days: Optional[int] = None, recent: int = 5) -> Dict[str, Any]:
+        """Get everything the status dashboard and exports show, under one lock
+
+        Args:
+            days: Summarize the last N days (None for all time)
+            recent: Number of recent sessions to include (0 for none)
+
+        Returns:
+            Dictionary with period_days, summary, projects and recent_sessions
+        """
+        with self._lock:
+            return super().get_dashboard_snapshot(days, recent)
+
+    def close(self):
+        """Drop every session"""
+        with self._lock:
+            self._reset()
+
+
+class LogAnalyticsBackend(MemoryAnalyticsBackend):
+    """Analytics backend persisting sessions to an append-only segment log
+
+    Every commit appends one JSON line per record to the active segment file
+    (segment-00000001.jsonl, ...) in the log directory. When the active
+    segment reaches segment_bytes it is sealed and a new one started; once
+    compact_segments segments are sealed, compact() rewrites the whole log
+    as a single segment, so opening never replays more than a few files.
+
+    Opening replays the segments into memory. A torn last line (the process
+    died mid-write) is truncated away. When a session_id appears more than
+    once the last record wins: later records are rewrites of the session,
+    or copies left by a compaction that did not finish removing old
+    segments. Only one process may write a log directory at a time.
+    """
+
+    # Size at which the active segment is sealed
+    SEGMENT_BYTES = 16 * 1024 * 1024
+    # Number of sealed segments that triggers a compaction
+    COMPACT_SEGMENTS = 8
+
+    _SEGMENT_GLOB = 'segment-*.jsonl'
+
+    def __init__(
+        self,
+        log_dir: Optional[str] = None,
+        segment_bytes: int = SEGMENT_BYTES,
+        compact_segments: int = COMPACT_SEGMENTS,
+        sync: bool = True
+    ):
+        """Open a log directory, creating it if needed, and replay it
+
+        Args:
+            log_dir: Directory holding the segment files. If None, uses the
+                default location next to the SQLite database
+            segment_bytes: Seal the active segment once it reaches this size
+            compact_segments: Compact once this many segments are sealed
+                (0 disables automatic compaction)
+            sync: fsync each commit; without it a crash can lose the last
+                commits (but never corrupt earlier ones)
+        """
+        super().__init__()
+
+        if segment_bytes < 1:
+            raise ValueError("segment_bytes must be at least 1")
+
+        if log_dir is None:
+            # Default to .analytics/stats.log relative to script location
+            log_dir = str(Path(__file__).parent.parent / '.analytics' / 'stats.log')
+
+        self.log_dir = Path(log_dir)
+        self.segment_bytes = segment_bytes
+        self.compact_segments = compact_segments
+        self.sync = sync
+        self._segment = None
+        self._segment_number = 0
+
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self._replay()
+
+    def _segments(self) -> List[Path]:
+        """List segment files, oldest first"""
+        return sorted(self.log_dir.glob(self._SEGMENT_GLOB))
+
+    def _segment_path(self, number: int) -> Path:
+        return self.log_dir / f'segment-{number:08d}.jsonl'
+
+    def _replay(self):
+        """Load every segment into memory and open the newest for appending"""
+        for temp in self.log_dir.glob('segment-*.tmp'):
+            # Left by a compaction that did not finish; the old segments are intact
+            temp.unlink()
+
+        segments = self._segments()
+        # session_id -> (last record, segment name, line number)
+        latest: Dict[str, Tuple[Dict[str, Any], str, int]] = {}
+
+        for path in segments:
+            data = path.read_bytes()
+            if data and not data.endswith(b'\n'):
+                # Only the tail of a crashed write can be incomplete
+                keep = data.rfind(b'\n') + 1
+                logger.warning(f"Truncating torn record at the end of {path.name}")
+                with open(path, 'r+b') as f:
+                    f.truncate(keep)
+                data = data[:keep]
+
+            for line_number, line in enumerate(data.splitlines(), 1):
+                try:
+                    record = json.loads(line)
+                    latest[record['session_id']] = (record, path.name, line_number)
+                except (ValueError, KeyError, TypeError):
+                    logger.warning(f"Skipping unreadable record {path.name}:{line_number}")
+
+        replayed = 0
+        for record, name, line_number in latest.values():
+            try:
+                self._apply(record, keep_sorted=False)
+                replayed += 1
+            except (KeyError, TypeError):
+                logger.warning(f"Skipping unreadable record {name}:{line_number}")
+
+        self._timeline.sort()
+
+        if segments:
+            self._segment_number = int(segments[-1].stem.split('-')[1])
+            self._open_segment(self._segment_number)
+        else:
+            self._open_segment(1)
+
+        logger.info(f"Replayed {replayed} sessions from {len(segments)} segments in {self.log_dir}")
+
+    def _open_segment(self, number: int):
+        """Make segment `number` the active segment"""
+        if self._segment is not None:
+            self._segment.close()
+        self._segment_number = number
+        self._segment = open(self._segment_path(number), 'ab')
+
+    def _commit(self, records: List[Dict[str, Any]]):
+        """Append records to the active segment, then make them visible
+
+        Args:
+            records: Records to store, with distinct session ids; a record
+                whose session is stored replaces it
+        """
+        if not records:
+            return
+
+        data = b''.join(self._encode(record) for record in records)
+        position = self._segment.tell()
+        try:
+            self._segment.write(data)
+            self._segment.flush()
+            if self.sync:
+                os.fsync(self._segment.fileno())
+        except OSError:
+            # Drop a partial write so the next commit starts on a fresh line
+            self._segment.truncate(position)
+            raise
+
+        super()._commit(records)
+
+        if self._segment.tell() >= self.segment_bytes:
+            self._open_segment(self._segment_number + 1)
+            if self.compact_segments and len(self._segments()) - 1 >= self.compact_segments:
+                self.compact()
+
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> bytes:
+        return json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n'
+
+    def compact(self) -> Dict[str, int]:
+        """Rewrite the whole log as a single segment
+
+        The compacted segment is written to a temporary file and renamed
+        into place before the old segments are removed, so a crash at any
+        point leaves a log that replays to the same sessions.
+
+        Returns:
+            Dictionary with the number of sessions written, segments
+            replaced and bytes before and after
+        """
+        with self._lock:
+            old_segments = self._segments()
+            bytes_before = sum(path.stat().st_size for path in old_segments)
+
+            self._segment.close()
+            self._segment = None
+
+            number = self._segment_number + 1
+            target = self._segment_path(number)
+            temp = target.with_suffix('.tmp')
+            with open(temp, 'wb') as f:
+                for entry in self._timeline:
+                    f.write(self._encode(self._sessions[entry[2]]))
+                f.flush()
+                os.fsync(f.fileno())
+            temp.replace(target)
+
+            for path in old_segments:
+                path.unlink()
+
+            # Later commits go to a fresh segment after the compacted one
+            self._open_segment(number + 1)
+
+            result = {
+                'sessions': len(self._timeline),
+                'segments': len(old_segments),
+                'bytes_before': bytes_before,
+                'bytes_after': target.stat().st_size
+            }
+
+        logger.info(
+            f"Compacted {result['segments']} segments into one: "
+            f"{result['bytes_before']} -> {result['bytes_after']} bytes"
+        )
+        return result
+
+    def close(self):
+        """Close the active segment"""
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+                logger.info(f"Log {self.log_dir} closed")
+
+
+# Backend name -> class, as accepted by open_backend
+BACKENDS = {
+    'sqlite': AnalyticsDB,
+    'memory': MemoryAnalyticsBackend,
+    'log': LogAnalyticsBackend,
+}
+
+
+def open_backend(kind: str = 'sqlite', path: Optional[str] = None, **options) -> AnalyticsBackend:
+    """Open an analytics backend by name
+
+    Args:
+        kind: 'sqlite', 'memory' or 'log'
+        path: Database file (sqlite) or log directory (log); must be None
+            for the memory backend. None uses the default location
+        **options: Further constructor arguments of the backend class
+
+    Returns:
+        Open backend
+    """
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown backend '{kind}', expected one of {sorted(BACKENDS)}")
+
+    if kind == 'sqlite':
+        return AnalyticsDB(db_path=path, **options)
+    if kind == 'log':
+        return LogAnalyticsBackend(log_dir=path, **options)
+    if path is not None:
+        raise ValueError("The memory backend does not take a path")
+    return MemoryAnalyticsBackend(**options)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Write-Behind Ingest Buffer for the Analytics Database
+
+AnalyticsDB.insert_session commits (and fsyncs) once per checkpoint, which
+adds up under bursty hook activity. BufferedAnalyticsWriter accepts
+checkpoints without touching the database and writes them from a background
+thread as one transaction every max_records checkpoints or max_delay_ms
+milliseconds, whichever comes first.
+
+Buffered checkpoints are flushed on close(), at interpreter exit and on
+SIGTERM. Checkpoints still buffered when the process is killed outright are
+lost, so only use it where that trade-off is acceptable.
+
+Usage:
+    from analytics_db import ThreadSafeAnalyticsDB
+    from analytics_buffer import BufferedAnalyticsWriter
+
+    db = ThreadSafeAnalyticsDB(profile='ingest')
+    with BufferedAnalyticsWriter(db, max_records=500, max_delay_ms=1000) as writer:
+        writer.add(checkpoint_data)
+        writer.flush()              # Barrier: everything added so far is committed
+        print(writer.metrics())
+"""
+
+import os
+import time
+import queue
+import atexit
+import signal
+import sqlite3
+import threading
+import logging
+from typing import Any, Dict, List
+
+from analytics_db import ThreadSafeAnalyticsDB
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+# Control items passed through the queue alongside checkpoints
+_STOP = object()
+
+
+class _Barrier:
+    """Queue marker released once everything queued before it is written"""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class BufferedAnalyticsWriter:
+    """Buffer checkpoints and write them in size- or time-bounded batches
+
+    Flushes go through insert_sessions_bulk with one transaction per batch,
+    so duplicates are skipped (or replaced, if changed) exactly as in a bulk
+    load. The database must be a ThreadSafeAnalyticsDB because flushes run
+    on a background thread; it is not closed by the writer.
+
+    Checkpoints travel through a queue.SimpleQueue, whose put() is safe to
+    call from a signal handler, so the SIGTERM flush cannot deadlock against
+    an add() it interrupted.
+    """
+
+    def __init__(
+        self,
+        db: ThreadSafeAnalyticsDB,
+        max_records: int = 500,
+        max_delay_ms: int = 1000,
+        handle_signals: bool = True
+    ):
+        """Start the background flush thread
+
+        Args:
+            db: Database to write to
+            max_records: Flush once this many checkpoints are buffered
+            max_delay_ms: Flush once the oldest buffered checkpoint is this old
+            handle_signals: Flush on SIGTERM (only possible from the main thread)
+        """
+        if not isinstance(db, ThreadSafeAnalyticsDB):
+            raise TypeError("BufferedAnalyticsWriter requires a ThreadSafeAnalyticsDB")
+        if max_records < 1:
+            raise ValueError("max_records must be at least 1")
+        if max_delay_ms < 0:
+            raise ValueError("max_delay_ms must not be negative")
+
+        self.db = db
+        self.max_records = max_records
+        self.max_delay_ms = max_delay_ms
+
+        self._queue: 'queue.SimpleQueue[Any]' = queue.SimpleQueue()
+        self._closed = False
+
+        # Written only by the flush thread; metrics() reads them unlocked
+        self._batch_size = 0
+        self._flushed = 0
+        self._flushes = 0
+        self._flush_ms_total = 0.0
+        self._flush_ms_last = 0.0
+        self._flush_ms_max = 0.0
+        self._counts = {'inserted': 0, 'updated': 0, 'skipped': 0, 'errors': 0, 'failed': 0}
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name='analytics-buffer-flush',
+            daemon=True
+        )
+        self._thread.start()
+
+        atexit.register(self.close)
+
+        self._previous_sigterm = None
+        if handle_signals and threading.current_thread() is threading.main_thread():
+            self._previous_sigterm = signal.signal(signal.SIGTERM, self._on_sigterm)
+
+    def add(self, checkpoint_data: Dict[str, Any]):
+        """Buffer a checkpoint for the next flush
+
+        Args:
+            checkpoint_data: Checkpoint JSON data
+        """
+        if self._closed:
+            raise sqlite3.ProgrammingError("Cannot add to a closed buffered writer.")
+        self._queue.put(checkpoint_data)
+
+    def flush(self):
+        """Block until every checkpoint added before this call is written"""
+        if not self._thread.is_alive():
+            return
+
+        barrier = _Barrier()
+        self._queue.put(barrier)
+        while not barrier.done.wait(0.1):
+            if not self._thread.is_alive():
+                return
+
+    def _run(self):
+        """Flush thread: collect checkpoints until a size, age, flush or stop trigger"""
+        batch: List[Dict[str, Any]] = []
+        deadline = 0.0
+
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is None or item is _STOP or isinstance(item, _Barrier):
+                if batch:
+                    self._write(batch)
+                    batch = []
+                if isinstance(item, _Barrier):
+                    item.done.set()
+                if item is _STOP:
+                    return
+                continue
+
+            if not batch:
+                deadline = time.monotonic() + self.max_delay_ms / 1000
+            batch.append(item)
+            self._batch_size = len(batch)
+
+            if len(batch) >= self.max_records or time.monotonic() >= deadline:
+                self._write(batch)
+                batch = []
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        """Write one batch in a single transaction and record metrics
+
+        Args:
+            batch: Checkpoints to write
+        """
+        start = time.perf_counter()
+
+        try:
+            counts = self.db.insert_sessions_bulk(batch, batch_size=len(batch))
+        except Exception as e:
+            logger.error(f"Buffered flush of {len(batch)} checkpoints failed: {e}")
+            counts = {'failed': len(batch)}
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        for key, value in counts.items():
+            self._counts[key] += value
+        self._flushes += 1
+        self._flush_ms_total += elapsed_ms
+        self._flush_ms_last = elapsed_ms
+        self._flush_ms_max = max(self._flush_ms_max, elapsed_ms)
+        self._flushed += len(batch)
+        self._batch_size = 0
+
+        logger.debug(f"Flushed {len(batch)} checkpoints in {elapsed_ms:.1f} ms")
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of buffer and flush metrics
+
+        Returns:
+            Dictionary with queue_depth (checkpoints not yet written; approximate
+            while flushes are running), records_flushed, flushes, flush latency
+            (last/avg/max ms) and inserted, updated, skipped, errors and failed
+            (lost to a database error) record counts
+        """
+        flushes = self._flushes
+        return {
+            'queue_depth': self._queue.qsize() + self._batch_size,
+            'records_flushed': self._flushed,
+            'flushes': flushes,
+            'last_flush_ms': self._flush_ms_last,
+            'avg_flush_ms': self._flush_ms_total / flushes if flushes else 0.0,
+            'max_flush_ms': self._flush_ms_max,
+            **self._counts,
+        }
+
+    def _on_sigterm(self, signum, frame):
+        """Flush, then hand SIGTERM to the handler that was installed before"""
+        previous = self._previous_sigterm
+        self.close()
+
+        if callable(previous):
+            previous(signum, frame)
+        elif previous == signal.SIG_DFL:
+            os.kill(os.getpid(), signum)
+
+    def close(self):
+        """Flush everything buffered and stop the flush thread
+
+        Safe to call more than once; also runs at interpreter exit.
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        self._queue.put(_STOP)
+        self._thread.join()
+        atexit.unregister(self.close)
+
+        if self._previous_sigterm is not None:
+            # Leave handlers installed after ours alone
+            if signal.getsignal(signal.SIGTERM) == self._on_sigterm:
+                signal.signal(signal.SIGTERM, self._previous_sigterm)
+            self._previous_sigterm = None
+
+        logger.info(
+            f"Buffered writer closed: {self._flushed} checkpoints in {self._flushes} flushes"
+        )
+
+    def __enter__(self):
+        """Context manager entry"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit"""
+        self.close()
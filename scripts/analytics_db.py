@@ -14,14 +14,47 @@ Usage:
 
     db = AnalyticsDB()
     db.insert_session(checkpoint_data)
+    db.insert_sessions_bulk(many_checkpoints)   # Rewritten checkpoints replace their session
     stats = db.get_aggregate_stats()
+    hits = db.search_decisions('"connection pool" OR sqlite*', project='my-project')
+    p90 = db.get_distribution('duration', days=30)['percentiles']['p90']
+    weekly = db.get_timeseries('decisions', bucket='week', days=365)
+    snapshot = db.get_dashboard_snapshot(days=30)  # Summary, projects, recent: one transaction
+    db.cache_info()                 # Query results are cached until the data changes
+    db = AnalyticsDB(trace=True)    # Then db.query_profile(): per-statement latency and plans
+    db.apply_retention(days=365)    # Prune old raw rows, keep lifetime stats
+    db.merge_from('laptop.db')      # Copy in another machine's new sessions
+
+    # Reporting: no schema work, fails fast if the database is missing
+    db = AnalyticsDB(profile='read', read_only=True)
+
+    # Shared by worker threads: reads use per-thread connections,
+    # writes are serialized through one writer thread
+    db = ThreadSafeAnalyticsDB()
+
+    # AnalyticsDB implements AnalyticsBackend; analytics_backends.py has
+    # in-memory and append-only log implementations of the same interface
+
+    python analytics_db.py --db-path team.db merge alice.db bob.db
 """
 
+import re
+import copy
+import hashlib
+import inspect
+import itertools
 import sqlite3
 import json
-from datetime import datetime, timedelta
+import queue
+import threading
+import functools
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Any, Tuple
 import logging
 
 # Configure logging
@@ -31,567 +64,4492 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+_EPOCH = datetime(1970, 1, 1)
 
-class AnalyticsDB:
-    """SQLite database layer for session analytics"""
 
-    # Time saved estimates (in minutes)
-    TIME_SAVED_PER_SESSION = 15  # Average time saved per successful session
-    TIME_SAVED_PER_DECISION = 5   # Time saved by logging each decision
-    TIME_SAVED_PER_FILE = 2       # Time saved by tracking file changes
+def to_epoch_ms(value: Any) -> Optional[int]:
+    """Convert a timestamp to integer epoch milliseconds
 
-    def __init__(self, db_path: Optional[str] = None):
-        """Initialize database connection
+    Naive datetimes (what checkpoints record) are stored as wall-clock time,
+    i.e. as if they were UTC, so integer day buckets line up with the
+    calendar days the user saw. Aware datetimes are converted to UTC first.
 
-        Args:
-            db_path: Path to SQLite database file. If None, uses default location
-        """
-        if db_path is None:
-            # Default to .analytics/stats.db relative to script location
-            script_dir = Path(__file__).parent.parent
-            analytics_dir = script_dir / '.analytics'
-            analytics_dir.mkdir(exist_ok=True)
-            db_path = str(analytics_dir / 'stats.db')
+    Args:
+        value: datetime, ISO 8601 string, epoch milliseconds or None
 
-        self.db_path = db_path
-        self.conn = None
-        self._connect()
-        self.initialize_schema()
+    Returns:
+        Milliseconds since 1970-01-01, or None
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
 
-    def _connect(self):
-        """Establish database connection"""
-        try:
-            self.conn = sqlite3.connect(self.db_path)
-            self.conn.row_factory = sqlite3.Row  # Enable column access by name
-            logger.info(f"Connected to database: {self.db_path}")
-        except sqlite3.Error as e:
-            logger.error(f"Database connection failed: {e}")
-            raise
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000 + delta.microseconds // 1000
 
-    def initialize_schema(self):
-        """Create database tables and indexes"""
-        cursor = self.conn.cursor()
 
-        try:
-            # Sessions table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS sessions (
-                    session_id TEXT PRIMARY KEY,
-                    timestamp DATETIME NOT NULL,
-                    started_at DATETIME,
-                    duration_seconds INTEGER,
-                    checkpoint_success BOOLEAN DEFAULT 1,
-                    files_changed INTEGER DEFAULT 0,
-                    decisions_logged INTEGER DEFAULT 0,
-                    resume_points_generated INTEGER DEFAULT 0,
-                    problems_encountered INTEGER DEFAULT 0,
-                    tokens_estimated INTEGER,
-                    project_name TEXT,
-                    git_commit_hash TEXT,
-                    git_branch TEXT,
-                    tool_triggered TEXT
-                )
-            """)
+def from_epoch_ms(value: Optional[float]) -> Optional[datetime]:
+    """Convert epoch milliseconds back to a (naive, wall-clock) datetime
 
-            # File changes table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS file_changes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_id TEXT NOT NULL,
-                    file_path TEXT NOT NULL,
-                    change_type TEXT,
-                    FOREIGN KEY (session_id) REFERENCES sessions(session_id)
-                )
-            """)
+    Args:
+        value: Milliseconds since 1970-01-01, or None
 
-            # Decisions table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS decisions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_id TEXT NOT NULL,
-                    decision_text TEXT NOT NULL,
-                    timestamp DATETIME,
-                    FOREIGN KEY (session_id) REFERENCES sessions(session_id)
-                )
-            """)
+    Returns:
+        datetime, or None
+    """
+    if value is None:
+        return None
+    return _EPOCH + timedelta(milliseconds=int(value))
 
-            # Aggregate stats table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS aggregate_stats (
-                    stat_key TEXT PRIMARY KEY,
-                    stat_value REAL NOT NULL,
-                    last_updated DATETIME NOT NULL
-                )
-            """)
 
-            # Create indexes for better query performance
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_sessions_timestamp
-                ON sessions(timestamp)
-            """)
+def _iso_from_ms(value: Optional[float]) -> Optional[str]:
+    """Format epoch milliseconds as an ISO 8601 string for API results"""
+    if value is None:
+        return None
+    return from_epoch_ms(value).isoformat()
 
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_sessions_project
-                ON sessions(project_name)
-            """)
 
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_file_changes_session
-                ON file_changes(session_id)
-            """)
+def _fts_literal_query(text: str) -> str:
+    """Turn free text into an FTS5 query matching all of its words
 
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_decisions_session
-                ON decisions(session_id)
-            """)
+    Used when text is not valid FTS5 query syntax (e.g. "why did we pick X?").
+    Words are quoted so punctuation and keywords lose their meaning; a
+    trailing * is kept as a prefix match.
 
-            self.conn.commit()
-            logger.info("Database schema initialized successfully")
+    Args:
+        text: User search text
 
-        except sqlite3.Error as e:
-            logger.error(f"Schema initialization failed: {e}")
-            self.conn.rollback()
-            raise
+    Returns:
+        FTS5 query string (empty if text has no words)
+    """
+    return ' '.join(
+        f'"{word}"*' if star else f'"{word}"'
+        for word, star in re.findall(r'(\w+)(\*?)', text)
+    )
 
-    def insert_session(self, checkpoint_data: Dict[str, Any]) -> bool:
-        """Insert a session record from checkpoint data
+
+class _LRUCache:
+    """Bounded mapping that evicts the least recently used entry"""
+
+    def __init__(self, maxsize: int):
+        """Create an empty cache
 
         Args:
-            checkpoint_data: Checkpoint JSON data
+            maxsize: Maximum number of entries (0 disables caching)
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: 'OrderedDict[Any, Any]' = OrderedDict()
+
+    def get(self, key: Any) -> Any:
+        """Look up a key, marking it as recently used
+
+        Args:
+            key: Key to look up
 
         Returns:
-            True if successful, False otherwise
+            Cached value, or None
         """
-        cursor = self.conn.cursor()
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
 
-        try:
-            session_id = checkpoint_data.get('session_id')
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
 
-            # Check for duplicate
-            cursor.execute(
-                "SELECT session_id FROM sessions WHERE session_id = ?",
-                (session_id,)
-            )
-            if cursor.fetchone():
-                logger.warning(f"Session {session_id} already exists, skipping")
-                return False
+    def put(self, key: Any, value: Any):
+        """Store a value, evicting the oldest entry when full
 
-            # Parse timestamps
-            timestamp = datetime.fromisoformat(
-                checkpoint_data.get('timestamp', datetime.now().isoformat())
-            )
+        Args:
+            key: Key to store
+            value: Value to store
+        """
+        if self.maxsize <= 0:
+            return
 
-            started_at = None
-            if checkpoint_data.get('started_at'):
-                started_at = datetime.fromisoformat(checkpoint_data['started_at'])
-
-            # Calculate duration
-            duration_seconds = None
-            if started_at and timestamp:
-                duration_seconds = int((timestamp - started_at).total_seconds())
-
-            # Extract metadata
-            file_changes = checkpoint_data.get('file_changes', [])
-            decisions = checkpoint_data.get('decisions', [])
-            resume_points = checkpoint_data.get('resume_points', [])
-            problems = checkpoint_data.get('problems_encountered', [])
-
-            # Get project info
-            project_info = checkpoint_data.get('project', {})
-            project_name = project_info.get('name', 'Unknown')
-
-            # Get git info
-            git_commit_hash = checkpoint_data.get('git_commit_hash')
-            git_branch = checkpoint_data.get('git_branch')
-
-            # Get tool info
-            context = checkpoint_data.get('context', {})
-            tool_triggered = context.get('tool', 'manual')
-
-            # Estimate tokens saved (rough calculation)
-            tokens_estimated = self._estimate_tokens_saved(
-                len(file_changes),
-                len(decisions),
-                len(resume_points)
-            )
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
 
-            # Insert session
-            cursor.execute("""
-                INSERT INTO sessions (
-                    session_id, timestamp, started_at, duration_seconds,
-                    checkpoint_success, files_changed, decisions_logged,
-                    resume_points_generated, problems_encountered,
-                    tokens_estimated, project_name, git_commit_hash,
-                    git_branch, tool_triggered
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                session_id,
-                timestamp,
-                started_at,
-                duration_seconds,
-                True,  # If we got the checkpoint, it succeeded
-                len(file_changes),
-                len(decisions),
-                len(resume_points),
-                len(problems),
-                tokens_estimated,
-                project_name,
-                git_commit_hash,
-                git_branch,
-                tool_triggered
-            ))
+    def clear(self):
+        """Drop every entry"""
+        self._data.clear()
 
-            # Insert file changes
-            for change in file_changes:
-                if isinstance(change, dict):
-                    file_path = change.get('path', '')
-                    change_type = change.get('type', 'modified')
-                else:
-                    # Handle simple string format
-                    file_path = str(change)
-                    change_type = 'modified'
+    def __len__(self) -> int:
+        return len(self._data)
 
-                cursor.execute("""
-                    INSERT INTO file_changes (session_id, file_path, change_type)
-                    VALUES (?, ?, ?)
-                """, (session_id, file_path, change_type))
-
-            # Insert decisions
-            for decision in decisions:
-                if isinstance(decision, dict):
-                    decision_text = decision.get('text', str(decision))
-                    decision_timestamp = decision.get('timestamp')
-                    if decision_timestamp:
-                        decision_timestamp = datetime.fromisoformat(decision_timestamp)
-                else:
-                    decision_text = str(decision)
-                    decision_timestamp = timestamp
 
-                cursor.execute("""
-                    INSERT INTO decisions (session_id, decision_text, timestamp)
-                    VALUES (?, ?, ?)
-                """, (session_id, decision_text, decision_timestamp))
+class _ResultCache(_LRUCache):
+    """Thread-safe LRU cache of query results, each valid for one data version"""
 
-            self.conn.commit()
-            logger.info(f"Session {session_id} inserted successfully")
-            return True
+    def __init__(self, maxsize: int):
+        """Create an empty cache
 
-        except Exception as e:
-            logger.error(f"Failed to insert session: {e}")
-            self.conn.rollback()
-            return False
+        Args:
+            maxsize: Maximum number of results (0 disables caching)
+        """
+        super().__init__(maxsize)
+        self.lock = threading.Lock()
 
-    def _estimate_tokens_saved(self, files: int, decisions: int, resume_points: int) -> int:
-        """Estimate tokens saved by session tracking
+    def lookup(self, key: Any, version: Any) -> Tuple[bool, Any]:
+        """Look up a result computed at the given data version
+
+        An entry from an older version is dropped and counts as a miss.
 
         Args:
-            files: Number of files changed
-            decisions: Number of decisions logged
-            resume_points: Number of resume points generated
+            key: Method and arguments
+            version: Current data version
 
         Returns:
-            Estimated tokens saved
+            (True, result) on a hit, (False, None) otherwise
         """
-        # Rough estimates based on typical context usage
-        tokens_per_file = 200       # Average tokens to describe a file change
-        tokens_per_decision = 150   # Average tokens for a decision context
-        tokens_per_resume = 100     # Average tokens for a resume point
-
-        total = (
-            files * tokens_per_file +
-            decisions * tokens_per_decision +
-            resume_points * tokens_per_resume
-        )
+        with self.lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] == version:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
 
-        return total
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return False, None
 
-    def get_session_stats(self, days: int = 30) -> Dict[str, Any]:
-        """Get session statistics for the last N days
+    def store(self, key: Any, version: Any, value: Any):
+        """Store a result computed at the given data version
 
         Args:
-            days: Number of days to include
-
-        Returns:
-            Dictionary of statistics
+            key: Method and arguments
+            version: Data version the result was read at
+            value: Result to store
         """
-        cursor = self.conn.cursor()
-        cutoff_date = datetime.now() - timedelta(days=days)
+        with self.lock:
+            self.put(key, (version, value))
 
-        try:
-            # Get session counts
-            cursor.execute("""
-                SELECT
-                    COUNT(*) as total_sessions,
-                    SUM(CASE WHEN checkpoint_success = 1 THEN 1 ELSE 0 END) as successful_sessions,
-                    SUM(files_changed) as total_files_changed,
-                    SUM(decisions_logged) as total_decisions,
-                    SUM(resume_points_generated) as total_resume_points,
-                    SUM(problems_encountered) as total_problems,
-                    AVG(duration_seconds) as avg_duration_seconds,
-                    SUM(tokens_estimated) as total_tokens_saved
-                FROM sessions
-                WHERE timestamp >= ?
-            """, (cutoff_date,))
+    def clear(self):
+        """Drop every result and reset the counters"""
+        with self.lock:
+            super().clear()
+            self.hits = 0
+            self.misses = 0
 
-            row = cursor.fetchone()
 
-            stats = {
-                'period_days': days,
-                'total_sessions': row['total_sessions'] or 0,
-                'successful_sessions': row['successful_sessions'] or 0,
-                'total_files_changed': row['total_files_changed'] or 0,
-                'total_decisions': row['total_decisions'] or 0,
-                'total_resume_points': row['total_resume_points'] or 0,
-                'total_problems': row['total_problems'] or 0,
-                'avg_duration_seconds': row['avg_duration_seconds'] or 0,
-                'total_tokens_saved': row['total_tokens_saved'] or 0
-            }
+def _cached_query(method: Callable) -> Callable:
+    """Memoize a query method in the instance's result cache
 
-            # Calculate success rate
-            if stats['total_sessions'] > 0:
-                stats['success_rate'] = (
-                    stats['successful_sessions'] / stats['total_sessions']
-                ) * 100
-            else:
-                stats['success_rate'] = 0.0
+    Results are keyed by method, reader connection and arguments (defaults
+    filled in), and are reused only while _data_version() of the reader is
+    unchanged. Methods with a days argument read a window that ends now, so
+    their key also holds the current WINDOW_CACHE_SECONDS tick of the clock
+    and their results expire as the window moves. Callers get a copy, so
+    mutating a result is safe. Empty results, which is also what a failed
+    query returns, are not cached.
 
-            # Calculate time saved
-            stats['time_saved_minutes'] = self._calculate_time_saved_from_stats(stats)
-            stats['time_saved_hours'] = stats['time_saved_minutes'] / 60
+    Args:
+        method: AnalyticsDB query method
 
-            return stats
+    Returns:
+        Wrapped method
+    """
+    signature = inspect.signature(method)
+    windowed = 'days' in signature.parameters
 
-        except sqlite3.Error as e:
-            logger.error(f"Failed to get session stats: {e}")
-            return {}
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = self._result_cache
+        if cache.maxsize <= 0 or (windowed and self.WINDOW_CACHE_SECONDS <= 0):
+            return method(self, *args, **kwargs)
 
-    def get_aggregate_stats(self) -> Dict[str, Any]:
-        """Get lifetime aggregate statistics
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        conn = self._reader()
+        # The key holds the connection itself: while an entry exists, no
+        # later connection can take over its identity
+        key = (method.__name__, conn, tuple(bound.arguments.items())[1:])
+        if windowed:
+            # Same clock as _window_params
+            key += (to_epoch_ms(datetime.now()) // (self.WINDOW_CACHE_SECONDS * 1000),)
+        try:
+            hash(key)
+        except TypeError:
+            return method(self, *args, **kwargs)
 
-        Returns:
-            Dictionary of aggregate metrics
-        """
-        cursor = self.conn.cursor()
+        version = self._data_version(conn)
+        hit, value = cache.lookup(key, version)
+        if hit:
+            return copy.deepcopy(value)
 
-        try:
-            # Get all-time stats
-            cursor.execute("""
-                SELECT
-                    COUNT(*) as total_sessions,
-                    SUM(CASE WHEN checkpoint_success = 1 THEN 1 ELSE 0 END) as successful_sessions,
-                    SUM(files_changed) as total_files_changed,
-                    SUM(decisions_logged) as total_decisions,
-                    SUM(resume_points_generated) as total_resume_points,
-                    MIN(timestamp) as first_session,
-                    MAX(timestamp) as last_session,
-                    COUNT(DISTINCT project_name) as total_projects
-                FROM sessions
-            """)
+        value = method(self, *args, **kwargs)
+        if value:
+            cache.store(key, version, copy.deepcopy(value))
+        return value
 
-            row = cursor.fetchone()
+    return wrapper
 
-            stats = {
-                'total_sessions': row['total_sessions'] or 0,
-                'successful_sessions': row['successful_sessions'] or 0,
-                'total_files_changed': row['total_files_changed'] or 0,
-                'total_decisions': row['total_decisions'] or 0,
-                'total_resume_points': row['total_resume_points'] or 0,
-                'first_session': row['first_session'],
-                'last_session': row['last_session'],
-                'total_projects': row['total_projects'] or 0
-            }
 
-            # Calculate success rate
-            if stats['total_sessions'] > 0:
-                stats['success_rate'] = (
-                    stats['successful_sessions'] / stats['total_sessions']
-                ) * 100
-            else:
-                stats['success_rate'] = 0.0
+class _QueryProfiler:
+    """Per-statement execution statistics collected on profiled connections
 
-            # Calculate time saved
-            stats['time_saved_hours'] = self.calculate_time_saved()
+    Statements are keyed by their SQL text with whitespace collapsed, so a
+    parameterized query is one entry however often it runs. Latency covers
+    execute() and every fetch from the cursor afterwards; percentiles are
+    taken over the most recent SAMPLE_SIZE executions of each statement.
+    """
 
-            return stats
+    # Executions per statement kept for the latency percentiles
+    SAMPLE_SIZE = 1000
 
-        except sqlite3.Error as e:
-            logger.error(f"Failed to get aggregate stats: {e}")
-            return {}
+    def __init__(self):
+        """Create an empty profile"""
+        self.lock = threading.Lock()
+        self._statements: Dict[str, Dict[str, Any]] = {}
+        self._keys: Dict[str, str] = {}
 
-    def _calculate_time_saved_from_stats(self, stats: Dict[str, Any]) -> float:
-        """Calculate time saved in minutes from statistics
+    def attach(self, conn: sqlite3.Connection):
+        """Start recording the statements run on a connection
+
+        The trace callback fires for every statement SQLite runs, including
+        the implicit BEGIN and each trigger body, and is charged to the call
+        that is executing at the time.
 
         Args:
-            stats: Statistics dictionary
+            conn: Connection created with factory=_ProfiledConnection
+        """
+        conn.profiler = self
+        conn.active = None
+
+        def trace(_sql: str):
+            entry = conn.active
+            if entry is not None:
+                with self.lock:
+                    entry['sqlite_statements'] += 1
+
+        conn.set_trace_callback(trace)
+
+    def begin(self, conn: sqlite3.Connection, sql: str, parameters: Any) -> list:
+        """Open one execution of a statement
+
+        Args:
+            conn: Connection the statement runs on
+            sql: Statement text
+            parameters: Bound parameters (kept from the first execution for
+                EXPLAIN QUERY PLAN)
 
         Returns:
-            Time saved in minutes
+            Sample to pass to add() for the execute and each fetch
         """
-        time_saved = (
-            stats['successful_sessions'] * self.TIME_SAVED_PER_SESSION +
-            stats['total_decisions'] * self.TIME_SAVED_PER_DECISION +
-            stats['total_files_changed'] * self.TIME_SAVED_PER_FILE
-        )
-        return time_saved
+        key = self._keys.get(sql)
+        if key is None:
+            key = ' '.join(sql.split())
+            self._keys[sql] = key
 
-    def calculate_time_saved(self) -> float:
-        """Calculate total time saved in hours
+        with self.lock:
+            entry = self._statements.get(key)
+            if entry is None:
+                entry = self._statements[key] = {
+                    'sql': key,
+                    'parameters': parameters,
+                    'calls': 0,
+                    'seconds': 0.0,
+                    'max_seconds': 0.0,
+                    'rows': 0,
+                    'sqlite_statements': 0,
+                    'samples': deque(maxlen=self.SAMPLE_SIZE),
+                }
+            entry['calls'] += 1
+            sample = [0.0, entry]
+            entry['samples'].append(sample)
 
-        Returns:
-            Total hours saved across all sessions
+        conn.active = entry
+        return sample
+
+    def add(self, conn: sqlite3.Connection, sample: list, seconds: float, rows: int = 0):
+        """Charge time and returned rows to an execution
+
+        Args:
+            conn: Connection the statement runs on
+            sample: Sample returned by begin()
+            seconds: Time spent in the call
+            rows: Rows the call returned
         """
-        cursor = self.conn.cursor()
+        conn.active = None
+        entry = sample[1]
+        with self.lock:
+            sample[0] += seconds
+            entry['seconds'] += seconds
+            entry['rows'] += rows
+            if sample[0] > entry['max_seconds']:
+                entry['max_seconds'] = sample[0]
 
-        try:
-            cursor.execute("""
-                SELECT
-                    COUNT(*) as total_sessions,
-                    SUM(decisions_logged) as total_decisions,
-                    SUM(files_changed) as total_files
-                FROM sessions
-                WHERE checkpoint_success = 1
-            """)
+    def clear(self):
+        """Drop every recorded statement"""
+        with self.lock:
+            self._statements.clear()
 
-            row = cursor.fetchone()
+    def report(self) -> List[Dict[str, Any]]:
+        """Summarize the recorded statements
 
-            total_sessions = row['total_sessions'] or 0
-            total_decisions = row['total_decisions'] or 0
-            total_files = row['total_files'] or 0
+        Returns:
+            One row per statement, most total time first, with calls,
+            total/mean/max and p50/p95/p99 latency in milliseconds, rows
+            returned and the statements SQLite ran for them (trigger bodies
+            included); 'parameters' holds the first execution's parameters
+        """
+        with self.lock:
+            entries = [
+                (dict(entry), sorted(sample[0] for sample in entry['samples']))
+                for entry in self._statements.values()
+            ]
 
-            # Calculate time saved in minutes
-            time_saved_minutes = (
-                total_sessions * self.TIME_SAVED_PER_SESSION +
-                total_decisions * self.TIME_SAVED_PER_DECISION +
-                total_files * self.TIME_SAVED_PER_FILE
-            )
+        rows = []
+        for entry, latencies in entries:
+            def percentile(p: int) -> float:
+                # Nearest rank
+                if not latencies:
+                    return 0.0
+                return latencies[max(0, -(-p * len(latencies) // 100) - 1)] * 1000
 
-            # Convert to hours
-            time_saved_hours = time_saved_minutes / 60
+            rows.append({
+                'sql': entry['sql'],
+                'calls': entry['calls'],
+                'total_ms': entry['seconds'] * 1000,
+                'mean_ms': entry['seconds'] * 1000 / entry['calls'],
+                'p50_ms': percentile(50),
+                'p95_ms': percentile(95),
+                'p99_ms': percentile(99),
+                'max_ms': entry['max_seconds'] * 1000,
+                'rows': entry['rows'],
+                'sqlite_statements': entry['sqlite_statements'],
+                'parameters': entry['parameters'],
+            })
 
-            return time_saved_hours
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return rows
 
-        except sqlite3.Error as e:
-            logger.error(f"Failed to calculate time saved: {e}")
-            return 0.0
 
-    def get_success_rate(self, days: Optional[int] = None) -> float:
-        """Calculate checkpoint success percentage
+class _ProfiledCursor(sqlite3.Cursor):
+    """Cursor that records its executions and fetches in the connection's profiler"""
 
-        Args:
-            days: Number of days to include (None for all-time)
+    _sample = None
 
-        Returns:
-            Success rate as percentage (0-100)
-        """
-        cursor = self.conn.cursor()
+    def _timed(self, func, *args) -> Any:
+        """Run a fetch, charging its time and rows to the current execution"""
+        if self._sample is None:
+            return func(*args)
 
+        start = time.perf_counter()
         try:
-            if days:
-                cutoff_date = datetime.now() - timedelta(days=days)
-                cursor.execute("""
-                    SELECT
-                        COUNT(*) as total,
-                        SUM(CASE WHEN checkpoint_success = 1 THEN 1 ELSE 0 END) as successful
-                    FROM sessions
-                    WHERE timestamp >= ?
-                """, (cutoff_date,))
-            else:
-                cursor.execute("""
-                    SELECT
-                        COUNT(*) as total,
-                        SUM(CASE WHEN checkpoint_success = 1 THEN 1 ELSE 0 END) as successful
-                    FROM sessions
-                """)
+            result = func(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+        rows = len(result) if isinstance(result, list) else int(result is not None)
+        self.connection.profiler.add(self.connection, self._sample, elapsed, rows)
+        return result
 
-            row = cursor.fetchone()
-            total = row['total'] or 0
-            successful = row['successful'] or 0
+    def _run(self, func, sql: str, parameters: Any, argument: Any) -> '_ProfiledCursor':
+        """Run execute/executemany/executescript as a new recorded execution"""
+        profiler = self.connection.profiler
+        if profiler is None:
+            return func(sql, argument) if argument is not None else func(sql)
 
-            if total == 0:
-                return 0.0
+        self._sample = profiler.begin(self.connection, sql, parameters)
+        start = time.perf_counter()
+        try:
+            return func(sql, argument) if argument is not None else func(sql)
+        finally:
+            profiler.add(self.connection, self._sample, time.perf_counter() - start)
 
-            return (successful / total) * 100
+    def execute(self, sql: str, parameters: Any = ()) -> '_ProfiledCursor':
+        return self._run(super().execute, sql, parameters, parameters)
 
-        except sqlite3.Error as e:
-            logger.error(f"Failed to get success rate: {e}")
-            return 0.0
+    def executemany(self, sql: str, seq_of_parameters: Iterable[Any]) -> '_ProfiledCursor':
+        # Keep the first parameter set for EXPLAIN QUERY PLAN without
+        # consuming a generator
+        rows = iter(seq_of_parameters)
+        first = next(rows, None)
+        if first is not None:
+            rows = itertools.chain([first], rows)
+        return self._run(super().executemany, sql, first, rows)
 
-    def get_project_breakdown(self) -> List[Dict[str, Any]]:
-        """Get statistics broken down by project
+    def executescript(self, sql_script: str) -> '_ProfiledCursor':
+        return self._run(super().executescript, sql_script, None, None)
 
-        Returns:
-            List of project statistics
-        """
-        cursor = self.conn.cursor()
+    def fetchone(self) -> Any:
+        return self._timed(super().fetchone)
+
+    def fetchmany(self, size: Optional[int] = None) -> list:
+        return self._timed(super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchall(self) -> list:
+        return self._timed(super().fetchall)
+
+    def __next__(self) -> Any:
+        return self._timed(super().__next__)
+
+
+class _ProfiledConnection(sqlite3.Connection):
+    """Connection whose cursors, commits and rollbacks are recorded by a _QueryProfiler"""
+
+    profiler: Optional[_QueryProfiler] = None
+
+    def cursor(self, factory: Callable = _ProfiledCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Iterable[Any]) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script: str) -> sqlite3.Cursor:
+        return self.cursor().executescript(sql_script)
+
+    def _timed(self, statement: str, func: Callable):
+        """Record a transaction control call as the statement it runs"""
+        if self.profiler is None:
+            return func()
+
+        sample = self.profiler.begin(self, statement, None)
+        start = time.perf_counter()
+        try:
+            return func()
+        finally:
+            self.profiler.add(self, sample, time.perf_counter() - start)
+
+    def commit(self):
+        return self._timed('COMMIT', super().commit)
+
+    def rollback(self):
+        return self._timed('ROLLBACK', super().rollback)
+
+
+class AnalyticsBackend(ABC):
+    """Storage-independent interface of the analytics database
+
+    Declares the ingest and reporting methods the status dashboard, badges
+    and exports use, and holds what every backend shares: converting
+    checkpoints to session rows and the time saved estimates. AnalyticsDB
+    is the SQLite backend; analytics_backends.py adds an in-memory and an
+    append-only log backend. Distributions, time series, decision search
+    and retention are SQLite only.
+    """
+
+    # Time saved estimates (in minutes)
+    TIME_SAVED_PER_SESSION = 15  # Average time saved per successful session
+    TIME_SAVED_PER_DECISION = 5   # Time saved by logging each decision
+    TIME_SAVED_PER_FILE = 2       # Time saved by tracking file changes
+
+    # Timestamps are stored as integer epoch milliseconds; day buckets are
+    # timestamp_ms // MS_PER_DAY (days since 1970-01-01)
+    MS_PER_DAY = 86400000
+
+    # Lifetime running totals every backend keeps up to date on insert
+    # (AnalyticsDB: aggregate_stats rows maintained by triggers on sessions)
+    AGGREGATE_COUNTER_KEYS = (
+        'total_sessions',
+        'successful_sessions',
+        'total_files_changed',
+        'total_decisions',
+        'total_resume_points',
+        'successful_files_changed',
+        'successful_decisions',
+        'total_projects',
+    )
+
+    # Names of the session row fields built by _prepare_session
+    SESSION_FIELDS = (
+        'session_id', 'timestamp_ms', 'started_at_ms', 'duration_seconds',
+        'checkpoint_success', 'files_changed', 'decisions_logged',
+        'resume_points_generated', 'problems_encountered',
+        'tokens_estimated', 'project_name', 'git_commit_hash',
+        'git_branch', 'tool_triggered', 'content_hash'
+    )
+
+    @abstractmethod
+    def insert_session(self, checkpoint_data: Dict[str, Any]) -> bool:
+        """Insert a session record from checkpoint data
+
+        A checkpoint whose session_id is already stored replaces the stored
+        session if its content changed (see _content_hash) and is skipped
+        otherwise.
+
+        Args:
+            checkpoint_data: Checkpoint JSON data
+
+        Returns:
+            True if inserted or updated, False if it was unchanged or failed
+        """
+
+    @abstractmethod
+    def insert_sessions_bulk(
+        self,
+        checkpoints: Iterable[Dict[str, Any]],
+        batch_size: int = 1000
+    ) -> Dict[str, int]:
+        """Insert many sessions, persisting once per batch
+
+        Args:
+            checkpoints: Iterable of checkpoint JSON data
+            batch_size: Number of checkpoints per batch
+
+        Returns:
+            Dictionary with inserted, updated, skipped and errors counts
+        """
+
+    @abstractmethod
+    def insert_sessions(self, checkpoints: Iterable[Dict[str, Any]]) -> List[bool]:
+        """Insert several sessions as one group
+
+        Args:
+            checkpoints: Iterable of checkpoint JSON data
+
+        Returns:
+            One flag per checkpoint: True if inserted or updated
+        """
+
+    @abstractmethod
+    def get_session_stats(self, days: int = 30) -> Dict[str, Any]:
+        """Get session statistics for the last N days
+
+        Args:
+            days: Number of days to include
+
+        Returns:
+            Dictionary of statistics
+        """
+
+    @abstractmethod
+    def get_aggregate_stats(self) -> Dict[str, Any]:
+        """Get lifetime aggregate statistics
+
+        Returns:
+            Dictionary of aggregate metrics
+        """
+
+    @abstractmethod
+    def get_project_breakdown(self) -> List[Dict[str, Any]]:
+        """Get statistics broken down by project, most sessions first
+
+        Returns:
+            List of project statistics
+        """
+
+    @abstractmethod
+    def get_hot_files(
+        self,
+        project: Optional[str] = None,
+        days: Optional[int] = None,
+        top_k: int = 20
+    ) -> List[Dict[str, Any]]:
+        """Get the most frequently changed files
+
+        Args:
+            project: Only files of this project (None for all projects)
+            days: Only changes in the last N days (None for all time)
+            top_k: Maximum number of files to return
+
+        Returns:
+            List of file dictionaries, most changes first
+        """
+
+    @abstractmethod
+    def get_recent_sessions(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """Get the most recent sessions
+
+        Args:
+            limit: Maximum number of sessions to return
+
+        Returns:
+            List of session dictionaries, newest first
+        """
+
+    @abstractmethod
+    def close(self):
+        """Release the storage"""
+
+    def calculate_time_saved(self) -> float:
+        """Calculate total time saved in hours
+
+        Returns:
+            Total hours saved across all sessions
+        """
+        return self.get_aggregate_stats().get('time_saved_hours', 0.0)
+
+    def get_success_rate(self, days: Optional[int] = None) -> float:
+        """Calculate checkpoint success percentage
+
+        Args:
+            days: Number of days to include (None for all-time)
+
+        Returns:
+            Success rate as percentage (0-100)
+        """
+        stats = self.get_session_stats(days) if days else self.get_aggregate_stats()
+        return stats.get('success_rate', 0.0)
+
+    def get_dashboard_snapshot(self, days: Optional[int] = None, recent: int = 5) -> Dict[str, Any]:
+        """Get everything the status dashboard and exports show
+
+        Args:
+            days: Summarize the last N days (None for all time)
+            recent: Number of recent sessions to include (0 for none)
+
+        Returns:
+            Dictionary with period_days, summary, projects and recent_sessions
+        """
+        return {
+            'period_days': days,
+            'summary': self.get_session_stats(days) if days else self.get_aggregate_stats(),
+            'projects': self.get_project_breakdown(),
+            'recent_sessions': self.get_recent_sessions(recent) if recent > 0 else []
+        }
+
+    def _prepare_session(self, checkpoint_data: Dict[str, Any]) -> Tuple[tuple, List[tuple], List[tuple]]:
+        """Convert checkpoint data into rows for the sessions and child tables
+
+        Args:
+            checkpoint_data: Checkpoint JSON data
+
+        Returns:
+            Tuple of (session row, file change rows, decision rows)
+        """
+        session_id = checkpoint_data.get('session_id')
+
+        # Parse timestamps (stored as epoch milliseconds)
+        timestamp_ms = to_epoch_ms(checkpoint_data.get('timestamp') or datetime.now())
+        started_at_ms = to_epoch_ms(checkpoint_data.get('started_at') or None)
+
+        # Calculate duration
+        duration_seconds = None
+        if started_at_ms is not None:
+            duration_seconds = int((timestamp_ms - started_at_ms) / 1000)
+
+        # Extract metadata
+        file_changes = checkpoint_data.get('file_changes', [])
+        decisions = checkpoint_data.get('decisions', [])
+        resume_points = checkpoint_data.get('resume_points', [])
+        problems = checkpoint_data.get('problems_encountered', [])
+
+        # Get project info
+        project_info = checkpoint_data.get('project', {})
+        project_name = project_info.get('name', 'Unknown')
+
+        # Get git info
+        git_commit_hash = checkpoint_data.get('git_commit_hash')
+        git_branch = checkpoint_data.get('git_branch')
+
+        # Get tool info
+        context = checkpoint_data.get('context', {})
+        tool_triggered = context.get('tool', 'manual')
+
+        # Estimate tokens saved (rough calculation)
+        tokens_estimated = self._estimate_tokens_saved(
+            len(file_changes),
+            len(decisions),
+            len(resume_points)
+        )
+
+        session_row = (
+            session_id,
+            timestamp_ms,
+            started_at_ms,
+            duration_seconds,
+            True,  # If we got the checkpoint, it succeeded
+            len(file_changes),
+            len(decisions),
+            len(resume_points),
+            len(problems),
+            tokens_estimated,
+            project_name,
+            git_commit_hash,
+            git_branch,
+            tool_triggered,
+            self._content_hash(checkpoint_data)
+        )
+
+        file_rows = []
+        for change in file_changes:
+            if isinstance(change, dict):
+                file_path = change.get('path', '')
+                change_type = change.get('type', 'modified')
+            else:
+                # Handle simple string format
+                file_path = str(change)
+                change_type = 'modified'
+            file_rows.append((session_id, file_path, change_type))
+
+        decision_rows = []
+        for decision in decisions:
+            if isinstance(decision, dict):
+                decision_text = decision.get('text', str(decision))
+                decision_timestamp_ms = to_epoch_ms(decision.get('timestamp') or None)
+            else:
+                decision_text = str(decision)
+                decision_timestamp_ms = timestamp_ms
+            decision_rows.append((session_id, decision_text, decision_timestamp_ms))
+
+        return session_row, file_rows, decision_rows
+
+    @staticmethod
+    def _content_hash(checkpoint_data: Dict[str, Any]) -> str:
+        """Fingerprint a checkpoint's content
+
+        The checkpoint is hashed as canonical JSON (sorted keys, no
+        whitespace), so key order does not matter. A session rewritten under
+        the same session_id gets a new hash; re-reading an unchanged
+        checkpoint gives the stored one.
+
+        Args:
+            checkpoint_data: Checkpoint JSON data
+
+        Returns:
+            32-character hex BLAKE2b digest
+        """
+        canonical = json.dumps(checkpoint_data, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _estimate_tokens_saved(self, files: int, decisions: int, resume_points: int) -> int:
+        """Estimate tokens saved by session tracking
+
+        Args:
+            files: Number of files changed
+            decisions: Number of decisions logged
+            resume_points: Number of resume points generated
+
+        Returns:
+            Estimated tokens saved
+        """
+        # Rough estimates based on typical context usage
+        tokens_per_file = 200       # Average tokens to describe a file change
+        tokens_per_decision = 150   # Average tokens for a decision context
+        tokens_per_resume = 100     # Average tokens for a resume point
+
+        total = (
+            files * tokens_per_file +
+            decisions * tokens_per_decision +
+            resume_points * tokens_per_resume
+        )
+
+        return total
+
+    def _calculate_time_saved_from_stats(self, stats: Dict[str, Any]) -> float:
+        """Calculate time saved in minutes from statistics
+
+        Args:
+            stats: Statistics dictionary
+
+        Returns:
+            Time saved in minutes
+        """
+        time_saved = (
+            stats['successful_sessions'] * self.TIME_SAVED_PER_SESSION +
+            stats['total_decisions'] * self.TIME_SAVED_PER_DECISION +
+            stats['total_files_changed'] * self.TIME_SAVED_PER_FILE
+        )
+        return time_saved
+
+    def _time_saved_hours_from_totals(self, totals: Dict[str, Any]) -> float:
+        """Calculate time saved in hours from aggregate running totals
+
+        Args:
+            totals: Running totals keyed by AGGREGATE_COUNTER_KEYS
+
+        Returns:
+            Total hours saved across successful sessions
+        """
+        time_saved_minutes = (
+            totals['successful_sessions'] * self.TIME_SAVED_PER_SESSION +
+            totals['successful_decisions'] * self.TIME_SAVED_PER_DECISION +
+            totals['successful_files_changed'] * self.TIME_SAVED_PER_FILE
+        )
+        return time_saved_minutes / 60
+
+    def __enter__(self):
+        """Context manager entry"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit"""
+        self.close()
+
+
+class AnalyticsDB(AnalyticsBackend):
+    """SQLite database layer for session analytics"""
+
+    # Dictionary-encoded strings: each dimension table maps a repeated string
+    # (project name, file path, git branch, tool) to a small integer id that
+    # sessions, file_changes and the rollups store instead
+    DIMENSIONS = ('projects', 'file_paths', 'git_branches', 'tools')
+
+    # Sessions without a project roll up under 'Unknown', which always has
+    # this id in the projects table
+    UNKNOWN_PROJECT_ID = 1
+
+    # Entries per dimension kept in the string -> id cache used during ingest
+    INTERN_CACHE_SIZE = 4096
+    # Query results kept by the result cache (0 disables it)
+    RESULT_CACHE_SIZE = 128
+    # Seconds a result of a "last N days" query is reused before its window
+    # is recomputed from the clock (0 disables caching those queries)
+    WINDOW_CACHE_SECONDS = 60
+
+    # Statements query_profile() can ask EXPLAIN QUERY PLAN about
+    _EXPLAINABLE = re.compile(r'\s*(SELECT|WITH|INSERT|REPLACE|UPDATE|DELETE)\b', re.IGNORECASE)
+
+    # Default age (days) after which apply_retention prunes raw child rows
+    RETENTION_DAYS = 365
+
+    # Columns of each table's raw row export (iter_raw_rows), in output
+    # order; child rows carry the time and project of their session
+    RAW_EXPORT_COLUMNS = {
+        'sessions': (
+            'session_id', 'timestamp', 'started_at', 'duration_seconds',
+            'checkpoint_success', 'files_changed', 'decisions_logged',
+            'resume_points_generated', 'problems_encountered', 'tokens_estimated',
+            'project_name', 'git_commit_hash', 'git_branch', 'tool_triggered'
+        ),
+        'file_changes': (
+            'session_id', 'session_timestamp', 'project_name', 'file_path', 'change_type'
+        ),
+        'decisions': (
+            'decision_id', 'session_id', 'session_timestamp', 'project_name',
+            'timestamp', 'decision_text'
+        ),
+    }
+    # Rows fetched per round trip while streaming an export
+    RAW_EXPORT_BATCH_SIZE = 5000
+
+    # Connection profiles: PRAGMAs applied to every new connection.
+    # All profiles use WAL so readers never block the writer (and vice versa).
+    PROFILES = {
+        'default': {
+            'journal_mode': 'WAL',
+            'synchronous': 'FULL',
+            'busy_timeout': 5000,
+            'cache_size': -2000,        # KiB when negative (~2 MB)
+            'mmap_size': 0,
+            'temp_store': 'DEFAULT',
+        },
+        'ingest': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',    # WAL + NORMAL: no fsync per commit
+            'busy_timeout': 10000,
+            'cache_size': -65536,       # ~64 MB
+            'mmap_size': 268435456,     # 256 MB
+            'temp_store': 'MEMORY',
+        },
+        'read': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 5000,
+            'cache_size': -32768,       # ~32 MB
+            'mmap_size': 268435456,     # 256 MB
+            'temp_store': 'MEMORY',
+        },
+    }
+
+    _AGGREGATE_COUNTER_KEYS_SQL = ", ".join(
+        f"'{key}'" for key in AnalyticsBackend.AGGREGATE_COUNTER_KEYS
+    )
+
+    # Rows covering "the last N days": whole days come from the sessions_daily
+    # rollup, raw sessions are read only for the partial day the cutoff falls on
+    _WINDOW_SOURCE_SQL = f"""
+        SELECT
+            project_id, total_sessions, successful_sessions, files_changed,
+            decisions_logged, resume_points_generated, problems_encountered,
+            tokens_estimated, sum_duration, duration_count,
+            first_session_ms, last_session_ms
+        FROM sessions_daily
+        WHERE day > :cutoff_day
+        UNION ALL
+        SELECT
+            IFNULL(project_id, {UNKNOWN_PROJECT_ID}), 1, checkpoint_success = 1,
+            IFNULL(files_changed, 0), IFNULL(decisions_logged, 0),
+            IFNULL(resume_points_generated, 0), IFNULL(problems_encountered, 0),
+            IFNULL(tokens_estimated, 0), IFNULL(duration_seconds, 0),
+            duration_seconds IS NOT NULL, timestamp_ms, timestamp_ms
+        FROM sessions
+        WHERE timestamp_ms >= :cutoff_ms AND timestamp_ms < :next_day_ms
+    """
+
+    # get_timeseries metrics: aggregate over sessions_daily columns and the
+    # value reported for buckets without sessions
+    TIMESERIES_METRICS = {
+        'sessions': ('SUM(total_sessions)', 0),
+        'successful_sessions': ('SUM(successful_sessions)', 0),
+        'files': ('SUM(files_changed)', 0),
+        'decisions': ('SUM(decisions_logged)', 0),
+        'resume_points': ('SUM(resume_points_generated)', 0),
+        'problems': ('SUM(problems_encountered)', 0),
+        'tokens': ('SUM(tokens_estimated)', 0),
+        'avg_duration': ('SUM(sum_duration) * 1.0 / NULLIF(SUM(duration_count), 0)', None),
+        'success_rate': ('SUM(successful_sessions) * 100.0 / NULLIF(SUM(total_sessions), 0)', None),
+    }
+    # Per bucket size: the start of the bucket holding day number {day}, and
+    # the start of the bucket after the one starting on {day}. Day 0
+    # (1970-01-01) was a Thursday; weeks start on Monday.
+    _BUCKET_SQL = {
+        'day': ('{day}', '{day} + 1'),
+        'week': ('{day} - ({day} + 3) % 7', '{day} + 7'),
+        'month': (
+            "CAST(strftime('%s', {day} * 86400, 'unixepoch', 'start of month') AS INTEGER) / 86400",
+            "CAST(strftime('%s', {day} * 86400, 'unixepoch', '+1 month') AS INTEGER) / 86400",
+        ),
+    }
+
+    # Lower bounds of the session_histograms_daily bins; the last bin of each
+    # metric is open-ended. Duration bins (seconds) are 1.2-1.5x apart, so an
+    # interpolated percentile is off by at most a fraction of one bin.
+    # Files-per-session bins are exact up to 8.
+    HISTOGRAM_BINS = {
+        'duration': (
+            0, 10, 20, 30, 45, 60, 90, 120, 180, 240, 300, 420, 600, 900,
+            1200, 1500, 1800, 2400, 3000, 3600, 4500, 5400, 7200, 9000,
+            10800, 14400, 18000, 21600, 28800, 36000, 43200, 57600, 86400,
+        ),
+        'files': (
+            0, 1, 2, 3, 4, 5, 6, 7, 8, 10, 12, 15, 20, 25, 30, 40, 50, 75,
+            100, 150, 200, 300, 500, 1000,
+        ),
+    }
+    # Session column each histogram metric bins ({row} is '' or 'NEW.'/'OLD.');
+    # sessions where it is NULL are left out of that metric
+    _HISTOGRAM_VALUE_SQL = {
+        'duration': '{row}duration_seconds',
+        'files': 'IFNULL({row}files_changed, 0)',
+    }
+
+    # Ordered schema migrations (method names). PRAGMA user_version stores
+    # how many have been applied; append new migrations, never reorder.
+    MIGRATIONS = (
+        '_migrate_base_schema',
+        '_migrate_aggregate_triggers',
+        '_migrate_daily_rollup',
+        '_migrate_epoch_timestamps',
+        '_migrate_decisions_fts',
+        '_migrate_file_hot_spots',
+        '_migrate_dictionary_encoding',
+        '_migrate_retention',
+        '_migrate_session_histograms',
+        '_migrate_content_hash',
+    )
+    SCHEMA_VERSION = len(MIGRATIONS)
+
+    # Triggers installed by _install_triggers (dropped and recreated on migration)
+    _TRIGGERS = (
+        'trg_sessions_aggregate_insert',
+        'trg_sessions_aggregate_delete',
+        'trg_sessions_daily_insert',
+        'trg_sessions_daily_delete',
+        'trg_decisions_fts_insert',
+        'trg_decisions_fts_delete',
+        'trg_decisions_fts_update',
+        'trg_file_changes_daily_insert',
+        'trg_file_changes_daily_delete',
+        'trg_session_histograms_insert',
+        'trg_session_histograms_delete',
+    )
+
+    # Current retention horizon (0 until apply_retention first runs)
+    _HORIZON_MS_SQL = "IFNULL((SELECT value FROM settings WHERE key = 'retention_horizon_ms'), 0)"
+
+    _SESSION_COLUMNS = """
+        session_id, timestamp_ms, started_at_ms, duration_seconds,
+        checkpoint_success, files_changed, decisions_logged,
+        resume_points_generated, problems_encountered,
+        tokens_estimated, project_id, git_commit_hash,
+        git_branch_id, tool_id, content_hash
+    """
+    _INSERT_OR_IGNORE_SESSION_SQL = f"""
+        INSERT OR IGNORE INTO sessions ({_SESSION_COLUMNS})
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    # A rewritten session goes back in under its old rowid
+    _REINSERT_SESSION_SQL = f"""
+        INSERT INTO sessions (rowid, {_SESSION_COLUMNS})
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    _INSERT_FILE_CHANGE_SQL = """
+        INSERT INTO file_changes (session_id, file_path_id, change_type)
+        VALUES (?, ?, ?)
+    """
+    # Decisions are inserted with one statement per batch: the FTS5 index
+    # flushes its pending terms at the end of every statement that writes
+    # to it, so row-at-a-time inserts are several times slower
+    _INSERT_DECISIONS_SQL = """
+        INSERT INTO decisions (session_id, decision_text, timestamp_ms)
+        SELECT
+            json_extract(value, '$[0]'),
+            json_extract(value, '$[1]'),
+            json_extract(value, '$[2]')
+        FROM json_each(?)
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        profile: str = 'default',
+        read_only: bool = False,
+        immutable: bool = False,
+        trace: bool = False
+    ):
+        """Initialize database connection
+
+        Args:
+            db_path: Path to SQLite database file. If None, uses default location
+            profile: Connection profile name from PROFILES
+                ('default', 'ingest' or 'read')
+            read_only: Open an existing database for queries only: no
+                directory or file is created, no schema work runs and writes
+                fail. Raises if the database is missing or its schema is not
+                the current version.
+            immutable: Like read_only, for a file nothing writes to while it
+                is open (a backup or snapshot copy): SQLite skips all locking
+                and change detection. Do not use on a live database.
+            trace: Record the calls, latency and rows of every SQL statement
+                for query_profile(). Adds overhead to each statement; meant
+                for finding out where ingest or reporting time goes.
+        """
+        if profile not in self.PROFILES:
+            raise ValueError(
+                f"Unknown profile '{profile}', expected one of {sorted(self.PROFILES)}"
+            )
+
+        read_only = read_only or immutable
+        if read_only and db_path == ':memory:':
+            raise ValueError("read_only requires a database file")
+
+        if db_path is None:
+            # Default to .analytics/stats.db relative to script location
+            script_dir = Path(__file__).parent.parent
+            analytics_dir = script_dir / '.analytics'
+            if not read_only:
+                analytics_dir.mkdir(exist_ok=True)
+            db_path = str(analytics_dir / 'stats.db')
+
+        self.db_path = db_path
+        self.profile = profile
+        self.read_only = read_only
+        self.immutable = immutable
+        self.conn = None
+        self._intern_caches = {
+            table: _LRUCache(self.INTERN_CACHE_SIZE) for table in self.DIMENSIONS
+        }
+        self._result_cache = _ResultCache(self.RESULT_CACHE_SIZE)
+        self._profiler = _QueryProfiler() if trace else None
+        self._open()
+
+    def _open(self):
+        """Connect and bring the schema up to date (or, read-only, check it)"""
+        self._connect()
+
+        if self.read_only:
+            try:
+                self._check_schema()
+            except sqlite3.Error:
+                self.conn.close()
+                raise
+        else:
+            self.initialize_schema()
+
+    def _reader(self) -> sqlite3.Connection:
+        """Connection used by the query methods
+
+        Returns:
+            The connection reads should run on (the main connection here;
+            ThreadSafeAnalyticsDB returns a per-thread read-only connection)
+        """
+        return self.conn
+
+    def _data_version(self, conn: sqlite3.Connection) -> Tuple[int, int]:
+        """Token that changes whenever data a query on conn reads may have changed
+
+        PRAGMA data_version changes when another connection commits;
+        total_changes of the read-write connection covers this instance's
+        own writes, which data_version does not report on that connection.
+
+        Args:
+            conn: Reader connection the query runs on
+
+        Returns:
+            Version tuple to compare cached results against
+        """
+        return conn.execute("PRAGMA data_version").fetchone()[0], self.conn.total_changes
+
+    def cache_info(self) -> Dict[str, int]:
+        """Get result cache statistics
+
+        Returns:
+            Dictionary with hits, misses, size and maxsize
+        """
+        cache = self._result_cache
+        with cache.lock:
+            return {
+                'hits': cache.hits,
+                'misses': cache.misses,
+                'size': len(cache),
+                'maxsize': cache.maxsize
+            }
+
+    def cache_clear(self):
+        """Drop all cached query results and reset the counters"""
+        self._result_cache.clear()
+
+    def query_profile(self, explain: int = 5) -> Dict[str, Any]:
+        """Get per-statement statistics of the SQL run since opening or clearing
+
+        Only available when the database was opened with trace=True. Cached
+        query results (cache_info) run no SQL and so do not show up.
+
+        Args:
+            explain: Attach the EXPLAIN QUERY PLAN of this many statements,
+                those with the most total time that have a plan
+
+        Returns:
+            Dictionary with calls and total_ms over all statements, and
+            statements: one dictionary per statement, most total time first,
+            with sql, calls, total_ms, mean_ms, p50_ms, p95_ms, p99_ms,
+            max_ms, rows (returned) and sqlite_statements (statements SQLite
+            ran for it, trigger bodies included); the explained ones also
+            have plan, a list of indented plan lines
+
+        Raises:
+            ValueError: If the database was not opened with trace=True
+        """
+        if self._profiler is None:
+            raise ValueError("Query profiling is off; open the database with trace=True")
+
+        statements = self._profiler.report()
+        explained = 0
+        for statement in statements:
+            parameters = statement.pop('parameters')
+            if explained < explain and self._EXPLAINABLE.match(statement['sql']):
+                plan = self._explain(statement['sql'], parameters)
+                # A plain INSERT ... VALUES has an empty plan: nothing to show
+                if plan:
+                    statement['plan'] = plan
+                    explained += 1
+
+        return {
+            'calls': sum(statement['calls'] for statement in statements),
+            'total_ms': sum(statement['total_ms'] for statement in statements),
+            'statements': statements
+        }
+
+    def query_profile_clear(self):
+        """Drop the statistics recorded so far (no-op unless tracing)"""
+        if self._profiler is not None:
+            self._profiler.clear()
+
+    def _explain(self, sql: str, parameters: Any) -> List[str]:
+        """Get the query plan of a recorded statement
+
+        Runs on a plain cursor, so the profiler does not record it.
+
+        Args:
+            sql: Statement text
+            parameters: Parameters of one of its executions
+
+        Returns:
+            Plan lines, indented by depth (or one line with the error, for
+            statements on objects that are gone, such as a detached database)
+        """
+        try:
+            rows = sqlite3.Cursor(self._reader()).execute(
+                f"EXPLAIN QUERY PLAN {sql}",
+                () if parameters is None else parameters
+            ).fetchall()
+        except sqlite3.Error as e:
+            return [f"(no plan: {e})"]
+
+        depth = {0: -1}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depth[node_id] = depth.get(parent, -1) + 1
+            lines.append('  ' * depth[node_id] + detail)
+        return lines
+
+    def _write(self, func, *args, **kwargs):
+        """Run one write step against the read-write connection
+
+        Multi-transaction operations (apply_retention, insert_sessions_bulk)
+        run each step through here, so ThreadSafeAnalyticsDB can interleave
+        other queued writes between steps.
+
+        Args:
+            func: Callable using self.conn
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Whatever func returns
+        """
+        return func(*args, **kwargs)
+
+    def _connect(self):
+        """Establish database connection"""
+        try:
+            if self.read_only:
+                # mode=ro never creates the file; query_only rejects any
+                # write up front
+                if not Path(self.db_path).is_file():
+                    raise sqlite3.OperationalError(f"Database not found: {self.db_path}")
+                uri = Path(self.db_path).resolve().as_uri() + '?mode=ro'
+                if self.immutable:
+                    uri += '&immutable=1'
+                self.conn = self._sqlite_connect(uri, uri=True)
+                self._apply_profile(self.conn, read_only=True)
+                self.conn.execute("PRAGMA query_only = 1")
+            else:
+                self.conn = self._sqlite_connect(self.db_path)
+                self._apply_profile(self.conn)
+            self.conn.row_factory = sqlite3.Row  # Enable column access by name
+            mode = ', immutable' if self.immutable else ', read-only' if self.read_only else ''
+            logger.info(f"Connected to database: {self.db_path} (profile: {self.profile}{mode})")
+        except sqlite3.Error as e:
+            logger.error(f"Database connection failed: {e}")
+            raise
+
+    def _sqlite_connect(self, database: str, **kwargs) -> sqlite3.Connection:
+        """Open a SQLite connection, recorded by the query profiler when tracing
+
+        Args:
+            database: Path or URI to open
+            **kwargs: Further sqlite3.connect() arguments
+
+        Returns:
+            New connection
+        """
+        if self._profiler is None:
+            return sqlite3.connect(database, **kwargs)
+
+        conn = sqlite3.connect(database, factory=_ProfiledConnection, **kwargs)
+        self._profiler.attach(conn)
+        return conn
+
+    def _apply_profile(self, conn: sqlite3.Connection, read_only: bool = False):
+        """Apply the connection profile PRAGMAs
+
+        Args:
+            conn: Connection to configure
+            read_only: True for read-only connections, which cannot change
+                the (persistent) journal mode
+        """
+        settings = self.PROFILES[self.profile]
+
+        # Only possible on a new, empty database (before switching to WAL);
+        # existing ones convert with enable_incremental_vacuum()
+        if not read_only and conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+        # journal_mode is persistent and can only change outside a transaction;
+        # in-memory databases stay in 'memory' mode
+        if not read_only:
+            conn.execute(f"PRAGMA journal_mode = {settings['journal_mode']}")
+        conn.execute(f"PRAGMA synchronous = {settings['synchronous']}")
+        conn.execute(f"PRAGMA busy_timeout = {int(settings['busy_timeout'])}")
+        conn.execute(f"PRAGMA cache_size = {int(settings['cache_size'])}")
+        conn.execute(f"PRAGMA mmap_size = {int(settings['mmap_size'])}")
+        conn.execute(f"PRAGMA temp_store = {settings['temp_store']}")
+
+    def initialize_schema(self):
+        """Bring the database schema up to date
+
+        The applied schema version is tracked in PRAGMA user_version. When it
+        is current this only reads the pragma: no DDL runs and no write lock
+        is taken. Otherwise pending MIGRATIONS are applied in order inside a
+        single write transaction, after which triggers are reinstalled from
+        their current definitions and derived tables are rebuilt.
+        """
+        version = self._schema_version()
+
+        if version == self.SCHEMA_VERSION:
+            return
+
+        if version > self.SCHEMA_VERSION:
+            raise sqlite3.DatabaseError(
+                f"Database schema version {version} is newer than supported "
+                f"version {self.SCHEMA_VERSION}"
+            )
+
+        cursor = self.conn.cursor()
+
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+
+            # Another process may have migrated while we waited for the lock
+            version = self._schema_version()
+
+            if version < self.SCHEMA_VERSION:
+                # Old trigger bodies may reference columns a migration removes
+                self._drop_triggers(cursor)
+
+                for migration in self.MIGRATIONS[version:]:
+                    logger.info(f"Applying schema migration {migration}")
+                    getattr(self, migration)(cursor)
+
+                self._install_triggers(cursor)
+                self._rebuild_derived(cursor)
+
+                cursor.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+            self.conn.commit()
+            logger.info(f"Database schema migrated to version {self.SCHEMA_VERSION}")
+
+        except sqlite3.Error as e:
+            logger.error(f"Schema initialization failed: {e}")
+            self._rollback()
+            raise
+
+    def _check_schema(self):
+        """Make sure a database opened read-only has the current schema
+
+        Raises:
+            sqlite3.DatabaseError: The file has no analytics schema, or one
+                that needs a migration (open it read-write once) or is newer
+                than this code
+        """
+        version = self._schema_version()
+
+        if version == 0:
+            raise sqlite3.DatabaseError(f"No analytics schema in {self.db_path}")
+        if version < self.SCHEMA_VERSION:
+            raise sqlite3.DatabaseError(
+                f"Database schema version {version} is older than version "
+                f"{self.SCHEMA_VERSION}; open it read-write once to migrate"
+            )
+        if version > self.SCHEMA_VERSION:
+            raise sqlite3.DatabaseError(
+                f"Database schema version {version} is newer than supported "
+                f"version {self.SCHEMA_VERSION}"
+            )
+
+    def _schema_version(self) -> int:
+        """Read the applied schema version
+
+        Returns:
+            Value of PRAGMA user_version (0 for new or pre-versioning databases)
+        """
+        return self.conn.execute("PRAGMA user_version").fetchone()[0]
+
+    # Migrations only change tables and their data. Triggers and derived
+    # tables (aggregate_stats contents, rollups) are reinstalled from the
+    # current definitions by _install_triggers/_rebuild_derived afterwards,
+    # so a migration never has to know about later trigger versions.
+
+    def _migrate_base_schema(self, cursor: sqlite3.Cursor):
+        """Migration 1: sessions, child tables, aggregate_stats and indexes
+
+        Uses IF NOT EXISTS so databases created before schema versioning
+        are adopted as-is.
+
+        Args:
+            cursor: Cursor inside the migration transaction
+        """
+        # Sessions table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                timestamp DATETIME NOT NULL,
+                started_at DATETIME,
+                duration_seconds INTEGER,
+                checkpoint_success BOOLEAN DEFAULT 1,
+                files_changed INTEGER DEFAULT 0,
+                decisions_logged INTEGER DEFAULT 0,
+                resume_points_generated INTEGER DEFAULT 0,
+                problems_encountered INTEGER DEFAULT 0,
+                tokens_estimated INTEGER,
+                project_name TEXT,
+                git_commit_hash TEXT,
+                git_branch TEXT,
+                tool_triggered TEXT
+            )
+        """)
+
+        # File changes table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS file_changes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                change_type TEXT,
+                FOREIGN KEY (session_id) REFERENCES sessions(session_id)
+            )
+        """)
+
+        # Decisions table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS decisions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                decision_text TEXT NOT NULL,
+                timestamp DATETIME,
+                FOREIGN KEY (session_id) REFERENCES sessions(session_id)
+            )
+        """)
+
+        # Aggregate stats table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS aggregate_stats (
+                stat_key TEXT PRIMARY KEY,
+                stat_value REAL NOT NULL,
+                last_updated DATETIME NOT NULL
+            )
+        """)
+
+        # Create indexes for better query performance
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_sessions_timestamp
+            ON sessions(timestamp)
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_sessions_project
+            ON sessions(project_name)
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_file_changes_session
+            ON file_changes(session_id)
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_decisions_session
+            ON decisions(session_id)
+        """)
+
+    def _migrate_aggregate_triggers(self, cursor: sqlite3.Cursor):
+        """Migration 2: aggregate_stats becomes trigger-maintained
+
+        No table changes: the triggers and the seeded totals are installed
+        with the other derived objects once migrations finish.
+
+        Args:
+            cursor: Cursor inside the migration transaction
+        """
+
+    def _migrate_daily_rollup(self, cursor: sqlite3.Cursor):
+        """Migration 3: sessions_daily rollup table (text day keys)
+
+        Args:
+            cursor: Cursor inside the migration transaction
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sessions_daily (
+                day DATE NOT NULL,
+                project_name TEXT NOT NULL,
+                total_sessions INTEGER NOT NULL DEFAULT 0,
+                successful_sessions INTEGER NOT NULL DEFAULT 0,
+                files_changed INTEGER NOT NULL DEFAULT 0,
+                decisions_logged INTEGER NOT NULL DEFAULT 0,
+                resume_points_generated INTEGER NOT NULL DEFAULT 0,
+                problems_encountered INTEGER NOT NULL DEFAULT 0,
+                tokens_estimated INTEGER NOT NULL DEFAULT 0,
+                sum_duration INTEGER NOT NULL DEFAULT 0,
+                duration_count INTEGER NOT NULL DEFAULT 0,
+                first_session DATETIME,
+                last_session DATETIME,
+                PRIMARY KEY (day, project_name)
+            ) WITHOUT ROWID
+        """)
+
+    def _migrate_epoch_timestamps(self, cursor: sqlite3.Cursor):
+        """Migration 4: store timestamps as integer epoch milliseconds
+
+        Rebuilds sessions and decisions with *_ms INTEGER columns (converting
+        the adapter-written ISO strings in SQL) and re-keys sessions_daily by
+        integer day number (epoch ms // MS_PER_DAY).
+
+        Args:
+            cursor: Cursor inside the migration transaction
+        """
+        to_ms = lambda column: (
+            f"CAST(strftime('%s', {column}) AS INTEGER) * 1000"
+            f" + CAST(substr(strftime('%f', {column}), 4) AS INTEGER)"
+        )
+
+        cursor.execute("""
+            CREATE TABLE sessions_new (
+                session_id TEXT PRIMARY KEY,
+                timestamp_ms INTEGER NOT NULL,
+                started_at_ms INTEGER,
+                duration_seconds INTEGER,
+                checkpoint_success BOOLEAN DEFAULT 1,
+                files_changed INTEGER DEFAULT 0,
+                decisions_logged INTEGER DEFAULT 0,
+                resume_points_generated INTEGER DEFAULT 0,
+                problems_encountered INTEGER DEFAULT 0,
+                tokens_estimated INTEGER,
+                project_name TEXT,
+                git_commit_hash TEXT,
+                git_branch TEXT,
+                tool_triggered TEXT
+            )
+        """)
+        cursor.execute(f"""
+            INSERT INTO sessions_new
+            SELECT
+                session_id, {to_ms('timestamp')}, {to_ms('started_at')},
+                duration_seconds, checkpoint_success, files_changed,
+                decisions_logged, resume_points_generated, problems_encountered,
+                tokens_estimated, project_name, git_commit_hash, git_branch,
+                tool_triggered
+            FROM sessions
+        """)
+        cursor.execute("DROP TABLE sessions")
+        cursor.execute("ALTER TABLE sessions_new RENAME TO sessions")
+        cursor.execute("CREATE INDEX idx_sessions_timestamp ON sessions(timestamp_ms)")
+        cursor.execute("CREATE INDEX idx_sessions_project ON sessions(project_name)")
+
+        cursor.execute("""
+            CREATE TABLE decisions_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                decision_text TEXT NOT NULL,
+                timestamp_ms INTEGER,
+                FOREIGN KEY (session_id) REFERENCES sessions(session_id)
+            )
+        """)
+        cursor.execute(f"""
+            INSERT INTO decisions_new (id, session_id, decision_text, timestamp_ms)
+            SELECT id, session_id, decision_text, {to_ms('timestamp')}
+            FROM decisions
+        """)
+        cursor.execute("DROP TABLE decisions")
+        cursor.execute("ALTER TABLE decisions_new RENAME TO decisions")
+        cursor.execute("CREATE INDEX idx_decisions_session ON decisions(session_id)")
+
+        # Derived table: recreated empty here, repopulated by _rebuild_derived
+        cursor.execute("DROP TABLE IF EXISTS sessions_daily")
+        cursor.execute("""
+            CREATE TABLE sessions_daily (
+                day INTEGER NOT NULL,
+                project_name TEXT NOT NULL,
+                total_sessions INTEGER NOT NULL DEFAULT 0,
+                successful_sessions INTEGER NOT NULL DEFAULT 0,
+                files_changed INTEGER NOT NULL DEFAULT 0,
+                decisions_logged INTEGER NOT NULL DEFAULT 0,
+                resume_points_generated INTEGER NOT NULL DEFAULT 0,
+                problems_encountered INTEGER NOT NULL DEFAULT 0,
+                tokens_estimated INTEGER NOT NULL DEFAULT 0,
+                sum_duration INTEGER NOT NULL DEFAULT 0,
+                duration_count INTEGER NOT NULL DEFAULT 0,
+                first_session_ms INTEGER,
+                last_session_ms INTEGER,
+                PRIMARY KEY (day, project_name)
+            ) WITHOUT ROWID
+        """)
+
+    def _migrate_decisions_fts(self, cursor: sqlite3.Cursor):
+        """Migration 5: full-text index over decision text
+
+        decisions_fts is an external-content FTS5 table: it indexes
+        decisions.decision_text without storing a second copy. Prefix indexes
+        keep short prefix queries (e.g. 'db*') fast. The index is populated by
+        _rebuild_derived and kept in sync by triggers. Builds of SQLite
+        without FTS5 skip the table and search falls back to LIKE scans.
+
+        Args:
+            cursor: Cursor inside the migration transaction
+        """
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE decisions_fts USING fts5(
+                    decision_text,
+                    content='decisions',
+                    content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2',
+                    prefix='2 3'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 unavailable, decision search will scan: {e}")
+
+    def _migrate_file_hot_spots(self, cursor: sqlite3.Cursor):
+        """Migration 6: per-file daily rollup for hot-spot queries
+
+        file_changes has no project or time of its own, so churn questions
+        joined every change to its session. file_changes_daily keeps change
+        counts per (project, day, file), maintained by triggers. The
+        session_id index on file_changes becomes (session_id, file_path),
+        which the triggers use to count distinct sessions per file.
+
+        Args:
+            cursor: Cursor inside the migration transaction
+        """
+        cursor.execute("DROP INDEX IF EXISTS idx_file_changes_session")
+        cursor.execute("""
+            CREATE INDEX idx_file_changes_session_path
+            ON file_changes(session_id, file_path)
+        """)
+
+        cursor.execute("""
+            CREATE TABLE file_changes_daily (
+                project_name TEXT NOT NULL,
+                day INTEGER NOT NULL,
+                file_path TEXT NOT NULL,
+                changes INTEGER NOT NULL DEFAULT 0,
+                sessions INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (project_name, day, file_path)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX idx_file_changes_daily_day ON file_changes_daily(day)")
+
+    def _migrate_dictionary_encoding(self, cursor: sqlite3.Cursor):
+        """Migration 7: intern repeated strings into dimension tables
+
+        Every session repeated its project name, branch and tool, and every
+        file change its full path. Each distinct string now lives once in a
+        DIMENSIONS table and sessions, file_changes and the rollups store
+        integer ids. Ids are assigned in order of first appearance; the
+        'Unknown' project is seeded as UNKNOWN_PROJECT_ID. Rollups are
+        recreated empty and repopulated by _rebuild_derived.
+
+        Args:
+            cursor: Cursor inside the migration transaction
+        """
+        for table in self.DIMENSIONS:
+            cursor.execute(f"""
+                CREATE TABLE {table} (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL UNIQUE
+                )
+            """)
+        cursor.execute(
+            "INSERT INTO projects (id, name) VALUES (?, 'Unknown')",
+            (self.UNKNOWN_PROJECT_ID,)
+        )
+
+        for table, source, column in (
+            ('projects', 'sessions', 'project_name'),
+            ('git_branches', 'sessions', 'git_branch'),
+            ('tools', 'sessions', 'tool_triggered'),
+            ('file_paths', 'file_changes', 'file_path'),
+        ):
+            cursor.execute(f"""
+                INSERT OR IGNORE INTO {table} (name)
+                SELECT {column} FROM {source}
+                WHERE {column} IS NOT NULL
+                GROUP BY {column}
+                ORDER BY MIN(rowid)
+            """)
+
+        cursor.execute("""
+            CREATE TABLE sessions_new (
+                session_id TEXT PRIMARY KEY,
+                timestamp_ms INTEGER NOT NULL,
+                started_at_ms INTEGER,
+                duration_seconds INTEGER,
+                checkpoint_success BOOLEAN DEFAULT 1,
+                files_changed INTEGER DEFAULT 0,
+                decisions_logged INTEGER DEFAULT 0,
+                resume_points_generated INTEGER DEFAULT 0,
+                problems_encountered INTEGER DEFAULT 0,
+                tokens_estimated INTEGER,
+                project_id INTEGER REFERENCES projects(id),
+                git_commit_hash TEXT,
+                git_branch_id INTEGER REFERENCES git_branches(id),
+                tool_id INTEGER REFERENCES tools(id)
+            )
+        """)
+        cursor.execute("""
+            INSERT INTO sessions_new
+            SELECT
+                s.session_id, s.timestamp_ms, s.started_at_ms, s.duration_seconds,
+                s.checkpoint_success, s.files_changed, s.decisions_logged,
+                s.resume_points_generated, s.problems_encountered,
+                s.tokens_estimated, p.id, s.git_commit_hash, b.id, t.id
+            FROM sessions s
+            LEFT JOIN projects p ON p.name = s.project_name
+            LEFT JOIN git_branches b ON b.name = s.git_branch
+            LEFT JOIN tools t ON t.name = s.tool_triggered
+        """)
+        cursor.execute("DROP TABLE sessions")
+        cursor.execute("ALTER TABLE sessions_new RENAME TO sessions")
+        cursor.execute("CREATE INDEX idx_sessions_timestamp ON sessions(timestamp_ms)")
+        cursor.execute("CREATE INDEX idx_sessions_project ON sessions(project_id)")
+
+        cursor.execute("""
+            CREATE TABLE file_changes_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                file_path_id INTEGER NOT NULL REFERENCES file_paths(id),
+                change_type TEXT,
+                FOREIGN KEY (session_id) REFERENCES sessions(session_id)
+            )
+        """)
+        cursor.execute("""
+            INSERT INTO file_changes_new (id, session_id, file_path_id, change_type)
+            SELECT f.id, f.session_id, p.id, f.change_type
+            FROM file_changes f
+            JOIN file_paths p ON p.name = f.file_path
+        """)
+        cursor.execute("DROP TABLE file_changes")
+        cursor.execute("ALTER TABLE file_changes_new RENAME TO file_changes")
+        cursor.execute("""
+            CREATE INDEX idx_file_changes_session_path
+            ON file_changes(session_id, file_path_id)
+        """)
+
+        # Derived tables: recreated empty here, repopulated by _rebuild_derived
+        cursor.execute("DROP TABLE sessions_daily")
+        cursor.execute("""
+            CREATE TABLE sessions_daily (
+                day INTEGER NOT NULL,
+                project_id INTEGER NOT NULL,
+                total_sessions INTEGER NOT NULL DEFAULT 0,
+                successful_sessions INTEGER NOT NULL DEFAULT 0,
+                files_changed INTEGER NOT NULL DEFAULT 0,
+                decisions_logged INTEGER NOT NULL DEFAULT 0,
+                resume_points_generated INTEGER NOT NULL DEFAULT 0,
+                problems_encountered INTEGER NOT NULL DEFAULT 0,
+                tokens_estimated INTEGER NOT NULL DEFAULT 0,
+                sum_duration INTEGER NOT NULL DEFAULT 0,
+                duration_count INTEGER NOT NULL DEFAULT 0,
+                first_session_ms INTEGER,
+                last_session_ms INTEGER,
+                PRIMARY KEY (day, project_id)
+            ) WITHOUT ROWID
+        """)
+
+        cursor.execute("DROP TABLE file_changes_daily")
+        cursor.execute("""
+            CREATE TABLE file_changes_daily (
+                project_id INTEGER NOT NULL,
+                day INTEGER NOT NULL,
+                file_path_id INTEGER NOT NULL,
+                changes INTEGER NOT NULL DEFAULT 0,
+                sessions INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (project_id, day, file_path_id)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX idx_file_changes_daily_day ON file_changes_daily(day)")
+
+    def _migrate_retention(self, cursor: sqlite3.Cursor):
+        """Migration 8: settings table holding the retention horizon
+
+        apply_retention prunes raw child rows of sessions before the horizon
+        (a day boundary, stored as epoch ms under 'retention_horizon_ms').
+        Rollup rows of those days are frozen: the file rollup delete trigger
+        and _rebuild_file_rollup leave them alone.
+
+        Args:
+            cursor: Cursor inside the migration transaction
+        """
+        cursor.execute("""
+            CREATE TABLE settings (
+                key TEXT PRIMARY KEY,
+                value NOT NULL
+            ) WITHOUT ROWID
+        """)
+
+    def _migrate_session_histograms(self, cursor: sqlite3.Cursor):
+        """Migration 9: session_histograms_daily rollup of per-day histogram bins
+
+        One row per (metric, day, project, bin) holding the number of sessions
+        whose value falls in the bin (see HISTOGRAM_BINS). Bins of any set of
+        days add up, so percentiles over a window are interpolated from a few
+        hundred rows instead of sorting raw sessions. Filled by
+        _rebuild_derived after the migration.
+
+        Args:
+            cursor: Cursor inside the migration transaction
+        """
+        cursor.execute("""
+            CREATE TABLE session_histograms_daily (
+                metric TEXT NOT NULL,
+                day INTEGER NOT NULL,
+                project_id INTEGER NOT NULL,
+                bin INTEGER NOT NULL,
+                sessions INTEGER NOT NULL,
+                PRIMARY KEY (metric, day, project_id, bin)
+            ) WITHOUT ROWID
+        """)
+
+    def _migrate_content_hash(self, cursor: sqlite3.Cursor):
+        """Migration 10: content_hash column on sessions
+
+        Hash of the checkpoint each session was last written from (see
+        _content_hash). Re-ingesting a checkpoint with the stored hash is a
+        skip; a different hash replaces the session in place. Sessions
+        stored before this migration have NULL, so their first re-ingest
+        rewrites them once.
+
+        Args:
+            cursor: Cursor inside the migration transaction
+        """
+        cursor.execute("ALTER TABLE sessions ADD COLUMN content_hash TEXT")
+
+    @classmethod
+    def _histogram_bin_sql(cls, metric: str, row: str = '') -> str:
+        """Build the SQL expression mapping a session to its histogram bin
+
+        Args:
+            metric: Key of HISTOGRAM_BINS
+            row: Column prefix ('' for a plain query, 'NEW.' or 'OLD.' in triggers)
+
+        Returns:
+            CASE expression evaluating to the lower bound of the value's bin
+        """
+        value_sql = cls._HISTOGRAM_VALUE_SQL[metric].format(row=row)
+        bins = cls.HISTOGRAM_BINS[metric]
+        whens = " ".join(
+            f"WHEN {value_sql} < {upper} THEN {lower}"
+            for lower, upper in zip(bins, bins[1:])
+        )
+        return f"CASE {whens} ELSE {bins[-1]} END"
+
+    def _has_search_index(self, conn: sqlite3.Connection) -> bool:
+        """Check whether the decisions_fts index exists
+
+        Args:
+            conn: Connection (or cursor) to check on
+
+        Returns:
+            True if decisions can be searched through FTS5
+        """
+        return conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'decisions_fts'"
+        ).fetchone() is not None
+
+    def _drop_triggers(self, cursor: sqlite3.Cursor):
+        """Drop every trigger listed in _TRIGGERS
+
+        Args:
+            cursor: Cursor inside the migration transaction
+        """
+        for name in self._TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+    def _install_triggers(self, cursor: sqlite3.Cursor):
+        """(Re)create the triggers that maintain derived tables
+
+        Args:
+            cursor: Cursor inside the migration transaction
+        """
+        self._drop_triggers(cursor)
+
+        # Triggers keeping aggregate_stats running totals in step with
+        # sessions, so lifetime stats never need to scan the table
+        cursor.execute(f"""
+            CREATE TRIGGER trg_sessions_aggregate_insert
+            AFTER INSERT ON sessions
+            BEGIN
+                UPDATE aggregate_stats SET
+                    stat_value = stat_value + CASE stat_key
+                        WHEN 'total_sessions' THEN 1
+                        WHEN 'successful_sessions' THEN NEW.checkpoint_success = 1
+                        WHEN 'total_files_changed' THEN IFNULL(NEW.files_changed, 0)
+                        WHEN 'total_decisions' THEN IFNULL(NEW.decisions_logged, 0)
+                        WHEN 'total_resume_points' THEN IFNULL(NEW.resume_points_generated, 0)
+                        WHEN 'successful_files_changed'
+                            THEN (NEW.checkpoint_success = 1) * IFNULL(NEW.files_changed, 0)
+                        WHEN 'successful_decisions'
+                            THEN (NEW.checkpoint_success = 1) * IFNULL(NEW.decisions_logged, 0)
+                        WHEN 'total_projects' THEN NEW.project_id IS NOT NULL AND NOT EXISTS (
+                            SELECT 1 FROM sessions
+                            WHERE project_id = NEW.project_id AND rowid != NEW.rowid
+                        )
+                    END,
+                    last_updated = CURRENT_TIMESTAMP
+                WHERE stat_key IN ({self._AGGREGATE_COUNTER_KEYS_SQL});
+
+                INSERT INTO aggregate_stats (stat_key, stat_value, last_updated)
+                VALUES ('first_session', NEW.timestamp_ms, CURRENT_TIMESTAMP)
+                ON CONFLICT(stat_key) DO UPDATE SET
+                    stat_value = MIN(stat_value, excluded.stat_value),
+                    last_updated = excluded.last_updated;
+
+                INSERT INTO aggregate_stats (stat_key, stat_value, last_updated)
+                VALUES ('last_session', NEW.timestamp_ms, CURRENT_TIMESTAMP)
+                ON CONFLICT(stat_key) DO UPDATE SET
+                    stat_value = MAX(stat_value, excluded.stat_value),
+                    last_updated = excluded.last_updated;
+            END
+        """)
+
+        cursor.execute(f"""
+            CREATE TRIGGER trg_sessions_aggregate_delete
+            AFTER DELETE ON sessions
+            BEGIN
+                UPDATE aggregate_stats SET
+                    stat_value = stat_value - CASE stat_key
+                        WHEN 'total_sessions' THEN 1
+                        WHEN 'successful_sessions' THEN OLD.checkpoint_success = 1
+                        WHEN 'total_files_changed' THEN IFNULL(OLD.files_changed, 0)
+                        WHEN 'total_decisions' THEN IFNULL(OLD.decisions_logged, 0)
+                        WHEN 'total_resume_points' THEN IFNULL(OLD.resume_points_generated, 0)
+                        WHEN 'successful_files_changed'
+                            THEN (OLD.checkpoint_success = 1) * IFNULL(OLD.files_changed, 0)
+                        WHEN 'successful_decisions'
+                            THEN (OLD.checkpoint_success = 1) * IFNULL(OLD.decisions_logged, 0)
+                        WHEN 'total_projects' THEN OLD.project_id IS NOT NULL AND NOT EXISTS (
+                            SELECT 1 FROM sessions WHERE project_id = OLD.project_id
+                        )
+                    END,
+                    last_updated = CURRENT_TIMESTAMP
+                WHERE stat_key IN ({self._AGGREGATE_COUNTER_KEYS_SQL});
+
+                -- MIN/MAX only need recomputing (via the timestamp index)
+                -- when the removed row was the boundary
+                UPDATE aggregate_stats SET
+                    stat_value = (SELECT MIN(timestamp_ms) FROM sessions),
+                    last_updated = CURRENT_TIMESTAMP
+                WHERE stat_key = 'first_session' AND stat_value = OLD.timestamp_ms
+                    AND EXISTS (SELECT 1 FROM sessions);
+
+                UPDATE aggregate_stats SET
+                    stat_value = (SELECT MAX(timestamp_ms) FROM sessions),
+                    last_updated = CURRENT_TIMESTAMP
+                WHERE stat_key = 'last_session' AND stat_value = OLD.timestamp_ms
+                    AND EXISTS (SELECT 1 FROM sessions);
+
+                DELETE FROM aggregate_stats
+                WHERE stat_key IN ('first_session', 'last_session')
+                    AND NOT EXISTS (SELECT 1 FROM sessions);
+            END
+        """)
+
+        # Daily per-project rollup backing windowed stats and breakdowns
+        cursor.execute(f"""
+            CREATE TRIGGER trg_sessions_daily_insert
+            AFTER INSERT ON sessions
+            BEGIN
+                INSERT INTO sessions_daily (
+                    day, project_id, total_sessions, successful_sessions,
+                    files_changed, decisions_logged, resume_points_generated,
+                    problems_encountered, tokens_estimated, sum_duration,
+                    duration_count, first_session_ms, last_session_ms
+                ) VALUES (
+                    NEW.timestamp_ms / {self.MS_PER_DAY},
+                    IFNULL(NEW.project_id, {self.UNKNOWN_PROJECT_ID}),
+                    1,
+                    NEW.checkpoint_success = 1,
+                    IFNULL(NEW.files_changed, 0),
+                    IFNULL(NEW.decisions_logged, 0),
+                    IFNULL(NEW.resume_points_generated, 0),
+                    IFNULL(NEW.problems_encountered, 0),
+                    IFNULL(NEW.tokens_estimated, 0),
+                    IFNULL(NEW.duration_seconds, 0),
+                    NEW.duration_seconds IS NOT NULL,
+                    NEW.timestamp_ms,
+                    NEW.timestamp_ms
+                )
+                ON CONFLICT(day, project_id) DO UPDATE SET
+                    total_sessions = total_sessions + excluded.total_sessions,
+                    successful_sessions = successful_sessions + excluded.successful_sessions,
+                    files_changed = files_changed + excluded.files_changed,
+                    decisions_logged = decisions_logged + excluded.decisions_logged,
+                    resume_points_generated = resume_points_generated + excluded.resume_points_generated,
+                    problems_encountered = problems_encountered + excluded.problems_encountered,
+                    tokens_estimated = tokens_estimated + excluded.tokens_estimated,
+                    sum_duration = sum_duration + excluded.sum_duration,
+                    duration_count = duration_count + excluded.duration_count,
+                    first_session_ms = MIN(first_session_ms, excluded.first_session_ms),
+                    last_session_ms = MAX(last_session_ms, excluded.last_session_ms);
+            END
+        """)
+
+        cursor.execute(f"""
+            CREATE TRIGGER trg_sessions_daily_delete
+            AFTER DELETE ON sessions
+            BEGIN
+                UPDATE sessions_daily SET
+                    total_sessions = total_sessions - 1,
+                    successful_sessions = successful_sessions - (OLD.checkpoint_success = 1),
+                    files_changed = files_changed - IFNULL(OLD.files_changed, 0),
+                    decisions_logged = decisions_logged - IFNULL(OLD.decisions_logged, 0),
+                    resume_points_generated = resume_points_generated
+                        - IFNULL(OLD.resume_points_generated, 0),
+                    problems_encountered = problems_encountered
+                        - IFNULL(OLD.problems_encountered, 0),
+                    tokens_estimated = tokens_estimated - IFNULL(OLD.tokens_estimated, 0),
+                    sum_duration = sum_duration - IFNULL(OLD.duration_seconds, 0),
+                    duration_count = duration_count - (OLD.duration_seconds IS NOT NULL)
+                WHERE day = OLD.timestamp_ms / {self.MS_PER_DAY}
+                    AND project_id = IFNULL(OLD.project_id, {self.UNKNOWN_PROJECT_ID});
+
+                DELETE FROM sessions_daily
+                WHERE day = OLD.timestamp_ms / {self.MS_PER_DAY}
+                    AND project_id = IFNULL(OLD.project_id, {self.UNKNOWN_PROJECT_ID})
+                    AND total_sessions <= 0;
+
+                -- Boundaries only change when the removed row was one;
+                -- recompute from that single day of raw rows
+                UPDATE sessions_daily SET
+                    first_session_ms = (
+                        SELECT MIN(timestamp_ms) FROM sessions
+                        WHERE timestamp_ms >= sessions_daily.day * {self.MS_PER_DAY}
+                            AND timestamp_ms < (sessions_daily.day + 1) * {self.MS_PER_DAY}
+                            AND IFNULL(project_id, {self.UNKNOWN_PROJECT_ID}) = sessions_daily.project_id
+                    ),
+                    last_session_ms = (
+                        SELECT MAX(timestamp_ms) FROM sessions
+                        WHERE timestamp_ms >= sessions_daily.day * {self.MS_PER_DAY}
+                            AND timestamp_ms < (sessions_daily.day + 1) * {self.MS_PER_DAY}
+                            AND IFNULL(project_id, {self.UNKNOWN_PROJECT_ID}) = sessions_daily.project_id
+                    )
+                WHERE day = OLD.timestamp_ms / {self.MS_PER_DAY}
+                    AND project_id = IFNULL(OLD.project_id, {self.UNKNOWN_PROJECT_ID})
+                    AND OLD.timestamp_ms IN (first_session_ms, last_session_ms);
+            END
+        """)
+
+        # Histogram bins: one row per metric the session has a value for
+        histogram_rows = " UNION ALL ".join(
+            f"""
+                SELECT
+                    '{metric}',
+                    NEW.timestamp_ms / {self.MS_PER_DAY},
+                    IFNULL(NEW.project_id, {self.UNKNOWN_PROJECT_ID}),
+                    {self._histogram_bin_sql(metric, 'NEW.')},
+                    1
+                WHERE {self._HISTOGRAM_VALUE_SQL[metric].format(row='NEW.')} IS NOT NULL
+            """
+            for metric in self.HISTOGRAM_BINS
+        )
+        cursor.execute(f"""
+            CREATE TRIGGER trg_session_histograms_insert
+            AFTER INSERT ON sessions
+            BEGIN
+                INSERT INTO session_histograms_daily (metric, day, project_id, bin, sessions)
+                {histogram_rows}
+                ON CONFLICT(metric, day, project_id, bin) DO UPDATE SET
+                    sessions = sessions + 1;
+            END
+        """)
+
+        old_bins = " OR ".join(
+            f"""(
+                    metric = '{metric}'
+                    AND {self._HISTOGRAM_VALUE_SQL[metric].format(row='OLD.')} IS NOT NULL
+                    AND bin = {self._histogram_bin_sql(metric, 'OLD.')}
+                )"""
+            for metric in self.HISTOGRAM_BINS
+        )
+        cursor.execute(f"""
+            CREATE TRIGGER trg_session_histograms_delete
+            AFTER DELETE ON sessions
+            BEGIN
+                UPDATE session_histograms_daily SET sessions = sessions - 1
+                WHERE day = OLD.timestamp_ms / {self.MS_PER_DAY}
+                    AND project_id = IFNULL(OLD.project_id, {self.UNKNOWN_PROJECT_ID})
+                    AND ({old_bins});
+
+                DELETE FROM session_histograms_daily
+                WHERE day = OLD.timestamp_ms / {self.MS_PER_DAY}
+                    AND project_id = IFNULL(OLD.project_id, {self.UNKNOWN_PROJECT_ID})
+                    AND sessions <= 0;
+            END
+        """)
+
+        # Per-file daily rollup; project and day come from the session row,
+        # which is always inserted before its file changes
+        cursor.execute(f"""
+            CREATE TRIGGER trg_file_changes_daily_insert
+            AFTER INSERT ON file_changes
+            BEGIN
+                INSERT INTO file_changes_daily (project_id, day, file_path_id, changes, sessions)
+                SELECT
+                    IFNULL(s.project_id, {self.UNKNOWN_PROJECT_ID}),
+                    s.timestamp_ms / {self.MS_PER_DAY},
+                    NEW.file_path_id,
+                    1,
+                    NOT EXISTS (
+                        SELECT 1 FROM file_changes
+                        WHERE session_id = NEW.session_id
+                            AND file_path_id = NEW.file_path_id
+                            AND id != NEW.id
+                    )
+                FROM sessions s
+                WHERE s.session_id = NEW.session_id
+                ON CONFLICT(project_id, day, file_path_id) DO UPDATE SET
+                    changes = changes + 1,
+                    sessions = sessions + excluded.sessions;
+            END
+        """)
+
+        # Rows of sessions before the retention horizon are pruned without
+        # touching their (frozen) rollup rows
+        cursor.execute(f"""
+            CREATE TRIGGER trg_file_changes_daily_delete
+            AFTER DELETE ON file_changes
+            WHEN NOT EXISTS (
+                SELECT 1 FROM sessions
+                WHERE session_id = OLD.session_id
+                    AND timestamp_ms < {self._HORIZON_MS_SQL}
+            )
+            BEGIN
+                UPDATE file_changes_daily SET
+                    changes = changes - 1,
+                    sessions = sessions - NOT EXISTS (
+                        SELECT 1 FROM file_changes
+                        WHERE session_id = OLD.session_id AND file_path_id = OLD.file_path_id
+                    )
+                WHERE (project_id, day) = (
+                        SELECT IFNULL(project_id, {self.UNKNOWN_PROJECT_ID}), timestamp_ms / {self.MS_PER_DAY}
+                        FROM sessions WHERE session_id = OLD.session_id
+                    )
+                    AND file_path_id = OLD.file_path_id;
+
+                DELETE FROM file_changes_daily
+                WHERE (project_id, day) = (
+                        SELECT IFNULL(project_id, {self.UNKNOWN_PROJECT_ID}), timestamp_ms / {self.MS_PER_DAY}
+                        FROM sessions WHERE session_id = OLD.session_id
+                    )
+                    AND file_path_id = OLD.file_path_id
+                    AND changes <= 0;
+            END
+        """)
+
+        if self._has_search_index(cursor):
+            # External-content FTS5 tables are synced with the special
+            # 'delete' command, which needs the old text
+            cursor.execute("""
+                CREATE TRIGGER trg_decisions_fts_insert
+                AFTER INSERT ON decisions
+                BEGIN
+                    INSERT INTO decisions_fts (rowid, decision_text)
+                    VALUES (NEW.id, NEW.decision_text);
+                END
+            """)
+
+            cursor.execute("""
+                CREATE TRIGGER trg_decisions_fts_delete
+                AFTER DELETE ON decisions
+                BEGIN
+                    INSERT INTO decisions_fts (decisions_fts, rowid, decision_text)
+                    VALUES ('delete', OLD.id, OLD.decision_text);
+                END
+            """)
+
+            cursor.execute("""
+                CREATE TRIGGER trg_decisions_fts_update
+                AFTER UPDATE OF decision_text ON decisions
+                BEGIN
+                    INSERT INTO decisions_fts (decisions_fts, rowid, decision_text)
+                    VALUES ('delete', OLD.id, OLD.decision_text);
+                    INSERT INTO decisions_fts (rowid, decision_text)
+                    VALUES (NEW.id, NEW.decision_text);
+                END
+            """)
+
+    def _rebuild_derived(self, cursor: sqlite3.Cursor):
+        """Recompute every derived table from the source tables
+
+        Runs inside the caller's transaction.
+
+        Args:
+            cursor: Cursor to execute on
+        """
+        self._rebuild_aggregates(cursor)
+        self._rebuild_daily_rollup(cursor)
+        self._rebuild_file_rollup(cursor)
+        self._rebuild_search_index(cursor)
+
+    def insert_session(self, checkpoint_data: Dict[str, Any]) -> bool:
+        """Insert a session record from checkpoint data
+
+        If the session_id is already stored with the same content hash this
+        is a single primary key lookup. A changed checkpoint replaces the
+        stored session and its child rows in one transaction.
+
+        Args:
+            checkpoint_data: Checkpoint JSON data
+
+        Returns:
+            True if inserted or updated, False otherwise
+        """
+        cursor = self.conn.cursor()
+
+        try:
+            session_id = checkpoint_data.get('session_id')
+            session_row, file_rows, decision_rows = self._prepare_session(checkpoint_data)
+
+            # Check for an unchanged duplicate
+            cursor.execute(
+                "SELECT content_hash FROM sessions WHERE session_id = ?",
+                (session_id,)
+            )
+            row = cursor.fetchone()
+            if row and row[0] == session_row[-1]:
+                logger.warning(f"Session {session_id} already exists, skipping")
+                return False
+
+            pending_decisions: List[tuple] = []
+            status = self._write_session(cursor, session_row, file_rows, decision_rows, pending_decisions)
+            self._insert_decisions(cursor, pending_decisions)
+
+            self.conn.commit()
+            if status == 'skipped':
+                return False
+            logger.info(f"Session {session_id} {status} successfully")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to insert session: {e}")
+            self._rollback()
+            return False
+
+    def insert_sessions_bulk(
+        self,
+        checkpoints: Iterable[Dict[str, Any]],
+        batch_size: int = 1000
+    ) -> Dict[str, int]:
+        """Insert many sessions, committing once per batch
+
+        Duplicates are detected by the sessions primary key (INSERT OR IGNORE)
+        rather than a lookup query, and child rows are written with executemany.
+        Duplicates whose content changed replace the stored session (counted
+        as updated). A checkpoint that cannot be converted is counted as an
+        error and does not abort the batch.
+
+        Batches are taken from checkpoints on the calling thread and each is
+        one _write step, so a lazy iterable (e.g. one parsing files) never
+        runs inside a write.
+
+        Args:
+            checkpoints: Iterable of checkpoint JSON data
+            batch_size: Number of checkpoints per transaction
+
+        Returns:
+            Dictionary with inserted, updated, skipped and errors counts
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        counts = {'inserted': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
+        checkpoints = iter(checkpoints)
+        while True:
+            batch = list(itertools.islice(checkpoints, batch_size))
+            if not batch:
+                break
+            for key, value in self._write(self._insert_batch, batch).items():
+                counts[key] += value
+
+        logger.info(
+            f"Bulk insert complete: {counts['inserted']} inserted, {counts['updated']} updated, "
+            f"{counts['skipped']} skipped, {counts['errors']} errors"
+        )
+        return counts
+
+    def _insert_batch(self, checkpoints: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Insert one batch of sessions in a single transaction
+
+        Args:
+            checkpoints: Checkpoint JSON data of the batch
+
+        Returns:
+            Dictionary with inserted, updated, skipped and errors counts
+        """
+        counts = {'inserted': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
+        cursor = self.conn.cursor()
+        decision_rows: List[tuple] = []
+
+        try:
+            for checkpoint_data in checkpoints:
+                counts[self._insert_or_ignore(cursor, checkpoint_data, decision_rows)] += 1
+
+            self._insert_decisions(cursor, decision_rows)
+            self.conn.commit()
+
+        except sqlite3.Error as e:
+            logger.error(f"Bulk insert failed: {e}")
+            self._rollback()
+            raise
+
+        return counts
+
+    def insert_sessions(self, checkpoints: Iterable[Dict[str, Any]]) -> List[bool]:
+        """Insert several sessions in one transaction
+
+        Like insert_session for each checkpoint, but with a single commit.
+        A database error rolls back the whole group.
+
+        Args:
+            checkpoints: Iterable of checkpoint JSON data
+
+        Returns:
+            One flag per checkpoint: True if inserted or updated, False if
+            it was an unchanged duplicate, could not be converted or the
+            transaction failed
+        """
+        checkpoints = list(checkpoints)
+        cursor = self.conn.cursor()
+        decision_rows: List[tuple] = []
+
+        try:
+            results = [
+                self._insert_or_ignore(cursor, checkpoint_data, decision_rows) in ('inserted', 'updated')
+                for checkpoint_data in checkpoints
+            ]
+            self._insert_decisions(cursor, decision_rows)
+            self.conn.commit()
+            logger.info(f"Inserted or updated {sum(results)} of {len(results)} sessions")
+            return results
+
+        except sqlite3.Error as e:
+            logger.error(f"Failed to insert sessions: {e}")
+            self._rollback()
+            return [False] * len(checkpoints)
+
+    def merge_from(self, path: str) -> Dict[str, int]:
+        """Copy in the sessions of another analytics database that are not here yet
+
+        The other database is attached and its new sessions, file changes
+        and decisions are copied with one INSERT ... SELECT per table, all in
+        one transaction, instead of replaying checkpoints one by one.
+        Sessions whose session_id is already here are skipped along with
+        their child rows. Dimension ids are remapped by name (names new to
+        this database get new ids) and child rows get new ids. The triggers
+        update the running totals, rollups and search index as the rows are
+        copied.
+
+        Child rows the other database has already pruned (apply_retention)
+        cannot be copied; their sessions still count in the totals.
+
+        Args:
+            path: Database file to merge from (same schema version)
+
+        Returns:
+            Dictionary with inserted, skipped, file_changes and decisions counts
+
+        Raises:
+            sqlite3.Error: The file is missing or not at this schema version,
+                or the copy failed (nothing is merged)
+        """
+        if not Path(path).is_file():
+            raise sqlite3.OperationalError(f"Database not found: {path}")
+
+        cursor = self.conn.cursor()
+        cursor.execute("ATTACH DATABASE ? AS merge_source", (str(path),))
+
+        try:
+            version = cursor.execute("PRAGMA merge_source.user_version").fetchone()[0]
+            if version != self.SCHEMA_VERSION:
+                raise sqlite3.DatabaseError(
+                    f"Cannot merge {path}: schema version {version}, expected "
+                    f"{self.SCHEMA_VERSION} (open it read-write once to migrate)"
+                )
+            counts = self._merge_attached(cursor)
+
+        finally:
+            cursor.execute("DETACH DATABASE merge_source")
+
+        logger.info(
+            f"Merged {path}: {counts['inserted']} sessions inserted, {counts['skipped']} skipped, "
+            f"{counts['file_changes']} file changes, {counts['decisions']} decisions"
+        )
+        return counts
+
+    def _merge_attached(self, cursor: sqlite3.Cursor) -> Dict[str, int]:
+        """Copy the new sessions of the database attached as merge_source
+
+        Args:
+            cursor: Cursor on self.conn
+
+        Returns:
+            Dictionary with inserted, skipped, file_changes and decisions counts
+        """
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+
+            # session_ids to copy, probed by the three copies below
+            cursor.execute("""
+                CREATE TEMP TABLE merge_sessions (session_id TEXT PRIMARY KEY) WITHOUT ROWID
+            """)
+            cursor.execute("""
+                INSERT INTO temp.merge_sessions
+                SELECT s.session_id FROM merge_source.sessions s
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM main.sessions m WHERE m.session_id = s.session_id
+                )
+            """)
+            inserted = cursor.rowcount
+            total = cursor.execute("SELECT COUNT(*) FROM merge_source.sessions").fetchone()[0]
+
+            # New names get the next ids here, in the other database's id
+            # (first appearance) order
+            for table in self.DIMENSIONS:
+                cursor.execute(f"""
+                    INSERT OR IGNORE INTO main.{table} (name)
+                    SELECT name FROM merge_source.{table} ORDER BY id
+                """)
+
+            # Sessions first: the file rollup trigger reads the session row
+            cursor.execute(f"""
+                INSERT INTO main.sessions ({self._SESSION_COLUMNS})
+                SELECT
+                    s.session_id, s.timestamp_ms, s.started_at_ms, s.duration_seconds,
+                    s.checkpoint_success, s.files_changed, s.decisions_logged,
+                    s.resume_points_generated, s.problems_encountered,
+                    s.tokens_estimated, mp.id, s.git_commit_hash, mb.id, mt.id,
+                    s.content_hash
+                FROM merge_source.sessions s
+                LEFT JOIN merge_source.projects sp ON sp.id = s.project_id
+                LEFT JOIN main.projects mp ON mp.name = sp.name
+                LEFT JOIN merge_source.git_branches sb ON sb.id = s.git_branch_id
+                LEFT JOIN main.git_branches mb ON mb.name = sb.name
+                LEFT JOIN merge_source.tools st ON st.id = s.tool_id
+                LEFT JOIN main.tools mt ON mt.name = st.name
+                WHERE s.session_id IN (SELECT session_id FROM temp.merge_sessions)
+                ORDER BY s.timestamp_ms
+            """)
+
+            cursor.execute("""
+                INSERT INTO main.file_changes (session_id, file_path_id, change_type)
+                SELECT f.session_id, mf.id, f.change_type
+                FROM merge_source.file_changes f
+                JOIN merge_source.file_paths sf ON sf.id = f.file_path_id
+                JOIN main.file_paths mf ON mf.name = sf.name
+                WHERE f.session_id IN (SELECT session_id FROM temp.merge_sessions)
+                ORDER BY f.id
+            """)
+            file_changes = cursor.rowcount
+
+            # One statement, so the FTS5 index flushes its terms once
+            cursor.execute("""
+                INSERT INTO main.decisions (session_id, decision_text, timestamp_ms)
+                SELECT d.session_id, d.decision_text, d.timestamp_ms
+                FROM merge_source.decisions d
+                WHERE d.session_id IN (SELECT session_id FROM temp.merge_sessions)
+                ORDER BY d.id
+            """)
+            decisions = cursor.rowcount
+
+            cursor.execute("DROP TABLE temp.merge_sessions")
+            self.conn.commit()
+
+        except sqlite3.Error as e:
+            logger.error(f"Merge failed: {e}")
+            self._rollback()
+            raise
+
+        return {
+            'inserted': inserted,
+            'skipped': total - inserted,
+            'file_changes': file_changes,
+            'decisions': decisions
+        }
+
+    def _insert_or_ignore(
+        self,
+        cursor: sqlite3.Cursor,
+        checkpoint_data: Dict[str, Any],
+        decision_rows: List[tuple]
+    ) -> str:
+        """Insert one session and its file changes, or replace it if it changed
+
+        Does not commit. Duplicates are detected by the sessions primary key
+        (INSERT OR IGNORE) rather than a lookup query. Decision rows are
+        appended to decision_rows for the caller to write per batch with
+        _insert_decisions.
+
+        Args:
+            cursor: Cursor inside the caller's transaction
+            checkpoint_data: Checkpoint JSON data
+            decision_rows: Pending decision rows of the current batch
+
+        Returns:
+            'inserted', 'updated' (content changed), 'skipped' (unchanged
+            duplicate) or 'errors' (not convertible)
+        """
+        try:
+            session_row, file_rows, decision_rows_for_session = self._prepare_session(checkpoint_data)
+        except Exception as e:
+            logger.debug(f"Could not convert checkpoint: {e}")
+            return 'errors'
+
+        return self._write_session(cursor, session_row, file_rows, decision_rows_for_session, decision_rows)
+
+    def _write_session(
+        self,
+        cursor: sqlite3.Cursor,
+        session_row: tuple,
+        file_rows: List[tuple],
+        session_decisions: List[tuple],
+        decision_rows: List[tuple]
+    ) -> str:
+        """Write the rows of one prepared session unless it is stored unchanged
+
+        Args:
+            cursor: Cursor inside the caller's transaction
+            session_row: Session row from _prepare_session
+            file_rows: File change rows from _prepare_session
+            session_decisions: Decision rows from _prepare_session
+            decision_rows: Pending decision rows of the current batch
+
+        Returns:
+            'inserted', 'updated' or 'skipped'
+        """
+        session_id = session_row[0]
+        session_row = self._encode_session_row(cursor, session_row)
+
+        cursor.execute(self._INSERT_OR_IGNORE_SESSION_SQL, session_row)
+        if cursor.rowcount == 1:
+            status = 'inserted'
+        else:
+            rowid, content_hash, timestamp_ms = cursor.execute(
+                "SELECT rowid, content_hash, timestamp_ms FROM sessions WHERE session_id = ?",
+                (session_id,)
+            ).fetchone()
+            if content_hash == session_row[-1]:
+                logger.debug(f"Session {session_id} already exists, skipping")
+                return 'skipped'
+
+            horizon_ms = cursor.execute(f"SELECT {self._HORIZON_MS_SQL}").fetchone()[0]
+            if timestamp_ms < horizon_ms:
+                # Its child rows are pruned and its file rollup rows frozen,
+                # so the old version cannot be subtracted
+                logger.warning(
+                    f"Session {session_id} changed but is before the retention horizon, skipping"
+                )
+                return 'skipped'
+
+            self._replace_session(cursor, rowid, timestamp_ms, session_row, decision_rows)
+            status = 'updated'
+
+        cursor.executemany(self._INSERT_FILE_CHANGE_SQL, self._encode_file_rows(cursor, file_rows))
+        decision_rows.extend(session_decisions)
+        return status
+
+    def _replace_session(
+        self,
+        cursor: sqlite3.Cursor,
+        rowid: int,
+        old_timestamp_ms: int,
+        session_row: tuple,
+        decision_rows: List[tuple]
+    ):
+        """Swap a stored session row for a new version, dropping its child rows
+
+        The triggers subtract the old rows from the running totals, rollups
+        and search index as they are deleted and add the new row as it is
+        inserted, so derived tables move by the difference without being
+        recomputed. Child rows go first: the file rollup trigger reads the
+        old session row. The new row keeps the old rowid, and the
+        'session_rewrites' setting is incremented so caches keyed by rowid
+        (AnalyticsFrame) notice the change.
+
+        Args:
+            cursor: Cursor inside the caller's transaction
+            rowid: Rowid of the stored session
+            old_timestamp_ms: Timestamp of the stored session
+            session_row: New row matching _SESSION_COLUMNS
+            decision_rows: Pending decision rows of the current batch; rows
+                of an earlier version of the session are removed
+        """
+        session_id = session_row[0]
+
+        cursor.execute("DELETE FROM file_changes WHERE session_id = ?", (session_id,))
+        cursor.execute("DELETE FROM decisions WHERE session_id = ?", (session_id,))
+        decision_rows[:] = [row for row in decision_rows if row[0] != session_id]
+        cursor.execute("DELETE FROM sessions WHERE rowid = ?", (rowid,))
+        cursor.execute(self._REINSERT_SESSION_SQL, (rowid,) + session_row)
+
+        cursor.execute("""
+            INSERT INTO settings (key, value) VALUES ('session_rewrites', 1)
+            ON CONFLICT(key) DO UPDATE SET value = value + 1
+        """)
+        logger.debug(f"Session {session_id} changed, replaced")
+
+    def _insert_decisions(self, cursor: sqlite3.Cursor, decision_rows: List[tuple]):
+        """Insert decision rows with a single statement
+
+        Args:
+            cursor: Cursor inside the caller's transaction
+            decision_rows: (session_id, decision_text, timestamp_ms) tuples
+        """
+        if decision_rows:
+            cursor.execute(self._INSERT_DECISIONS_SQL, (json.dumps(decision_rows),))
+
+    def _intern(self, cursor: sqlite3.Cursor, table: str, value: Optional[str]) -> Optional[int]:
+        """Get the dimension id of a string, adding it if it is new
+
+        Recently used ids are served from an LRU cache, so repeated strings
+        cost no query at all during ingest.
+
+        Args:
+            cursor: Cursor inside the caller's transaction
+            table: Dimension table (one of DIMENSIONS)
+            value: String to look up (None stays None)
+
+        Returns:
+            Id of value in table, or None
+        """
+        if value is None:
+            return None
+
+        cache = self._intern_caches[table]
+        dimension_id = cache.get(value)
+        if dimension_id is not None:
+            return dimension_id
+
+        row = cursor.execute(f"SELECT id FROM {table} WHERE name = ?", (value,)).fetchone()
+        if row is not None:
+            dimension_id = row[0]
+        else:
+            cursor.execute(f"INSERT INTO {table} (name) VALUES (?)", (value,))
+            dimension_id = cursor.lastrowid
+
+        cache.put(value, dimension_id)
+        return dimension_id
+
+    def _encode_session_row(self, cursor: sqlite3.Cursor, session_row: tuple) -> tuple:
+        """Replace the project, branch and tool names of a session row by ids
+
+        Args:
+            cursor: Cursor inside the caller's transaction
+            session_row: Session row from _prepare_session
+
+        Returns:
+            Row matching _SESSION_COLUMNS
+        """
+        project_name, git_commit_hash, git_branch, tool_triggered, content_hash = session_row[10:]
+        return session_row[:10] + (
+            self._intern(cursor, 'projects', project_name),
+            git_commit_hash,
+            self._intern(cursor, 'git_branches', git_branch),
+            self._intern(cursor, 'tools', tool_triggered),
+            content_hash,
+        )
+
+    def _encode_file_rows(self, cursor: sqlite3.Cursor, file_rows: List[tuple]) -> List[tuple]:
+        """Replace the paths of file change rows by file_paths ids
+
+        Args:
+            cursor: Cursor inside the caller's transaction
+            file_rows: File change rows from _prepare_session
+
+        Returns:
+            (session_id, file_path_id, change_type) tuples
+        """
+        return [
+            (session_id, self._intern(cursor, 'file_paths', file_path), change_type)
+            for session_id, file_path, change_type in file_rows
+        ]
+
+    def _rollback(self):
+        """Roll back the current transaction
+
+        Dimension rows added by the transaction are rolled back too and their
+        ids may be handed out again for other strings, so the intern caches
+        are cleared.
+        """
+        self.conn.rollback()
+        for cache in self._intern_caches.values():
+            cache.clear()
+
+    def _window_params(self, days: int) -> Dict[str, Any]:
+        """Build the named parameters for _WINDOW_SOURCE_SQL
+
+        Args:
+            days: Window length in days, ending now
+
+        Returns:
+            Parameters for the cutoff, its day number and the following midnight
+        """
+        cutoff_ms = to_epoch_ms(datetime.now() - timedelta(days=days))
+        cutoff_day = cutoff_ms // self.MS_PER_DAY
+
+        return {
+            'cutoff_ms': cutoff_ms,
+            'cutoff_day': cutoff_day,
+            'next_day_ms': (cutoff_day + 1) * self.MS_PER_DAY
+        }
+
+    def _rebuild_daily_rollup(self, cursor: sqlite3.Cursor):
+        """Recompute sessions_daily and session_histograms_daily from sessions
+
+        Runs inside the caller's transaction.
+
+        Args:
+            cursor: Cursor to execute on
+        """
+        cursor.execute("DELETE FROM sessions_daily")
+        cursor.execute(f"""
+            INSERT INTO sessions_daily (
+                day, project_id, total_sessions, successful_sessions,
+                files_changed, decisions_logged, resume_points_generated,
+                problems_encountered, tokens_estimated, sum_duration,
+                duration_count, first_session_ms, last_session_ms
+            )
+            SELECT
+                timestamp_ms / {self.MS_PER_DAY},
+                IFNULL(project_id, {self.UNKNOWN_PROJECT_ID}),
+                COUNT(*),
+                IFNULL(SUM(checkpoint_success = 1), 0),
+                IFNULL(SUM(files_changed), 0),
+                IFNULL(SUM(decisions_logged), 0),
+                IFNULL(SUM(resume_points_generated), 0),
+                IFNULL(SUM(problems_encountered), 0),
+                IFNULL(SUM(tokens_estimated), 0),
+                IFNULL(SUM(duration_seconds), 0),
+                COUNT(duration_seconds),
+                MIN(timestamp_ms),
+                MAX(timestamp_ms)
+            FROM sessions
+            GROUP BY 1, 2
+        """)
+
+        cursor.execute("DELETE FROM session_histograms_daily")
+        for metric in self.HISTOGRAM_BINS:
+            cursor.execute(f"""
+                INSERT INTO session_histograms_daily (metric, day, project_id, bin, sessions)
+                {self._histogram_rollup_sql(metric)}
+            """)
+
+    @classmethod
+    def _histogram_rollup_sql(cls, metric: str, source: str = 'sessions') -> str:
+        """Build the SELECT computing one metric's session_histograms_daily rows
+
+        Args:
+            metric: Key of HISTOGRAM_BINS
+            source: Sessions table to read (e.g. 'part.sessions')
+
+        Returns:
+            SELECT of (metric, day, project_id, bin, sessions) rows
+        """
+        return f"""
+            SELECT
+                '{metric}' AS metric,
+                timestamp_ms / {cls.MS_PER_DAY} AS day,
+                IFNULL(project_id, {cls.UNKNOWN_PROJECT_ID}) AS project_id,
+                {cls._histogram_bin_sql(metric)} AS bin,
+                COUNT(*) AS sessions
+            FROM {source}
+            WHERE {cls._HISTOGRAM_VALUE_SQL[metric].format(row='')} IS NOT NULL
+            GROUP BY 2, 3, 4
+        """
+
+    def rebuild_daily_rollup(self) -> int:
+        """Recompute the sessions_daily rollup and histogram bins from raw sessions
+
+        Repair command for a rollup that drifted from the raw data.
+        Runs in a single transaction.
+
+        Returns:
+            Number of (day, project) rows in the rebuilt rollup
+        """
+        cursor = self.conn.cursor()
+
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            self._rebuild_daily_rollup(cursor)
+            cursor.execute("SELECT COUNT(*) as count FROM sessions_daily")
+            count = cursor.fetchone()['count']
+            self.conn.commit()
+            logger.info(f"Daily rollup rebuilt ({count} rows)")
+            return count
+        except sqlite3.Error as e:
+            logger.error(f"Failed to rebuild daily rollup: {e}")
+            self._rollback()
+            raise
+
+    def _rebuild_file_rollup(self, cursor: sqlite3.Cursor):
+        """Recompute file_changes_daily from raw file changes
+
+        Days before the retention horizon have no raw rows left; their
+        rollup rows are kept as they are.
+
+        Args:
+            cursor: Cursor to execute on
+        """
+        horizon_ms = cursor.execute(f"SELECT {self._HORIZON_MS_SQL}").fetchone()[0]
+        self._refresh_file_rollup(cursor, horizon_ms)
+
+    def _refresh_file_rollup(self, cursor: sqlite3.Cursor, start_ms: int, end_ms: Optional[int] = None):
+        """Recompute the file_changes_daily rows of a range of days
+
+        Args:
+            cursor: Cursor to execute on
+            start_ms: Start of the first day (epoch ms, day aligned)
+            end_ms: Start of the day after the range (None for no end)
+        """
+        params = {
+            'start_ms': start_ms,
+            'end_ms': end_ms if end_ms is not None else 2 ** 62,
+        }
+        cursor.execute(f"""
+            DELETE FROM file_changes_daily
+            WHERE day >= :start_ms / {self.MS_PER_DAY} AND day < :end_ms / {self.MS_PER_DAY}
+        """, params)
+        cursor.execute(f"""
+            INSERT INTO file_changes_daily (project_id, day, file_path_id, changes, sessions)
+            SELECT
+                IFNULL(s.project_id, {self.UNKNOWN_PROJECT_ID}),
+                s.timestamp_ms / {self.MS_PER_DAY},
+                f.file_path_id,
+                COUNT(*),
+                COUNT(DISTINCT f.session_id)
+            FROM sessions s
+            JOIN file_changes f ON f.session_id = s.session_id
+            WHERE s.timestamp_ms >= :start_ms AND s.timestamp_ms < :end_ms
+            GROUP BY 1, 2, 3
+        """, params)
+
+    def rebuild_file_rollup(self) -> int:
+        """Recompute the file_changes_daily rollup from raw file changes
+
+        Repair command for a rollup that drifted from the raw data. Days
+        already pruned by apply_retention are kept. Runs in a single
+        transaction.
+
+        Returns:
+            Number of (project, day, file) rows in the rebuilt rollup
+        """
+        cursor = self.conn.cursor()
+
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            self._rebuild_file_rollup(cursor)
+            cursor.execute("SELECT COUNT(*) as count FROM file_changes_daily")
+            count = cursor.fetchone()['count']
+            self.conn.commit()
+            logger.info(f"File rollup rebuilt ({count} rows)")
+            return count
+        except sqlite3.Error as e:
+            logger.error(f"Failed to rebuild file rollup: {e}")
+            self._rollback()
+            raise
+
+    @_cached_query
+    def get_session_stats(self, days: int = 30) -> Dict[str, Any]:
+        """Get session statistics for the last N days
+
+        Args:
+            days: Number of days to include
+
+        Returns:
+            Dictionary of statistics
+        """
+        cursor = self._reader().cursor()
+
+        try:
+            # Get session counts
+            cursor.execute(f"""
+                SELECT
+                    SUM(total_sessions) as total_sessions,
+                    SUM(successful_sessions) as successful_sessions,
+                    SUM(files_changed) as total_files_changed,
+                    SUM(decisions_logged) as total_decisions,
+                    SUM(resume_points_generated) as total_resume_points,
+                    SUM(problems_encountered) as total_problems,
+                    SUM(sum_duration) * 1.0 / NULLIF(SUM(duration_count), 0)
+                        as avg_duration_seconds,
+                    SUM(tokens_estimated) as total_tokens_saved
+                FROM ({self._WINDOW_SOURCE_SQL})
+            """, self._window_params(days))
+
+            row = cursor.fetchone()
+
+            stats = {
+                'period_days': days,
+                'total_sessions': row['total_sessions'] or 0,
+                'successful_sessions': row['successful_sessions'] or 0,
+                'total_files_changed': row['total_files_changed'] or 0,
+                'total_decisions': row['total_decisions'] or 0,
+                'total_resume_points': row['total_resume_points'] or 0,
+                'total_problems': row['total_problems'] or 0,
+                'avg_duration_seconds': row['avg_duration_seconds'] or 0,
+                'total_tokens_saved': row['total_tokens_saved'] or 0
+            }
+
+            # Calculate success rate
+            if stats['total_sessions'] > 0:
+                stats['success_rate'] = (
+                    stats['successful_sessions'] / stats['total_sessions']
+                ) * 100
+            else:
+                stats['success_rate'] = 0.0
+
+            # Calculate time saved
+            stats['time_saved_minutes'] = self._calculate_time_saved_from_stats(stats)
+            stats['time_saved_hours'] = stats['time_saved_minutes'] / 60
+
+            return stats
+
+        except sqlite3.Error as e:
+            logger.error(f"Failed to get session stats: {e}")
+            return {}
+
+    @_cached_query
+    def get_distribution(
+        self,
+        metric: str = 'duration',
+        days: Optional[int] = None,
+        project: Optional[str] = None,
+        percentiles: Iterable[float] = (50, 90, 99)
+    ) -> Dict[str, Any]:
+        """Get percentiles and a histogram of session duration or files changed
+
+        Reads the session_histograms_daily bins, so no window sorts raw
+        sessions; for a window, only the partial first day is binned from raw
+        rows. Percentiles are interpolated linearly inside their bin (the
+        lower bound is returned for the open-ended last bin and for bins one
+        unit wide, where it is exact).
+
+        Args:
+            metric: 'duration' (seconds, sessions without a start time are
+                left out) or 'files' (files changed per session)
+            days: Only sessions from the last N days (None for all time)
+            project: Only sessions of this project (None for all projects)
+            percentiles: Percentiles to report (0-100)
+
+        Returns:
+            Dictionary with metric, period_days, project, count,
+            percentiles ({'p50': value, ...}, None when count is 0) and
+            histogram (lower, upper and sessions per bin from the lowest to
+            the highest non-empty bin; upper is None for the last bin)
+        """
+        if metric not in self.HISTOGRAM_BINS:
+            raise ValueError(
+                f"Unknown metric '{metric}', expected one of {sorted(self.HISTOGRAM_BINS)}"
+            )
+
+        project_id_sql = "(SELECT id FROM projects WHERE name = :project)"
+        project_sql = "" if project is None else f" AND project_id = {project_id_sql}"
+        raw_project_sql = "" if project is None else (
+            f" AND IFNULL(project_id, {self.UNKNOWN_PROJECT_ID}) = {project_id_sql}"
+        )
+
+        if days is None:
+            source = f"""
+                SELECT bin, sessions FROM session_histograms_daily
+                WHERE metric = :metric{project_sql}
+            """
+            params: Dict[str, Any] = {}
+        else:
+            source = f"""
+                SELECT bin, sessions FROM session_histograms_daily
+                WHERE metric = :metric AND day > :cutoff_day{project_sql}
+                UNION ALL
+                SELECT {self._histogram_bin_sql(metric)}, 1
+                FROM sessions
+                WHERE timestamp_ms >= :cutoff_ms AND timestamp_ms < :next_day_ms
+                    AND {self._HISTOGRAM_VALUE_SQL[metric].format(row='')} IS NOT NULL{raw_project_sql}
+            """
+            params = self._window_params(days)
+
+        params.update({'metric': metric, 'project': project})
+        cursor = self._reader().cursor()
+
+        try:
+            cursor.execute(f"""
+                SELECT bin, SUM(sessions) as sessions
+                FROM ({source})
+                GROUP BY bin
+            """, params)
+            counts = {row['bin']: row['sessions'] for row in cursor.fetchall()}
+
+        except sqlite3.Error as e:
+            logger.error(f"Failed to get {metric} distribution: {e}")
+            return {}
+
+        bins = self.HISTOGRAM_BINS[metric]
+        uppers = dict(zip(bins, bins[1:]))
+        histogram = []
+        if counts:
+            used = [lower for lower in bins if counts.get(lower)]
+            histogram = [
+                {'lower': lower, 'upper': uppers.get(lower), 'sessions': counts.get(lower, 0)}
+                for lower in bins
+                if used[0] <= lower <= used[-1]
+            ]
+
+        total = sum(counts.values())
+        return {
+            'metric': metric,
+            'period_days': days,
+            'project': project,
+            'count': total,
+            'percentiles': {
+                f"p{p:g}": self._histogram_percentile(histogram, total, p)
+                for p in percentiles
+            },
+            'histogram': histogram
+        }
+
+    @staticmethod
+    def _histogram_percentile(
+        histogram: List[Dict[str, Any]],
+        total: int,
+        percentile: float
+    ) -> Optional[float]:
+        """Interpolate a percentile from histogram bins
+
+        Args:
+            histogram: Bins in ascending order (lower, upper, sessions)
+            total: Sum of sessions over the bins
+            percentile: Percentile to compute (0-100)
+
+        Returns:
+            Estimated value, or None for an empty histogram
+        """
+        if total == 0:
+            return None
+
+        rank = total * percentile / 100
+        seen = 0
+        for entry in histogram:
+            if entry['sessions'] and seen + entry['sessions'] >= rank:
+                lower, upper = entry['lower'], entry['upper']
+                if upper is None or upper - lower <= 1:
+                    return float(lower)
+                fraction = (rank - seen) / entry['sessions']
+                return lower + (upper - lower) * fraction
+            seen += entry['sessions']
+
+        return float(histogram[-1]['lower'])
+
+    @_cached_query
+    def get_timeseries(
+        self,
+        metric: str = 'sessions',
+        bucket: str = 'day',
+        days: Optional[int] = 30,
+        project: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get a metric per day, week or month, with empty buckets filled in
+
+        Aggregates the sessions_daily rollup (plus the partial cutoff day
+        from raw rows, like get_session_stats), so summing a series gives the
+        window totals. Buckets without sessions come from a recursive CTE
+        and hold 0 for counts and None for averages and rates.
+
+        Args:
+            metric: Key of TIMESERIES_METRICS
+            bucket: 'day', 'week' (starting Monday) or 'month'
+            days: Only the last N days; the first bucket only counts sessions
+                after the cutoff (None for all time)
+            project: Only sessions of this project (None for all projects)
+
+        Returns:
+            List of dictionaries (start: first day of the bucket as
+            YYYY-MM-DD, value), oldest first, up to the bucket holding today
+
+        Raises:
+            ValueError: If metric or bucket is unknown, or days is negative
+        """
+        if metric not in self.TIMESERIES_METRICS:
+            raise ValueError(
+                f"Unknown metric '{metric}', expected one of {sorted(self.TIMESERIES_METRICS)}"
+            )
+        if bucket not in self._BUCKET_SQL:
+            raise ValueError(
+                f"Unknown bucket '{bucket}', expected one of {sorted(self._BUCKET_SQL)}"
+            )
+        if days is not None and days < 0:
+            raise ValueError("days must not be negative")
+
+        aggregate_sql, empty_value = self.TIMESERIES_METRICS[metric]
+        bucket_start_sql, next_bucket_sql = self._BUCKET_SQL[bucket]
+        project_sql = "" if project is None else (
+            " AND project_id = (SELECT id FROM projects WHERE name = :project)"
+        )
+
+        if days is None:
+            source = f"SELECT * FROM sessions_daily WHERE 1{project_sql}"
+            params: Dict[str, Any] = {}
+            start_day_sql = "(SELECT MIN(day) FROM source)"
+        else:
+            source = f"""
+                SELECT first_session_ms / {self.MS_PER_DAY} as day, w.*
+                FROM ({self._WINDOW_SOURCE_SQL}) w
+                WHERE 1{project_sql}
+            """
+            params = self._window_params(days)
+            start_day_sql = ":cutoff_day"
+
+        params.update({
+            'project': project,
+            'end_day': to_epoch_ms(datetime.now()) // self.MS_PER_DAY
+        })
+        cursor = self._reader().cursor()
+
+        try:
+            cursor.execute(f"""
+                WITH RECURSIVE
+                    source AS ({source}),
+                    buckets(start) AS (
+                        SELECT {bucket_start_sql.format(day=start_day_sql)}
+                        UNION ALL
+                        SELECT {next_bucket_sql.format(day='start')}
+                        FROM buckets
+                        WHERE {next_bucket_sql.format(day='start')} <= :end_day
+                    ),
+                    totals AS (
+                        SELECT {bucket_start_sql.format(day='day')} as start,
+                            {aggregate_sql} as value
+                        FROM source
+                        GROUP BY 1
+                    )
+                SELECT b.start, t.value
+                FROM buckets b
+                LEFT JOIN totals t ON t.start = b.start
+                WHERE b.start IS NOT NULL
+                ORDER BY b.start
+            """, params)
+
+            return [
+                {
+                    'start': from_epoch_ms(row['start'] * self.MS_PER_DAY).date().isoformat(),
+                    'value': empty_value if row['value'] is None else row['value']
+                }
+                for row in cursor.fetchall()
+            ]
+
+        except sqlite3.Error as e:
+            logger.error(f"Failed to get {metric} timeseries: {e}")
+            return []
+
+    def _rebuild_aggregates(self, cursor: sqlite3.Cursor):
+        """Recompute aggregate_stats from the sessions table
+
+        Runs inside the caller's transaction.
+
+        Args:
+            cursor: Cursor to execute on
+        """
+        cursor.execute("DELETE FROM aggregate_stats")
+
+        cursor.execute("""
+            SELECT
+                COUNT(*) as total_sessions,
+                SUM(CASE WHEN checkpoint_success = 1 THEN 1 ELSE 0 END) as successful_sessions,
+                SUM(files_changed) as total_files_changed,
+                SUM(decisions_logged) as total_decisions,
+                SUM(resume_points_generated) as total_resume_points,
+                SUM(CASE WHEN checkpoint_success = 1 THEN files_changed ELSE 0 END)
+                    as successful_files_changed,
+                SUM(CASE WHEN checkpoint_success = 1 THEN decisions_logged ELSE 0 END)
+                    as successful_decisions,
+                COUNT(DISTINCT project_id) as total_projects,
+                MIN(timestamp_ms) as first_session,
+                MAX(timestamp_ms) as last_session
+            FROM sessions
+        """)
+        row = cursor.fetchone()
+
+        values = [(key, row[key] or 0) for key in self.AGGREGATE_COUNTER_KEYS]
+        if row['total_sessions']:
+            values.append(('first_session', row['first_session']))
+            values.append(('last_session', row['last_session']))
+
+        cursor.executemany("""
+            INSERT INTO aggregate_stats (stat_key, stat_value, last_updated)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+        """, values)
+
+    def rebuild_aggregates(self) -> Dict[str, Any]:
+        """Recompute the aggregate_stats running totals from raw sessions
+
+        Repair command for totals that drifted (e.g. rows edited by hand with
+        triggers disabled). Runs in a single transaction.
+
+        Returns:
+            Lifetime aggregate statistics after the rebuild
+        """
+        cursor = self.conn.cursor()
+
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            self._rebuild_aggregates(cursor)
+            self.conn.commit()
+            logger.info("Aggregate statistics rebuilt")
+        except sqlite3.Error as e:
+            logger.error(f"Failed to rebuild aggregates: {e}")
+            self._rollback()
+            raise
+
+        return self.get_aggregate_stats()
+
+    def _read_aggregates(self) -> Dict[str, Any]:
+        """Read the aggregate_stats running totals
+
+        Returns:
+            Dictionary of stat_key -> value (counters as int)
+        """
+        cursor = self._reader().cursor()
+        cursor.execute("SELECT stat_key, stat_value FROM aggregate_stats")
+
+        values = {key: 0 for key in self.AGGREGATE_COUNTER_KEYS}
+        values['first_session'] = None
+        values['last_session'] = None
+
+        for row in cursor.fetchall():
+            key, value = row['stat_key'], row['stat_value']
+            if key in self.AGGREGATE_COUNTER_KEYS:
+                value = int(value)
+            values[key] = value
+
+        return values
+
+    @_cached_query
+    def get_aggregate_stats(self) -> Dict[str, Any]:
+        """Get lifetime aggregate statistics
+
+        Reads the running totals from aggregate_stats (O(1)) rather than
+        scanning sessions.
+
+        Returns:
+            Dictionary of aggregate metrics
+        """
+        try:
+            totals = self._read_aggregates()
+
+            stats = {
+                'total_sessions': totals['total_sessions'],
+                'successful_sessions': totals['successful_sessions'],
+                'total_files_changed': totals['total_files_changed'],
+                'total_decisions': totals['total_decisions'],
+                'total_resume_points': totals['total_resume_points'],
+                'first_session': _iso_from_ms(totals['first_session']),
+                'last_session': _iso_from_ms(totals['last_session']),
+                'total_projects': totals['total_projects']
+            }
+
+            # Calculate success rate
+            if stats['total_sessions'] > 0:
+                stats['success_rate'] = (
+                    stats['successful_sessions'] / stats['total_sessions']
+                ) * 100
+            else:
+                stats['success_rate'] = 0.0
+
+            # Calculate time saved
+            stats['time_saved_hours'] = self._time_saved_hours_from_totals(totals)
+
+            return stats
+
+        except sqlite3.Error as e:
+            logger.error(f"Failed to get aggregate stats: {e}")
+            return {}
+
+    @_cached_query
+    def calculate_time_saved(self) -> float:
+        """Calculate total time saved in hours
+
+        Returns:
+            Total hours saved across all sessions
+        """
+        try:
+            return self._time_saved_hours_from_totals(self._read_aggregates())
+
+        except sqlite3.Error as e:
+            logger.error(f"Failed to calculate time saved: {e}")
+            return 0.0
+
+    @_cached_query
+    def get_success_rate(self, days: Optional[int] = None) -> float:
+        """Calculate checkpoint success percentage
+
+        Args:
+            days: Number of days to include (None for all-time)
+
+        Returns:
+            Success rate as percentage (0-100)
+        """
+        cursor = self._reader().cursor()
+
+        try:
+            if days:
+                cursor.execute(f"""
+                    SELECT
+                        SUM(total_sessions) as total,
+                        SUM(successful_sessions) as successful
+                    FROM ({self._WINDOW_SOURCE_SQL})
+                """, self._window_params(days))
+            else:
+                cursor.execute("""
+                    SELECT
+                        MAX(CASE WHEN stat_key = 'total_sessions' THEN stat_value END) as total,
+                        MAX(CASE WHEN stat_key = 'successful_sessions' THEN stat_value END) as successful
+                    FROM aggregate_stats
+                """)
+
+            row = cursor.fetchone()
+            total = row['total'] or 0
+            successful = row['successful'] or 0
+
+            if total == 0:
+                return 0.0
+
+            return (successful / total) * 100
+
+        except sqlite3.Error as e:
+            logger.error(f"Failed to get success rate: {e}")
+            return 0.0
+
+    @_cached_query
+    def get_project_breakdown(self) -> List[Dict[str, Any]]:
+        """Get statistics broken down by project
+
+        Returns:
+            List of project statistics
+        """
+        cursor = self._reader().cursor()
+
+        try:
+            # Group by id first so names are looked up once per project
+            cursor.execute("""
+                SELECT p.name as project_name, d.*
+                FROM (
+                    SELECT
+                        project_id,
+                        SUM(total_sessions) as total_sessions,
+                        SUM(successful_sessions) as successful_sessions,
+                        SUM(files_changed) as total_files_changed,
+                        SUM(decisions_logged) as total_decisions,
+                        MIN(first_session_ms) as first_session_ms,
+                        MAX(last_session_ms) as last_session_ms
+                    FROM sessions_daily
+                    GROUP BY project_id
+                ) d
+                JOIN projects p ON p.id = d.project_id
+                ORDER BY d.total_sessions DESC
+            """)
+
+            projects = []
+            for row in cursor.fetchall():
+                project = {
+                    'project_name': row['project_name'],
+                    'total_sessions': row['total_sessions'],
+                    'successful_sessions': row['successful_sessions'],
+                    'total_files_changed': row['total_files_changed'],
+                    'total_decisions': row['total_decisions'],
+                    'first_session': _iso_from_ms(row['first_session_ms']),
+                    'last_session': _iso_from_ms(row['last_session_ms'])
+                }
+
+                # Calculate success rate
+                if project['total_sessions'] > 0:
+                    project['success_rate'] = (
+                        project['successful_sessions'] / project['total_sessions']
+                    ) * 100
+                else:
+                    project['success_rate'] = 0.0
+
+                projects.append(project)
+
+            return projects
+
+        except sqlite3.Error as e:
+            logger.error(f"Failed to get project breakdown: {e}")
+            return []
+
+    @_cached_query
+    def get_hot_files(
+        self,
+        project: Optional[str] = None,
+        days: Optional[int] = None,
+        top_k: int = 20
+    ) -> List[Dict[str, Any]]:
+        """Get the most frequently changed files
+
+        Reads the file_changes_daily rollup; for a window, the partial first
+        day is counted from raw rows like get_session_stats does.
+
+        Args:
+            project: Only files of this project (None for all projects)
+            days: Only changes in the last N days (None for all time)
+            top_k: Maximum number of files to return
+
+        Returns:
+            List of dictionaries (project_name, file_path, changes, sessions
+            that changed the file, last_changed date), most changes first
+        """
+        project_id_sql = "(SELECT id FROM projects WHERE name = :project)"
+        project_sql = "" if project is None else f" AND project_id = {project_id_sql}"
+        raw_project_sql = "" if project is None else (
+            f" AND IFNULL(s.project_id, {self.UNKNOWN_PROJECT_ID}) = {project_id_sql}"
+        )
+
+        if days is None:
+            source = f"""
+                SELECT project_id, file_path_id, changes, sessions, day
+                FROM file_changes_daily
+                WHERE 1{project_sql}
+            """
+            params: Dict[str, Any] = {}
+        else:
+            # Once the cutoff day is pruned its rollup row counts whole
+            horizon_day_sql = f"{self._HORIZON_MS_SQL} / {self.MS_PER_DAY}"
+            source = f"""
+                SELECT project_id, file_path_id, changes, sessions, day
+                FROM file_changes_daily
+                WHERE (day > :cutoff_day OR (day = :cutoff_day AND day < {horizon_day_sql})){project_sql}
+                UNION ALL
+                SELECT
+                    IFNULL(s.project_id, {self.UNKNOWN_PROJECT_ID}) as project_id,
+                    f.file_path_id,
+                    COUNT(*),
+                    COUNT(DISTINCT f.session_id),
+                    :cutoff_day
+                FROM sessions s
+                JOIN file_changes f ON f.session_id = s.session_id
+                WHERE s.timestamp_ms >= :cutoff_ms AND s.timestamp_ms < :next_day_ms
+                    AND :cutoff_day >= {horizon_day_sql}{raw_project_sql}
+                GROUP BY 1, 2
+            """
+            params = self._window_params(days)
+
+        params.update({'project': project, 'top_k': top_k})
+        cursor = self._reader().cursor()
+
+        try:
+            # Grouped by id; names are joined only to order ties and return
+            cursor.execute(f"""
+                SELECT
+                    p.name as project_name,
+                    fp.name as file_path,
+                    h.changes,
+                    h.sessions,
+                    h.last_day
+                FROM (
+                    SELECT
+                        project_id,
+                        file_path_id,
+                        SUM(changes) as changes,
+                        SUM(sessions) as sessions,
+                        MAX(day) as last_day
+                    FROM ({source})
+                    GROUP BY project_id, file_path_id
+                ) h
+                JOIN projects p ON p.id = h.project_id
+                JOIN file_paths fp ON fp.id = h.file_path_id
+                ORDER BY h.changes DESC, fp.name
+                LIMIT :top_k
+            """, params)
+
+            return [
+                {
+                    'project_name': row['project_name'],
+                    'file_path': row['file_path'],
+                    'changes': row['changes'],
+                    'sessions': row['sessions'],
+                    'last_changed': from_epoch_ms(row['last_day'] * self.MS_PER_DAY).date().isoformat()
+                }
+                for row in cursor.fetchall()
+            ]
+
+        except sqlite3.Error as e:
+            logger.error(f"Failed to get hot files: {e}")
+            return []
+
+    @_cached_query
+    def get_recent_sessions(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """Get the most recent sessions
+
+        Args:
+            limit: Maximum number of sessions to return
+
+        Returns:
+            List of session dictionaries, newest first ('timestamp' is a datetime)
+        """
+        cursor = self._reader().cursor()
+
+        try:
+            cursor.execute("""
+                SELECT
+                    s.session_id,
+                    s.timestamp_ms,
+                    p.name as project_name,
+                    s.files_changed,
+                    s.decisions_logged,
+                    s.checkpoint_success
+                FROM sessions s
+                LEFT JOIN projects p ON p.id = s.project_id
+                ORDER BY s.timestamp_ms DESC
+                LIMIT ?
+            """, (limit,))
+
+            return [
+                {
+                    'session_id': row['session_id'],
+                    'timestamp': from_epoch_ms(row['timestamp_ms']),
+                    'project_name': row['project_name'],
+                    'files_changed': row['files_changed'],
+                    'decisions_logged': row['decisions_logged'],
+                    'checkpoint_success': bool(row['checkpoint_success'])
+                }
+                for row in cursor.fetchall()
+            ]
+
+        except sqlite3.Error as e:
+            logger.error(f"Failed to get recent sessions: {e}")
+            return []
+
+    @_cached_query
+    def get_dashboard_snapshot(self, days: Optional[int] = None, recent: int = 5) -> Dict[str, Any]:
+        """Get everything the status dashboard and exports show, read in one transaction
+
+        The summary, project breakdown and recent sessions all come from the
+        same snapshot of the database, so they agree with each other while
+        ingest runs. Each part reads a rollup, the running totals or an index
+        (no scan of the raw tables).
+
+        Args:
+            days: Summarize the last N days (None for all time)
+            recent: Number of recent sessions to include (0 for none)
+
+        Returns:
+            Dictionary with period_days, summary (get_session_stats for a
+            window, get_aggregate_stats otherwise), projects
+            (get_project_breakdown) and recent_sessions (get_recent_sessions)
+        """
+        conn = self._reader()
+        # Inside a caller's transaction the reads already share a snapshot
+        own_transaction = not conn.in_transaction
+
+        try:
+            if own_transaction:
+                conn.execute("BEGIN")
+
+            return {
+                'period_days': days,
+                'summary': self.get_session_stats(days) if days else self.get_aggregate_stats(),
+                'projects': self.get_project_breakdown(),
+                'recent_sessions': self.get_recent_sessions(recent) if recent > 0 else []
+            }
+
+        except sqlite3.Error as e:
+            logger.error(f"Failed to get dashboard snapshot: {e}")
+            return {}
+
+        finally:
+            if own_transaction and conn.in_transaction:
+                conn.commit()
+
+    def _rebuild_search_index(self, cursor: sqlite3.Cursor):
+        """Re-index every decision into decisions_fts (if it exists)
+
+        Args:
+            cursor: Cursor to execute on
+        """
+        if self._has_search_index(cursor):
+            cursor.execute("INSERT INTO decisions_fts (decisions_fts) VALUES ('rebuild')")
+
+    def rebuild_search_index(self) -> int:
+        """Rebuild the decisions full-text index from the decisions table
+
+        Repair command for an index that drifted from the raw data; the
+        rebuilt index is also fully merged, which helps query latency after
+        large loads. Runs in a single transaction.
+
+        Returns:
+            Number of decisions indexed (0 when FTS5 is unavailable)
+        """
+        cursor = self.conn.cursor()
+
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            if not self._has_search_index(cursor):
+                self._rollback()
+                logger.warning("No full-text index to rebuild (FTS5 unavailable)")
+                return 0
+
+            self._rebuild_search_index(cursor)
+            cursor.execute("SELECT COUNT(*) as count FROM decisions")
+            count = cursor.fetchone()['count']
+            self.conn.commit()
+            logger.info(f"Search index rebuilt ({count} decisions)")
+            return count
+        except sqlite3.Error as e:
+            logger.error(f"Failed to rebuild search index: {e}")
+            self._rollback()
+            raise
+
+    @_cached_query
+    def search_decisions(
+        self,
+        query: str,
+        project: Optional[str] = None,
+        since: Any = None,
+        until: Any = None,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """Full-text search over logged decisions
+
+        The query uses FTS5 syntax: words (all must match), "quoted phrases",
+        prefix* matches and AND/OR/NOT. Text that is not valid query syntax is
+        searched as plain words instead. Results are ranked by bm25 relevance.
+        Without FTS5, every word is matched with a LIKE scan and results are
+        ordered newest first.
+
+        Args:
+            query: Search text
+            project: Only decisions from sessions of this project
+            since: Only decisions at or after this time (datetime, ISO string
+                or epoch ms)
+            until: Only decisions before this time
+            limit: Maximum number of results
+
+        Returns:
+            List of result dictionaries (decision_id, session_id, project_name,
+            timestamp as datetime, decision_text, snippet with matches in
+            [brackets], rank), best match first
+        """
+        filters = []
+        params: List[Any] = []
+        if project is not None:
+            filters.append("s.project_id = (SELECT id FROM projects WHERE name = ?)")
+            params.append(project)
+        if since is not None:
+            filters.append("d.timestamp_ms >= ?")
+            params.append(to_epoch_ms(since))
+        if until is not None:
+            filters.append("d.timestamp_ms < ?")
+            params.append(to_epoch_ms(until))
+        filter_sql = ''.join(f" AND {condition}" for condition in filters)
+
+        conn = self._reader()
+        cursor = conn.cursor()
 
         try:
-            cursor.execute("""
-                SELECT
-                    project_name,
-                    COUNT(*) as total_sessions,
-                    SUM(CASE WHEN checkpoint_success = 1 THEN 1 ELSE 0 END) as successful_sessions,
-                    SUM(files_changed) as total_files_changed,
-                    SUM(decisions_logged) as total_decisions,
-                    MIN(timestamp) as first_session,
-                    MAX(timestamp) as last_session
-                FROM sessions
-                GROUP BY project_name
-                ORDER BY total_sessions DESC
-            """)
+            if self._has_search_index(conn):
+                if filters:
+                    # bm25() is only evaluated for rows that pass the filters
+                    sql = f"""
+                        SELECT
+                            d.id, d.session_id, d.decision_text, d.timestamp_ms, p.name as project_name,
+                            snippet(decisions_fts, 0, '[', ']', '...', 16) as snippet,
+                            bm25(decisions_fts) as rank
+                        FROM decisions_fts
+                        JOIN decisions d ON d.id = decisions_fts.rowid
+                        LEFT JOIN sessions s ON s.session_id = d.session_id
+                        LEFT JOIN projects p ON p.id = s.project_id
+                        WHERE decisions_fts MATCH ?{filter_sql}
+                        ORDER BY rank
+                        LIMIT ?
+                    """
+                else:
+                    # Unfiltered: FTS5 sorts by its rank column itself and
+                    # snippets are only built for the rows returned
+                    sql = """
+                        SELECT
+                            d.id, d.session_id, d.decision_text, d.timestamp_ms, p.name as project_name,
+                            f.snippet, f.rank
+                        FROM (
+                            SELECT
+                                rowid,
+                                rank,
+                                snippet(decisions_fts, 0, '[', ']', '...', 16) as snippet
+                            FROM decisions_fts
+                            WHERE decisions_fts MATCH ?
+                            ORDER BY rank
+                            LIMIT ?
+                        ) f
+                        JOIN decisions d ON d.id = f.rowid
+                        LEFT JOIN sessions s ON s.session_id = d.session_id
+                        LEFT JOIN projects p ON p.id = s.project_id
+                        ORDER BY f.rank
+                    """
+                try:
+                    cursor.execute(sql, [query, *params, limit])
+                except sqlite3.OperationalError as e:
+                    if 'fts5' not in str(e):
+                        raise
+                    literal = _fts_literal_query(query)
+                    if not literal:
+                        return []
+                    cursor.execute(sql, [literal, *params, limit])
+            else:
+                words = re.findall(r'\w+', query)
+                if not words:
+                    return []
+                cursor.execute(f"""
+                    SELECT
+                        d.id, d.session_id, d.decision_text, d.timestamp_ms, p.name as project_name,
+                        d.decision_text as snippet,
+                        NULL as rank
+                    FROM decisions d
+                    LEFT JOIN sessions s ON s.session_id = d.session_id
+                    LEFT JOIN projects p ON p.id = s.project_id
+                    WHERE {' AND '.join(["d.decision_text LIKE ?"] * len(words))}{filter_sql}
+                    ORDER BY d.timestamp_ms DESC
+                    LIMIT ?
+                """, [*(f'%{word}%' for word in words), *params, limit])
 
-            projects = []
-            for row in cursor.fetchall():
-                project = {
+            return [
+                {
+                    'decision_id': row['id'],
+                    'session_id': row['session_id'],
                     'project_name': row['project_name'],
-                    'total_sessions': row['total_sessions'],
-                    'successful_sessions': row['successful_sessions'],
-                    'total_files_changed': row['total_files_changed'],
-                    'total_decisions': row['total_decisions'],
-                    'first_session': row['first_session'],
-                    'last_session': row['last_session']
+                    'timestamp': from_epoch_ms(row['timestamp_ms']),
+                    'decision_text': row['decision_text'],
+                    'snippet': row['snippet'],
+                    'rank': row['rank']
                 }
+                for row in cursor.fetchall()
+            ]
 
-                # Calculate success rate
-                if project['total_sessions'] > 0:
-                    project['success_rate'] = (
-                        project['successful_sessions'] / project['total_sessions']
-                    ) * 100
-                else:
-                    project['success_rate'] = 0.0
+        except sqlite3.Error as e:
+            logger.error(f"Failed to search decisions: {e}")
+            return []
 
-                projects.append(project)
+    def iter_raw_rows(
+        self,
+        table: str = 'sessions',
+        since: Any = None,
+        until: Any = None,
+        project: Optional[str] = None,
+        batch_size: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream every row of a raw table, oldest session first
 
-            return projects
+        Rows are fetched batch_size at a time from one cursor inside one read
+        transaction, so memory use does not depend on the size of the table
+        and the export is a consistent snapshot. The rows come off
+        idx_sessions_timestamp in order (no sort). Unlike the query methods,
+        a database error is raised: a silently truncated export would look
+        complete.
+
+        Args:
+            table: 'sessions', 'file_changes' or 'decisions'
+            since: Only rows of sessions at or after this time (datetime, ISO
+                string or epoch ms)
+            until: Only rows of sessions before this time
+            project: Only rows of sessions of this project
+            batch_size: Rows per fetchmany (default RAW_EXPORT_BATCH_SIZE)
+
+        Returns:
+            Iterator of dictionaries keyed by RAW_EXPORT_COLUMNS[table];
+            timestamps are ISO 8601 strings
+        """
+        if table not in self.RAW_EXPORT_COLUMNS:
+            raise ValueError(
+                f"Unknown table '{table}' (expected one of: {', '.join(self.RAW_EXPORT_COLUMNS)})"
+            )
+        # Checked here rather than on first next()
+        return self._iter_raw_rows(
+            self._reader(), table, to_epoch_ms(since), to_epoch_ms(until), project,
+            batch_size or self.RAW_EXPORT_BATCH_SIZE
+        )
+
+    def _iter_raw_rows(
+        self,
+        conn: sqlite3.Connection,
+        table: str,
+        since_ms: Optional[int],
+        until_ms: Optional[int],
+        project: Optional[str],
+        batch_size: int
+    ) -> Iterator[Dict[str, Any]]:
+        """Generator behind iter_raw_rows, reading from conn
+
+        Args:
+            conn: Connection to read from
+            table: Table name (validated by iter_raw_rows)
+            since_ms: Lower bound on the session timestamp, or None
+            until_ms: Upper bound (exclusive) on the session timestamp, or None
+            project: Project name, or None
+            batch_size: Rows per fetchmany
+
+        Yields:
+            Row dictionaries
+        """
+        filters = []
+        params: List[Any] = []
+        if since_ms is not None:
+            filters.append("s.timestamp_ms >= ?")
+            params.append(since_ms)
+        if until_ms is not None:
+            filters.append("s.timestamp_ms < ?")
+            params.append(until_ms)
+        if project is not None:
+            # Unary + keeps idx_sessions_project out of the plan, so rows are
+            # read in timestamp index order instead of being sorted
+            filters.append("+s.project_id = (SELECT id FROM projects WHERE name = ?)")
+            params.append(project)
+        where_sql = f"WHERE {' AND '.join(filters)}" if filters else ""
+
+        # CROSS JOIN fixes sessions as the outer loop, so child rows follow
+        # the session order too
+        if table == 'sessions':
+            sql = f"""
+                SELECT
+                    s.session_id, s.timestamp_ms, s.started_at_ms, s.duration_seconds,
+                    s.checkpoint_success, s.files_changed, s.decisions_logged,
+                    s.resume_points_generated, s.problems_encountered, s.tokens_estimated,
+                    p.name, s.git_commit_hash, b.name, t.name
+                FROM sessions s
+                LEFT JOIN projects p ON p.id = s.project_id
+                LEFT JOIN git_branches b ON b.id = s.git_branch_id
+                LEFT JOIN tools t ON t.id = s.tool_id
+                {where_sql}
+                ORDER BY s.timestamp_ms
+            """
+            convert = (
+                lambda row: (row[0], _iso_from_ms(row[1]), _iso_from_ms(row[2]), row[3],
+                             bool(row[4]), *row[5:])
+            )
+        elif table == 'file_changes':
+            sql = f"""
+                SELECT s.session_id, s.timestamp_ms, p.name, fp.name, f.change_type
+                FROM sessions s
+                CROSS JOIN file_changes f ON f.session_id = s.session_id
+                LEFT JOIN projects p ON p.id = s.project_id
+                LEFT JOIN file_paths fp ON fp.id = f.file_path_id
+                {where_sql}
+                ORDER BY s.timestamp_ms
+            """
+            convert = lambda row: (row[0], _iso_from_ms(row[1]), *row[2:])
+        else:
+            sql = f"""
+                SELECT d.id, s.session_id, s.timestamp_ms, p.name, d.timestamp_ms, d.decision_text
+                FROM sessions s
+                CROSS JOIN decisions d ON d.session_id = s.session_id
+                LEFT JOIN projects p ON p.id = s.project_id
+                {where_sql}
+                ORDER BY s.timestamp_ms
+            """
+            convert = (
+                lambda row: (row[0], row[1], _iso_from_ms(row[2]), row[3],
+                             _iso_from_ms(row[4]), row[5])
+            )
+
+        columns = self.RAW_EXPORT_COLUMNS[table]
+        own_transaction = not conn.in_transaction
+        cursor = conn.cursor()
+        # Plain tuples: no per-row sqlite3.Row on millions of rows
+        cursor.row_factory = None
+
+        try:
+            if own_transaction:
+                conn.execute("BEGIN")
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(columns, convert(row)))
 
         except sqlite3.Error as e:
-            logger.error(f"Failed to get project breakdown: {e}")
-            return []
+            logger.error(f"Failed to export {table}: {e}")
+            raise
+
+        finally:
+            cursor.close()
+            if own_transaction and conn.in_transaction:
+                conn.commit()
+
+    def apply_retention(
+        self,
+        days: Optional[int] = None,
+        batch_size: int = 500,
+        vacuum_pages: int = 1000
+    ) -> Dict[str, Any]:
+        """Prune raw file changes and decisions of old sessions
+
+        Sessions (and with them lifetime and windowed statistics) are kept.
+        First the file rollup of the days about to be pruned is recomputed
+        from raw rows and the retention horizon is moved to the start of
+        the cutoff day, in one transaction; from then on those rollup rows
+        are frozen. Child rows of sessions before the horizon are then
+        deleted batch_size sessions per transaction (every run scans them
+        all, so late backfills of old checkpoints get pruned too), and freed pages are
+        returned to the file vacuum_pages at a time with incremental_vacuum
+        (databases without auto_vacuum=INCREMENTAL keep their free pages;
+        see enable_incremental_vacuum). The horizon never moves backwards.
+
+        Args:
+            days: Keep raw rows of the last N days (default RETENTION_DAYS)
+            batch_size: Sessions whose child rows are deleted per transaction
+            vacuum_pages: Pages released per incremental_vacuum step
+
+        Returns:
+            Dictionary with horizon (ISO date), sessions_scanned,
+            file_changes and decisions pruned, batches and pages_vacuumed
+        """
+        days = self.RETENTION_DAYS if days is None else days
+        if days < 1:
+            raise ValueError("days must be at least 1")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if vacuum_pages < 1:
+            raise ValueError("vacuum_pages must be at least 1")
+
+        cutoff_day = to_epoch_ms(datetime.now() - timedelta(days=days)) // self.MS_PER_DAY
+        horizon_ms = self._write(self._advance_retention_horizon, cutoff_day * self.MS_PER_DAY)
+
+        result = {
+            'horizon': from_epoch_ms(horizon_ms).date().isoformat(),
+            'sessions_scanned': 0,
+            'file_changes': 0,
+            'decisions': 0,
+            'batches': 0,
+            'pages_vacuumed': 0,
+        }
+
+        after = (-1, -1)
+        while True:
+            counts, after = self._write(self._prune_batch, horizon_ms, after, batch_size)
+            if after is None:
+                break
+            for key, value in counts.items():
+                result[key] += value
+            result['batches'] += 1
+
+        # Bounded by the free pages found now, so concurrent deletes by
+        # other writers cannot keep this loop going
+        if self._reader().execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            remaining = self._reader().execute("PRAGMA freelist_count").fetchone()[0]
+            while remaining > 0:
+                released = self._write(self._incremental_vacuum, min(vacuum_pages, remaining))
+                if released == 0:
+                    break
+                result['pages_vacuumed'] += released
+                remaining -= released
+
+        logger.info(
+            f"Retention applied before {result['horizon']}: {result['file_changes']} file changes "
+            f"and {result['decisions']} decisions pruned, {result['pages_vacuumed']} pages released"
+        )
+        return result
+
+    def _advance_retention_horizon(self, horizon_ms: int) -> int:
+        """Freeze the file rollup up to horizon_ms and record the new horizon
+
+        Args:
+            horizon_ms: Requested horizon (start of a day, epoch ms)
+
+        Returns:
+            Horizon in effect afterwards (never earlier than before)
+        """
+        cursor = self.conn.cursor()
+
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            current_ms = cursor.execute(f"SELECT {self._HORIZON_MS_SQL}").fetchone()[0]
+
+            if horizon_ms > current_ms:
+                # Make sure the rollup holds everything about to be pruned
+                self._refresh_file_rollup(cursor, current_ms, horizon_ms)
+                cursor.execute("""
+                    INSERT INTO settings (key, value) VALUES ('retention_horizon_ms', ?)
+                    ON CONFLICT(key) DO UPDATE SET value = excluded.value
+                """, (horizon_ms,))
+            else:
+                horizon_ms = current_ms
+
+            self.conn.commit()
+            return horizon_ms
+
+        except sqlite3.Error as e:
+            logger.error(f"Failed to advance retention horizon: {e}")
+            self._rollback()
+            raise
+
+    def _prune_batch(
+        self,
+        horizon_ms: int,
+        after: Tuple[int, int],
+        batch_size: int
+    ) -> Tuple[Dict[str, int], Optional[Tuple[int, int]]]:
+        """Delete the child rows of the next batch of sessions before the horizon
+
+        Sessions are walked in (timestamp_ms, rowid) order, which the
+        timestamp index provides without sorting.
+
+        Args:
+            horizon_ms: Retention horizon (epoch ms)
+            after: (timestamp_ms, rowid) of the last session already handled
+            batch_size: Maximum number of sessions in this batch
+
+        Returns:
+            Tuple of (rows deleted per table, key to continue after; None
+            when no sessions were left)
+        """
+        cursor = self.conn.cursor()
+
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("""
+                SELECT rowid, session_id, timestamp_ms FROM sessions
+                WHERE timestamp_ms < ? AND (timestamp_ms, rowid) > (?, ?)
+                ORDER BY timestamp_ms, rowid
+                LIMIT ?
+            """, (horizon_ms, after[0], after[1], batch_size))
+            rows = cursor.fetchall()
+
+            if not rows:
+                self.conn.commit()
+                return {}, None
+
+            session_ids = json.dumps([row['session_id'] for row in rows])
+            cursor.execute(
+                "DELETE FROM file_changes WHERE session_id IN (SELECT value FROM json_each(?))",
+                (session_ids,)
+            )
+            file_changes = cursor.rowcount
+            cursor.execute(
+                "DELETE FROM decisions WHERE session_id IN (SELECT value FROM json_each(?))",
+                (session_ids,)
+            )
+            decisions = cursor.rowcount
+
+            self.conn.commit()
+            counts = {'sessions_scanned': len(rows), 'file_changes': file_changes, 'decisions': decisions}
+            return counts, (rows[-1]['timestamp_ms'], rows[-1]['rowid'])
+
+        except sqlite3.Error as e:
+            logger.error(f"Failed to prune retention batch: {e}")
+            self._rollback()
+            raise
+
+    def _incremental_vacuum(self, pages: int) -> int:
+        """Return up to pages free pages to the file system
+
+        Args:
+            pages: Maximum number of pages to release
+
+        Returns:
+            Number of pages released
+        """
+        before = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        # Runs in its own short transaction; the pragma only does its work
+        # when stepped to completion
+        self.conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+        return before - self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def enable_incremental_vacuum(self) -> bool:
+        """Switch an existing database to auto_vacuum=INCREMENTAL
+
+        New databases are created that way. Converting an older one rewrites
+        the whole file with VACUUM, holding an exclusive lock while it runs,
+        so it is a one-off maintenance step.
+
+        Returns:
+            True if the database was converted, False if it already was
+        """
+        if self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return False
+
+        try:
+            self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            self.conn.execute("VACUUM")
+        except sqlite3.Error as e:
+            logger.error(f"Failed to enable incremental vacuum: {e}")
+            raise
+
+        logger.info("Database converted to auto_vacuum=INCREMENTAL")
+        return True
 
     def close(self):
         """Close database connection"""
+        self._result_cache.clear()
         if self.conn:
             self.conn.close()
             logger.info("Database connection closed")
 
-    def __enter__(self):
-        """Context manager entry"""
-        return self
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit"""
-        self.close()
+class ThreadSafeAnalyticsDB(AnalyticsDB):
+    """AnalyticsDB that can be shared between threads
 
+    All writes (inserts, rebuilds, migrations) are funneled through a queue
+    to one dedicated writer thread that owns the read-write connection, so
+    SQLite writes stay serialized. Each calling thread reads through its own
+    read-only connection, opened on first use and kept in a pool that is
+    closed together with the database. The query methods are the same as
+    AnalyticsDB's.
 
-if __name__ == "__main__":
-    # Simple test
-    db = AnalyticsDB()
-    print("Database initialized successfully")
-    print(f"Database location: {db.db_path}")
+    Requires a file database: ':memory:' databases cannot be shared between
+    connections.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, profile: str = 'default', trace: bool = False):
+        """Initialize the writer thread and reader pool
+
+        Args:
+            db_path: Path to SQLite database file. If None, uses default location
+            profile: Connection profile name from PROFILES
+                ('default', 'ingest' or 'read')
+            trace: Record every SQL statement, on the writer and all reader
+                connections, for query_profile()
+        """
+        if db_path == ':memory:':
+            raise ValueError("ThreadSafeAnalyticsDB requires a file database")
+
+        self._writes: 'queue.Queue[Optional[tuple]]' = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._closed = False
+
+        super().__init__(db_path=db_path, profile=profile, trace=trace)
+
+    def _open(self):
+        """Start the writer thread and wait for it to connect and migrate"""
+        ready: Future = Future()
+        self._writer = threading.Thread(
+            target=self._writer_loop,
+            args=(ready,),
+            name='analytics-db-writer',
+            daemon=True
+        )
+        self._writer.start()
+
+        try:
+            ready.result()
+        except Exception:
+            self._writer.join()
+            self._closed = True
+            raise
+
+    def _writer_loop(self, ready: Future):
+        """Writer thread: own the read-write connection and run queued writes
+
+        Args:
+            ready: Resolved once the schema is up to date (or with the error)
+        """
+        try:
+            super()._open()
+        except BaseException as e:
+            if self.conn:
+                self.conn.close()
+            ready.set_exception(e)
+            return
+
+        ready.set_result(None)
+
+        while True:
+            item = self._writes.get()
+            if item is None:
+                break
+
+            future, func, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+        self.conn.close()
+
+    def _submit(self, func, *args, **kwargs):
+        """Run a write on the writer thread and wait for its result
+
+        Args:
+            func: Callable to run against the read-write connection
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Whatever func returns (its exception is re-raised here)
+        """
+        if threading.current_thread() is self._writer:
+            return func(*args, **kwargs)
+
+        future: Future = Future()
+        with self._state_lock:
+            # Checked under the lock so nothing is queued behind the stop marker
+            if self._closed:
+                raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+            self._writes.put((future, func, args, kwargs))
+        return future.result()
+
+    def _reader(self) -> sqlite3.Connection:
+        """Return this thread's read-only connection, opening it on first use
+
+        Returns:
+            Read-only connection owned by the calling thread
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+
+        if self._closed:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+
+        uri = Path(self.db_path).resolve().as_uri() + '?mode=ro'
+        try:
+            # check_same_thread=False only so close() can release connections
+            # of other threads; each connection is used by one thread
+            conn = self._sqlite_connect(uri, uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._apply_profile(conn, read_only=True)
+            conn.execute("PRAGMA query_only = 1")
+        except sqlite3.Error as e:
+            logger.error(f"Reader connection failed: {e}")
+            raise
+
+        with self._readers_lock:
+            self._readers.append(conn)
+        self._local.conn = conn
+        return conn
+
+    def _data_version(self, conn: sqlite3.Connection) -> int:
+        """Token that changes whenever data a query on conn reads may have changed
+
+        Readers are separate connections, so every write (all of them go
+        through the writer connection) changes their PRAGMA data_version.
+
+        Args:
+            conn: This thread's reader connection
+
+        Returns:
+            Version to compare cached results against
+        """
+        return conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _write(self, func, *args, **kwargs):
+        """Run one write step on the writer thread
+
+        Args:
+            func: Callable using self.conn
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Whatever func returns
+        """
+        return self._submit(func, *args, **kwargs)
+
+    def initialize_schema(self):
+        """Bring the database schema up to date on the writer thread"""
+        return self._submit(super().initialize_schema)
 
-    # Display schema info
-    cursor = db.conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-    tables = cursor.fetchall()
-    print(f"\nTables created: {[t['name'] for t in tables]}")
+    def insert_session(self, checkpoint_data: Dict[str, Any]) -> bool:
+        """Insert a session record on the writer thread
+
+        Args:
+            checkpoint_data: Checkpoint JSON data
+
+        Returns:
+            True if successful, False otherwise
+        """
+        return self._submit(super().insert_session, checkpoint_data)
+
+    def insert_sessions(self, checkpoints: Iterable[Dict[str, Any]]) -> List[bool]:
+        """Insert several sessions in one transaction on the writer thread
+
+        Args:
+            checkpoints: Iterable of checkpoint JSON data
+
+        Returns:
+            One flag per checkpoint, True if it was inserted
+        """
+        return self._submit(super().insert_sessions, checkpoints)
+
+    def merge_from(self, path: str) -> Dict[str, int]:
+        """Merge another analytics database on the writer thread
+
+        Args:
+            path: Database file to merge from (same schema version)
+
+        Returns:
+            Dictionary with inserted, skipped, file_changes and decisions counts
+        """
+        return self._submit(super().merge_from, path)
+
+    def rebuild_aggregates(self) -> Dict[str, Any]:
+        """Recompute the aggregate_stats running totals on the writer thread
+
+        Returns:
+            Lifetime aggregate statistics after the rebuild
+        """
+        return self._submit(super().rebuild_aggregates)
+
+    def rebuild_search_index(self) -> int:
+        """Rebuild the decisions full-text index on the writer thread
+
+        Returns:
+            Number of decisions indexed
+        """
+        return self._submit(super().rebuild_search_index)
+
+    def rebuild_file_rollup(self) -> int:
+        """Recompute the file_changes_daily rollup on the writer thread
+
+        Returns:
+            Number of (project, day, file) rows in the rebuilt rollup
+        """
+        return self._submit(super().rebuild_file_rollup)
 
-    db.close()
+    def rebuild_daily_rollup(self) -> int:
+        """Recompute the sessions_daily rollup on the writer thread
+
+        Returns:
+            Number of (day, project) rows in the rebuilt rollup
+        """
+        return self._submit(super().rebuild_daily_rollup)
+
+    def enable_incremental_vacuum(self) -> bool:
+        """Switch to auto_vacuum=INCREMENTAL on the writer thread
+
+        Returns:
+            True if the database was converted, False if it already was
+        """
+        return self._submit(super().enable_incremental_vacuum)
+
+    def close(self):
+        """Stop the writer thread and close all connections
+
+        Writes already queued are completed first.
+        """
+        with self._state_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._writes.put(None)
+
+        self._writer.join()
+
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        self._result_cache.clear()
+        for conn in readers:
+            conn.close()
+
+        logger.info("Database connections closed")
+
+
+def main():
+    """CLI entry point for database maintenance"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Analytics database maintenance")
+    parser.add_argument(
+        '--db-path',
+        help='Path to analytics database',
+        default=None
+    )
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('info', help='Show database location and tables (default)')
+    subparsers.add_parser(
+        'rebuild-aggregates',
+        help='Recompute lifetime running totals from raw sessions'
+    )
+    subparsers.add_parser(
+        'rebuild-daily-rollup',
+        help='Recompute the per-project daily rollup from raw sessions'
+    )
+    subparsers.add_parser(
+        'rebuild-file-rollup',
+        help='Recompute the per-file daily rollup from raw file changes'
+    )
+    subparsers.add_parser(
+        'rebuild-search-index',
+        help='Rebuild the full-text index over logged decisions'
+    )
+    merge = subparsers.add_parser(
+        'merge',
+        help='Copy in the sessions of other machines\' databases (duplicates skipped)'
+    )
+    merge.add_argument(
+        'sources',
+        nargs='+',
+        metavar='SOURCE',
+        help='Database files to merge into --db-path'
+    )
+    retention = subparsers.add_parser(
+        'retention',
+        help='Prune old file changes and decisions (lifetime stats are kept)'
+    )
+    retention.add_argument(
+        '--days',
+        type=int,
+        default=AnalyticsDB.RETENTION_DAYS,
+        help=f'Keep raw rows of the last N days (default: {AnalyticsDB.RETENTION_DAYS})'
+    )
+    retention.add_argument(
+        '--batch-size',
+        type=int,
+        default=500,
+        help='Sessions pruned per transaction (default: 500)'
+    )
+    retention.add_argument(
+        '--vacuum-pages',
+        type=int,
+        default=1000,
+        help='Pages released per incremental vacuum step (default: 1000)'
+    )
+    retention.add_argument(
+        '--enable-incremental-vacuum',
+        action='store_true',
+        help='First convert an older database to auto_vacuum=INCREMENTAL (full VACUUM)'
+    )
+
+    args = parser.parse_args()
+
+    db = AnalyticsDB(db_path=args.db_path)
+
+    try:
+        if args.command == 'rebuild-aggregates':
+            stats = db.rebuild_aggregates()
+            print(f"Aggregates rebuilt: {stats.get('total_sessions', 0)} sessions, "
+                  f"{stats.get('total_projects', 0)} projects")
+            return 0
+
+        if args.command == 'rebuild-daily-rollup':
+            count = db.rebuild_daily_rollup()
+            print(f"Daily rollup rebuilt: {count} project-days")
+            return 0
+
+        if args.command == 'rebuild-file-rollup':
+            count = db.rebuild_file_rollup()
+            print(f"File rollup rebuilt: {count} project-day-files")
+            return 0
+
+        if args.command == 'rebuild-search-index':
+            count = db.rebuild_search_index()
+            print(f"Search index rebuilt: {count} decisions")
+            return 0
+
+        if args.command == 'merge':
+            for source in args.sources:
+                started = time.perf_counter()
+                counts = db.merge_from(source)
+                elapsed = max(time.perf_counter() - started, 1e-9)
+                print(f"Merged {source}: {counts['inserted']} sessions "
+                      f"({counts['skipped']} already present), {counts['file_changes']} file changes, "
+                      f"{counts['decisions']} decisions in {elapsed:.2f}s "
+                      f"({counts['inserted'] / elapsed:,.0f} sessions/s)")
+            return 0
+
+        if args.command == 'retention':
+            if args.enable_incremental_vacuum and db.enable_incremental_vacuum():
+                print("Converted to auto_vacuum=INCREMENTAL")
+            result = db.apply_retention(
+                days=args.days,
+                batch_size=args.batch_size,
+                vacuum_pages=args.vacuum_pages
+            )
+            print(f"Raw rows before {result['horizon']} pruned: "
+                  f"{result['file_changes']} file changes, {result['decisions']} decisions "
+                  f"({result['sessions_scanned']} sessions scanned, {result['batches']} batches)")
+            print(f"Pages released: {result['pages_vacuumed']}")
+            return 0
+
+        print("Database initialized successfully")
+        print(f"Database location: {db.db_path}")
+
+        # Display schema info
+        cursor = db.conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        tables = cursor.fetchall()
+        print(f"\nTables created: {[t['name'] for t in tables]}")
+        return 0
+
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
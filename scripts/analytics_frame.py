@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+"""
+Columnar NumPy Cache of the Sessions Table
+
+Ad-hoc analysis beyond the get_* methods otherwise means looping over
+sqlite3.Row objects in Python. AnalyticsFrame keeps one .npy file per
+sessions column (timestamps, durations, counts and dictionary-coded project
+ids) next to the database, memory-maps them on load and answers filters,
+group-bys and aggregates with vectorized NumPy operations.
+
+refresh() appends only the sessions added since the last refresh (by
+rowid). If the rows already cached no longer match the table (rowids
+renumbered by VACUUM, a session rewritten in place, a refresh interrupted
+part way) the cache is rebuilt.
+
+get_session_stats and get_project_breakdown reproduce the AnalyticsDB
+results from the cache, so the two can be checked against each other.
+
+Requires numpy. Works on single-file databases; sessions of a
+PartitionedAnalyticsDB live in its partition files.
+
+Usage:
+    from analytics_db import AnalyticsDB
+    from analytics_frame import AnalyticsFrame
+
+    db = AnalyticsDB(profile='read', read_only=True)
+    frame = AnalyticsFrame(db)          # Refreshes, then memory-maps the columns
+    recent = frame.select(days=30, project='my-project')
+    by_day = frame.totals(recent, by='day')
+    frame.column('duration_seconds')[recent]
+    frame.get_session_stats(days=30) == db.get_session_stats(days=30)
+"""
+
+import io
+import json
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+from analytics_db import AnalyticsDB, _iso_from_ms, to_epoch_ms
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsFrame:
+    """Memory-mapped columns of the sessions table with vectorized queries"""
+
+    # Cached column -> (SQL expression, dtype). Missing durations are NaN;
+    # sessions without a project count as the 'Unknown' project.
+    COLUMNS = {
+        'rowid': ('rowid', 'int64'),
+        'timestamp_ms': ('timestamp_ms', 'int64'),
+        'duration_seconds': ('duration_seconds', 'float64'),
+        'checkpoint_success': ('checkpoint_success', 'bool'),
+        'files_changed': ('IFNULL(files_changed, 0)', 'int32'),
+        'decisions_logged': ('IFNULL(decisions_logged, 0)', 'int32'),
+        'resume_points_generated': ('IFNULL(resume_points_generated, 0)', 'int32'),
+        'problems_encountered': ('IFNULL(problems_encountered, 0)', 'int32'),
+        'tokens_estimated': ('IFNULL(tokens_estimated, 0)', 'int64'),
+        'project_id': (f'IFNULL(project_id, {AnalyticsDB.UNKNOWN_PROJECT_ID})', 'int32'),
+    }
+
+    # Summed per group by totals()
+    SUM_COLUMNS = (
+        'files_changed', 'decisions_logged', 'resume_points_generated',
+        'problems_encountered', 'tokens_estimated'
+    )
+
+    # Rows fetched from SQLite per chunk during refresh
+    CHUNK_ROWS = 50000
+
+    # Bumped when COLUMNS changes; a cache of another version is rebuilt
+    FORMAT_VERSION = 1
+
+    def __init__(self, db: AnalyticsDB, frame_dir: Optional[str] = None, refresh: bool = True):
+        """Open the column cache of a database
+
+        Args:
+            db: Database whose sessions table is cached
+            frame_dir: Directory of the .npy files. If None, uses
+                <database file>.frame next to the database
+            refresh: Bring the cache up to date before loading it (False
+                loads what is on disk)
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("AnalyticsFrame requires numpy")
+
+        if frame_dir is None:
+            if db.db_path == ':memory:':
+                raise ValueError("An in-memory database needs an explicit frame_dir")
+            frame_dir = str(Path(db.db_path).with_suffix('.frame'))
+
+        self.db = db
+        self.frame_dir = Path(frame_dir)
+        self.frame_dir.mkdir(parents=True, exist_ok=True)
+        self._meta = self._read_meta()
+        self._columns: Dict[str, Any] = {}
+
+        if refresh:
+            self.refresh()
+        else:
+            self._load()
+
+    def __len__(self) -> int:
+        return self._meta['rows']
+
+    def _column_path(self, name: str) -> Path:
+        return self.frame_dir / f'{name}.npy'
+
+    def _empty_meta(self) -> Dict[str, Any]:
+        return {
+            'version': self.FORMAT_VERSION,
+            'rows': 0,
+            'max_rowid': 0,
+            'last_session_id': None,
+            'rewrites': 0,
+            'projects': {}
+        }
+
+    def _read_meta(self) -> Dict[str, Any]:
+        """Read meta.json, or start an empty cache if it is missing or outdated"""
+        try:
+            meta = json.loads((self.frame_dir / 'meta.json').read_text())
+        except (OSError, ValueError):
+            return self._empty_meta()
+
+        if meta.get('version') != self.FORMAT_VERSION:
+            return self._empty_meta()
+        return meta
+
+    def _write_meta(self):
+        temp = self.frame_dir / 'meta.json.tmp'
+        temp.write_text(json.dumps(self._meta))
+        temp.replace(self.frame_dir / 'meta.json')
+
+    def _load(self):
+        """Memory-map every column file (read-only)"""
+        self._columns = {}
+        for name, (_, dtype) in self.COLUMNS.items():
+            path = self._column_path(name)
+            if self._meta['rows'] and path.exists():
+                column = np.load(path, mmap_mode='r')
+            else:
+                column = np.empty(0, dtype=dtype)
+            self._columns[name] = column[:self._meta['rows']]
+
+    def _columns_consistent(self) -> bool:
+        """Check every column file holds exactly the rows meta.json records"""
+        for name in self.COLUMNS:
+            path = self._column_path(name)
+            if not path.exists():
+                return False
+            if np.load(path, mmap_mode='r').shape[0] != self._meta['rows']:
+                return False
+        return True
+
+    def _cache_matches(self, conn) -> bool:
+        """Check the cached rows are still the first rows of the sessions table
+
+        Sessions are added with rowids above every existing one, and a
+        rewritten session keeps its rowid but bumps the session_rewrites
+        setting, so the cache is valid if no rewrite happened since, the
+        table still holds the same number of rows up to max_rowid and the
+        last of them is the same session.
+        """
+        if self._rewrites(conn) != self._meta.get('rewrites', 0):
+            return False
+        row = conn.execute(
+            "SELECT COUNT(*), MAX(CASE WHEN rowid = :max_rowid THEN session_id END) "
+            "FROM sessions WHERE rowid <= :max_rowid",
+            {'max_rowid': self._meta['max_rowid']}
+        ).fetchone()
+        return tuple(row) == (self._meta['rows'], self._meta['last_session_id'])
+
+    @staticmethod
+    def _rewrites(conn) -> int:
+        """Number of sessions ever replaced in place (see AnalyticsDB._replace_session)"""
+        row = conn.execute("SELECT value FROM settings WHERE key = 'session_rewrites'").fetchone()
+        return row[0] if row else 0
+
+    def refresh(self) -> int:
+        """Append the sessions added since the last refresh
+
+        Reads inside one transaction, so the appended rows are a consistent
+        snapshot. Rebuilds the cache from scratch when it no longer matches
+        the table.
+
+        Returns:
+            Number of rows appended
+        """
+        conn = self.db._reader()
+        own_transaction = not conn.in_transaction
+
+        try:
+            if own_transaction:
+                conn.execute("BEGIN")
+
+            if self._meta['rows'] and not (self._columns_consistent() and self._cache_matches(conn)):
+                logger.info(f"Column cache {self.frame_dir} is out of date, rebuilding")
+                self._meta = self._empty_meta()
+
+            if self._meta['rows'] == 0:
+                # Start from empty files, whatever an earlier cache left
+                self._columns = {}
+                for name in self.COLUMNS:
+                    self._column_path(name).unlink(missing_ok=True)
+
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(
+                f"SELECT {', '.join(sql for sql, _ in self.COLUMNS.values())} "
+                f"FROM sessions WHERE rowid > ? ORDER BY rowid",
+                (self._meta['max_rowid'],)
+            )
+
+            appended = 0
+            while True:
+                rows = cursor.fetchmany(self.CHUNK_ROWS)
+                if not rows:
+                    break
+                # NULL -> NaN; every value (epoch ms included) is exact in float64
+                block = np.array(rows, dtype=np.float64)
+                for i, (name, (_, dtype)) in enumerate(self.COLUMNS.items()):
+                    self._append(name, block[:, i].astype(dtype))
+                appended += len(rows)
+
+            if appended:
+                self._meta['rows'] += appended
+                self._meta['max_rowid'] = int(block[-1, 0])
+                self._meta['last_session_id'] = conn.execute(
+                    "SELECT session_id FROM sessions WHERE rowid = ?", (self._meta['max_rowid'],)
+                ).fetchone()[0]
+
+            self._meta['rewrites'] = self._rewrites(conn)
+            self._meta['projects'] = {
+                str(project_id): name
+                for project_id, name in conn.execute("SELECT id, name FROM projects")
+            }
+
+        finally:
+            if own_transaction and conn.in_transaction:
+                conn.commit()
+
+        self._write_meta()
+        self._load()
+
+        if appended:
+            logger.info(f"Column cache refreshed: {appended} rows appended, {len(self)} total")
+        return appended
+
+    def _append(self, name: str, values: Any):
+        """Append values to a column file
+
+        The .npy header is rewritten in place with the new length (numpy
+        pads headers so the shape can grow); the file is rewritten only if
+        the header no longer fits.
+
+        Args:
+            name: Column name
+            values: 1-D array of the column's dtype
+        """
+        path = self._column_path(name)
+        if not path.exists():
+            np.save(path, values)
+            return
+
+        with open(path, 'r+b') as f:
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            data_offset = f.tell()
+
+            header = {
+                'descr': np.lib.format.dtype_to_descr(dtype),
+                'fortran_order': fortran_order,
+                'shape': (shape[0] + len(values),)
+            }
+            buffer = io.BytesIO()
+            if version == (1, 0):
+                np.lib.format.write_array_header_1_0(buffer, header)
+            else:
+                np.lib.format.write_array_header_2_0(buffer, header)
+
+            if buffer.tell() == data_offset:
+                f.seek(data_offset + shape[0] * dtype.itemsize)
+                f.truncate()
+                f.write(values.astype(dtype).tobytes())
+                f.seek(0)
+                f.write(buffer.getvalue())
+                return
+
+        existing = np.load(path)
+        np.save(path, np.concatenate([existing, values.astype(existing.dtype)]))
+
+    def column(self, name: str) -> Any:
+        """Get a cached column
+
+        Args:
+            name: Column name from COLUMNS
+
+        Returns:
+            Read-only memory-mapped array, one value per session in rowid order
+        """
+        if name not in self.COLUMNS:
+            raise ValueError(f"Unknown column '{name}', expected one of {sorted(self.COLUMNS)}")
+        return self._columns[name]
+
+    def project_names(self) -> Dict[int, str]:
+        """Get the project id -> name mapping of the cached rows"""
+        return {int(project_id): name for project_id, name in self._meta['projects'].items()}
+
+    def select(
+        self,
+        days: Optional[int] = None,
+        project: Optional[str] = None,
+        since: Optional[Any] = None,
+        until: Optional[Any] = None
+    ) -> Any:
+        """Build a row mask
+
+        Args:
+            days: Only sessions in the last N days
+            project: Only sessions of this project
+            since: Only sessions at or after this time (datetime or ISO string)
+            until: Only sessions before this time (datetime or ISO string)
+
+        Returns:
+            Boolean array with one entry per cached session
+        """
+        timestamps = self._columns['timestamp_ms']
+        mask = np.ones(len(timestamps), dtype=bool)
+
+        if days is not None:
+            mask &= timestamps >= to_epoch_ms(datetime.now() - timedelta(days=days))
+        if since is not None:
+            mask &= timestamps >= to_epoch_ms(since)
+        if until is not None:
+            mask &= timestamps < to_epoch_ms(until)
+        if project is not None:
+            ids = [project_id for project_id, name in self.project_names().items() if name == project]
+            mask &= self._columns['project_id'] == (ids[0] if ids else -1)
+
+        return mask
+
+    def totals(self, mask: Optional[Any] = None, by: Optional[str] = None) -> Dict[str, Any]:
+        """Aggregate the selected sessions, optionally per group
+
+        Args:
+            mask: Row mask from select() (None for every session)
+            by: None for one total, 'project' (project ids) or 'day' (day
+                numbers, epoch ms // MS_PER_DAY) for one row per group
+
+        Returns:
+            Dictionary with sessions, successful_sessions, the SUM_COLUMNS,
+            sum_duration, duration_count, first_session_ms and
+            last_session_ms: scalars, or arrays aligned with 'keys' (group
+            keys, ascending) when grouped
+        """
+        if by not in (None, 'project', 'day'):
+            raise ValueError(f"Unknown grouping '{by}', expected None, 'project' or 'day'")
+
+        columns = self._columns
+        if mask is None:
+            mask = slice(None)
+        timestamps = np.asarray(columns['timestamp_ms'][mask])
+        durations = np.asarray(columns['duration_seconds'][mask])
+        has_duration = ~np.isnan(durations)
+        values = {
+            'successful_sessions': np.asarray(columns['checkpoint_success'][mask]),
+            'sum_duration': np.where(has_duration, durations, 0),
+            'duration_count': has_duration,
+        }
+        for name in self.SUM_COLUMNS:
+            values[name] = np.asarray(columns[name][mask])
+
+        if by is None:
+            result = {'sessions': len(timestamps)}
+            for name, column in values.items():
+                result[name] = column.sum(dtype=np.float64 if name == 'sum_duration' else np.int64)
+            result['first_session_ms'] = timestamps.min() if len(timestamps) else None
+            result['last_session_ms'] = timestamps.max() if len(timestamps) else None
+            return result
+
+        if by == 'project':
+            group_keys = np.asarray(columns['project_id'][mask])
+        else:
+            group_keys = timestamps // AnalyticsDB.MS_PER_DAY
+
+        # Keys are small integers (ids, day numbers): count into dense bins
+        # starting at the smallest key, then keep the bins that are used
+        offset = int(group_keys.min()) if len(group_keys) else 0
+        bins = group_keys - offset
+        counts = np.bincount(bins)
+        used = np.flatnonzero(counts)
+
+        result = {'keys': used + offset, 'sessions': counts[used].astype(np.int64)}
+        for name, column in values.items():
+            sums = np.bincount(bins, weights=column, minlength=len(counts))[used]
+            result[name] = sums if name == 'sum_duration' else sums.astype(np.int64)
+
+        first = np.full(len(counts), np.iinfo(np.int64).max)
+        last = np.full(len(counts), np.iinfo(np.int64).min)
+        np.minimum.at(first, bins, timestamps)
+        np.maximum.at(last, bins, timestamps)
+        result['first_session_ms'] = first[used]
+        result['last_session_ms'] = last[used]
+
+        return result
+
+    def get_session_stats(self, days: int = 30) -> Dict[str, Any]:
+        """Get session statistics for the last N days, as AnalyticsDB does
+
+        Args:
+            days: Number of days to include
+
+        Returns:
+            Dictionary of statistics
+        """
+        totals = self.totals(self.select(days=days))
+
+        stats = {
+            'period_days': days,
+            'total_sessions': int(totals['sessions']),
+            'successful_sessions': int(totals['successful_sessions']),
+            'total_files_changed': int(totals['files_changed']),
+            'total_decisions': int(totals['decisions_logged']),
+            'total_resume_points': int(totals['resume_points_generated']),
+            'total_problems': int(totals['problems_encountered']),
+            'avg_duration_seconds': (
+                float(totals['sum_duration']) / int(totals['duration_count'])
+                if totals['duration_count'] else 0
+            ),
+            'total_tokens_saved': int(totals['tokens_estimated'])
+        }
+
+        # Calculate success rate
+        if stats['total_sessions'] > 0:
+            stats['success_rate'] = (
+                stats['successful_sessions'] / stats['total_sessions']
+            ) * 100
+        else:
+            stats['success_rate'] = 0.0
+
+        # Calculate time saved
+        stats['time_saved_minutes'] = self.db._calculate_time_saved_from_stats(stats)
+        stats['time_saved_hours'] = stats['time_saved_minutes'] / 60
+
+        return stats
+
+    def get_project_breakdown(self) -> List[Dict[str, Any]]:
+        """Get statistics broken down by project, as AnalyticsDB does
+
+        Returns:
+            List of project statistics, most sessions first
+        """
+        totals = self.totals(by='project')
+        names = self.project_names()
+        # Stable sort on ascending ids keeps ties in id order, like SQLite
+        order = np.argsort(-totals['sessions'], kind='stable')
+
+        projects = []
+        for i in order:
+            project = {
+                'project_name': names.get(int(totals['keys'][i])),
+                'total_sessions': int(totals['sessions'][i]),
+                'successful_sessions': int(totals['successful_sessions'][i]),
+                'total_files_changed': int(totals['files_changed'][i]),
+                'total_decisions': int(totals['decisions_logged'][i]),
+                'first_session': _iso_from_ms(int(totals['first_session_ms'][i])),
+                'last_session': _iso_from_ms(int(totals['last_session_ms'][i]))
+            }
+            project['success_rate'] = (
+                project['successful_sessions'] / project['total_sessions']
+            ) * 100
+            projects.append(project)
+
+        return projects
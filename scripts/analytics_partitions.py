@@ -0,0 +1,1479 @@
+#!/usr/bin/env python3
+"""
+Monthly Partitioned Storage for the Analytics Database
+
+On a shared machine a single stats.db grows without bound, and every backup
+and vacuum touches all of it. PartitionedAnalyticsDB writes the sessions,
+file changes and decisions of each calendar month (by checkpoint timestamp)
+to their own database file next to a small catalog database:
+
+    stats.db                catalog: dictionaries, daily rollups, totals
+    stats.2026-09.db        raw rows of September 2026
+    stats.2025-01.db.gz     cold partition, frozen and compressed
+
+Partitions have the full AnalyticsDB schema but take their dictionary ids
+from the catalog, and the catalog keeps a copy of every partition's daily
+rollups and lifetime totals. Lifetime and windowed statistics therefore read
+the catalog; raw rows are read by ATTACHing only the partitions a query's
+date range needs (usually just the one holding the window's first day)
+behind TEMP views named like the single-file tables, so the AnalyticsDB
+query methods run unchanged.
+
+Months that no longer receive checkpoints can be frozen (made read-only and
+attached with immutable=1) and then compressed with gzip; a compressed
+partition is decompressed to a temporary directory when a query needs it.
+
+Usage:
+    from analytics_partitions import PartitionedAnalyticsDB
+
+    with PartitionedAnalyticsDB('.analytics/stats.db') as db:
+        db.insert_session(checkpoint_data)
+        stats = db.get_session_stats(days=30)
+        db.freeze_cold_partitions()         # Freeze months before last month
+        db.compress_partition('2025-01')
+
+    python analytics_partitions.py --db-path .analytics/stats.db list
+"""
+
+import re
+import os
+import gzip
+import json
+import stat
+import shutil
+import sqlite3
+import logging
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+from urllib.parse import quote
+
+from analytics_db import AnalyticsDB, to_epoch_ms, from_epoch_ms
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def _month_of(timestamp_ms: int) -> str:
+    """Partition month ('YYYY-MM') of an epoch ms timestamp"""
+    return from_epoch_ms(timestamp_ms).strftime('%Y-%m')
+
+
+def _add_months(month: str, count: int) -> str:
+    """Month count months after month (before it when count is negative)"""
+    year, number = map(int, month.split('-'))
+    index = year * 12 + number - 1 + count
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def _month_start_ms(month: str) -> int:
+    """Epoch ms of the first instant of a month"""
+    return to_epoch_ms(datetime.strptime(month, '%Y-%m'))
+
+
+class _Partition(AnalyticsDB):
+    """Database of one month, with dictionary ids assigned by the catalog
+
+    Dimension rows are copied into the partition with the catalog's id, so
+    ids mean the same thing in every partition and the partition stays
+    readable on its own. The days of sessions replaced by a rewrite are
+    collected in replaced_days for the catalog to sync.
+    """
+
+    def __init__(self, db_path: str, profile: str, catalog: 'PartitionedAnalyticsDB'):
+        """Open (and create or migrate) a partition
+
+        Args:
+            db_path: Partition file
+            profile: Connection profile name from PROFILES
+            catalog: Catalog that assigns dictionary ids
+        """
+        self._catalog = catalog
+        self.replaced_days: Set[int] = set()
+        super().__init__(db_path=db_path, profile=profile)
+
+    def _intern(self, cursor: sqlite3.Cursor, table: str, value: Optional[str]) -> Optional[int]:
+        """Get the catalog id of a string and make sure the partition has it
+
+        Args:
+            cursor: Cursor inside the caller's transaction
+            table: Dimension table (one of DIMENSIONS)
+            value: String to look up (None stays None)
+
+        Returns:
+            Id of value in the catalog's table, or None
+        """
+        if value is None:
+            return None
+
+        cache = self._intern_caches[table]
+        dimension_id = cache.get(value)
+        if dimension_id is None:
+            dimension_id = self._catalog._intern_shared(table, value)
+            cursor.execute(
+                f"INSERT OR IGNORE INTO {table} (id, name) VALUES (?, ?)",
+                (dimension_id, value)
+            )
+            cache.put(value, dimension_id)
+
+        return dimension_id
+
+    def _replace_session(
+        self,
+        cursor: sqlite3.Cursor,
+        rowid: int,
+        old_timestamp_ms: int,
+        session_row: tuple,
+        decision_rows: List[tuple]
+    ):
+        """Replace a stored session and remember the day it is removed from
+
+        Args:
+            cursor: Cursor inside the caller's transaction
+            rowid: Rowid of the stored session
+            old_timestamp_ms: Timestamp of the stored session
+            session_row: New row matching _SESSION_COLUMNS
+            decision_rows: Pending decision rows of the current batch
+        """
+        super()._replace_session(cursor, rowid, old_timestamp_ms, session_row, decision_rows)
+        self.replaced_days.add(old_timestamp_ms // self.MS_PER_DAY)
+
+    def take_replaced_days(self) -> Set[int]:
+        """Get and clear the days of sessions replaced since the last call"""
+        days, self.replaced_days = self.replaced_days, set()
+        return days
+
+
+class PartitionedAnalyticsDB(AnalyticsDB):
+    """AnalyticsDB that stores each month in its own database file
+
+    db_path names the catalog; partitions are created next to it on first
+    write. The query methods are the same as AnalyticsDB's. Like AnalyticsDB
+    it is meant for use from one thread.
+
+    Differences from a single-file database:
+    - insert_sessions commits once per partition instead of once overall.
+    - search_decisions searches each partition's index separately and
+      merges the results, so bm25 ranks are only approximately comparable
+      across months and decision_id is unique only within a partition.
+    - apply_retention is not supported; freeze, compress or remove cold
+      partitions instead.
+    - merge_from is not supported; merge into a single-file database.
+    - A rewritten checkpoint replaces its session only within the same
+      month: one whose timestamp moved to another month is stored there
+      as a new session.
+    - The catalog is updated right after each partition commit. If the
+      process dies in between, resync() brings it up to date.
+    """
+
+    # SQLite's default limit on attached databases (SQLITE_MAX_ATTACHED)
+    MAX_ATTACHED = 10
+
+    # Raw tables that live in the partitions; the reader connection shows
+    # them as TEMP views over the attached partitions
+    PARTITIONED_TABLES = ('sessions', 'file_changes', 'decisions')
+
+    # Daily rollups copied from each partition into the catalog
+    _SYNCED_ROLLUPS = ('sessions_daily', 'file_changes_daily', 'session_histograms_daily')
+
+    # Lifetime totals over all partitions, shadowing aggregate_stats on the
+    # reader connection. Projects are counted from the daily rollup because
+    # a project can appear in several partitions.
+    _AGGREGATE_VIEW_SQL = """
+        CREATE TEMP VIEW aggregate_stats (stat_key, stat_value) AS
+        SELECT
+            stat_key,
+            CASE stat_key
+                WHEN 'first_session' THEN MIN(stat_value)
+                WHEN 'last_session' THEN MAX(stat_value)
+                ELSE SUM(stat_value)
+            END
+        FROM main.partition_aggregates
+        WHERE stat_key != 'total_projects'
+        GROUP BY stat_key
+        UNION ALL
+        SELECT 'total_projects', COUNT(DISTINCT project_id)
+        FROM main.sessions_daily
+    """
+
+    def __init__(self, db_path: Optional[str] = None, profile: str = 'default'):
+        """Open the catalog
+
+        Args:
+            db_path: Path to the catalog database. If None, uses the default
+                AnalyticsDB location
+            profile: Connection profile name from PROFILES, used for the
+                catalog and every partition
+        """
+        if db_path == ':memory:':
+            raise ValueError("PartitionedAnalyticsDB requires a file database")
+
+        self._partitions: Dict[str, _Partition] = {}
+        self._reader_conn: Optional[sqlite3.Connection] = None
+        self._attached: Optional[Tuple[str, ...]] = None
+        self._scope: Optional[List[str]] = None
+        self._pinned: Optional[List[str]] = None
+        self._direct_conn: Optional[sqlite3.Connection] = None
+        self._cache_dir: Optional[str] = None
+        super().__init__(db_path=db_path, profile=profile)
+
+    def initialize_schema(self):
+        """Bring the catalog schema up to date
+
+        Migrating the catalog rebuilds its rollups from its own (empty) raw
+        tables, so the partitions are synced into it again afterwards.
+        """
+        migrated = self._schema_version() != self.SCHEMA_VERSION
+        super().initialize_schema()
+
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'partition_aggregates'"
+        )
+        if cursor.fetchone() is None:
+            cursor.execute("""
+                CREATE TABLE partition_aggregates (
+                    month TEXT NOT NULL,
+                    stat_key TEXT NOT NULL,
+                    stat_value REAL NOT NULL,
+                    PRIMARY KEY (month, stat_key)
+                ) WITHOUT ROWID
+            """)
+            self.conn.commit()
+
+        if migrated and self._partition_states():
+            self.resync()
+
+    # Partition files
+
+    def _partition_path(self, month: str, compressed: bool = False) -> Path:
+        """File of a month's partition
+
+        Args:
+            month: Partition month ('YYYY-MM')
+            compressed: Path of the gzip-compressed file instead
+
+        Returns:
+            Path next to the catalog, e.g. stats.2026-09.db
+        """
+        catalog = Path(self.db_path)
+        name = f"{catalog.stem}.{month}{catalog.suffix}"
+        return catalog.with_name(name + '.gz' if compressed else name)
+
+    def _partition_states(self) -> Dict[str, str]:
+        """Find the partition files next to the catalog
+
+        Returns:
+            Dictionary of month -> 'active', 'frozen' (no write permission)
+            or 'compressed', in month order
+        """
+        catalog = Path(self.db_path)
+        pattern = re.compile(
+            rf"{re.escape(catalog.stem)}\.(\d{{4}}-\d{{2}}){re.escape(catalog.suffix)}(\.gz)?"
+        )
+
+        states: Dict[str, str] = {}
+        for path in catalog.parent.iterdir():
+            match = pattern.fullmatch(path.name)
+            if match is None:
+                continue
+            month = match.group(1)
+            if match.group(2):
+                # An uncompressed copy wins (left behind by an interrupted thaw)
+                states.setdefault(month, 'compressed')
+            elif path.stat().st_mode & stat.S_IWUSR:
+                states[month] = 'active'
+            else:
+                states[month] = 'frozen'
+
+        return dict(sorted(states.items()))
+
+    def list_partitions(self) -> List[Dict[str, Any]]:
+        """List the partitions, oldest first
+
+        Returns:
+            List of dictionaries (month, state, path, size_bytes)
+        """
+        partitions = []
+        for month, state in self._partition_states().items():
+            path = self._partition_path(month, compressed=state == 'compressed')
+            partitions.append({
+                'month': month,
+                'state': state,
+                'path': str(path),
+                'size_bytes': path.stat().st_size,
+            })
+        return partitions
+
+    def _readable_path(self, month: str, state: str) -> Path:
+        """Uncompressed file to read a partition from
+
+        Compressed partitions are decompressed into a temporary directory
+        (once per database object).
+
+        Args:
+            month: Partition month
+            state: State from _partition_states
+
+        Returns:
+            Path of a database file
+        """
+        if state != 'compressed':
+            return self._partition_path(month)
+
+        if self._cache_dir is None:
+            self._cache_dir = tempfile.mkdtemp(prefix='analytics-partitions-')
+
+        path = Path(self._cache_dir) / self._partition_path(month).name
+        if not path.exists():
+            partial = path.with_name(path.name + '.tmp')
+            with gzip.open(self._partition_path(month, compressed=True), 'rb') as source, \
+                    open(partial, 'wb') as target:
+                shutil.copyfileobj(source, target, 1 << 20)
+            os.replace(partial, path)
+
+        return path
+
+    def _read_uri(self, month: str, state: str) -> str:
+        """Read-only URI of a partition
+
+        Frozen and compressed partitions are opened with immutable=1: they
+        cannot change, so SQLite skips locking and change detection.
+
+        Args:
+            month: Partition month
+            state: State from _partition_states
+
+        Returns:
+            SQLite URI filename
+        """
+        path = self._readable_path(month, state).resolve()
+        uri = f"file:{quote(path.as_posix())}?mode=ro"
+        return uri if state == 'active' else uri + '&immutable=1'
+
+    # Writes
+
+    def _intern_shared(self, table: str, value: str) -> int:
+        """Get the catalog id of a dictionary string, adding it if it is new
+
+        Committed right away: ids may be handed out to partitions whose
+        transaction later rolls back, which only leaves an unused name.
+
+        Args:
+            table: Dimension table (one of DIMENSIONS)
+            value: String to look up
+
+        Returns:
+            Id of value in the catalog
+        """
+        cursor = self.conn.cursor()
+
+        try:
+            dimension_id = self._intern(cursor, table, value)
+            self.conn.commit()
+            return dimension_id
+        except sqlite3.Error as e:
+            logger.error(f"Failed to add {table} entry to the catalog: {e}")
+            self._rollback()
+            raise
+
+    def _partition(self, month: str) -> _Partition:
+        """Writable partition of a month, created on first use
+
+        Args:
+            month: Partition month
+
+        Returns:
+            Open partition
+
+        Raises:
+            sqlite3.OperationalError: The partition is frozen or compressed
+        """
+        partition = self._partitions.get(month)
+        if partition is None:
+            state = self._partition_states().get(month, 'active')
+            if state != 'active':
+                raise sqlite3.OperationalError(
+                    f"Partition {month} is {state}; thaw it before writing"
+                )
+            partition = _Partition(str(self._partition_path(month)), self.profile, self)
+            self._partitions[month] = partition
+        return partition
+
+    def _route(self, checkpoint_data: Dict[str, Any]) -> Tuple[str, int, Dict[str, Any]]:
+        """Find the partition month and day of a checkpoint
+
+        A missing timestamp is filled in here, so the partition stores the
+        same timestamp the checkpoint was routed by.
+
+        Args:
+            checkpoint_data: Checkpoint JSON data
+
+        Returns:
+            Tuple of (month, day number, checkpoint data to insert)
+        """
+        if not checkpoint_data.get('timestamp'):
+            checkpoint_data = {**checkpoint_data, 'timestamp': datetime.now().isoformat()}
+
+        timestamp_ms = to_epoch_ms(checkpoint_data['timestamp'])
+        return _month_of(timestamp_ms), timestamp_ms // self.MS_PER_DAY, checkpoint_data
+
+    def _sync(self, month: str, days: Optional[Iterable[int]] = None):
+        """Copy a partition's daily rollup rows and totals into the catalog
+
+        Args:
+            month: Partition month
+            days: Day numbers to copy (None for the whole month)
+        """
+        state = self._partition_states().get(month)
+        if state is None:
+            return
+
+        start_day = _month_start_ms(month) // self.MS_PER_DAY
+        params = {
+            'month': month,
+            'start_day': start_day,
+            'end_day': _month_start_ms(_add_months(month, 1)) // self.MS_PER_DAY,
+            'days': json.dumps(sorted(days)) if days is not None else None,
+        }
+        if days is None:
+            day_sql = "day >= :start_day AND day < :end_day"
+        else:
+            day_sql = "day IN (SELECT value FROM json_each(:days))"
+
+        cursor = self.conn.cursor()
+        cursor.execute("ATTACH DATABASE ? AS part", (str(self._readable_path(month, state)),))
+
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            # Frozen partitions are never migrated: a rollup added since is
+            # derived from the partition's sessions, and columns are named so
+            # rows of an older table layout still land in the right place
+            for table in self._SYNCED_ROLLUPS:
+                cursor.execute(f"DELETE FROM main.{table} WHERE {day_sql}", params)
+                if self._has_table(cursor, 'part', table):
+                    columns = [row[1] for row in cursor.execute(f"PRAGMA main.table_info({table})")]
+                    cursor.execute(f"""
+                        INSERT INTO main.{table} ({', '.join(columns)})
+                        {self._select_columns(cursor, 'part', table, columns)} WHERE {day_sql}
+                    """, params)
+                else:
+                    self._derive_rollup(cursor, month, table, day_sql, params)
+            cursor.execute("DELETE FROM partition_aggregates WHERE month = :month", params)
+            cursor.execute("""
+                INSERT INTO partition_aggregates (month, stat_key, stat_value)
+                SELECT :month, stat_key, stat_value FROM part.aggregate_stats
+            """, params)
+            self.conn.commit()
+
+        except sqlite3.Error as e:
+            logger.error(f"Failed to sync partition {month} into the catalog: {e}")
+            self._rollback()
+            raise
+
+        finally:
+            cursor.execute("DETACH DATABASE part")
+
+    @staticmethod
+    def _has_table(cursor: sqlite3.Cursor, schema: str, table: str) -> bool:
+        """Check whether an attached database has a table
+
+        Args:
+            cursor: Cursor of the connection the database is attached to
+            schema: Attached schema name
+            table: Table name
+
+        Returns:
+            True if the table exists
+        """
+        cursor.execute(
+            f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        )
+        return cursor.fetchone() is not None
+
+    def _derive_rollup(
+        self,
+        cursor: sqlite3.Cursor,
+        month: str,
+        table: str,
+        day_sql: str,
+        params: Dict[str, Any]
+    ):
+        """Compute a rollup the attached partition predates from its sessions
+
+        Args:
+            cursor: Cursor inside the sync transaction, partition attached as part
+            month: Partition month
+            table: One of _SYNCED_ROLLUPS missing from the partition
+            day_sql: Condition on day selecting the rows to copy
+            params: Parameters of day_sql
+
+        Raises:
+            sqlite3.DatabaseError: If the rollup cannot be derived
+        """
+        if table != 'session_histograms_daily':
+            raise sqlite3.DatabaseError(f"Partition {month} has no {table} table")
+
+        logger.warning(f"Partition {month} predates {table}; deriving it from its sessions")
+        for metric in self.HISTOGRAM_BINS:
+            cursor.execute(f"""
+                INSERT INTO main.session_histograms_daily (metric, day, project_id, bin, sessions)
+                SELECT * FROM ({self._histogram_rollup_sql(metric, 'part.sessions')})
+                WHERE {day_sql}
+            """, params)
+
+    def resync(self) -> int:
+        """Copy every partition's rollups and totals into the catalog again
+
+        Repair command for a catalog that missed an update, e.g. because
+        the process died between a partition commit and the catalog sync.
+
+        Returns:
+            Number of partitions synced
+        """
+        states = self._partition_states()
+        cursor = self.conn.cursor()
+
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            for table in self._SYNCED_ROLLUPS:
+                cursor.execute(f"DELETE FROM {table}")
+            cursor.execute("DELETE FROM partition_aggregates")
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to clear the catalog rollups: {e}")
+            self._rollback()
+            raise
+
+        for month in states:
+            self._sync(month)
+
+        logger.info(f"Catalog resynced from {len(states)} partitions")
+        return len(states)
+
+    def insert_session(self, checkpoint_data: Dict[str, Any]) -> bool:
+        """Insert a session into the partition of its month
+
+        Args:
+            checkpoint_data: Checkpoint JSON data
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            month, day, checkpoint_data = self._route(checkpoint_data)
+            partition = self._partition(month)
+        except Exception as e:
+            logger.error(f"Failed to insert session: {e}")
+            return False
+
+        if not partition.insert_session(checkpoint_data):
+            return False
+
+        try:
+            self._sync(month, {day} | partition.take_replaced_days())
+        except sqlite3.Error:
+            # The session is stored; resync() repairs the catalog
+            logger.warning(f"Catalog is behind partition {month}; run resync")
+
+        return True
+
+    def insert_sessions_bulk(
+        self,
+        checkpoints: Iterable[Dict[str, Any]],
+        batch_size: int = 1000
+    ) -> Dict[str, int]:
+        """Insert many sessions, committing once per batch and partition
+
+        Checkpoints are grouped by month; each group is written with the
+        partition's insert_sessions_bulk once it holds batch_size
+        checkpoints, and the catalog is synced for the days it touched
+        (including the old days of rewritten sessions). Checkpoints for
+        frozen or compressed months count as errors.
+
+        Args:
+            checkpoints: Iterable of checkpoint JSON data
+            batch_size: Number of checkpoints per transaction
+
+        Returns:
+            Dictionary with inserted, updated, skipped and errors counts
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        counts = {'inserted': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
+        pending: Dict[str, List[Dict[str, Any]]] = {}
+        pending_days: Dict[str, Set[int]] = {}
+
+        for checkpoint_data in checkpoints:
+            try:
+                month, day, checkpoint_data = self._route(checkpoint_data)
+            except Exception as e:
+                logger.debug(f"Could not convert checkpoint: {e}")
+                counts['errors'] += 1
+                continue
+
+            batch = pending.setdefault(month, [])
+            batch.append(checkpoint_data)
+            pending_days.setdefault(month, set()).add(day)
+            if len(batch) >= batch_size:
+                self._flush_batch(month, pending.pop(month), pending_days.pop(month), counts)
+
+        for month in list(pending):
+            self._flush_batch(month, pending.pop(month), pending_days.pop(month), counts)
+
+        logger.info(
+            f"Bulk insert complete: {counts['inserted']} inserted, {counts['updated']} updated, "
+            f"{counts['skipped']} skipped, {counts['errors']} errors"
+        )
+        return counts
+
+    def _flush_batch(
+        self,
+        month: str,
+        batch: List[Dict[str, Any]],
+        days: Set[int],
+        counts: Dict[str, int]
+    ):
+        """Write one month's batch and sync the days it touched
+
+        Args:
+            month: Partition month
+            batch: Checkpoints of that month
+            days: Day numbers of the checkpoints
+            counts: Running counts to add to
+        """
+        try:
+            partition = self._partition(month)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"{len(batch)} checkpoints not inserted: {e}")
+            counts['errors'] += len(batch)
+            return
+
+        for key, value in partition.insert_sessions_bulk(batch, batch_size=len(batch)).items():
+            counts[key] += value
+        self._sync(month, days | partition.take_replaced_days())
+
+    def insert_sessions(self, checkpoints: Iterable[Dict[str, Any]]) -> List[bool]:
+        """Insert several sessions with one transaction per partition
+
+        Args:
+            checkpoints: Iterable of checkpoint JSON data
+
+        Returns:
+            One flag per checkpoint: True if inserted or updated, False if
+            it was an unchanged duplicate, could not be converted, belongs
+            to a frozen month or its partition's transaction failed
+        """
+        checkpoints = list(checkpoints)
+        results = [False] * len(checkpoints)
+        groups: Dict[str, List[Tuple[int, int, Dict[str, Any]]]] = {}
+
+        for index, checkpoint_data in enumerate(checkpoints):
+            try:
+                month, day, checkpoint_data = self._route(checkpoint_data)
+            except Exception as e:
+                logger.debug(f"Could not convert checkpoint: {e}")
+                continue
+            groups.setdefault(month, []).append((index, day, checkpoint_data))
+
+        for month, group in groups.items():
+            try:
+                partition = self._partition(month)
+            except sqlite3.OperationalError as e:
+                logger.error(f"Failed to insert sessions: {e}")
+                continue
+
+            flags = partition.insert_sessions([checkpoint_data for _, _, checkpoint_data in group])
+            for (index, _, _), flag in zip(group, flags):
+                results[index] = flag
+
+            replaced_days = partition.take_replaced_days()
+            if any(flags):
+                try:
+                    self._sync(month, {day for _, day, _ in group} | replaced_days)
+                except sqlite3.Error:
+                    logger.warning(f"Catalog is behind partition {month}; run resync")
+
+        return results
+
+    # Reads
+
+    def _reader(self) -> sqlite3.Connection:
+        """Read-only catalog connection with the partitions of the current scope attached
+
+        Returns:
+            Connection whose sessions, file_changes and decisions are views
+            over the attached partitions
+        """
+        if self._direct_conn is not None:
+            return self._direct_conn
+
+        conn = self._catalog_reader()
+        if self._pinned is not None:
+            # Superset of every scope used inside a snapshot transaction;
+            # extra partitions do not change results, all reads filter by time
+            months = self._pinned
+        elif self._scope is not None:
+            months = self._scope
+        else:
+            # Methods without a scope of their own see the newest partitions
+            months = list(self._partition_states())[-self.MAX_ATTACHED:]
+        self._attach(conn, months)
+        return conn
+
+    def _catalog_reader(self) -> sqlite3.Connection:
+        """Read-only connection to the catalog, opened on first use"""
+        if self._reader_conn is None:
+            uri = f"file:{quote(Path(self.db_path).resolve().as_posix())}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True)
+            conn.row_factory = sqlite3.Row
+            self._apply_profile(conn, read_only=True)
+            conn.execute(self._AGGREGATE_VIEW_SQL)
+            self._reader_conn = conn
+            self._attached = None
+        return self._reader_conn
+
+    @staticmethod
+    def _schema_name(month: str) -> str:
+        """Schema name a partition is attached as"""
+        return 'p_' + month.replace('-', '_')
+
+    def _attach(self, conn: sqlite3.Connection, months: Iterable[str]):
+        """Attach exactly the given partitions and point the views at them
+
+        Args:
+            conn: Catalog reader connection
+            months: Partition months (at most MAX_ATTACHED)
+        """
+        months = tuple(sorted(months))
+        if months == self._attached:
+            return
+        if len(months) > self.MAX_ATTACHED:
+            raise sqlite3.OperationalError(
+                f"Cannot attach {len(months)} partitions (limit {self.MAX_ATTACHED})"
+            )
+
+        for table in self.PARTITIONED_TABLES:
+            conn.execute(f"DROP VIEW IF EXISTS temp.{table}")
+
+        attached = {row['name'] for row in conn.execute("PRAGMA database_list")}
+        for month in self._attached or ():
+            if month not in months and self._schema_name(month) in attached:
+                conn.execute(f"DETACH DATABASE {self._schema_name(month)}")
+        self._attached = None
+
+        states = self._partition_states()
+        for month in months:
+            if self._schema_name(month) not in attached:
+                conn.execute(
+                    f"ATTACH DATABASE ? AS {self._schema_name(month)}",
+                    (self._read_uri(month, states[month]),)
+                )
+
+        for table in self.PARTITIONED_TABLES:
+            sources = [self._view_source(conn, month, table) for month in months]
+            conn.execute(
+                f"CREATE TEMP VIEW {table} AS "
+                + (" UNION ALL ".join(sources) or f"SELECT * FROM main.{table}")
+            )
+        self._attached = months
+
+    def _view_source(self, conn: sqlite3.Connection, month: str, table: str) -> str:
+        """SELECT reading one attached partition's table with the catalog's columns
+
+        Frozen partitions are never migrated, so they may lack columns added
+        to the schema after they were frozen; those read as NULL.
+
+        Args:
+            conn: Catalog reader connection with the partition attached
+            month: Partition month
+            table: One of PARTITIONED_TABLES
+
+        Returns:
+            SELECT statement for the view's UNION ALL
+        """
+        columns = [row[1] for row in conn.execute(f"PRAGMA main.table_info({table})")]
+        return self._select_columns(conn, self._schema_name(month), table, columns)
+
+    @staticmethod
+    def _select_columns(
+        conn: Union[sqlite3.Connection, sqlite3.Cursor],
+        schema: str,
+        table: str,
+        columns: List[str]
+    ) -> str:
+        """SELECT of the given columns from an attached table, by name
+
+        Args:
+            conn: Connection (or cursor) the database is attached to
+            schema: Attached schema name
+            table: Table name
+            columns: Columns to select; those the table lacks read as NULL
+
+        Returns:
+            SELECT statement without a WHERE clause
+        """
+        present = {row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")}
+        select = [name if name in present else f"NULL AS {name}" for name in columns]
+        return f"SELECT {', '.join(select)} FROM {schema}.{table}"
+
+    def _detach_all(self):
+        """Detach every partition from the reader (before files change)"""
+        if self._reader_conn is not None:
+            self._attach(self._reader_conn, ())
+
+    @contextmanager
+    def _scoped(self, months: Iterable[str]) -> Iterator[None]:
+        """Let the enclosed query see only the given partitions
+
+        Args:
+            months: Partition months the query needs
+        """
+        previous = self._scope
+        self._scope = list(months)
+        try:
+            yield
+        finally:
+            self._scope = previous
+
+    def _window_scope(self, days: Optional[int]) -> List[str]:
+        """Partitions a "last N days" query reads raw rows from
+
+        Whole days come from the catalog rollups; only the partial day the
+        cutoff falls on is read from raw sessions.
+
+        Args:
+            days: Window length in days (None or 0 for all time)
+
+        Returns:
+            The cutoff day's partition month, if it exists
+        """
+        if not days:
+            return []
+        month = _month_of(self._window_params(days)['cutoff_ms'])
+        return [month] if month in self._partition_states() else []
+
+    def get_session_stats(self, days: int = 30) -> Dict[str, Any]:
+        """Get session statistics for the last N days
+
+        Args:
+            days: Number of days to include
+
+        Returns:
+            Dictionary of statistics
+        """
+        with self._scoped(self._window_scope(days)):
+            return super().get_session_stats(days)
+
+    def get_aggregate_stats(self) -> Dict[str, Any]:
+        """Get lifetime aggregate statistics (from the catalog alone)
+
+        Returns:
+            Dictionary of aggregate metrics
+        """
+        with self._scoped([]):
+            return super().get_aggregate_stats()
+
+    def calculate_time_saved(self) -> float:
+        """Calculate total time saved in hours (from the catalog alone)
+
+        Returns:
+            Total hours saved across all sessions
+        """
+        with self._scoped([]):
+            return super().calculate_time_saved()
+
+    def get_success_rate(self, days: Optional[int] = None) -> float:
+        """Calculate checkpoint success percentage
+
+        Args:
+            days: Number of days to include (None for all-time)
+
+        Returns:
+            Success rate as percentage (0-100)
+        """
+        with self._scoped(self._window_scope(days)):
+            return super().get_success_rate(days)
+
+    def get_project_breakdown(self) -> List[Dict[str, Any]]:
+        """Get statistics broken down by project (from the catalog alone)
+
+        Returns:
+            List of project statistics
+        """
+        with self._scoped([]):
+            return super().get_project_breakdown()
+
+    def get_hot_files(
+        self,
+        project: Optional[str] = None,
+        days: Optional[int] = None,
+        top_k: int = 20
+    ) -> List[Dict[str, Any]]:
+        """Get the most frequently changed files
+
+        Args:
+            project: Only files of this project (None for all projects)
+            days: Only changes in the last N days (None for all time)
+            top_k: Maximum number of files to return
+
+        Returns:
+            List of dictionaries, most changes first (see AnalyticsDB)
+        """
+        with self._scoped(self._window_scope(days)):
+            return super().get_hot_files(project=project, days=days, top_k=top_k)
+
+    def get_distribution(
+        self,
+        metric: str = 'duration',
+        days: Optional[int] = None,
+        project: Optional[str] = None,
+        percentiles: Iterable[float] = (50, 90, 99)
+    ) -> Dict[str, Any]:
+        """Get percentiles and a histogram of session duration or files changed
+
+        Args:
+            metric: 'duration' or 'files'
+            days: Only sessions from the last N days (None for all time)
+            project: Only sessions of this project (None for all projects)
+            percentiles: Percentiles to report (0-100)
+
+        Returns:
+            Dictionary with count, percentiles and histogram (see AnalyticsDB)
+        """
+        with self._scoped(self._window_scope(days)):
+            return super().get_distribution(
+                metric=metric, days=days, project=project, percentiles=percentiles
+            )
+
+    def get_timeseries(
+        self,
+        metric: str = 'sessions',
+        bucket: str = 'day',
+        days: Optional[int] = 30,
+        project: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get a metric per day, week or month, with empty buckets filled in
+
+        Args:
+            metric: Key of TIMESERIES_METRICS
+            bucket: 'day', 'week' or 'month'
+            days: Only the last N days (None for all time)
+            project: Only sessions of this project (None for all projects)
+
+        Returns:
+            List of dictionaries (start, value), oldest first (see AnalyticsDB)
+        """
+        with self._scoped(self._window_scope(days)):
+            return super().get_timeseries(metric=metric, bucket=bucket, days=days, project=project)
+
+    def get_recent_sessions(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """Get the most recent sessions
+
+        Only the newest partitions that together hold at least limit
+        sessions are attached (at most MAX_ATTACHED of them).
+
+        Args:
+            limit: Maximum number of sessions to return
+
+        Returns:
+            List of session dictionaries, newest first
+        """
+        with self._scoped(self._recent_scope(limit)):
+            return super().get_recent_sessions(limit)
+
+    def _recent_scope(self, limit: int) -> List[str]:
+        """Newest partitions that together hold at least limit sessions
+
+        Args:
+            limit: Number of recent sessions wanted
+
+        Returns:
+            Partition months, newest first (at most MAX_ATTACHED)
+        """
+        states = self._partition_states()
+        cursor = self._catalog_reader().execute("""
+            SELECT month, stat_value FROM partition_aggregates
+            WHERE stat_key = 'total_sessions'
+            ORDER BY month DESC
+        """)
+
+        months: List[str] = []
+        sessions = 0
+        for row in cursor.fetchall():
+            if sessions >= limit or len(months) == self.MAX_ATTACHED:
+                break
+            if row['month'] in states and row['stat_value'] > 0:
+                months.append(row['month'])
+                sessions += row['stat_value']
+        return months
+
+    def get_dashboard_snapshot(self, days: Optional[int] = None, recent: int = 5) -> Dict[str, Any]:
+        """Get the dashboard summary, projects and recent sessions in one transaction
+
+        Partitions cannot be attached inside a transaction, so every
+        partition the parts need is attached up front and stays attached
+        until the snapshot is read.
+
+        Args:
+            days: Summarize the last N days (None for all time)
+            recent: Number of recent sessions to include (0 for none)
+
+        Returns:
+            Dictionary with period_days, summary, projects and recent_sessions
+            (see AnalyticsDB)
+        """
+        window = self._window_scope(days)
+        newest = self._recent_scope(recent) if recent > 0 else []
+        months = window + [
+            month for month in newest if month not in window
+        ][:self.MAX_ATTACHED - len(window)]
+
+        previous = self._pinned
+        self._pinned = months
+        try:
+            return super().get_dashboard_snapshot(days=days, recent=recent)
+        finally:
+            self._pinned = previous
+
+    def search_decisions(
+        self,
+        query: str,
+        project: Optional[str] = None,
+        since: Any = None,
+        until: Any = None,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """Full-text search over logged decisions
+
+        Each partition between since and until has its own full-text index
+        and is searched separately; the results are merged by rank (or
+        newest first without FTS5). bm25 ranks depend on each partition's
+        term statistics, so the merged order is approximate, and decision_id
+        is unique only within a partition.
+
+        Args:
+            query: Search text (FTS5 syntax, see AnalyticsDB.search_decisions)
+            project: Only decisions from sessions of this project
+            since: Only decisions at or after this time (datetime, ISO string
+                or epoch ms)
+            until: Only decisions before this time
+            limit: Maximum number of results
+
+        Returns:
+            List of result dictionaries, best match first
+        """
+        since_ms = to_epoch_ms(since)
+        until_ms = to_epoch_ms(until)
+
+        results: List[Dict[str, Any]] = []
+        for month, state in self._partition_states().items():
+            if since_ms is not None and _month_start_ms(_add_months(month, 1)) <= since_ms:
+                continue
+            if until_ms is not None and _month_start_ms(month) >= until_ms:
+                continue
+
+            try:
+                conn = sqlite3.connect(self._read_uri(month, state), uri=True)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to open partition {month}: {e}")
+                continue
+
+            conn.row_factory = sqlite3.Row
+            self._direct_conn = conn
+            try:
+                # Uncached: an entry keyed by this short-lived connection
+                # could never be hit again and would crowd out useful ones
+                results.extend(AnalyticsDB.search_decisions.__wrapped__(
+                    self, query, project, since, until, limit
+                ))
+            finally:
+                self._direct_conn = None
+                conn.close()
+
+        if all(result['rank'] is not None for result in results):
+            results.sort(key=lambda result: result['rank'])
+        else:
+            results.sort(key=lambda result: result['timestamp'] or datetime.min, reverse=True)
+        return results[:limit]
+
+    def iter_raw_rows(
+        self,
+        table: str = 'sessions',
+        since: Any = None,
+        until: Any = None,
+        project: Optional[str] = None,
+        batch_size: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream every row of a raw table, oldest session first
+
+        Partitions between since and until are read one after another, each
+        on its own read-only connection (not the shared reader, so queries
+        run while the export is consumed do not disturb it). Each partition
+        is a consistent snapshot; the export as a whole is not.
+
+        Args:
+            table: 'sessions', 'file_changes' or 'decisions'
+            since: Only rows of sessions at or after this time (datetime, ISO
+                string or epoch ms)
+            until: Only rows of sessions before this time
+            project: Only rows of sessions of this project
+            batch_size: Rows per fetchmany (default RAW_EXPORT_BATCH_SIZE)
+
+        Returns:
+            Iterator of dictionaries keyed by RAW_EXPORT_COLUMNS[table]
+        """
+        if table not in self.RAW_EXPORT_COLUMNS:
+            raise ValueError(
+                f"Unknown table '{table}' (expected one of: {', '.join(self.RAW_EXPORT_COLUMNS)})"
+            )
+        return self._iter_partition_rows(
+            table, to_epoch_ms(since), to_epoch_ms(until), project,
+            batch_size or self.RAW_EXPORT_BATCH_SIZE
+        )
+
+    def _iter_partition_rows(
+        self,
+        table: str,
+        since_ms: Optional[int],
+        until_ms: Optional[int],
+        project: Optional[str],
+        batch_size: int
+    ) -> Iterator[Dict[str, Any]]:
+        """Generator behind iter_raw_rows, one partition at a time
+
+        Args:
+            table: Table name (validated by iter_raw_rows)
+            since_ms: Lower bound on the session timestamp, or None
+            until_ms: Upper bound (exclusive) on the session timestamp, or None
+            project: Project name, or None
+            batch_size: Rows per fetchmany
+
+        Yields:
+            Row dictionaries
+        """
+        for month, state in self._partition_states().items():
+            if since_ms is not None and _month_start_ms(_add_months(month, 1)) <= since_ms:
+                continue
+            if until_ms is not None and _month_start_ms(month) >= until_ms:
+                continue
+
+            conn = sqlite3.connect(self._read_uri(month, state), uri=True)
+            try:
+                yield from self._iter_raw_rows(conn, table, since_ms, until_ms, project, batch_size)
+            finally:
+                conn.close()
+
+    # Maintenance
+
+    def _rebuild_partitions(self, method: str) -> int:
+        """Run a rebuild method on every active partition and resync
+
+        Args:
+            method: Name of an AnalyticsDB rebuild method
+
+        Returns:
+            Sum of the method's integer results
+        """
+        total = 0
+        for month, state in self._partition_states().items():
+            if state == 'active':
+                result = getattr(self._partition(month), method)()
+                if isinstance(result, int):
+                    total += result
+        self.resync()
+        return total
+
+    def rebuild_aggregates(self) -> Dict[str, Any]:
+        """Recompute the running totals of every active partition
+
+        Returns:
+            Lifetime aggregate statistics after the rebuild
+        """
+        self._rebuild_partitions('rebuild_aggregates')
+        return self.get_aggregate_stats()
+
+    def rebuild_daily_rollup(self) -> int:
+        """Recompute the daily rollup of every active partition
+
+        Returns:
+            Number of project-day rows written to the active partitions
+        """
+        return self._rebuild_partitions('rebuild_daily_rollup')
+
+    def rebuild_file_rollup(self) -> int:
+        """Recompute the file rollup of every active partition
+
+        Returns:
+            Number of project-day-file rows written to the active partitions
+        """
+        return self._rebuild_partitions('rebuild_file_rollup')
+
+    def rebuild_search_index(self) -> int:
+        """Rebuild the full-text index of every active partition
+
+        Returns:
+            Number of decisions indexed in the active partitions
+        """
+        return self._rebuild_partitions('rebuild_search_index')
+
+    def merge_from(self, path: str) -> Dict[str, int]:
+        """Not supported: merge into a single-file database instead
+
+        Raises:
+            sqlite3.NotSupportedError: Always
+        """
+        raise sqlite3.NotSupportedError(
+            "Sessions are routed to monthly partitions with catalog-wide ids; "
+            "merge into a single-file database or replay the checkpoints"
+        )
+
+    def apply_retention(
+        self,
+        days: Optional[int] = None,
+        batch_size: int = 500,
+        vacuum_pages: int = 1000
+    ) -> Dict[str, Any]:
+        """Not supported: freeze, compress or remove cold partitions instead
+
+        Raises:
+            sqlite3.NotSupportedError: Always
+        """
+        raise sqlite3.NotSupportedError(
+            "Partitioned databases age out whole months; "
+            "use freeze_partition, compress_partition or remove the file"
+        )
+
+    def freeze_partition(self, month: str) -> bool:
+        """Make a past month's partition read-only
+
+        The partition is synced into the catalog one last time, checkpointed
+        and switched from WAL to a rollback journal (so it is one
+        self-contained file), and its write permission is removed. Readers
+        then open it with immutable=1. Checkpoints for the month are refused
+        until thaw_partition.
+
+        Args:
+            month: Partition month ('YYYY-MM')
+
+        Returns:
+            True if frozen, False if it already was frozen or compressed
+
+        Raises:
+            ValueError: No such partition, or it is the current month
+        """
+        state = self._partition_states().get(month)
+        if state is None:
+            raise ValueError(f"No partition for {month}")
+        if state != 'active':
+            return False
+        if month >= _month_of(to_epoch_ms(datetime.now())):
+            raise ValueError(f"Cannot freeze the current month ({month})")
+
+        self._detach_all()
+        partition = self._partitions.pop(month, None)
+        if partition is not None:
+            partition.close()
+
+        self._sync(month)
+
+        path = self._partition_path(month)
+        conn = sqlite3.connect(str(path))
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            conn.close()
+
+        path.chmod(stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        logger.info(f"Partition {month} frozen")
+        return True
+
+    def freeze_cold_partitions(self, keep_months: int = 2) -> List[str]:
+        """Freeze all partitions older than the newest keep_months months
+
+        Args:
+            keep_months: Calendar months (counting the current one) that stay
+                writable for late checkpoints
+
+        Returns:
+            Months frozen by this call
+        """
+        if keep_months < 1:
+            raise ValueError("keep_months must be at least 1")
+
+        current = _month_of(to_epoch_ms(datetime.now()))
+        oldest_kept = _add_months(current, 1 - keep_months)
+
+        return [
+            month
+            for month, state in self._partition_states().items()
+            if state == 'active' and month < oldest_kept and self.freeze_partition(month)
+        ]
+
+    def compress_partition(self, month: str) -> bool:
+        """Freeze a partition (if needed) and compress it with gzip
+
+        Args:
+            month: Partition month ('YYYY-MM')
+
+        Returns:
+            True if compressed, False if it already was
+
+        Raises:
+            ValueError: No such partition, or it is the current month
+        """
+        state = self._partition_states().get(month)
+        if state is None:
+            raise ValueError(f"No partition for {month}")
+        if state == 'compressed':
+            return False
+        if state == 'active':
+            self.freeze_partition(month)
+
+        self._detach_all()
+        path = self._partition_path(month)
+        target = self._partition_path(month, compressed=True)
+        partial = target.with_name(target.name + '.tmp')
+
+        with open(path, 'rb') as source, gzip.open(partial, 'wb', compresslevel=6) as compressed:
+            shutil.copyfileobj(source, compressed, 1 << 20)
+        os.replace(partial, target)
+        path.unlink()
+
+        logger.info(
+            f"Partition {month} compressed: {target.stat().st_size} bytes ({target.name})"
+        )
+        return True
+
+    def thaw_partition(self, month: str) -> bool:
+        """Make a frozen or compressed partition writable again
+
+        Args:
+            month: Partition month ('YYYY-MM')
+
+        Returns:
+            True if thawed, False if it already was writable
+
+        Raises:
+            ValueError: No such partition
+        """
+        state = self._partition_states().get(month)
+        if state is None:
+            raise ValueError(f"No partition for {month}")
+        if state == 'active':
+            return False
+
+        self._detach_all()
+        path = self._partition_path(month)
+
+        if state == 'compressed':
+            compressed = self._partition_path(month, compressed=True)
+            partial = path.with_name(path.name + '.tmp')
+            with gzip.open(compressed, 'rb') as source, open(partial, 'wb') as target:
+                shutil.copyfileobj(source, target, 1 << 20)
+            os.replace(partial, path)
+            compressed.unlink()
+            if self._cache_dir is not None:
+                (Path(self._cache_dir) / path.name).unlink(missing_ok=True)
+
+        path.chmod(stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP | stat.S_IROTH)
+        logger.info(f"Partition {month} thawed")
+        return True
+
+    def close(self):
+        """Close the catalog, the reader and every open partition"""
+        for partition in self._partitions.values():
+            partition.close()
+        self._partitions.clear()
+
+        if self._reader_conn is not None:
+            self._reader_conn.close()
+            self._reader_conn = None
+
+        if self._cache_dir is not None:
+            shutil.rmtree(self._cache_dir, ignore_errors=True)
+            self._cache_dir = None
+
+        super().close()
+
+
+def main():
+    """CLI entry point for partition maintenance"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Partitioned analytics database maintenance")
+    parser.add_argument(
+        '--db-path',
+        help='Path to the catalog database',
+        default=None
+    )
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('list', help='List partitions and their state (default)')
+    freeze = subparsers.add_parser('freeze', help='Make past months read-only')
+    freeze.add_argument(
+        'months',
+        nargs='*',
+        help='Months to freeze (default: all but the last --keep-months)'
+    )
+    freeze.add_argument(
+        '--keep-months',
+        type=int,
+        default=2,
+        help='Recent months that stay writable (default: 2)'
+    )
+    compress = subparsers.add_parser('compress', help='Freeze and gzip partitions')
+    compress.add_argument('months', nargs='+', help='Months to compress (YYYY-MM)')
+    thaw = subparsers.add_parser('thaw', help='Make partitions writable again')
+    thaw.add_argument('months', nargs='+', help='Months to thaw (YYYY-MM)')
+    subparsers.add_parser('resync', help='Copy all partition rollups into the catalog again')
+
+    args = parser.parse_args()
+
+    db = PartitionedAnalyticsDB(db_path=args.db_path)
+
+    try:
+        if args.command == 'freeze':
+            if args.months:
+                frozen = [month for month in args.months if db.freeze_partition(month)]
+            else:
+                frozen = db.freeze_cold_partitions(keep_months=args.keep_months)
+            print(f"Frozen: {', '.join(frozen) or 'nothing to freeze'}")
+            return 0
+
+        if args.command == 'compress':
+            compressed = [month for month in args.months if db.compress_partition(month)]
+            print(f"Compressed: {', '.join(compressed) or 'nothing to compress'}")
+            return 0
+
+        if args.command == 'thaw':
+            thawed = [month for month in args.months if db.thaw_partition(month)]
+            print(f"Thawed: {', '.join(thawed) or 'nothing to thaw'}")
+            return 0
+
+        if args.command == 'resync':
+            print(f"Catalog resynced from {db.resync()} partitions")
+            return 0
+
+        partitions = db.list_partitions()
+        if not partitions:
+            print(f"No partitions next to {db.db_path}")
+        for partition in partitions:
+            print(f"{partition['month']}  {partition['state']:<10}  "
+                  f"{partition['size_bytes'] / 1024 / 1024:8.1f} MB  {partition['path']}")
+        return 0
+
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
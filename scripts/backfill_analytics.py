@@ -10,6 +10,7 @@ Usage:
     python backfill_analytics.py --days 30    # Backfill last 30 days
     python backfill_analytics.py --all        # Backfill all checkpoints
     python backfill_analytics.py --dry-run    # Preview without inserting
+    python backfill_analytics.py --no-bulk    # One transaction per checkpoint
 """
 
 import sys
@@ -17,7 +18,7 @@ import json
 import argparse
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Iterator, List, Dict, Any, Optional
 import logging
 
 # Import analytics database
@@ -152,7 +153,9 @@ class CheckpointBackfiller:
         self,
         days: Optional[int] = None,
         dry_run: bool = False,
-        verbose: bool = False
+        verbose: bool = False,
+        bulk: bool = True,
+        batch_size: int = 1000
     ) -> Dict[str, Any]:
         """Backfill database from checkpoint files
 
@@ -160,6 +163,10 @@ class CheckpointBackfiller:
             days: Only include files from last N days (None for all)
             dry_run: If True, don't insert into database
             verbose: If True, show detailed progress
+            bulk: If True, load in batches of batch_size checkpoints (one
+                transaction per batch); otherwise one checkpoint per
+                transaction
+            batch_size: Checkpoints per transaction in bulk mode
 
         Returns:
             Dictionary with backfill statistics
@@ -173,6 +180,7 @@ class CheckpointBackfiller:
                 'total_files': 0,
                 'processed': 0,
                 'inserted': 0,
+                'updated': 0,
                 'skipped': 0,
                 'errors': 0
             }
@@ -181,13 +189,50 @@ class CheckpointBackfiller:
             'total_files': len(checkpoint_files),
             'processed': 0,
             'inserted': 0,
+            'updated': 0,
             'skipped': 0,
             'errors': 0,
             'success_rate': 0.0,
             'time_saved_hours': 0.0
         }
 
-        # Process files with progress display
+        checkpoints = self._iter_checkpoints(checkpoint_files, stats, verbose)
+
+        if dry_run:
+            for _ in checkpoints:
+                stats['inserted'] += 1  # Count as inserted for dry run
+        else:
+            # Without bulk, batches of one: same counts, one transaction each
+            result = self.db.insert_sessions_bulk(checkpoints, batch_size=batch_size if bulk else 1)
+            stats['inserted'] += result['inserted']
+            stats['updated'] += result['updated']
+            stats['skipped'] += result['skipped']
+            stats['errors'] += result['errors']
+
+        # Calculate final statistics from database
+        if not dry_run:
+            aggregate = self.db.get_aggregate_stats()
+            stats['success_rate'] = aggregate.get('success_rate', 0.0)
+            stats['time_saved_hours'] = aggregate.get('time_saved_hours', 0.0)
+
+        return stats
+
+    def _iter_checkpoints(
+        self,
+        checkpoint_files: List[Path],
+        stats: Dict[str, Any],
+        verbose: bool
+    ) -> Iterator[Dict[str, Any]]:
+        """Parse checkpoint files lazily, updating counters and progress
+
+        Args:
+            checkpoint_files: Checkpoint file paths to parse
+            stats: Backfill statistics (processed/errors are updated in place)
+            verbose: If True, show per-file progress
+
+        Yields:
+            Parsed checkpoint data dictionaries
+        """
         total = len(checkpoint_files)
         show_progress = not verbose and total > 10
 
@@ -205,16 +250,7 @@ class CheckpointBackfiller:
                 continue
 
             stats['processed'] += 1
-
-            # Insert into database (unless dry run)
-            if not dry_run:
-                success = self.db.insert_session(checkpoint_data)
-                if success:
-                    stats['inserted'] += 1
-                else:
-                    stats['skipped'] += 1
-            else:
-                stats['inserted'] += 1  # Count as inserted for dry run
+            yield checkpoint_data
 
             # Show progress
             if verbose:
@@ -229,14 +265,6 @@ class CheckpointBackfiller:
         if show_progress:
             print()  # New line after progress bar
 
-        # Calculate final statistics from database
-        if not dry_run:
-            aggregate = self.db.get_aggregate_stats()
-            stats['success_rate'] = aggregate.get('success_rate', 0.0)
-            stats['time_saved_hours'] = aggregate.get('time_saved_hours', 0.0)
-
-        return stats
-
 
 def format_duration(hours: float) -> str:
     """Format hours into human-readable duration
@@ -300,6 +328,19 @@ Examples:
         help='Show detailed progress'
     )
 
+    parser.add_argument(
+        '--no-bulk',
+        action='store_true',
+        help='Insert one session per transaction instead of batching'
+    )
+
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=1000,
+        help='Checkpoints per transaction in bulk mode (default: 1000)'
+    )
+
     parser.add_argument(
         '--db-path',
         type=str,
@@ -325,7 +366,7 @@ Examples:
 
     # Initialize database
     try:
-        db = AnalyticsDB(db_path=args.db_path)
+        db = AnalyticsDB(db_path=args.db_path, profile='ingest')
         ui.print_success(f"Database initialized: {db.db_path}")
     except Exception as e:
         ui.print_error(f"Failed to initialize database: {e}")
@@ -360,7 +401,9 @@ Examples:
         stats = backfiller.backfill(
             days=days,
             dry_run=args.dry_run,
-            verbose=args.verbose
+            verbose=args.verbose,
+            bulk=not args.no_bulk,
+            batch_size=args.batch_size
         )
     except Exception as e:
         ui.print_error(f"Backfill failed: {e}")
@@ -376,6 +419,9 @@ Examples:
     ui.print_success(f"Sessions processed: {stats['processed']}")
     ui.print_success(f"Sessions inserted: {stats['inserted']}")
 
+    if stats['updated'] > 0:
+        ui.print_success(f"Sessions updated (checkpoint changed): {stats['updated']}")
+
     if stats['skipped'] > 0:
         ui.print_warning(f"Sessions skipped (duplicates): {stats['skipped']}")
 
@@ -8,7 +8,7 @@ in README files and documentation.
 Usage:
     from badge_generator import generate_stats_badges, generate_badge_markdown
 
-    db = AnalyticsDB()
+    db = AnalyticsDB(read_only=True)
     badges = generate_stats_badges(db)
     markdown = generate_badge_markdown(badges)
     print(markdown)
@@ -346,12 +346,18 @@ def main():
         action='store_true',
         help='Generate complete README section'
     )
+    parser.add_argument(
+        '--snapshot',
+        action='store_true',
+        help='Database is a copy nothing writes to (opened with immutable=1)'
+    )
 
     args = parser.parse_args()
 
     # Initialize database
     try:
-        db = AnalyticsDB(db_path=args.db_path)
+        db = AnalyticsDB(db_path=args.db_path, profile='read', read_only=True,
+                         immutable=args.snapshot)
     except Exception as e:
         logger.error(f"Failed to connect to database: {e}")
         return 1
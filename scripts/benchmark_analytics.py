@@ -0,0 +1,1594 @@
+#!/usr/bin/env python3
+"""
+Analytics Database Benchmarks
+
+Synthetic benchmarks for the analytics database layer. Each scenario builds
+its own temporary database from generated checkpoints, so results do not
+depend on local session history.
+
+Usage:
+    python benchmark_analytics.py profiles                # Compare connection profiles
+    python benchmark_analytics.py profiles --sessions 50000
+    python benchmark_analytics.py timestamps              # ISO text vs epoch-ms (1M rows)
+    python benchmark_analytics.py async --coroutines 200  # AsyncAnalyticsDB under load
+    python benchmark_analytics.py buffered                # Write-behind buffer vs insert_session
+    python benchmark_analytics.py search                  # Decision search (1M decisions)
+    python benchmark_analytics.py hot-files               # File hot spots (10M file changes)
+    python benchmark_analytics.py dictionary              # Text columns vs interned ids
+    python benchmark_analytics.py partitions              # Single file vs monthly partitions
+    python benchmark_analytics.py startup                 # Read-write vs read-only open
+    python benchmark_analytics.py distribution            # Exact vs binned percentiles
+    python benchmark_analytics.py timeseries              # 2-year daily/weekly series
+    python benchmark_analytics.py cache                   # Status report with/without result cache
+    python benchmark_analytics.py backends                # SQLite vs memory vs segment log
+    python benchmark_analytics.py frame                   # sqlite3.Row loops vs NumPy column cache
+    python benchmark_analytics.py merge                   # Replaying checkpoints vs merge_from
+    python benchmark_analytics.py rewrites                # Re-ingest: unchanged skips, in-place rewrites
+"""
+
+import sys
+import shutil
+import itertools
+import sqlite3
+import time
+import random
+import logging
+import asyncio
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List
+
+from analytics_async import AsyncAnalyticsDB
+from analytics_backends import open_backend
+from analytics_buffer import BufferedAnalyticsWriter
+from analytics_db import AnalyticsDB, ThreadSafeAnalyticsDB, from_epoch_ms, to_epoch_ms
+from analytics_frame import NUMPY_AVAILABLE, AnalyticsFrame
+from analytics_partitions import PartitionedAnalyticsDB
+
+# Keep per-session logging out of the timings
+logging.getLogger('analytics_db').setLevel(logging.WARNING)
+logging.getLogger('analytics_async').setLevel(logging.WARNING)
+logging.getLogger('analytics_backends').setLevel(logging.WARNING)
+logging.getLogger('analytics_buffer').setLevel(logging.WARNING)
+logging.getLogger('analytics_frame').setLevel(logging.WARNING)
+logging.getLogger('analytics_partitions').setLevel(logging.WARNING)
+
+
+def synthetic_checkpoints(
+    count: int,
+    projects: int = 20,
+    days: int = 365,
+    seed: int = 42
+) -> Iterator[Dict[str, Any]]:
+    """Generate checkpoint dictionaries shaped like real session checkpoints
+
+    Args:
+        count: Number of checkpoints to generate
+        projects: Number of distinct project names
+        days: Spread timestamps over the last N days
+        seed: Random seed for reproducible runs
+
+    Yields:
+        Checkpoint data dictionaries
+    """
+    rng = random.Random(seed)
+    now = datetime.now()
+
+    for i in range(count):
+        timestamp = now - timedelta(seconds=rng.randint(0, days * 86400))
+        started_at = timestamp - timedelta(minutes=rng.randint(1, 240))
+        project = f"project-{rng.randint(0, projects - 1):03d}"
+
+        yield {
+            'session_id': f'bench-{seed}-{i:09d}',
+            'timestamp': timestamp.isoformat(),
+            'started_at': started_at.isoformat(),
+            'file_changes': [
+                {'path': f'src/{project}/module_{rng.randint(0, 400)}.py', 'type': 'modified'}
+                for _ in range(rng.randint(0, 12))
+            ],
+            'decisions': [
+                f'Decision {j} for session {i}' for j in range(rng.randint(0, 6))
+            ],
+            'resume_points': ['Resume point'] * rng.randint(0, 3),
+            'problems_encountered': [],
+            'project': {'name': project},
+            'git_branch': rng.choice(['main', 'develop', f'feature/{project}']),
+            'context': {'tool': rng.choice(['manual', 'hook', 'auto'])}
+        }
+
+
+def time_call(func: Callable[[], Any], repeats: int = 5) -> Dict[str, float]:
+    """Time a callable several times
+
+    Args:
+        func: Zero-argument callable to time
+        repeats: Number of timed runs
+
+    Returns:
+        Dictionary with median and min latency in milliseconds
+    """
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return {'median_ms': statistics.median(samples), 'min_ms': min(samples)}
+
+
+def bench_profiles(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Compare insert throughput and query latency across connection profiles
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        One result row per profile
+    """
+    results = []
+
+    for profile in AnalyticsDB.PROFILES:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = str(Path(tmp) / 'bench.db')
+            db = AnalyticsDB(db_path=db_path, profile=profile)
+
+            # Single-session transactions: dominated by commit/fsync cost
+            start = time.perf_counter()
+            for checkpoint in synthetic_checkpoints(args.single, seed=1):
+                db.insert_session(checkpoint)
+            single_rate = args.single / (time.perf_counter() - start)
+
+            # Bulk load
+            start = time.perf_counter()
+            db.insert_sessions_bulk(synthetic_checkpoints(args.sessions, seed=2))
+            bulk_rate = args.sessions / (time.perf_counter() - start)
+
+            stats_latency = time_call(lambda: db.get_session_stats(days=30), args.repeats)
+            breakdown_latency = time_call(db.get_project_breakdown, args.repeats)
+
+            # Read from a second connection while the writer holds an open
+            # write transaction; in WAL mode this must not wait for the writer
+            db.conn.execute("BEGIN IMMEDIATE")
+            db.conn.execute("DELETE FROM decisions WHERE id = -1")
+            reader = AnalyticsDB(db_path=db_path, profile='read')
+            concurrent_latency = time_call(lambda: reader.get_session_stats(days=30), args.repeats)
+            reader.close()
+            db.conn.rollback()
+            db.close()
+
+        results.append({
+            'profile': profile,
+            'single_inserts_per_s': single_rate,
+            'bulk_inserts_per_s': bulk_rate,
+            'session_stats_ms': stats_latency['median_ms'],
+            'project_breakdown_ms': breakdown_latency['median_ms'],
+            'read_during_write_ms': concurrent_latency['median_ms'],
+        })
+
+    return results
+
+
+def _build_legacy_database(db_path: str, rows: int, days: int = 730) -> None:
+    """Create a pre-epoch (schema version 1) database with ISO text timestamps
+
+    Args:
+        db_path: Database file to create
+        rows: Number of session rows
+        days: Spread timestamps over the last N days
+    """
+    rng = random.Random(7)
+    now = datetime.now()
+
+    def generate():
+        for i in range(rows):
+            timestamp = now - timedelta(seconds=rng.randint(0, days * 86400))
+            # Same text format the default sqlite3 datetime adapter wrote
+            yield (
+                f'legacy-{i:09d}',
+                timestamp.isoformat(' '),
+                (timestamp - timedelta(minutes=30)).isoformat(' '),
+                1800,
+                rng.randint(0, 12),
+                rng.randint(0, 6),
+                f'project-{rng.randint(0, 19):03d}'
+            )
+
+    conn = sqlite3.connect(db_path)
+    AnalyticsDB._migrate_base_schema(None, conn.cursor())
+    conn.executemany(
+        "INSERT INTO sessions (session_id, timestamp, started_at, duration_seconds, "
+        "files_changed, decisions_logged, project_name) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        generate()
+    )
+    conn.commit()
+    conn.close()
+
+
+def bench_timestamps(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Compare ISO text timestamps with integer epoch-ms columns
+
+    Builds a legacy database, times text-based queries, migrates it through
+    AnalyticsDB and times the integer equivalents.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        One result row per measurement
+    """
+    cutoff = datetime.now() - timedelta(days=30)
+    day_cutoff = datetime.now() - timedelta(days=90)
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = str(Path(tmp) / 'legacy.db')
+        epoch_path = str(Path(tmp) / 'epoch.db')
+
+        _build_legacy_database(legacy_path, args.rows)
+        shutil.copy(legacy_path, epoch_path)
+
+        legacy = sqlite3.connect(legacy_path)
+        legacy_size = Path(legacy_path).stat().st_size
+
+        start = time.perf_counter()
+        db = AnalyticsDB(db_path=epoch_path, profile='ingest')
+        migration_s = time.perf_counter() - start
+        db.conn.execute("VACUUM")
+        epoch_size = Path(epoch_path).stat().st_size
+        conn = db.conn
+
+        measurements = [
+            (
+                'window count (30d)',
+                lambda: legacy.execute(
+                    "SELECT COUNT(*) FROM sessions WHERE timestamp >= ?",
+                    (cutoff.isoformat(' '),)).fetchone(),
+                lambda: conn.execute(
+                    "SELECT COUNT(*) FROM sessions WHERE timestamp_ms >= ?",
+                    (to_epoch_ms(cutoff),)).fetchone(),
+            ),
+            (
+                'daily buckets (90d)',
+                lambda: legacy.execute(
+                    "SELECT date(timestamp), COUNT(*) FROM sessions "
+                    "WHERE timestamp >= ? GROUP BY 1",
+                    (day_cutoff.isoformat(' '),)).fetchall(),
+                lambda: conn.execute(
+                    "SELECT timestamp_ms / 86400000, COUNT(*) FROM sessions "
+                    "WHERE timestamp_ms >= ? GROUP BY 1",
+                    (to_epoch_ms(day_cutoff),)).fetchall(),
+            ),
+            (
+                'daily buckets (all)',
+                lambda: legacy.execute(
+                    "SELECT date(timestamp), COUNT(*) FROM sessions GROUP BY 1").fetchall(),
+                lambda: conn.execute(
+                    "SELECT timestamp_ms / 86400000, COUNT(*) FROM sessions GROUP BY 1").fetchall(),
+            ),
+            (
+                'recent 1000 + parse',
+                lambda: [
+                    datetime.fromisoformat(row[0]) for row in legacy.execute(
+                        "SELECT timestamp FROM sessions ORDER BY timestamp DESC LIMIT 1000")
+                ],
+                lambda: [
+                    from_epoch_ms(row[0]) for row in conn.execute(
+                        "SELECT timestamp_ms FROM sessions ORDER BY timestamp_ms DESC LIMIT 1000")
+                ],
+            ),
+        ]
+
+        for name, before, after in measurements:
+            results.append({
+                'measurement': name,
+                'iso_text_ms': time_call(before, args.repeats)['median_ms'],
+                'epoch_ms_ms': time_call(after, args.repeats)['median_ms'],
+            })
+
+        results.append({
+            'measurement': 'database size (MB)',
+            'iso_text_ms': legacy_size / 1e6,
+            'epoch_ms_ms': epoch_size / 1e6,
+        })
+        results.append({
+            'measurement': f'migration of {args.rows:,} rows (s)',
+            'iso_text_ms': 0.0,
+            'epoch_ms_ms': migration_s,
+        })
+
+        legacy.close()
+        db.close()
+
+    return results
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def _run_async_load(db_path: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Drive AsyncAnalyticsDB with concurrent writer and reader coroutines
+
+    Args:
+        db_path: Database file to use
+        args: Parsed command line arguments
+
+    Returns:
+        One result row
+    """
+    checkpoints = list(synthetic_checkpoints(args.coroutines * args.per_coroutine, seed=3))
+    insert_latencies: List[float] = []
+    read_latencies: List[float] = []
+
+    async def writer(index: int):
+        for checkpoint in checkpoints[index::args.coroutines]:
+            start = time.perf_counter()
+            await db.insert_session(checkpoint)
+            insert_latencies.append((time.perf_counter() - start) * 1000)
+
+    async def reader():
+        for _ in range(args.per_coroutine):
+            start = time.perf_counter()
+            await db.get_session_stats(days=30)
+            read_latencies.append((time.perf_counter() - start) * 1000)
+
+    async with AsyncAnalyticsDB(db_path=db_path, profile=args.profile,
+                                max_workers=args.workers, max_batch=args.max_batch) as db:
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(writer(i) for i in range(args.coroutines)),
+            *(reader() for _ in range(args.readers))
+        )
+        elapsed = time.perf_counter() - start
+        batches = db.batches
+
+    return {
+        'coroutines': args.coroutines,
+        'inserts_per_s': len(checkpoints) / elapsed,
+        'avg_batch': len(checkpoints) / max(batches, 1),
+        'insert_p50_ms': _percentile(insert_latencies, 0.5),
+        'insert_p99_ms': _percentile(insert_latencies, 0.99),
+        'read_p50_ms': _percentile(read_latencies, 0.5) if read_latencies else 0.0,
+        'read_p99_ms': _percentile(read_latencies, 0.99) if read_latencies else 0.0,
+    }
+
+
+def bench_async(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Measure AsyncAnalyticsDB throughput and latency under concurrent load
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        One result row
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        return [asyncio.run(_run_async_load(str(Path(tmp) / 'bench.db'), args))]
+
+
+def bench_buffered(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Compare per-checkpoint transactions with the write-behind buffer
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        One result row per write path
+    """
+    checkpoints = list(synthetic_checkpoints(args.sessions, seed=4))
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = AnalyticsDB(db_path=str(Path(tmp) / 'direct.db'), profile=args.profile)
+        start = time.perf_counter()
+        for checkpoint in checkpoints:
+            db.insert_session(checkpoint)
+        elapsed = time.perf_counter() - start
+        db.close()
+
+        results.append({
+            'path': 'insert_session',
+            'accept_us': elapsed / len(checkpoints) * 1e6,
+            'sessions_per_s': len(checkpoints) / elapsed,
+            'flushes': float(len(checkpoints)),
+            'avg_flush_ms': elapsed / len(checkpoints) * 1000,
+        })
+
+        db = ThreadSafeAnalyticsDB(db_path=str(Path(tmp) / 'buffered.db'), profile=args.profile)
+        writer = BufferedAnalyticsWriter(db, max_records=args.max_records,
+                                         max_delay_ms=args.max_delay_ms, handle_signals=False)
+        start = time.perf_counter()
+        for checkpoint in checkpoints:
+            writer.add(checkpoint)
+        accepted = time.perf_counter() - start
+        writer.flush()
+        elapsed = time.perf_counter() - start
+        metrics = writer.metrics()
+        writer.close()
+        db.close()
+
+        results.append({
+            'path': 'BufferedAnalyticsWriter',
+            'accept_us': accepted / len(checkpoints) * 1e6,
+            'sessions_per_s': len(checkpoints) / elapsed,
+            'flushes': float(metrics['flushes']),
+            'avg_flush_ms': metrics['avg_flush_ms'],
+        })
+
+    return results
+
+
+_SEARCH_COMMON = (
+    'the to a for of and in we use because it is so with on instead than keep '
+    'move add from not as be by this that'
+).split()
+
+_SEARCH_TECHNICAL = (
+    'sqlite postgres redis cache index query schema migration trigger rollup '
+    'thread async queue writer reader pool connection latency throughput batch '
+    'commit transaction journal checkpoint session hook parser config module '
+    'refactor rename extract inline test fixture mock benchmark profile memory '
+    'disk network retry timeout backoff lock mutex deadlock race signal handler'
+).split()
+
+
+def _search_checkpoints(decisions: int, per_session: int = 5) -> Iterator[Dict[str, Any]]:
+    """Generate checkpoints whose decisions are Zipf-distributed sentences
+
+    Word frequencies follow 1/rank over ~10k words: filler words are very
+    common, the technical terms used by the benchmark queries sit in the
+    middle of the distribution and a long tail of identifiers follows.
+
+    Args:
+        decisions: Total number of decisions
+        per_session: Decisions per checkpoint
+
+    Yields:
+        Checkpoint data dictionaries
+    """
+    rng = random.Random(11)
+    tail = [f'ident{i}' for i in range(10000)]
+    vocabulary = _SEARCH_COMMON + tail[:150] + _SEARCH_TECHNICAL + tail[150:]
+    cumulative = []
+    total = 0.0
+    for rank in range(len(vocabulary)):
+        total += 1.0 / (rank + 1)
+        cumulative.append(total)
+
+    base = synthetic_checkpoints((decisions + per_session - 1) // per_session, seed=11)
+
+    for checkpoint in base:
+        checkpoint['decisions'] = [
+            'Chose ' + ' '.join(rng.choices(vocabulary, cum_weights=cumulative, k=rng.randint(6, 18)))
+            for _ in range(per_session)
+        ]
+        yield checkpoint
+
+
+def bench_search(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Measure full-text decision search latency against LIKE scans
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        One result row per query
+    """
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'bench.db')
+        db = AnalyticsDB(db_path=db_path, profile='ingest')
+
+        start = time.perf_counter()
+        db.insert_sessions_bulk(_search_checkpoints(args.decisions), batch_size=5000)
+        load_s = time.perf_counter() - start
+        db.rebuild_search_index()
+        db.conn.execute("VACUUM")
+        size_mb = Path(db_path).stat().st_size / 1e6
+
+        since = datetime.now() - timedelta(days=30)
+        queries = [
+            ('word', 'deadlock', {}),
+            ('two words', 'deadlock postgres', {}),
+            ('prefix', 'dead*', {}),
+            ('phrase', '"connection pool"', {}),
+            ('word + project', 'deadlock', {'project': 'project-007'}),
+            ('word + last 30 days', 'deadlock', {'since': since}),
+            ('plain text', 'why did we pick redis?', {}),
+            ('common word', 'because', {}),
+        ]
+
+        for name, query, filters in queries:
+            fts = time_call(lambda: db.search_decisions(query, limit=20, **filters), args.repeats)
+            matches = db.conn.execute(
+                "SELECT COUNT(*) FROM decisions_fts WHERE decisions_fts MATCH ?",
+                (query if name != 'plain text' else '"why" "did" "we" "pick" "redis"',)
+            ).fetchone()[0]
+            results.append({'query': name, 'search_ms': fts['median_ms'], 'matches': float(matches)})
+
+        like = time_call(lambda: db.conn.execute(
+            "SELECT COUNT(*) FROM decisions WHERE decision_text LIKE '%connection pool%'"
+        ).fetchall(), args.repeats)
+        results.append({'query': 'LIKE full scan (reference)', 'search_ms': like['median_ms'],
+                        'matches': 0.0})
+        results.append({'query': 'bulk load + index (s)', 'search_ms': load_s, 'matches': 0.0})
+        results.append({'query': 'database size (MB)', 'search_ms': size_mb, 'matches': 0.0})
+
+        db.close()
+
+    return results
+
+
+def _build_file_changes(db: AnalyticsDB, rows: int, sessions: int, days: int = 365) -> float:
+    """Fill a database with synthetic sessions and file changes in SQL
+
+    File paths are skewed (a few modules change far more often than the
+    rest) and changes go through the normal triggers.
+
+    Args:
+        db: Database to fill
+        rows: Number of file change rows
+        sessions: Number of sessions to spread them over
+        days: Spread sessions over the last N days
+
+    Returns:
+        Seconds spent inserting file changes
+    """
+    now_ms = to_epoch_ms(datetime.now())
+
+    db.conn.executemany("INSERT INTO projects (name) VALUES (?)",
+                        [(f'project-{i:03d}',) for i in range(20)])
+    db.conn.executemany("INSERT INTO file_paths (name) VALUES (?)",
+                        [(f'src/module_{i}.py',) for i in range(200)])
+    first_project, first_path = (
+        db.conn.execute(f"SELECT MIN(id) FROM {table} WHERE name != 'Unknown'").fetchone()[0]
+        for table in ('projects', 'file_paths')
+    )
+
+    db.conn.execute("""
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < ? - 1)
+        INSERT INTO sessions (session_id, timestamp_ms, files_changed, project_id)
+        SELECT
+            printf('hot-%08d', i),
+            ? - abs(random()) % ?,
+            0,
+            ? + abs(random()) % 20
+        FROM n
+    """, (sessions, now_ms, days * AnalyticsDB.MS_PER_DAY, first_project))
+    db.conn.commit()
+
+    start = time.perf_counter()
+    db.conn.execute("""
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < ? - 1)
+        INSERT INTO file_changes (session_id, file_path_id, change_type)
+        SELECT
+            printf('hot-%08d', abs(random()) % ?),
+            ? + abs(random()) % (abs(random()) % 200 + 1),
+            'modified'
+        FROM n
+    """, (rows, sessions, first_path))
+    db.conn.commit()
+    return time.perf_counter() - start
+
+
+def bench_hot_files(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Compare hot-file queries over raw joins with the per-file rollup
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        One result row per query
+    """
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = AnalyticsDB(db_path=str(Path(tmp) / 'bench.db'), profile='ingest')
+        load_s = _build_file_changes(db, args.rows, max(args.rows // 10, 1))
+        db.conn.execute("ANALYZE")
+
+        def raw_query(project, days):
+            conditions, params = [], []
+            if project:
+                conditions.append("p.name = ?")
+                params.append(project)
+            if days:
+                conditions.append("s.timestamp_ms >= ?")
+                params.append(to_epoch_ms(datetime.now() - timedelta(days=days)))
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            return db.conn.execute(f"""
+                SELECT p.name, fp.name, COUNT(*) as changes
+                FROM file_changes f
+                JOIN sessions s ON s.session_id = f.session_id
+                JOIN projects p ON p.id = s.project_id
+                JOIN file_paths fp ON fp.id = f.file_path_id
+                {where}
+                GROUP BY s.project_id, f.file_path_id ORDER BY changes DESC LIMIT 20
+            """, params).fetchall()
+
+        scenarios = [
+            ('project, 30 days', 'project-007', 30),
+            ('project, all time', 'project-007', None),
+            ('all projects, 30 days', None, 30),
+            ('all projects, all time', None, None),
+        ]
+        for name, project, days in scenarios:
+            raw = time_call(lambda: raw_query(project, days), args.repeats)
+            rollup = time_call(lambda: db.get_hot_files(project=project, days=days), args.repeats)
+            results.append({
+                'query': name,
+                'raw_join_ms': raw['median_ms'],
+                'rollup_ms': rollup['median_ms'],
+            })
+
+        rollup_rows = db.conn.execute("SELECT COUNT(*) FROM file_changes_daily").fetchone()[0]
+        results.append({'query': f'load {args.rows:,} changes (s)', 'raw_join_ms': 0.0,
+                        'rollup_ms': load_s})
+        results.append({'query': 'rollup rows', 'raw_join_ms': float(args.rows),
+                        'rollup_ms': float(rollup_rows)})
+        db.close()
+
+    return results
+
+
+def _build_text_database(db_path: str, sessions: int, seed: int = 11) -> None:
+    """Create a schema version 6 database (plain text columns) with raw rows
+
+    Args:
+        db_path: Database file to create
+        sessions: Number of session rows (about 6 file changes each)
+        seed: Random seed for reproducible runs
+    """
+    rng = random.Random(seed)
+    now_ms = to_epoch_ms(datetime.now())
+    session_rows, file_rows = [], []
+
+    for i in range(sessions):
+        session_id = f'text-{i:09d}'
+        project = f'project-{rng.randint(0, 19):03d}'
+        changes = rng.randint(0, 12)
+        session_rows.append((
+            session_id,
+            now_ms - rng.randint(0, 365 * AnalyticsDB.MS_PER_DAY),
+            changes,
+            f'/home/developer/workspace/{project}',
+            rng.choice(['main', 'develop', f'feature/{project}-improvements']),
+            rng.choice(['manual', 'post-tool-use-hook', 'session-end-hook'])
+        ))
+        for _ in range(changes):
+            file_rows.append((
+                session_id,
+                f'src/{project}/components/feature_{rng.randint(0, 40)}/module_{rng.randint(0, 25)}.py',
+                'modified'
+            ))
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    for migration in AnalyticsDB.MIGRATIONS[:6]:
+        getattr(AnalyticsDB, migration)(None, cursor)
+    cursor.executemany(
+        "INSERT INTO sessions (session_id, timestamp_ms, files_changed, project_name, "
+        "git_branch, tool_triggered) VALUES (?, ?, ?, ?, ?, ?)",
+        session_rows
+    )
+    cursor.executemany(
+        "INSERT INTO file_changes (session_id, file_path, change_type) VALUES (?, ?, ?)",
+        file_rows
+    )
+    conn.execute("PRAGMA user_version = 6")
+    conn.commit()
+    conn.close()
+
+
+def bench_dictionary(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Compare plain text columns with dictionary-encoded ids
+
+    Builds a version 6 database, times raw GROUP BY queries on the text
+    columns, migrates a copy through AnalyticsDB and times the same queries
+    on ids. Sizes cover sessions, file_changes, their indexes and (encoded)
+    the dimension tables; rollups and the search index exist only in the
+    migrated copy and are left out. Also compares bulk ingest with and
+    without the intern cache.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        One result row per measurement
+    """
+    results = []
+    raw_tables = ('sessions', 'file_changes', 'sqlite_autoindex_sessions_1',
+                  'idx_sessions_timestamp', 'idx_sessions_project',
+                  'idx_file_changes_session_path')
+
+    def table_bytes(conn, names):
+        placeholders = ', '.join('?' * len(names))
+        return conn.execute(
+            f"SELECT SUM(pgsize) FROM dbstat WHERE name IN ({placeholders})", names
+        ).fetchone()[0]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        text_path = str(Path(tmp) / 'text.db')
+        encoded_path = str(Path(tmp) / 'encoded.db')
+
+        _build_text_database(text_path, args.sessions)
+        shutil.copy(text_path, encoded_path)
+
+        text = sqlite3.connect(text_path)
+        text.execute("VACUUM")
+        text.execute("ANALYZE")
+
+        start = time.perf_counter()
+        db = AnalyticsDB(db_path=encoded_path, profile='ingest')
+        migration_s = time.perf_counter() - start
+        db.conn.execute("VACUUM")
+        db.conn.execute("ANALYZE")
+        db.close()
+
+        # Same plain connection settings on both sides
+        conn = sqlite3.connect(encoded_path)
+
+        dimensions = [*AnalyticsDB.DIMENSIONS]
+        dimensions += [f'sqlite_autoindex_{table}_1' for table in AnalyticsDB.DIMENSIONS]
+        results.append({
+            'measurement': 'raw tables + indexes (MB)',
+            'text_ms': table_bytes(text, raw_tables) / 1e6,
+            'encoded_ms': (table_bytes(conn, raw_tables) + table_bytes(conn, dimensions)) / 1e6,
+        })
+
+        measurements = [
+            (
+                'sessions per project',
+                lambda: text.execute(
+                    "SELECT project_name, COUNT(*), SUM(files_changed) FROM sessions "
+                    "GROUP BY project_name").fetchall(),
+                lambda: conn.execute(
+                    "SELECT p.name, n, files FROM (SELECT project_id, COUNT(*) as n, "
+                    "SUM(files_changed) as files FROM sessions GROUP BY project_id) "
+                    "JOIN projects p ON p.id = project_id").fetchall(),
+            ),
+            (
+                'sessions per branch',
+                lambda: text.execute(
+                    "SELECT git_branch, COUNT(*) FROM sessions GROUP BY git_branch").fetchall(),
+                lambda: conn.execute(
+                    "SELECT b.name, n FROM (SELECT git_branch_id, COUNT(*) as n FROM sessions "
+                    "GROUP BY git_branch_id) JOIN git_branches b ON b.id = git_branch_id").fetchall(),
+            ),
+            (
+                'top files (all)',
+                lambda: text.execute(
+                    "SELECT file_path, COUNT(*) as n FROM file_changes "
+                    "GROUP BY file_path ORDER BY n DESC LIMIT 20").fetchall(),
+                lambda: conn.execute(
+                    "SELECT fp.name, n FROM (SELECT file_path_id, COUNT(*) as n FROM file_changes "
+                    "GROUP BY file_path_id ORDER BY n DESC LIMIT 20) "
+                    "JOIN file_paths fp ON fp.id = file_path_id").fetchall(),
+            ),
+            (
+                'top files (one project)',
+                lambda: text.execute(
+                    "SELECT f.file_path, COUNT(*) as n FROM file_changes f "
+                    "JOIN sessions s ON s.session_id = f.session_id "
+                    "WHERE s.project_name = '/home/developer/workspace/project-007' "
+                    "GROUP BY f.file_path ORDER BY n DESC LIMIT 20").fetchall(),
+                lambda: conn.execute(
+                    "SELECT fp.name, n FROM (SELECT f.file_path_id, COUNT(*) as n FROM file_changes f "
+                    "JOIN sessions s ON s.session_id = f.session_id "
+                    "WHERE s.project_id = (SELECT id FROM projects "
+                    "WHERE name = '/home/developer/workspace/project-007') "
+                    "GROUP BY f.file_path_id ORDER BY n DESC LIMIT 20) "
+                    "JOIN file_paths fp ON fp.id = file_path_id").fetchall(),
+            ),
+        ]
+
+        for name, before, after in measurements:
+            results.append({
+                'measurement': name,
+                'text_ms': time_call(before, args.repeats)['median_ms'],
+                'encoded_ms': time_call(after, args.repeats)['median_ms'],
+            })
+
+        results.append({
+            'measurement': f'migration of {args.sessions:,} sessions (s)',
+            'text_ms': 0.0,
+            'encoded_ms': migration_s,
+        })
+        text.close()
+        conn.close()
+
+        # Ingest cost of interning, with and without the string -> id cache
+        checkpoints = list(synthetic_checkpoints(args.ingest))
+        rates = {}
+        for cache_size in (0, AnalyticsDB.INTERN_CACHE_SIZE):
+            ingest = AnalyticsDB(db_path=str(Path(tmp) / f'ingest-{cache_size}.db'), profile='ingest')
+            for cache in ingest._intern_caches.values():
+                cache.maxsize = cache_size
+            start = time.perf_counter()
+            ingest.insert_sessions_bulk(checkpoints)
+            rates[cache_size] = len(checkpoints) / (time.perf_counter() - start)
+            ingest.close()
+
+        results.append({
+            'measurement': f'ingest {args.ingest:,} (sessions/s, cache off/on)',
+            'text_ms': rates[0],
+            'encoded_ms': rates[AnalyticsDB.INTERN_CACHE_SIZE],
+        })
+
+    return results
+
+
+def bench_partitions(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Compare a single database file with monthly partitions
+
+    Both get the same checkpoints spread over two years. Besides query
+    latency this reports the size of the file the current month is written
+    to, which is what backups and vacuums of the live data have to touch.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        One result row per measurement
+    """
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Separate directories: partitions are created next to the catalog
+        (Path(tmp) / 'single').mkdir()
+        (Path(tmp) / 'partitioned').mkdir()
+        single = AnalyticsDB(db_path=str(Path(tmp) / 'single' / 'stats.db'), profile='ingest')
+        partitioned = PartitionedAnalyticsDB(
+            db_path=str(Path(tmp) / 'partitioned' / 'stats.db'), profile='ingest'
+        )
+
+        load_s = {}
+        for name, db in (('single', single), ('partitioned', partitioned)):
+            start = time.perf_counter()
+            db.insert_sessions_bulk(synthetic_checkpoints(args.sessions, days=730, seed=5),
+                                    batch_size=5000)
+            load_s[name] = time.perf_counter() - start
+        results.append({
+            'measurement': f'bulk load {args.sessions:,} (sessions/s)',
+            'single_file': args.sessions / load_s['single'],
+            'partitioned': args.sessions / load_s['partitioned'],
+        })
+
+        since = datetime.now() - timedelta(days=30)
+        queries = [
+            ('session stats, 30 days', lambda db: db.get_session_stats(days=30)),
+            ('session stats, 365 days', lambda db: db.get_session_stats(days=365)),
+            ('aggregate stats', lambda db: db.get_aggregate_stats()),
+            ('project breakdown', lambda db: db.get_project_breakdown()),
+            ('hot files, 30 days', lambda db: db.get_hot_files(days=30)),
+            ('recent sessions', lambda db: db.get_recent_sessions(limit=10)),
+            ('search, last 30 days', lambda db: db.search_decisions('session', since=since)),
+        ]
+        for name, query in queries:
+            row = {'measurement': f'{name} (ms)'}
+            for column, db in (('single_file', single), ('partitioned', partitioned)):
+                query(db)  # Warm the page cache and, for partitions, the attachments
+                row[column] = time_call(lambda: query(db), args.repeats)['median_ms']
+            results.append(row)
+
+        single.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        single_mb = Path(single.db_path).stat().st_size / 1e6
+        partitions = partitioned.list_partitions()
+        newest = partitions[-1]
+        partitioned._partition(newest['month']).conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        results.append({
+            'measurement': 'file written this month (MB)',
+            'single_file': single_mb,
+            'partitioned': Path(newest['path']).stat().st_size / 1e6,
+        })
+
+        start = time.perf_counter()
+        frozen = partitioned.freeze_cold_partitions()
+        for month in frozen:
+            partitioned.compress_partition(month)
+        compress_s = time.perf_counter() - start
+
+        total_mb = sum(p['size_bytes'] for p in partitioned.list_partitions()) / 1e6
+        total_mb += Path(partitioned.db_path).stat().st_size / 1e6
+        results.append({
+            'measurement': f'total on disk (MB), {len(frozen)} months compressed',
+            'single_file': single_mb,
+            'partitioned': total_mb,
+        })
+        results.append({
+            'measurement': 'freeze + compress cold months (s)',
+            'single_file': 0.0,
+            'partitioned': compress_s,
+        })
+
+        row = {'measurement': 'session stats, 730 days, compressed (ms)'}
+        for column, db in (('single_file', single), ('partitioned', partitioned)):
+            db.get_session_stats(days=730)
+            row[column] = time_call(lambda: db.get_session_stats(days=730), args.repeats)['median_ms']
+        results.append(row)
+
+        single.close()
+        partitioned.close()
+
+    return results
+
+
+def bench_startup(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Measure open + one query + close, the way reporting tools use the database
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        One result row per open mode
+    """
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'bench.db')
+        db = AnalyticsDB(db_path=db_path, profile='ingest')
+        db.insert_sessions_bulk(synthetic_checkpoints(args.sessions, seed=9), batch_size=5000)
+        db.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        modes = [
+            ('read-write', {}),
+            ('read-only', {'read_only': True}),
+            ('immutable', {'immutable': True}),
+        ]
+
+        for name, options in modes:
+            def report():
+                reader = AnalyticsDB(db_path=db_path, profile='read', **options)
+                reader.get_aggregate_stats()
+                reader.close()
+
+            idle = time_call(report, args.repeats)
+
+            # Same, while another connection holds the write lock
+            db.conn.execute("BEGIN IMMEDIATE")
+            try:
+                busy = time_call(report, args.repeats) if name != 'immutable' else idle
+            finally:
+                db.conn.rollback()
+
+            results.append({
+                'mode': name,
+                'open_query_close_ms': idle['median_ms'],
+                'min_ms': idle['min_ms'],
+                'while_writer_locked_ms': busy['median_ms'],
+            })
+
+        db.close()
+
+    return results
+
+
+def bench_distribution(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Compare exact duration percentiles (sorting raw rows) with the histogram bins
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        One result row per query, with the largest relative error of the
+        binned p50/p90/p99
+    """
+    results = []
+    percentiles = (50, 90, 99)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = AnalyticsDB(db_path=str(Path(tmp) / 'bench.db'), profile='ingest')
+        db.insert_sessions_bulk(synthetic_checkpoints(args.sessions, seed=13), batch_size=5000)
+        db.conn.execute("ANALYZE")
+
+        def exact(project, days):
+            conditions, params = ["duration_seconds IS NOT NULL"], []
+            if project:
+                conditions.append("project_id = (SELECT id FROM projects WHERE name = ?)")
+                params.append(project)
+            if days:
+                conditions.append("timestamp_ms >= ?")
+                params.append(to_epoch_ms(datetime.now() - timedelta(days=days)))
+            where = ' AND '.join(conditions)
+            count = db.conn.execute(f"SELECT COUNT(*) FROM sessions WHERE {where}", params).fetchone()[0]
+            return {
+                p: db.conn.execute(
+                    f"SELECT duration_seconds FROM sessions WHERE {where} "
+                    f"ORDER BY duration_seconds LIMIT 1 OFFSET ?",
+                    params + [max(int(count * p / 100 + 0.999999) - 1, 0)]
+                ).fetchone()[0]
+                for p in percentiles
+            }
+
+        scenarios = [
+            ('project, 30 days', 'project-007', 30),
+            ('project, all time', 'project-007', None),
+            ('all projects, 30 days', None, 30),
+            ('all projects, all time', None, None),
+        ]
+        for name, project, days in scenarios:
+            raw = time_call(lambda: exact(project, days), args.repeats)
+            binned = time_call(lambda: db.get_distribution(project=project, days=days), args.repeats)
+
+            expected = exact(project, days)
+            estimated = db.get_distribution(project=project, days=days)['percentiles']
+            error = max(
+                abs(estimated[f"p{p}"] - expected[p]) / expected[p] for p in percentiles
+            )
+            results.append({
+                'query': name,
+                'exact_sort_ms': raw['median_ms'],
+                'bins_ms': binned['median_ms'],
+                'max_error_pct': error * 100,
+            })
+
+        db.close()
+
+    return results
+
+
+def bench_timeseries(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Compare bucketing raw rows in Python with get_timeseries over the rollup
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        One result row per series
+    """
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = AnalyticsDB(db_path=str(Path(tmp) / 'bench.db'), profile='ingest')
+        db.insert_sessions_bulk(
+            synthetic_checkpoints(args.sessions, days=730, seed=17), batch_size=5000
+        )
+        db.conn.execute("ANALYZE")
+
+        def python_buckets(project, days, bucket):
+            sql = "SELECT timestamp_ms, decisions_logged FROM sessions WHERE timestamp_ms >= ?"
+            params: List[Any] = [to_epoch_ms(datetime.now() - timedelta(days=days))]
+            if project:
+                sql += " AND project_id = (SELECT id FROM projects WHERE name = ?)"
+                params.append(project)
+            counts: Dict[Any, int] = {}
+            for timestamp_ms, decisions in db.conn.execute(sql, params):
+                day = from_epoch_ms(timestamp_ms).date()
+                key = day - timedelta(days=day.weekday()) if bucket == 'week' else day
+                counts[key] = counts.get(key, 0) + decisions
+            return counts
+
+        scenarios = [
+            ('decisions/day, 2 years', None, 730, 'day'),
+            ('decisions/week, 2 years', None, 730, 'week'),
+            ('decisions/day, project, 2 years', 'project-007', 730, 'day'),
+            ('decisions/day, 30 days', None, 30, 'day'),
+        ]
+        for name, project, days, bucket in scenarios:
+            raw = time_call(lambda: python_buckets(project, days, bucket), args.repeats)
+            series = time_call(
+                lambda: db.get_timeseries('decisions', bucket=bucket, days=days, project=project),
+                args.repeats
+            )
+            results.append({
+                'series': name,
+                'python_buckets_ms': raw['median_ms'],
+                'get_timeseries_ms': series['median_ms'],
+            })
+
+        db.close()
+
+    return results
+
+
+def bench_cache(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Time the queries of one status.py report with the result cache off and on
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        One result row per cache setting
+    """
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'bench.db')
+        db = AnalyticsDB(db_path=db_path, profile='ingest')
+        db.insert_sessions_bulk(synthetic_checkpoints(args.sessions, seed=19), batch_size=5000)
+        db.close()
+
+        def report(reader):
+            reader.get_aggregate_stats()
+            reader.get_session_stats(days=30)
+            reader.get_project_breakdown()
+            reader.get_recent_sessions(limit=5)
+            reader.get_hot_files(days=30)
+            reader.get_timeseries('sessions', bucket='week', days=365)
+            reader.get_distribution('duration', days=30)
+            reader.get_project_breakdown()
+
+        for name, size in (('off', 0), ('on', AnalyticsDB.RESULT_CACHE_SIZE)):
+            reader = AnalyticsDB(db_path=db_path, profile='read', read_only=True)
+            reader._result_cache.maxsize = size
+            first = time_call(lambda: report(reader), 1)
+            repeated = time_call(lambda: report(reader), args.repeats)
+            info = reader.cache_info()
+            reader.close()
+
+            results.append({
+                'cache': name,
+                'first_report_ms': first['median_ms'],
+                'repeated_report_ms': repeated['median_ms'],
+                'hits': float(info['hits']),
+                'misses': float(info['misses']),
+            })
+
+    return results
+
+
+def bench_backends(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Compare insert throughput, query latency and reopen cost across backends
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        One result row per backend configuration
+    """
+    configurations = (
+        ('sqlite', 'sqlite', {}),
+        ('sqlite-ingest', 'sqlite', {'profile': 'ingest'}),
+        ('memory', 'memory', {}),
+        ('log', 'log', {}),
+        ('log-nosync', 'log', {'sync': False}),
+    )
+    results = []
+
+    for name, kind, options in configurations:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = None if kind == 'memory' else str(Path(tmp) / 'bench')
+            db = open_backend(kind, path, **options)
+
+            start = time.perf_counter()
+            for checkpoint in synthetic_checkpoints(args.single, seed=1):
+                db.insert_session(checkpoint)
+            single_rate = args.single / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            db.insert_sessions_bulk(synthetic_checkpoints(args.sessions, seed=2), batch_size=1000)
+            bulk_rate = args.sessions / (time.perf_counter() - start)
+
+            # Bypass the SQLite result cache so every run executes the query
+            uncached = getattr(db, 'cache_clear', lambda: None)
+
+            def query(func):
+                return lambda: (uncached(), func())
+
+            stats_latency = time_call(query(lambda: db.get_session_stats(days=30)), args.repeats)
+            aggregate_latency = time_call(query(db.get_aggregate_stats), args.repeats)
+            breakdown_latency = time_call(query(db.get_project_breakdown), args.repeats)
+            hot_files_latency = time_call(query(lambda: db.get_hot_files(days=30)), args.repeats)
+            db.close()
+
+            reopen_ms = float('nan')
+            if path is not None:
+                reopen = time_call(lambda: open_backend(kind, path, **options).close(), 1)
+                reopen_ms = reopen['median_ms']
+
+        results.append({
+            'backend': name,
+            'single_inserts_per_s': single_rate,
+            'bulk_inserts_per_s': bulk_rate,
+            'session_stats_ms': stats_latency['median_ms'],
+            'aggregate_stats_ms': aggregate_latency['median_ms'],
+            'project_breakdown_ms': breakdown_latency['median_ms'],
+            'hot_files_30d_ms': hot_files_latency['median_ms'],
+            'reopen_ms': reopen_ms,
+        })
+
+    return results
+
+
+def bench_merge(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Compare replaying every machine's checkpoints with merge_from
+
+    Each machine database holds args.sessions sessions; the second also
+    holds args.overlap sessions of the first, which both methods skip.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        One result row per method
+    """
+    def machine_checkpoints(index: int) -> Iterator[Dict[str, Any]]:
+        own = synthetic_checkpoints(args.sessions, seed=index + 1)
+        if index == 0:
+            return own
+        return itertools.chain(own, itertools.islice(synthetic_checkpoints(args.sessions, seed=1), args.overlap))
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = []
+        for index in range(args.machines):
+            path = str(Path(tmp) / f'machine-{index}.db')
+            db = AnalyticsDB(db_path=path, profile='ingest')
+            db.insert_sessions_bulk(machine_checkpoints(index))
+            db.close()
+            sources.append(path)
+
+        def replay(team: AnalyticsDB) -> Dict[str, int]:
+            counts = {'inserted': 0, 'skipped': 0}
+            for index in range(args.machines):
+                result = team.insert_sessions_bulk(machine_checkpoints(index))
+                counts['inserted'] += result['inserted']
+                counts['skipped'] += result['skipped']
+            return counts
+
+        def merge(team: AnalyticsDB) -> Dict[str, int]:
+            counts = {'inserted': 0, 'skipped': 0}
+            for path in sources:
+                result = team.merge_from(path)
+                counts['inserted'] += result['inserted']
+                counts['skipped'] += result['skipped']
+            return counts
+
+        for name, method in (('replay checkpoints', replay), ('merge_from', merge)):
+            team = AnalyticsDB(db_path=str(Path(tmp) / f'team-{len(results)}.db'), profile='ingest')
+            start = time.perf_counter()
+            counts = method(team)
+            elapsed = time.perf_counter() - start
+            total_sessions = team.get_aggregate_stats()['total_sessions']
+            team.close()
+
+            results.append({
+                'method': name,
+                'inserted': counts['inserted'],
+                'skipped': counts['skipped'],
+                'seconds': elapsed,
+                'sessions_per_s': counts['inserted'] / elapsed,
+                'total_sessions': total_sessions,
+            })
+
+    return results
+
+
+def bench_rewrites(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Measure re-ingesting checkpoints that are unchanged or were rewritten
+
+    Loads args.sessions checkpoints, re-ingests all of them unchanged, then
+    re-ingests them with args.rewritten of them grown by a file change and a
+    decision (a long session checkpointing again). The rewrites adjust the
+    derived tables by the delta; rebuilding every derived table instead is
+    timed for comparison.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        One result row per pass
+    """
+    checkpoints = list(synthetic_checkpoints(args.sessions))
+    rng = random.Random(7)
+    rewritten = list(checkpoints)
+    for index in rng.sample(range(len(checkpoints)), min(args.rewritten, len(checkpoints))):
+        checkpoint = rewritten[index]
+        rewritten[index] = dict(
+            checkpoint,
+            file_changes=checkpoint['file_changes'] + [{'path': 'src/late.py', 'type': 'added'}],
+            decisions=checkpoint['decisions'] + ['Decision added by a later checkpoint']
+        )
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db = AnalyticsDB(db_path=str(Path(tmp) / 'bench.db'), profile='ingest')
+
+        def run(name: str, batch: List[Dict[str, Any]]):
+            start = time.perf_counter()
+            counts = db.insert_sessions_bulk(batch)
+            elapsed = time.perf_counter() - start
+            results.append({
+                'pass': name,
+                'inserted': counts['inserted'],
+                'updated': counts['updated'],
+                'skipped': counts['skipped'],
+                'seconds': elapsed,
+                'total_sessions': db.get_aggregate_stats()['total_sessions'],
+            })
+
+        run('first ingest', checkpoints)
+        run('unchanged re-ingest', checkpoints)
+        run('re-ingest with rewrites', rewritten)
+
+        def rebuild():
+            cursor = db.conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            db._rebuild_derived(cursor)
+            db.conn.commit()
+
+        start = time.perf_counter()
+        rebuild()
+        elapsed = time.perf_counter() - start
+        results.append({
+            'pass': 'rebuild derived tables',
+            'inserted': '-',
+            'updated': '-',
+            'skipped': '-',
+            'seconds': elapsed,
+            'total_sessions': db.get_aggregate_stats()['total_sessions'],
+        })
+        db.close()
+
+    return results
+
+
+def bench_frame(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Compare ad-hoc analysis over sqlite3.Row loops with AnalyticsFrame
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        One result row per analysis, plus cache build and refresh rows
+    """
+    if not NUMPY_AVAILABLE:
+        raise SystemExit("The frame benchmark requires numpy")
+
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = AnalyticsDB(db_path=str(Path(tmp) / 'bench.db'), profile='ingest')
+        checkpoints = synthetic_checkpoints(args.sessions + args.append, days=730, seed=23)
+        db.insert_sessions_bulk(
+            (next(checkpoints) for _ in range(args.sessions)), batch_size=5000
+        )
+
+        start = time.perf_counter()
+        frame = AnalyticsFrame(db)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        db.insert_sessions_bulk(checkpoints, batch_size=5000)
+        start = time.perf_counter()
+        frame.refresh()
+        refresh_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        AnalyticsFrame(db, refresh=False)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        results.append({'analysis': f'build cache ({args.sessions:,} rows)', 'rows_ms': float('nan'),
+                        'frame_ms': build_ms})
+        results.append({'analysis': f'refresh (+{args.append:,} rows)', 'rows_ms': float('nan'),
+                        'frame_ms': refresh_ms})
+        results.append({'analysis': 'load (memory-map)', 'rows_ms': float('nan'), 'frame_ms': load_ms})
+
+        def rows():
+            return db.conn.execute(
+                "SELECT s.timestamp_ms, s.duration_seconds, s.files_changed, p.name as project_name "
+                "FROM sessions s JOIN projects p ON p.id = s.project_id"
+            )
+
+        def rows_daily_files():
+            totals: Dict[int, int] = {}
+            for row in rows():
+                day = row['timestamp_ms'] // AnalyticsDB.MS_PER_DAY
+                totals[day] = totals.get(day, 0) + row['files_changed']
+            return totals
+
+        def rows_long_sessions_per_project():
+            counts: Dict[str, int] = {}
+            for row in rows():
+                if row['duration_seconds'] is not None and row['duration_seconds'] > 3600:
+                    counts[row['project_name']] = counts.get(row['project_name'], 0) + 1
+            return counts
+
+        def frame_long_sessions_per_project():
+            durations = frame.column('duration_seconds')
+            return frame.totals(durations > 3600, by='project')['sessions']
+
+        for name, python_version, frame_version in (
+            ('files changed per day', rows_daily_files, lambda: frame.totals(by='day')),
+            ('sessions > 1h per project', rows_long_sessions_per_project, frame_long_sessions_per_project),
+            ('get_session_stats(365)', lambda: (db.cache_clear(), db.get_session_stats(365)),
+             lambda: frame.get_session_stats(365)),
+            ('get_project_breakdown', lambda: (db.cache_clear(), db.get_project_breakdown()),
+             frame.get_project_breakdown),
+        ):
+            results.append({
+                'analysis': name,
+                'rows_ms': time_call(python_version, args.repeats)['median_ms'],
+                'frame_ms': time_call(frame_version, args.repeats)['median_ms'],
+            })
+
+        db.close()
+
+    return results
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    """Print benchmark results as an aligned table
+
+    Args:
+        results: Result rows with identical keys
+    """
+    if not results:
+        return
+
+    headers = list(results[0].keys())
+    rows = [
+        [f"{value:,.1f}" if isinstance(value, float) else str(value) for value in row.values()]
+        for row in results
+    ]
+    widths = [max(len(h), *(len(r[i]) for r in rows)) for i, h in enumerate(headers)]
+
+    print("  ".join(h.ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join('-' * w for w in widths))
+    for row in rows:
+        print("  ".join(cell.rjust(w) for cell, w in zip(row, widths)))
+
+
+def main():
+    """CLI entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark the analytics database layer")
+    subparsers = parser.add_subparsers(dest='scenario', required=True)
+
+    profiles = subparsers.add_parser('profiles', help='Compare connection profiles')
+    profiles.add_argument('--sessions', type=int, default=20000,
+                          help='Sessions to bulk load (default: 20000)')
+    profiles.add_argument('--single', type=int, default=500,
+                          help='Sessions inserted one transaction each (default: 500)')
+    profiles.add_argument('--repeats', type=int, default=5,
+                          help='Timed runs per query (default: 5)')
+    profiles.set_defaults(func=bench_profiles)
+
+    timestamps = subparsers.add_parser('timestamps',
+                                       help='Compare ISO text and epoch-ms timestamp columns')
+    timestamps.add_argument('--rows', type=int, default=1000000,
+                            help='Session rows in the synthetic database (default: 1000000)')
+    timestamps.add_argument('--repeats', type=int, default=5,
+                            help='Timed runs per query (default: 5)')
+    timestamps.set_defaults(func=bench_timestamps)
+
+    async_load = subparsers.add_parser('async', help='AsyncAnalyticsDB under concurrent coroutines')
+    async_load.add_argument('--coroutines', type=int, default=200,
+                            help='Concurrent inserting coroutines (default: 200)')
+    async_load.add_argument('--per-coroutine', type=int, default=50,
+                            help='Inserts per coroutine (default: 50)')
+    async_load.add_argument('--readers', type=int, default=20,
+                            help='Concurrent querying coroutines (default: 20)')
+    async_load.add_argument('--workers', type=int, default=4,
+                            help='Executor threads (default: 4)')
+    async_load.add_argument('--max-batch', type=int, default=500,
+                            help='Most inserts per transaction (default: 500)')
+    async_load.add_argument('--profile', default='ingest', choices=sorted(AnalyticsDB.PROFILES),
+                            help='Connection profile (default: ingest)')
+    async_load.set_defaults(func=bench_async)
+
+    buffered = subparsers.add_parser('buffered',
+                                     help='Compare insert_session with the write-behind buffer')
+    buffered.add_argument('--sessions', type=int, default=2000,
+                          help='Checkpoints to write (default: 2000)')
+    buffered.add_argument('--max-records', type=int, default=500,
+                          help='Buffer flush size (default: 500)')
+    buffered.add_argument('--max-delay-ms', type=int, default=1000,
+                          help='Buffer flush age (default: 1000)')
+    buffered.add_argument('--profile', default='default', choices=sorted(AnalyticsDB.PROFILES),
+                          help='Connection profile (default: default)')
+    buffered.set_defaults(func=bench_buffered)
+
+    search = subparsers.add_parser('search', help='Full-text decision search latency')
+    search.add_argument('--decisions', type=int, default=1000000,
+                        help='Decisions in the synthetic database (default: 1000000)')
+    search.add_argument('--repeats', type=int, default=5,
+                        help='Timed runs per query (default: 5)')
+    search.set_defaults(func=bench_search)
+
+    hot_files = subparsers.add_parser('hot-files', help='File hot-spot queries')
+    hot_files.add_argument('--rows', type=int, default=10000000,
+                           help='File change rows in the synthetic database (default: 10000000)')
+    hot_files.add_argument('--repeats', type=int, default=3,
+                           help='Timed runs per query (default: 3)')
+    hot_files.set_defaults(func=bench_hot_files)
+
+    dictionary = subparsers.add_parser('dictionary',
+                                       help='Plain text columns vs dictionary-encoded ids')
+    dictionary.add_argument('--sessions', type=int, default=1000000,
+                            help='Sessions in the synthetic database (default: 1000000)')
+    dictionary.add_argument('--ingest', type=int, default=50000,
+                            help='Checkpoints for the ingest comparison (default: 50000)')
+    dictionary.add_argument('--repeats', type=int, default=5,
+                            help='Timed runs per query (default: 5)')
+    dictionary.set_defaults(func=bench_dictionary)
+
+    partitions = subparsers.add_parser('partitions',
+                                       help='Single database file vs monthly partitions')
+    partitions.add_argument('--sessions', type=int, default=200000,
+                            help='Sessions spread over two years (default: 200000)')
+    partitions.add_argument('--repeats', type=int, default=5,
+                            help='Timed runs per query (default: 5)')
+    partitions.set_defaults(func=bench_partitions)
+
+    startup = subparsers.add_parser('startup',
+                                    help='Open cost of read-write vs read-only connections')
+    startup.add_argument('--sessions', type=int, default=20000,
+                         help='Sessions in the synthetic database (default: 20000)')
+    startup.add_argument('--repeats', type=int, default=50,
+                         help='Timed opens per mode (default: 50)')
+    startup.set_defaults(func=bench_startup)
+
+    distribution = subparsers.add_parser('distribution',
+                                         help='Exact vs histogram-binned duration percentiles')
+    distribution.add_argument('--sessions', type=int, default=200000,
+                              help='Sessions in the synthetic database (default: 200000)')
+    distribution.add_argument('--repeats', type=int, default=5,
+                              help='Timed runs per query (default: 5)')
+    distribution.set_defaults(func=bench_distribution)
+
+    timeseries = subparsers.add_parser('timeseries',
+                                       help='Python bucketing of raw rows vs get_timeseries')
+    timeseries.add_argument('--sessions', type=int, default=200000,
+                            help='Sessions spread over two years (default: 200000)')
+    timeseries.add_argument('--repeats', type=int, default=5,
+                            help='Timed runs per series (default: 5)')
+    timeseries.set_defaults(func=bench_timeseries)
+
+    cache = subparsers.add_parser('cache', help='Status report queries with and without the result cache')
+    cache.add_argument('--sessions', type=int, default=100000,
+                       help='Sessions in the synthetic database (default: 100000)')
+    cache.add_argument('--repeats', type=int, default=20,
+                       help='Timed repeated reports (default: 20)')
+    cache.set_defaults(func=bench_cache)
+
+    backends = subparsers.add_parser('backends',
+                                     help='Compare the SQLite, memory and segment log backends')
+    backends.add_argument('--sessions', type=int, default=50000,
+                          help='Sessions to bulk load (default: 50000)')
+    backends.add_argument('--single', type=int, default=500,
+                          help='Sessions inserted one commit each (default: 500)')
+    backends.add_argument('--repeats', type=int, default=5,
+                          help='Timed runs per query (default: 5)')
+    backends.set_defaults(func=bench_backends)
+
+    frame = subparsers.add_parser('frame',
+                                  help='Python loops over sqlite3.Row vs the NumPy column cache')
+    frame.add_argument('--sessions', type=int, default=1000000,
+                       help='Sessions in the synthetic database (default: 1000000)')
+    frame.add_argument('--append', type=int, default=10000,
+                       help='Sessions added before the incremental refresh (default: 10000)')
+    frame.add_argument('--repeats', type=int, default=5,
+                       help='Timed runs per analysis (default: 5)')
+    frame.set_defaults(func=bench_frame)
+
+    merge = subparsers.add_parser('merge',
+                                  help='Replay checkpoints vs merge_from another machine\'s database')
+    merge.add_argument('--sessions', type=int, default=100000,
+                       help='Sessions per machine database (default: 100000)')
+    merge.add_argument('--machines', type=int, default=2,
+                       help='Machine databases to merge (default: 2)')
+    merge.add_argument('--overlap', type=int, default=10000,
+                       help='Sessions of the first machine also on the others (default: 10000)')
+    merge.set_defaults(func=bench_merge)
+
+    rewrites = subparsers.add_parser('rewrites',
+                                     help='Re-ingest unchanged and rewritten checkpoints')
+    rewrites.add_argument('--sessions', type=int, default=100000,
+                          help='Checkpoints to load and re-ingest (default: 100000)')
+    rewrites.add_argument('--rewritten', type=int, default=5000,
+                          help='Checkpoints changed before the second re-ingest (default: 5000)')
+    rewrites.set_defaults(func=bench_rewrites)
+
+    args = parser.parse_args()
+    print_results(args.func(args))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
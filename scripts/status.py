@@ -11,13 +11,24 @@ Usage:
     python status.py --lifetime         # Lifetime stats only
     python status.py --days 30          # Last 30 days
     python status.py --export json      # Export to JSON
+    python status.py --export-raw ndjson --compress gzip --since 2024-01-01
+    python status.py --export-raw csv --raw-table decisions --project P
+    python status.py --search "sqlite*" # Search logged decisions
+    python status.py --hot-files --project P --days 30
+    python status.py --distribution --days 90   # Duration/files percentiles
+    python status.py --trend decisions --bucket week --days 180
+    python status.py --db-path backup.db --snapshot
+    python status.py --profile-db       # Then per-statement SQL timings and plans
+    python status.py --trend files --profile-db profile.json
 """
 
+import io
 import sys
 import os
+import gzip
 import json
 import csv
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 
@@ -33,6 +44,14 @@ from claude_terminal_ui.tokens.symbols import Symbols
 # Import analytics DB
 from analytics_db import AnalyticsDB
 
+# Optional zstd compression for raw exports
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
 import logging
 
 # Configure logging
@@ -139,20 +158,26 @@ def display_current_session(db: AnalyticsDB) -> None:
     print()
 
 
-def display_lifetime_stats(db: AnalyticsDB, days: Optional[int] = None) -> None:
+def display_lifetime_stats(
+    db: AnalyticsDB,
+    days: Optional[int] = None,
+    snapshot: Optional[Dict[str, Any]] = None
+) -> None:
     """
     Display lifetime statistics with visual polish.
 
     Args:
         db: AnalyticsDB instance
         days: Number of days for stats (None for all-time)
+        snapshot: Dashboard snapshot to render (read from db if None)
     """
-    # Get stats
+    if snapshot is None:
+        snapshot = db.get_dashboard_snapshot(days=days, recent=0)
+    stats = snapshot.get('summary', {})
+
     if days:
-        stats = db.get_session_stats(days=days)
         period_label = f"LIFETIME STATISTICS (Last {days} Days)"
     else:
-        stats = db.get_aggregate_stats()
         period_label = "LIFETIME STATISTICS (All Time)"
 
     # Header
@@ -192,14 +217,17 @@ def display_lifetime_stats(db: AnalyticsDB, days: Optional[int] = None) -> None:
     print()
 
 
-def display_project_breakdown(db: AnalyticsDB) -> None:
+def display_project_breakdown(db: AnalyticsDB, snapshot: Optional[Dict[str, Any]] = None) -> None:
     """
     Display statistics broken down by project.
 
     Args:
         db: AnalyticsDB instance
+        snapshot: Dashboard snapshot to render (read from db if None)
     """
-    projects = db.get_project_breakdown()
+    if snapshot is None:
+        snapshot = db.get_dashboard_snapshot(recent=0)
+    projects = snapshot.get('projects', [])
 
     if not projects:
         print(info_panel("No project data available", panel_type="info"))
@@ -240,31 +268,23 @@ def display_project_breakdown(db: AnalyticsDB) -> None:
     print()
 
 
-def display_recent_activity(db: AnalyticsDB, limit: int = 5) -> None:
+def display_recent_activity(
+    db: AnalyticsDB,
+    limit: int = 5,
+    snapshot: Optional[Dict[str, Any]] = None
+) -> None:
     """
     Display recent session activity.
 
     Args:
         db: AnalyticsDB instance
         limit: Number of recent sessions to show
+        snapshot: Dashboard snapshot to render (read from db if None)
     """
-    cursor = db.conn.cursor()
-
     try:
-        cursor.execute("""
-            SELECT
-                session_id,
-                timestamp,
-                project_name,
-                files_changed,
-                decisions_logged,
-                checkpoint_success
-            FROM sessions
-            ORDER BY timestamp DESC
-            LIMIT ?
-        """, (limit,))
-
-        sessions = cursor.fetchall()
+        if snapshot is None:
+            snapshot = db.get_dashboard_snapshot(recent=limit)
+        sessions = snapshot.get('recent_sessions', [])[:limit]
 
         if not sessions:
             print(info_panel("No recent activity", panel_type="info"))
@@ -280,9 +300,8 @@ def display_recent_activity(db: AnalyticsDB, limit: int = 5) -> None:
 
         for session in sessions:
             session_id = session['session_id'][:8]
-            timestamp = datetime.fromisoformat(session['timestamp'])
-            time_str = timestamp.strftime('%m/%d %H:%M')
-            project = session['project_name'][:20]
+            time_str = session['timestamp'].strftime('%m/%d %H:%M')
+            project = (session['project_name'] or 'Unknown')[:20]
             files = session['files_changed']
             decisions = session['decisions_logged']
             success = session['checkpoint_success']
@@ -305,7 +324,296 @@ def display_recent_activity(db: AnalyticsDB, limit: int = 5) -> None:
         logger.error(f"Failed to fetch recent activity: {e}")
 
 
-def export_stats_json(db: AnalyticsDB, output_path: str, days: Optional[int] = None) -> None:
+def display_hot_files(
+    db: AnalyticsDB,
+    project: Optional[str] = None,
+    days: Optional[int] = None,
+    top_k: int = 20
+) -> None:
+    """
+    Display the most frequently changed files.
+
+    Args:
+        db: AnalyticsDB instance
+        project: Only files of this project
+        days: Only changes from the last N days
+        top_k: Number of files to show
+    """
+    files = db.get_hot_files(project=project, days=days, top_k=top_k)
+
+    if not files:
+        print(info_panel("No file changes recorded", panel_type="info"))
+        return
+
+    scope = project or "ALL PROJECTS"
+    period = f"LAST {days} DAYS" if days else "ALL TIME"
+    print(divider(char="━", label=f"HOT FILES - {scope} ({period})", width=70))
+    print()
+
+    headers = ['File', 'Changes', 'Sessions', 'Last Changed']
+    if project is None:
+        headers.insert(0, 'Project')
+
+    rows = []
+    for entry in files:
+        row = [
+            entry['file_path'][-40:],  # Keep the most specific part of long paths
+            str(entry['changes']),
+            str(entry['sessions']),
+            entry['last_changed']
+        ]
+        if project is None:
+            row.insert(0, entry['project_name'][:20])
+        rows.append(row)
+
+    align = ['left', 'right', 'right', 'left']
+    if project is None:
+        align.insert(0, 'left')
+
+    print(table(rows, headers=headers, align=align))
+    print()
+
+
+def format_duration(seconds: float) -> str:
+    """
+    Format a duration in seconds for display.
+
+    Args:
+        seconds: Duration in seconds
+
+    Returns:
+        Short string such as '45s', '12.5m' or '1.5h'
+    """
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.3g}m"
+    return f"{seconds / 3600:.3g}h"
+
+
+def display_distribution(
+    db: AnalyticsDB,
+    project: Optional[str] = None,
+    days: Optional[int] = None,
+    bar_width: int = 30
+) -> None:
+    """
+    Display percentiles and histograms of session duration and files changed.
+
+    Args:
+        db: AnalyticsDB instance
+        project: Only sessions of this project
+        days: Only sessions from the last N days
+        bar_width: Width of the longest histogram bar
+    """
+    scope = project or "ALL PROJECTS"
+    period = f"LAST {days} DAYS" if days else "ALL TIME"
+    bar_char = Symbols.PROGRESS_FULL.render()
+
+    # Duration bins are half-open ranges, files bins whole numbers
+    for metric, label, fmt, last in (
+        ('duration', 'SESSION DURATION', format_duration, format_duration),
+        ('files', 'FILES PER SESSION', lambda value: f"{value:.0f}", lambda upper: f"{upper - 1}"),
+    ):
+        distribution = db.get_distribution(metric=metric, days=days, project=project)
+
+        if not distribution.get('count'):
+            print(info_panel(f"No {label.lower()} data available", panel_type="info"))
+            continue
+
+        print(divider(char="━", label=f"{label} - {scope} ({period})", width=70))
+        print()
+
+        data = {'Sessions': f"{distribution['count']:,}"}
+        for name, value in distribution['percentiles'].items():
+            data[name] = fmt(value)
+        print(key_value(data, indent=2))
+        print()
+
+        histogram = distribution['histogram']
+        peak = max(entry['sessions'] for entry in histogram)
+        rows = []
+        for entry in histogram:
+            if entry['upper'] is None:
+                bucket = f"{fmt(entry['lower'])}+"
+            elif metric == 'files' and entry['upper'] - entry['lower'] == 1:
+                bucket = fmt(entry['lower'])
+            else:
+                bucket = f"{fmt(entry['lower'])}-{last(entry['upper'])}"
+
+            bar = bar_char * round(entry['sessions'] / peak * bar_width)
+            rows.append([bucket, str(entry['sessions']), bar])
+
+        print(table(rows, headers=['Range', 'Sessions', ''], align=['right', 'right', 'left']))
+        print()
+
+
+def display_trend(
+    db: AnalyticsDB,
+    metric: str = 'sessions',
+    bucket: str = 'week',
+    project: Optional[str] = None,
+    days: Optional[int] = None,
+    bar_width: int = 30
+) -> None:
+    """
+    Display a metric per day, week or month as a bar chart.
+
+    Args:
+        db: AnalyticsDB instance
+        metric: Metric name (see AnalyticsDB.TIMESERIES_METRICS)
+        bucket: 'day', 'week' or 'month'
+        project: Only sessions of this project
+        days: Only the last N days
+        bar_width: Width of the longest bar
+    """
+    series = db.get_timeseries(metric=metric, bucket=bucket, days=days, project=project)
+
+    if not series:
+        print(info_panel("No sessions recorded", panel_type="info"))
+        return
+
+    scope = project or "ALL PROJECTS"
+    period = f"LAST {days} DAYS" if days else "ALL TIME"
+    label = f"{metric.replace('_', ' ').upper()} PER {bucket.upper()} - {scope} ({period})"
+    print(divider(char="━", label=label, width=70))
+    print()
+
+    peak = max((point['value'] or 0 for point in series), default=0)
+    bar_char = Symbols.PROGRESS_FULL.render()
+    rows = []
+    for point in series:
+        value = point['value']
+        if value is None:
+            shown = '-'
+        elif isinstance(value, float):
+            shown = f"{value:,.1f}"
+        else:
+            shown = f"{value:,}"
+
+        bar = bar_char * round((value or 0) / peak * bar_width) if peak else ''
+        rows.append([point['start'], shown, bar])
+
+    print(table(rows, headers=[bucket.title(), metric.replace('_', ' ').title(), ''],
+                align=['left', 'right', 'left']))
+    print()
+
+
+def display_search_results(
+    db: AnalyticsDB,
+    query: str,
+    project: Optional[str] = None,
+    days: Optional[int] = None,
+    limit: int = 20
+) -> None:
+    """
+    Display decisions matching a full-text search.
+
+    Args:
+        db: AnalyticsDB instance
+        query: Search text (FTS5 syntax: words, "phrases", prefix*, OR, NOT)
+        project: Only decisions from this project
+        days: Only decisions from the last N days
+        limit: Maximum number of results
+    """
+    since = datetime.now() - timedelta(days=days) if days else None
+    results = db.search_decisions(query, project=project, since=since, limit=limit)
+
+    if not results:
+        print(info_panel(f"No decisions match '{query}'", panel_type="info"))
+        return
+
+    print(divider(char="━", label=f"DECISIONS MATCHING '{query}'", width=70))
+    print()
+
+    headers = ['Time', 'Project', 'Decision']
+    rows = []
+
+    for result in results:
+        time_str = result['timestamp'].strftime('%m/%d %H:%M') if result['timestamp'] else '-'
+        project_name = (result['project_name'] or 'Unknown')[:20]
+        snippet = ' '.join(result['snippet'].split())
+
+        rows.append([time_str, project_name, snippet[:80]])
+
+    print(table(rows, headers=headers, align=['left', 'left', 'left']))
+    print()
+
+
+def display_query_profile(db: AnalyticsDB, top: int = 15) -> None:
+    """
+    Display the SQL statements that took the most time, with query plans.
+
+    Args:
+        db: AnalyticsDB instance opened with trace=True
+        top: Number of statements to show
+    """
+    profile = db.query_profile()
+    statements = profile['statements'][:top]
+
+    if not statements:
+        print(info_panel("No SQL statements recorded", panel_type="info"))
+        return
+
+    print(divider(char="━", label=f"SQL PROFILE - {profile['calls']} CALLS, "
+                                  f"{profile['total_ms']:.1f} MS", width=70))
+    print()
+
+    headers = ['Statement', 'Calls', 'Total ms', 'p50 ms', 'p95 ms', 'Rows', 'Run']
+    rows = []
+    for statement in statements:
+        rows.append([
+            statement['sql'][:40],
+            str(statement['calls']),
+            f"{statement['total_ms']:.2f}",
+            f"{statement['p50_ms']:.2f}",
+            f"{statement['p95_ms']:.2f}",
+            str(statement['rows']),
+            str(statement['sqlite_statements'])  # Trigger bodies included
+        ])
+
+    print(table(rows, headers=headers,
+                align=['left', 'right', 'right', 'right', 'right', 'right', 'right']))
+    print()
+
+    explained = [statement for statement in statements if 'plan' in statement]
+    if explained:
+        print(divider(char="─", label="QUERY PLANS", width=70))
+        print()
+        for statement in explained:
+            print(statement['sql'][:70])
+            for line in statement['plan']:
+                print(f"  {line}")
+            print()
+
+
+def export_query_profile(db: AnalyticsDB, output_path: str) -> None:
+    """
+    Export the per-statement SQL profile to JSON format.
+
+    Args:
+        db: AnalyticsDB instance opened with trace=True
+        output_path: Output file path
+    """
+    export_data = {
+        'generated_at': datetime.now().isoformat(),
+        'db_path': db.db_path,
+        **db.query_profile()
+    }
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(export_data, f, indent=2, default=str)
+
+    logger.info(f"Exported SQL profile to {output_path}")
+    print(info_panel(f"Exported SQL profile to {output_path}", panel_type="success"))
+
+
+def export_stats_json(
+    db: AnalyticsDB,
+    output_path: str,
+    days: Optional[int] = None,
+    snapshot: Optional[Dict[str, Any]] = None
+) -> None:
     """
     Export statistics to JSON format.
 
@@ -313,21 +621,18 @@ def export_stats_json(db: AnalyticsDB, output_path: str, days: Optional[int] = N
         db: AnalyticsDB instance
         output_path: Output file path
         days: Number of days for stats (None for all-time)
+        snapshot: Dashboard snapshot to export (read from db if None)
     """
     # Gather all data
-    if days:
-        stats = db.get_session_stats(days=days)
-    else:
-        stats = db.get_aggregate_stats()
-
-    projects = db.get_project_breakdown()
+    if snapshot is None:
+        snapshot = db.get_dashboard_snapshot(days=days, recent=0)
 
     # Build export data
     export_data = {
         'generated_at': datetime.now().isoformat(),
         'period_days': days if days else 'all_time',
-        'summary': stats,
-        'projects': projects
+        'summary': snapshot.get('summary', {}),
+        'projects': snapshot.get('projects', [])
     }
 
     # Write to file
@@ -338,7 +643,12 @@ def export_stats_json(db: AnalyticsDB, output_path: str, days: Optional[int] = N
     print(info_panel(f"Exported to {output_path}", panel_type="success"))
 
 
-def export_stats_csv(db: AnalyticsDB, output_path: str, days: Optional[int] = None) -> None:
+def export_stats_csv(
+    db: AnalyticsDB,
+    output_path: str,
+    days: Optional[int] = None,
+    snapshot: Optional[Dict[str, Any]] = None
+) -> None:
     """
     Export project statistics to CSV format.
 
@@ -346,8 +656,11 @@ def export_stats_csv(db: AnalyticsDB, output_path: str, days: Optional[int] = No
         db: AnalyticsDB instance
         output_path: Output file path
         days: Number of days for stats (None for all-time)
+        snapshot: Dashboard snapshot to export (read from db if None)
     """
-    projects = db.get_project_breakdown()
+    if snapshot is None:
+        snapshot = db.get_dashboard_snapshot(days=days, recent=0)
+    projects = snapshot.get('projects', [])
 
     # Write to CSV
     with open(output_path, 'w', newline='', encoding='utf-8') as f:
@@ -382,7 +695,12 @@ def export_stats_csv(db: AnalyticsDB, output_path: str, days: Optional[int] = No
     print(info_panel(f"Exported to {output_path}", panel_type="success"))
 
 
-def export_stats_markdown(db: AnalyticsDB, output_path: str, days: Optional[int] = None) -> None:
+def export_stats_markdown(
+    db: AnalyticsDB,
+    output_path: str,
+    days: Optional[int] = None,
+    snapshot: Optional[Dict[str, Any]] = None
+) -> None:
     """
     Export statistics to Markdown format.
 
@@ -390,17 +708,19 @@ def export_stats_markdown(db: AnalyticsDB, output_path: str, days: Optional[int]
         db: AnalyticsDB instance
         output_path: Output file path
         days: Number of days for stats (None for all-time)
+        snapshot: Dashboard snapshot to export (read from db if None)
     """
     # Get stats
+    if snapshot is None:
+        snapshot = db.get_dashboard_snapshot(days=days, recent=0)
+    stats = snapshot.get('summary', {})
+    projects = snapshot.get('projects', [])
+
     if days:
-        stats = db.get_session_stats(days=days)
         period_label = f"Last {days} Days"
     else:
-        stats = db.get_aggregate_stats()
         period_label = "All Time"
 
-    projects = db.get_project_breakdown()
-
     # Build markdown
     lines = []
 
@@ -456,6 +776,92 @@ def export_stats_markdown(db: AnalyticsDB, output_path: str, days: Optional[int]
     print(info_panel(f"Exported to {output_path}", panel_type="success"))
 
 
+# File name suffix added by each --compress method
+RAW_EXPORT_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+
+def _open_export(output_path: str, compress: Optional[str] = None):
+    """
+    Open a text file for writing, compressing as it is written.
+
+    Args:
+        output_path: Output file path
+        compress: None, 'gzip' or 'zstd' (needs the zstandard package)
+
+    Returns:
+        Writable text file object
+    """
+    if compress == 'gzip':
+        return gzip.open(output_path, 'wt', encoding='utf-8', newline='')
+    if compress == 'zstd':
+        if not ZSTD_AVAILABLE:
+            raise ImportError("zstd compression requires the zstandard package")
+        writer = zstandard.ZstdCompressor().stream_writer(open(output_path, 'wb'))
+        return io.TextIOWrapper(writer, encoding='utf-8', newline='')
+    if compress is not None:
+        raise ValueError(f"Unknown compression '{compress}'")
+    return open(output_path, 'w', encoding='utf-8', newline='')
+
+
+def export_raw(
+    db: AnalyticsDB,
+    output_path: str,
+    fmt: str = 'ndjson',
+    table: str = 'sessions',
+    since: Any = None,
+    until: Any = None,
+    project: Optional[str] = None,
+    compress: Optional[str] = None
+) -> int:
+    """
+    Export every row of a raw table as NDJSON or CSV.
+
+    Rows are streamed from the database and written as they arrive, so
+    memory use stays flat however large the table is. A failed export
+    removes its partial output file.
+
+    Args:
+        db: AnalyticsDB instance
+        output_path: Output file path
+        fmt: 'ndjson' (one JSON object per line) or 'csv'
+        table: 'sessions', 'file_changes' or 'decisions'
+        since: Only rows of sessions at or after this time
+        until: Only rows of sessions before this time
+        project: Only rows of sessions of this project
+        compress: None, 'gzip' or 'zstd'
+
+    Returns:
+        Number of rows written
+    """
+    if fmt not in ('ndjson', 'csv'):
+        raise ValueError(f"Unknown raw export format '{fmt}'")
+
+    # Validates the table before the output file is created
+    rows = db.iter_raw_rows(table, since=since, until=until, project=project)
+    count = 0
+
+    try:
+        with _open_export(output_path, compress) as f:
+            if fmt == 'csv':
+                writer = csv.DictWriter(f, fieldnames=db.RAW_EXPORT_COLUMNS[table])
+                writer.writeheader()
+                for row in rows:
+                    writer.writerow(row)
+                    count += 1
+            else:
+                for row in rows:
+                    f.write(json.dumps(row, ensure_ascii=False))
+                    f.write('\n')
+                    count += 1
+    except BaseException:
+        Path(output_path).unlink(missing_ok=True)
+        raise
+
+    logger.info(f"Exported {count} {table} rows to {output_path}")
+    print(info_panel(f"Exported {count:,} {table} rows to {output_path}", panel_type="success"))
+    return count
+
+
 def main():
     """CLI entry point"""
     import argparse
@@ -492,6 +898,57 @@ def main():
         help='Number of days for statistics (default: all-time)'
     )
 
+    # Search options
+    parser.add_argument(
+        '--search',
+        metavar='QUERY',
+        help='Search logged decisions (words, "phrases", prefix*, OR, NOT)'
+    )
+    parser.add_argument(
+        '--project',
+        help='Limit --search, --hot-files, --distribution, --trend or --export-raw to one project'
+    )
+    parser.add_argument(
+        '--limit',
+        type=int,
+        default=20,
+        help='Maximum --search results (default: 20)'
+    )
+
+    # File hot-spot options
+    parser.add_argument(
+        '--hot-files',
+        type=int,
+        nargs='?',
+        const=20,
+        metavar='N',
+        help='Show the N most frequently changed files (default: 20)'
+    )
+
+    # Distribution options
+    parser.add_argument(
+        '--distribution',
+        action='store_true',
+        help='Show duration and files-per-session percentiles and histograms'
+    )
+
+    # Trend options
+    parser.add_argument(
+        '--trend',
+        nargs='?',
+        const='sessions',
+        choices=sorted(AnalyticsDB.TIMESERIES_METRICS),
+        metavar='METRIC',
+        help='Show METRIC per --bucket (default: sessions; also files, decisions, '
+             'success_rate, avg_duration, ...)'
+    )
+    parser.add_argument(
+        '--bucket',
+        choices=['day', 'week', 'month'],
+        default='week',
+        help='Bucket size for --trend (default: week)'
+    )
+
     # Export options
     parser.add_argument(
         '--export',
@@ -503,18 +960,63 @@ def main():
         help='Output file path for export'
     )
 
-    # Database option
+    # Raw export options
+    parser.add_argument(
+        '--export-raw',
+        choices=['ndjson', 'csv'],
+        help='Export every row of --raw-table (streamed, constant memory)'
+    )
+    parser.add_argument(
+        '--raw-table',
+        choices=list(AnalyticsDB.RAW_EXPORT_COLUMNS),
+        default='sessions',
+        help='Table for --export-raw (default: sessions)'
+    )
+    parser.add_argument(
+        '--since',
+        type=datetime.fromisoformat,
+        metavar='DATE',
+        help='Only sessions at or after this ISO date/time for --export-raw '
+             '(default: --days ago, or all time)'
+    )
+    parser.add_argument(
+        '--until',
+        type=datetime.fromisoformat,
+        metavar='DATE',
+        help='Only sessions before this ISO date/time for --export-raw'
+    )
+    parser.add_argument(
+        '--compress',
+        choices=sorted(RAW_EXPORT_SUFFIXES),
+        help='Compress the --export-raw output (zstd needs the zstandard package)'
+    )
+
+    # Database options
     parser.add_argument(
         '--db-path',
         help='Path to analytics database',
         default=None
     )
+    parser.add_argument(
+        '--snapshot',
+        action='store_true',
+        help='Database is a copy nothing writes to (opened with immutable=1)'
+    )
+    parser.add_argument(
+        '--profile-db',
+        nargs='?',
+        const='-',
+        metavar='FILE',
+        help='Trace the SQL this command runs and show per-statement timings and '
+             'query plans afterwards (with FILE: write them as JSON)'
+    )
 
     args = parser.parse_args()
 
-    # Initialize database
+    # Initialize database (read-only: no schema work, works while ingest runs)
     try:
-        db = AnalyticsDB(db_path=args.db_path)
+        db = AnalyticsDB(db_path=args.db_path, profile='read', read_only=True,
+                         immutable=args.snapshot, trace=args.profile_db is not None)
     except Exception as e:
         logger.error(f"Failed to connect to database: {e}")
         print(info_panel(f"Database error: {e}", panel_type="error"))
@@ -536,8 +1038,53 @@ def main():
 
             return 0
 
+        # Handle raw export
+        if args.export_raw:
+            if not args.output:
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                args.output = (f"portfolio_{args.raw_table}_{timestamp}.{args.export_raw}"
+                               f"{RAW_EXPORT_SUFFIXES.get(args.compress, '')}")
+
+            since = args.since
+            if since is None and args.days:
+                since = datetime.now() - timedelta(days=args.days)
+
+            export_raw(db, args.output, fmt=args.export_raw, table=args.raw_table,
+                       since=since, until=args.until, project=args.project,
+                       compress=args.compress)
+            return 0
+
+        # Handle search
+        if args.search:
+            display_search_results(db, args.search, project=args.project,
+                                   days=args.days, limit=args.limit)
+            return 0
+
+        # Handle hot files
+        if args.hot_files:
+            display_hot_files(db, project=args.project, days=args.days, top_k=args.hot_files)
+            return 0
+
+        # Handle distributions
+        if args.distribution:
+            display_distribution(db, project=args.project, days=args.days)
+            return 0
+
+        # Handle trends
+        if args.trend:
+            display_trend(db, metric=args.trend, bucket=args.bucket,
+                          project=args.project, days=args.days)
+            return 0
+
         # Display sections based on arguments
         show_all = not any([args.current, args.lifetime, args.projects, args.recent])
+        limit = args.recent if args.recent else 5
+
+        # Every section renders from one consistent read
+        snapshot = db.get_dashboard_snapshot(
+            days=args.days,
+            recent=limit if (args.recent or show_all) else 0
+        )
 
         # Main header
         if show_all or args.lifetime:
@@ -551,16 +1098,15 @@ def main():
 
         # Lifetime stats
         if show_all or args.lifetime:
-            display_lifetime_stats(db, days=args.days)
+            display_lifetime_stats(db, days=args.days, snapshot=snapshot)
 
         # Project breakdown
         if show_all or args.projects:
-            display_project_breakdown(db)
+            display_project_breakdown(db, snapshot=snapshot)
 
         # Recent activity
         if args.recent or show_all:
-            limit = args.recent if args.recent else 5
-            display_recent_activity(db, limit=limit)
+            display_recent_activity(db, limit=limit, snapshot=snapshot)
 
         print()
         return 0
@@ -571,6 +1117,10 @@ def main():
         return 1
 
     finally:
+        if args.profile_db == '-':
+            display_query_profile(db)
+        elif args.profile_db:
+            export_query_profile(db, args.profile_db)
         db.close()
 
 
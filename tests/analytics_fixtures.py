@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Shared Fixtures for the Analytics Tests
+
+Builds checkpoint dictionaries shaped like the ones the checkpoint hook
+writes, timestamped relative to now.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+
+def make_checkpoint(
+    session_id: str,
+    days_ago: float = 0,
+    minutes: Optional[float] = None,
+    project: Optional[str] = None,
+    now: Optional[datetime] = None,
+    **fields: Any
+) -> Dict[str, Any]:
+    """Build a checkpoint taken days_ago before now
+
+    Args:
+        session_id: Session ID
+        days_ago: Age of the checkpoint in days (fractions allowed)
+        minutes: Session length, which sets started_at (None: no start time)
+        project: Project name (None: no project)
+        now: Reference time (default: datetime.now()); pass the same value
+            to a group of checkpoints to keep their spacing exact
+        **fields: Further checkpoint keys (file_changes, decisions, ...)
+
+    Returns:
+        Checkpoint data dictionary
+    """
+    timestamp = (now or datetime.now()) - timedelta(days=days_ago)
+    checkpoint = {'session_id': session_id, 'timestamp': timestamp.isoformat()}
+    if minutes is not None:
+        checkpoint['started_at'] = (timestamp - timedelta(minutes=minutes)).isoformat()
+    if project is not None:
+        checkpoint['project'] = {'name': project}
+    checkpoint.update(fields)
+    return checkpoint
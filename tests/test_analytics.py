@@ -11,16 +11,20 @@ Usage:
 """
 
 import sys
+import shutil
+import sqlite3
 import unittest
 import tempfile
 import json
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
+from unittest.mock import patch
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
 
-from analytics_db import AnalyticsDB
+from analytics_db import AnalyticsDB, ThreadSafeAnalyticsDB, to_epoch_ms, from_epoch_ms
 from backfill_analytics import CheckpointBackfiller, format_duration
 
 
@@ -56,6 +60,98 @@ class TestAnalyticsDB(unittest.TestCase):
         for table in expected_tables:
             self.assertIn(table, tables)
 
+    def test_schema_version_recorded(self):
+        """Test migrations record the schema version"""
+        version = self.db.conn.execute("PRAGMA user_version").fetchone()[0]
+        self.assertEqual(version, AnalyticsDB.SCHEMA_VERSION)
+        self.assertEqual(AnalyticsDB.SCHEMA_VERSION, len(AnalyticsDB.MIGRATIONS))
+
+    def test_open_current_schema_takes_no_write_lock(self):
+        """Test opening an up-to-date database runs no DDL and never waits on writers"""
+        self.db.conn.execute("BEGIN IMMEDIATE")
+
+        try:
+            # Would raise "database is locked" if opening needed the write lock
+            other = AnalyticsDB(db_path=self.db_path)
+            statements = []
+            other.conn.set_trace_callback(statements.append)
+            other.initialize_schema()
+            other.close()
+        finally:
+            self.db.conn.rollback()
+
+        self.assertEqual(statements, ["PRAGMA user_version"])
+
+    def test_newer_schema_rejected(self):
+        """Test a database from a newer release is not silently downgraded"""
+        self.db.conn.execute(f"PRAGMA user_version = {AnalyticsDB.SCHEMA_VERSION + 1}")
+        self.db.conn.commit()
+
+        with self.assertRaises(sqlite3.DatabaseError):
+            AnalyticsDB(db_path=self.db_path)
+
+        self.db.conn.execute(f"PRAGMA user_version = {AnalyticsDB.SCHEMA_VERSION}")
+        self.db.conn.commit()
+
+    def test_read_only_open(self):
+        """Test read-only mode runs no schema work and reads while a writer holds the lock"""
+        self.db.insert_session({'session_id': 'ro-1', 'file_changes': ['a.py']})
+        self.db.conn.execute("BEGIN IMMEDIATE")
+
+        try:
+            # Would raise "database is locked" if opening needed the write lock
+            reader = AnalyticsDB(db_path=self.db_path, read_only=True)
+            self.assertEqual(reader.conn.execute("PRAGMA query_only").fetchone()[0], 1)
+            self.assertEqual(reader.get_aggregate_stats()['total_sessions'], 1)
+            self.assertFalse(reader.insert_session({'session_id': 'ro-2'}))
+            reader.close()
+        finally:
+            self.db.conn.rollback()
+
+        self.assertEqual(self.db.get_aggregate_stats()['total_sessions'], 1)
+
+    def test_read_only_fails_fast(self):
+        """Test read-only mode never creates a database or runs migrations"""
+        missing = Path(self.db_path).with_name('missing-analytics.db')
+        with self.assertRaises(sqlite3.OperationalError):
+            AnalyticsDB(db_path=str(missing), read_only=True)
+        self.assertFalse(missing.exists())
+
+        empty = Path(self.db_path).with_name('empty-analytics.db')
+        sqlite3.connect(str(empty)).close()
+        try:
+            with self.assertRaises(sqlite3.DatabaseError):
+                AnalyticsDB(db_path=str(empty), read_only=True)
+        finally:
+            empty.unlink()
+
+        self.db.conn.execute(f"PRAGMA user_version = {AnalyticsDB.SCHEMA_VERSION - 1}")
+        self.db.conn.commit()
+        with self.assertRaises(sqlite3.DatabaseError):
+            AnalyticsDB(db_path=self.db_path, read_only=True)
+        self.db.conn.execute(f"PRAGMA user_version = {AnalyticsDB.SCHEMA_VERSION}")
+        self.db.conn.commit()
+
+        with self.assertRaises(ValueError):
+            AnalyticsDB(db_path=':memory:', read_only=True)
+
+    def test_immutable_snapshot(self):
+        """Test a backup copy can be opened with immutable=1"""
+        self.db.insert_session({'session_id': 'snap-1', 'file_changes': ['a.py']})
+        snapshot_path = Path(self.db_path).with_name('snapshot-analytics.db')
+        snapshot = sqlite3.connect(str(snapshot_path))
+        self.db.conn.backup(snapshot)
+        snapshot.execute("PRAGMA journal_mode = DELETE")
+        snapshot.close()
+
+        try:
+            with AnalyticsDB(db_path=str(snapshot_path), immutable=True) as db:
+                self.assertTrue(db.read_only)
+                self.assertEqual(db.get_aggregate_stats()['total_sessions'], 1)
+                self.assertEqual(db.get_hot_files()[0]['file_path'], 'a.py')
+        finally:
+            snapshot_path.unlink()
+
     def test_insert_session_success(self):
         """Test successful session insertion"""
         checkpoint_data = {
@@ -88,7 +184,13 @@ class TestAnalyticsDB(unittest.TestCase):
 
         # Verify session was inserted
         cursor = self.db.conn.cursor()
-        cursor.execute("SELECT * FROM sessions WHERE session_id = ?", ('test-session-001',))
+        cursor.execute("""
+            SELECT s.*, p.name as project_name, b.name as git_branch
+            FROM sessions s
+            JOIN projects p ON p.id = s.project_id
+            JOIN git_branches b ON b.id = s.git_branch_id
+            WHERE s.session_id = ?
+        """, ('test-session-001',))
         row = cursor.fetchone()
 
         self.assertIsNotNone(row)
@@ -97,6 +199,7 @@ class TestAnalyticsDB(unittest.TestCase):
         self.assertEqual(row['decisions_logged'], 2)
         self.assertEqual(row['resume_points_generated'], 2)
         self.assertEqual(row['project_name'], 'TestProject')
+        self.assertEqual(row['git_branch'], 'main')
 
         # Verify file changes were inserted
         cursor.execute("SELECT COUNT(*) as count FROM file_changes WHERE session_id = ?",
@@ -126,6 +229,173 @@ class TestAnalyticsDB(unittest.TestCase):
         success2 = self.db.insert_session(checkpoint_data)
         self.assertFalse(success2)
 
+    def test_insert_sessions_bulk(self):
+        """Test bulk insertion counts, dedupe and child rows"""
+        checkpoints = [
+            {
+                'session_id': f'bulk-{i}',
+                'timestamp': datetime.now().isoformat(),
+                'file_changes': ['a.py', {'path': 'b.py', 'type': 'added'}],
+                'decisions': [f'Decision {i}'],
+                'project': {'name': 'BulkProject'}
+            }
+            for i in range(25)
+        ]
+        # Duplicate within the same load and an unparseable timestamp
+        checkpoints.append(dict(checkpoints[0]))
+        checkpoints.append({'session_id': 'bad', 'timestamp': 'not-a-date'})
+
+        result = self.db.insert_sessions_bulk(checkpoints, batch_size=10)
+
+        self.assertEqual(result, {'inserted': 25, 'updated': 0, 'skipped': 1, 'errors': 1})
+
+        cursor = self.db.conn.cursor()
+        cursor.execute("SELECT COUNT(*) as count FROM sessions")
+        self.assertEqual(cursor.fetchone()['count'], 25)
+        cursor.execute("SELECT COUNT(*) as count FROM file_changes")
+        self.assertEqual(cursor.fetchone()['count'], 50)
+        cursor.execute("SELECT COUNT(*) as count FROM decisions")
+        self.assertEqual(cursor.fetchone()['count'], 25)
+
+        # Re-loading skips everything without duplicating child rows
+        result = self.db.insert_sessions_bulk(checkpoints[:25])
+        self.assertEqual(result, {'inserted': 0, 'updated': 0, 'skipped': 25, 'errors': 0})
+        cursor.execute("SELECT COUNT(*) as count FROM file_changes")
+        self.assertEqual(cursor.fetchone()['count'], 50)
+
+    def test_insert_sessions_bulk_invalid_batch_size(self):
+        """Test bulk insertion rejects a non-positive batch size"""
+        with self.assertRaises(ValueError):
+            self.db.insert_sessions_bulk([], batch_size=0)
+
+    def test_insert_sessions(self):
+        """Test grouped insertion reports a result per checkpoint"""
+        timestamp = datetime.now().isoformat()
+        results = self.db.insert_sessions([
+            {'session_id': 'group-1', 'timestamp': timestamp, 'decisions': ['a']},
+            {'session_id': 'group-1', 'timestamp': timestamp, 'decisions': ['a']},
+            {'session_id': 'group-2', 'timestamp': 'not a timestamp'},
+            {'session_id': 'group-3'},
+            {'session_id': 'group-1', 'timestamp': timestamp},
+        ])
+
+        # The last group-1 checkpoint changed, so it replaces the first
+        self.assertEqual(results, [True, False, False, True, True])
+        stats = self.db.get_aggregate_stats()
+        self.assertEqual(stats['total_sessions'], 2)
+        self.assertEqual(stats['total_decisions'], 0)
+        self.assertEqual(self.db.conn.execute("SELECT COUNT(*) FROM decisions").fetchone()[0], 0)
+
+    def test_rewritten_checkpoint_replaces_session(self):
+        """Test a changed checkpoint replaces its session and everything derived from it"""
+        first = self._merge_checkpoints(range(30), ['Alpha', 'Beta'])
+        # Sessions that went on after their first checkpoint was ingested
+        final = list(first)
+        for i in (3, 7, 12, 25):
+            final[i] = dict(
+                first[i],
+                timestamp=(datetime.fromisoformat(first[i]['timestamp']) + timedelta(hours=2)).isoformat(),
+                file_changes=first[i]['file_changes'] + ['src/late.py'],
+                decisions=first[i]['decisions'] + ['Rewrite cache keys']
+            )
+        final[7]['file_changes'] = []
+        final[25]['project'] = {'name': 'Gamma'}
+
+        self.db.insert_sessions_bulk(first)
+        rowids = dict(self.db.conn.execute("SELECT session_id, rowid FROM sessions").fetchall())
+
+        counts = self.db.insert_sessions_bulk(first + final, batch_size=7)
+        self.assertEqual(counts, {'inserted': 0, 'updated': 4, 'skipped': 56, 'errors': 0})
+        self.assertEqual(
+            dict(self.db.conn.execute("SELECT session_id, rowid FROM sessions").fetchall()), rowids
+        )
+
+        temp_dir = tempfile.mkdtemp()
+        try:
+            expected = AnalyticsDB(db_path=str(Path(temp_dir) / 'expected.db'))
+            expected.insert_sessions_bulk(final)
+            for name, args in (
+                ('get_aggregate_stats', ()),
+                ('get_session_stats', (7,)),
+                ('get_project_breakdown', ()),
+                ('get_hot_files', ()),
+                ('get_hot_files', (None, 3)),
+                ('get_distribution', ('files',)),
+                ('get_timeseries', ('decisions', 'day', 30)),
+                ('get_recent_sessions', (10,)),
+            ):
+                with self.subTest(method=name, args=args):
+                    self.assertEqual(getattr(self.db, name)(*args), getattr(expected, name)(*args))
+            for table in ('file_changes', 'decisions'):
+                with self.subTest(table=table):
+                    rows, expected_rows = (
+                        sorted(
+                            tuple(value for key, value in row.items() if key != 'decision_id')
+                            for row in db.iter_raw_rows(table)
+                        )
+                        for db in (self.db, expected)
+                    )
+                    self.assertEqual(rows, expected_rows)
+            expected.close()
+        finally:
+            shutil.rmtree(temp_dir)
+
+        self.assertEqual(
+            sorted(r['session_id'] for r in self.db.search_decisions('rewrite')),
+            ['merge-12', 'merge-25', 'merge-3', 'merge-7']
+        )
+
+        # Unchanged re-ingest is a lookup only
+        changes = self.db.conn.total_changes
+        self.assertFalse(self.db.insert_session(final[3]))
+        self.assertEqual(self.db.insert_sessions_bulk(final)['skipped'], 30)
+        self.assertEqual(self.db.conn.total_changes, changes)
+
+        # A session rewritten twice within one batch keeps only the last version
+        later = dict(final[3], decisions=['Only this one'])
+        counts = self.db.insert_sessions_bulk([dict(later, decisions=['Not this']), later])
+        self.assertEqual(counts, {'inserted': 0, 'updated': 2, 'skipped': 0, 'errors': 0})
+        self.assertTrue(self.db.insert_session(dict(later, file_changes=['last.py'])))
+        self.assertEqual(
+            [(row['session_id'], row['decision_text']) for row in self.db.iter_raw_rows('decisions')
+             if row['session_id'] == 'merge-3'],
+            [('merge-3', 'Only this one')]
+        )
+        self.assertEqual(self.db.get_aggregate_stats()['total_sessions'], 30)
+        self.assertEqual(self.db.rebuild_aggregates(), self.db.get_aggregate_stats())
+
+    def test_sessions_without_hash_rewritten_once(self):
+        """Test sessions stored before content hashes are replaced by their next ingest"""
+        checkpoint = {'session_id': 'legacy', 'timestamp': datetime.now().isoformat(), 'decisions': ['a']}
+        self.assertTrue(self.db.insert_session(checkpoint))
+        self.db.conn.execute("UPDATE sessions SET content_hash = NULL")
+        self.db.conn.commit()
+
+        self.assertTrue(self.db.insert_session(checkpoint))
+        self.assertFalse(self.db.insert_session(checkpoint))
+        self.assertEqual(self.db.get_aggregate_stats()['total_decisions'], 1)
+
+    def test_rewrite_before_retention_horizon_skipped(self):
+        """Test a pruned session is not rewritten, so frozen rollups stay exact"""
+        self._insert_retention_sessions(self.db)
+        self.db.apply_retention(days=365)
+        stats = self.db.get_aggregate_stats()
+        hot = self.db.get_hot_files()
+
+        old = {
+            'session_id': 'ret-0',
+            'timestamp': (datetime.now() - timedelta(days=400)).isoformat(),
+            'file_changes': ['new.py']
+        }
+        self.assertFalse(self.db.insert_session(old))
+        self.assertEqual(self.db.insert_sessions_bulk([old])['skipped'], 1)
+        self.assertEqual(self.db.get_aggregate_stats(), stats)
+        self.assertEqual(self.db.get_hot_files(), hot)
+
+        # Sessions after the horizon are still replaced
+        self.assertTrue(self.db.insert_session({'session_id': 'ret-2', 'file_changes': ['new.py']}))
+        self.assertEqual(self.db.get_aggregate_stats()['total_files_changed'], stats['total_files_changed'] - 2)
+
     def test_session_stats(self):
         """Test session statistics calculation"""
         # Insert multiple sessions
@@ -151,6 +421,526 @@ class TestAnalyticsDB(unittest.TestCase):
         self.assertGreater(stats['total_decisions'], 0)
         self.assertEqual(stats['success_rate'], 100.0)
 
+    def test_session_stats_from_daily_rollup(self):
+        """Test windowed stats combine rollup days with the partial cutoff day"""
+        now = datetime.now()
+        self.db.insert_sessions_bulk(
+            {
+                'session_id': f'window-{i}',
+                'timestamp': (now - timedelta(hours=7 * i)).isoformat(),
+                'started_at': (now - timedelta(hours=7 * i, minutes=10 * i)).isoformat(),
+                'file_changes': [f'file{j}.py' for j in range(i % 5)],
+                'decisions': ['Decision'] * (i % 3),
+                'project': {'name': f'Project{i % 3}'}
+            }
+            for i in range(40)
+        )
+
+        # Reference values straight from the raw table
+        cutoff = now - timedelta(days=3)
+        cursor = self.db.conn.cursor()
+        cursor.execute("""
+            SELECT COUNT(*) as total, SUM(files_changed) as files,
+                   AVG(duration_seconds) as avg_duration
+            FROM sessions WHERE timestamp_ms >= ?
+        """, (to_epoch_ms(cutoff),))
+        expected = cursor.fetchone()
+
+        stats = self.db.get_session_stats(days=3)
+        self.assertEqual(stats['total_sessions'], expected['total'])
+        self.assertEqual(stats['total_files_changed'], expected['files'])
+        self.assertAlmostEqual(stats['avg_duration_seconds'], expected['avg_duration'])
+        self.assertLess(stats['total_sessions'], 40)
+        self.assertEqual(self.db.get_success_rate(days=3), 100.0)
+
+    def test_daily_rollup_maintenance(self):
+        """Test the daily rollup follows deletes and matches a rebuild"""
+        for i in range(6):
+            self.db.insert_session({
+                'session_id': f'rollup-{i}',
+                'timestamp': (datetime.now() - timedelta(days=i // 2)).isoformat(),
+                'file_changes': ['file.py'] * i,
+                'project': {'name': 'Alpha' if i % 2 else 'Beta'}
+            })
+
+        self.db.conn.execute("DELETE FROM sessions WHERE session_id = 'rollup-5'")
+        self.db.conn.commit()
+
+        cursor = self.db.conn.cursor()
+        cursor.execute("SELECT * FROM sessions_daily ORDER BY day, project_id")
+        incremental = [tuple(row) for row in cursor.fetchall()]
+
+        self.db.rebuild_daily_rollup()
+        cursor.execute("SELECT * FROM sessions_daily ORDER BY day, project_id")
+        rebuilt = [tuple(row) for row in cursor.fetchall()]
+
+        self.assertEqual(incremental, rebuilt)
+        self.assertEqual(len(rebuilt), 5)
+
+        breakdown = {p['project_name']: p for p in self.db.get_project_breakdown()}
+        self.assertEqual(breakdown['Alpha']['total_sessions'], 2)
+        self.assertEqual(breakdown['Alpha']['total_files_changed'], 1 + 3)
+        self.assertEqual(breakdown['Beta']['total_sessions'], 3)
+
+    def _insert_distribution_sessions(self):
+        """Insert 100 sessions of 1..100 minutes, 0..9 files, every 2 hours"""
+        now = datetime.now()
+        self.db.insert_sessions_bulk(
+            {
+                'session_id': f'dist-{i}',
+                'timestamp': (now - timedelta(hours=2 * i)).isoformat(),
+                'started_at': (now - timedelta(hours=2 * i, minutes=i + 1)).isoformat(),
+                'file_changes': [f'file{j}.py' for j in range(i % 10)],
+                'project': {'name': 'Long' if i % 4 == 0 else 'Short'}
+            }
+            for i in range(100)
+        )
+
+    def test_distribution(self):
+        """Test percentiles and histograms interpolated from the daily bins"""
+        self._insert_distribution_sessions()
+
+        duration = self.db.get_distribution('duration')
+        self.assertEqual(duration['count'], 100)
+        self.assertEqual(sum(b['sessions'] for b in duration['histogram']), 100)
+        self.assertEqual(duration['histogram'][0], {'lower': 60, 'upper': 90, 'sessions': 1})
+        self.assertEqual(duration['histogram'][-1]['upper'], 7200)
+
+        # Exact values are 3000, 5400 and 5940 seconds; estimates stay in the bin
+        percentiles = duration['percentiles']
+        self.assertEqual(list(percentiles), ['p50', 'p90', 'p99'])
+        self.assertTrue(2400 <= percentiles['p50'] <= 3600)
+        self.assertTrue(5400 <= percentiles['p90'] <= 7200)
+        self.assertTrue(5400 <= percentiles['p99'] <= 7200)
+        self.assertLessEqual(percentiles['p50'], percentiles['p90'])
+
+        # Files per session are exact in the narrow bins
+        files = self.db.get_distribution('files', percentiles=(0, 50, 75))
+        self.assertEqual(files['percentiles'], {'p0': 0.0, 'p50': 4.0, 'p75': 7.0})
+        self.assertEqual([b['sessions'] for b in files['histogram']], [10] * 8 + [20])
+
+        # Project and window filters agree with the raw rows
+        long_files = self.db.get_distribution('files', project='Long')
+        self.assertEqual(long_files['count'], 25)
+        self.assertEqual([b['lower'] for b in long_files['histogram']], [0, 1, 2, 3, 4, 5, 6, 7, 8])
+        self.assertEqual(long_files['histogram'][1]['sessions'], 0)
+
+        cursor = self.db.conn.cursor()
+        cursor.execute(
+            "SELECT COUNT(*) FROM sessions WHERE timestamp_ms >= ?",
+            (to_epoch_ms(datetime.now() - timedelta(days=3)),)
+        )
+        self.assertEqual(self.db.get_distribution(days=3)['count'], cursor.fetchone()[0])
+
+        empty = self.db.get_distribution(project='Missing')
+        self.assertEqual((empty['count'], empty['histogram']), (0, []))
+        self.assertEqual(empty['percentiles'], {'p50': None, 'p90': None, 'p99': None})
+
+        with self.assertRaises(ValueError):
+            self.db.get_distribution('tokens')
+
+    def test_histogram_rollup_maintenance(self):
+        """Test the histogram bins follow deletes and match a rebuild"""
+        self._insert_distribution_sessions()
+        self.db.insert_session({'session_id': 'no-start', 'timestamp': datetime.now().isoformat()})
+        self.assertEqual(self.db.get_distribution('duration')['count'], 100)
+        self.assertEqual(self.db.get_distribution('files')['count'], 101)
+
+        self.db.conn.execute("DELETE FROM sessions WHERE session_id IN ('dist-0', 'dist-7', 'no-start')")
+        self.db.conn.commit()
+
+        cursor = self.db.conn.cursor()
+        cursor.execute("SELECT * FROM session_histograms_daily ORDER BY metric, day, project_id, bin")
+        incremental = [tuple(row) for row in cursor.fetchall()]
+
+        self.db.rebuild_daily_rollup()
+        cursor.execute("SELECT * FROM session_histograms_daily ORDER BY metric, day, project_id, bin")
+        rebuilt = [tuple(row) for row in cursor.fetchall()]
+
+        self.assertEqual(incremental, rebuilt)
+        self.assertEqual(self.db.get_distribution('files')['count'], 98)
+
+    def test_timeseries(self):
+        """Test time series buckets, gap filling and agreement with window stats"""
+        now = datetime.now()
+        self.db.insert_sessions_bulk(
+            {
+                'session_id': f'series-{i}',
+                'timestamp': (now - timedelta(days=age)).isoformat(),
+                'started_at': (now - timedelta(days=age, minutes=10)).isoformat(),
+                'file_changes': ['a.py'] * (i + 1),
+                'project': {'name': 'Alpha' if i % 2 else 'Beta'}
+            }
+            for i, age in enumerate((0, 0, 2, 9, 40, 75))
+        )
+
+        daily = self.db.get_timeseries(days=9)
+        self.assertEqual(len(daily), 10)
+        self.assertEqual(daily[-1], {'start': now.date().isoformat(), 'value': 2})
+        self.assertEqual([point['value'] for point in daily[:-1]].count(0), 8)
+
+        # Series totals match the window stats, including the partial first day
+        for days in (3, 30, 100):
+            stats = self.db.get_session_stats(days=days)
+            series = self.db.get_timeseries('files', bucket='week', days=days)
+            self.assertEqual(sum(point['value'] for point in series), stats['total_files_changed'])
+
+        weekly = self.db.get_timeseries(bucket='week', days=60)
+        self.assertTrue(all(
+            datetime.fromisoformat(point['start']).weekday() == 0 for point in weekly
+        ))
+
+        monthly = self.db.get_timeseries('sessions', bucket='month', days=None, project='Alpha')
+        self.assertEqual(monthly[0]['start'], (now - timedelta(days=75)).strftime('%Y-%m-01'))
+        self.assertEqual(monthly[-1]['start'], now.strftime('%Y-%m-01'))
+        self.assertEqual(sum(point['value'] for point in monthly), 3)
+
+        rates = self.db.get_timeseries('success_rate', days=5)
+        self.assertEqual(rates[-1]['value'], 100.0)
+        self.assertIsNone(rates[0]['value'])
+
+        self.assertEqual(self.db.get_timeseries(days=None, project='Missing'), [])
+        with self.assertRaises(ValueError):
+            self.db.get_timeseries('lines')
+        with self.assertRaises(ValueError):
+            self.db.get_timeseries(bucket='hour')
+        with self.assertRaises(ValueError):
+            self.db.get_timeseries(days=-1)
+
+    def test_result_cache(self):
+        """Test query results are reused until the data changes"""
+        self.db.insert_session({'session_id': 'cache-1', 'project': {'name': 'Cached'}})
+        self.db.cache_clear()
+
+        first = self.db.get_project_breakdown()
+        first[0]['total_sessions'] = 999
+        self.assertEqual(self.db.get_project_breakdown()[0]['total_sessions'], 1)
+        self.assertEqual(self.db.get_session_stats(days=7), self.db.get_session_stats(7))
+        self.assertEqual(self.db.cache_info(), {'hits': 2, 'misses': 2, 'size': 2, 'maxsize': 128})
+
+        # Empty results (also what failed queries return) are not cached
+        self.assertEqual(self.db.get_hot_files(), [])
+        self.assertEqual(self.db.cache_info()['size'], 2)
+
+        # Own writes and commits from other connections both invalidate
+        self.db.insert_session({'session_id': 'cache-2', 'project': {'name': 'Cached'}})
+        self.assertEqual(self.db.get_aggregate_stats()['total_sessions'], 2)
+        self.assertEqual(self.db.get_aggregate_stats()['total_sessions'], 2)
+
+        other = AnalyticsDB(db_path=self.db_path)
+        other.insert_session({'session_id': 'cache-3', 'project': {'name': 'Cached'}})
+        other.close()
+        self.assertEqual(self.db.get_aggregate_stats()['total_sessions'], 3)
+        self.assertEqual(self.db.get_project_breakdown()[0]['total_sessions'], 3)
+
+        # Least recently used results are evicted
+        self.db._result_cache.maxsize = 2
+        self.db.get_timeseries(days=7)
+        self.db.get_distribution('files')
+        self.db.get_session_stats(days=3)
+        self.assertEqual(self.db.cache_info()['size'], 2)
+        hits = self.db.cache_info()['hits']
+        self.db.get_distribution('files')
+        self.db.get_timeseries(days=7)
+        self.assertEqual(self.db.cache_info()['hits'], hits + 1)
+
+        self.db.cache_clear()
+        self.assertEqual(self.db.cache_info(), {'hits': 0, 'misses': 0, 'size': 0, 'maxsize': 2})
+
+    def test_result_cache_follows_clock(self):
+        """Test cached "last N days" results expire as the window moves"""
+        now = datetime.now()
+        self.db.insert_session({
+            'session_id': 'clock-1',
+            'timestamp': (now - timedelta(days=10)).isoformat(),
+            'file_changes': ['a.py'],
+            'project': {'name': 'Clock'}
+        })
+        self.db.cache_clear()
+        self.assertEqual(self.db.get_session_stats(30)['total_sessions'], 1)
+        self.assertEqual(len(self.db.get_hot_files(days=30)), 1)
+        self.assertEqual(len(self.db.get_timeseries(bucket='day', days=None)), 11)
+
+        class Later(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return now + timedelta(days=40)
+
+        with patch('analytics_db.datetime', Later):
+            self.assertEqual(self.db.get_session_stats(30)['total_sessions'], 0)
+            self.assertEqual(self.db.get_hot_files(days=30), [])
+            self.assertEqual(len(self.db.get_timeseries(bucket='day', days=None)), 51)
+
+        # Within one tick results are still reused
+        self.db.get_session_stats(30)
+        hits = self.db.cache_info()['hits']
+        self.db.get_session_stats(30)
+        self.assertEqual(self.db.cache_info()['hits'], hits + 1)
+
+    def test_query_profile(self):
+        """Test traced statements are counted, timed and explained"""
+        with self.assertRaises(ValueError):
+            self.db.query_profile()
+
+        db = AnalyticsDB(db_path=self.db_path, trace=True)
+        try:
+            db.query_profile_clear()
+            db.insert_sessions_bulk([
+                {'session_id': f'traced-{i}', 'file_changes': ['a.py'], 'project': {'name': 'Traced'}}
+                for i in range(4)
+            ])
+            db.cache_clear()
+            recent = db.get_recent_sessions(limit=3)
+            self.assertEqual(len(recent), 3)
+
+            profile = db.query_profile(explain=10)
+            statements = {statement['sql']: statement for statement in profile['statements']}
+            self.assertEqual(profile['calls'], sum(s['calls'] for s in profile['statements']))
+            self.assertEqual(
+                [s['total_ms'] for s in profile['statements']],
+                sorted((s['total_ms'] for s in profile['statements']), reverse=True)
+            )
+
+            # One entry per parameterized statement, whitespace collapsed;
+            # trigger bodies run for each session insert are counted too
+            insert = next(s for sql, s in statements.items() if sql.startswith('INSERT OR IGNORE INTO sessions ('))
+            self.assertEqual(insert['calls'], 4)
+            self.assertGreater(insert['sqlite_statements'], insert['calls'])
+            self.assertNotIn('\n', insert['sql'])
+            self.assertIn('COMMIT', statements)
+
+            # Rows are counted as they are fetched
+            select = next(s for sql, s in statements.items() if 'FROM sessions s' in sql and 'LIMIT' in sql)
+            self.assertEqual((select['calls'], select['rows']), (1, 3))
+            self.assertLessEqual(select['p50_ms'], select['max_ms'])
+            self.assertTrue(any('idx_sessions_timestamp' in line for line in select['plan']))
+            json.dumps(profile)
+
+            db.query_profile_clear()
+            self.assertEqual(db.query_profile()['statements'], [])
+        finally:
+            db.close()
+
+    def test_dashboard_snapshot(self):
+        """Test the snapshot matches the individual queries and is read consistently"""
+        now = datetime.now()
+        for i in range(3):
+            self.db.insert_session({
+                'session_id': f'dash-{i}',
+                'timestamp': (now - timedelta(days=10 * i)).isoformat(),
+                'file_changes': ['a.py'] * (i + 1),
+                'project': {'name': f'Dash{i % 2}'}
+            })
+
+        snapshot = self.db.get_dashboard_snapshot(recent=2)
+        self.assertEqual(snapshot['period_days'], None)
+        self.assertEqual(snapshot['summary'], self.db.get_aggregate_stats())
+        self.assertEqual(snapshot['projects'], self.db.get_project_breakdown())
+        self.assertEqual(snapshot['recent_sessions'], self.db.get_recent_sessions(2))
+
+        windowed = self.db.get_dashboard_snapshot(days=15, recent=0)
+        self.assertEqual(windowed['summary'], self.db.get_session_stats(15))
+        self.assertEqual(windowed['recent_sessions'], [])
+
+        # A commit landing between two parts is not seen by the later parts
+        other = AnalyticsDB(db_path=self.db_path)
+        read_summary = self.db.get_aggregate_stats
+
+        def summary_then_write():
+            stats = read_summary()
+            other.insert_session({'session_id': 'dash-late', 'project': {'name': 'Dash0'}})
+            return stats
+
+        self.db.cache_clear()
+        with patch.object(self.db, 'get_aggregate_stats', side_effect=summary_then_write):
+            snapshot = self.db.get_dashboard_snapshot(recent=10)
+        other.close()
+
+        self.assertEqual(snapshot['summary']['total_sessions'], 3)
+        self.assertEqual(sum(p['total_sessions'] for p in snapshot['projects']), 3)
+        self.assertEqual(len(snapshot['recent_sessions']), 3)
+        self.assertFalse(self.db.conn.in_transaction)
+        self.assertEqual(self.db.get_dashboard_snapshot(recent=10)['summary']['total_sessions'], 4)
+
+    def test_hot_files(self):
+        """Test hot files are ranked by changes with project and window filters"""
+        now = datetime.now()
+        self.db.insert_session({
+            'session_id': 'hot-1',
+            'timestamp': now.isoformat(),
+            'file_changes': ['a.py', 'a.py', 'b.py'],
+            'project': {'name': 'Alpha'}
+        })
+        self.db.insert_session({
+            'session_id': 'hot-2',
+            'timestamp': (now - timedelta(days=10)).isoformat(),
+            'file_changes': ['a.py', 'c.py', 'c.py', 'c.py'],
+            'project': {'name': 'Alpha'}
+        })
+        self.db.insert_session({
+            'session_id': 'hot-3',
+            'timestamp': (now - timedelta(days=1)).isoformat(),
+            'file_changes': ['a.py'],
+            'project': {'name': 'Beta'}
+        })
+
+        alpha = self.db.get_hot_files(project='Alpha')
+        self.assertEqual(
+            [(f['file_path'], f['changes'], f['sessions']) for f in alpha],
+            [('a.py', 3, 2), ('c.py', 3, 1), ('b.py', 1, 1)]
+        )
+        self.assertEqual(alpha[0]['last_changed'], now.date().isoformat())
+
+        recent = self.db.get_hot_files(project='Alpha', days=7)
+        self.assertEqual([(f['file_path'], f['changes']) for f in recent], [('a.py', 2), ('b.py', 1)])
+
+        everywhere = self.db.get_hot_files(days=7, top_k=2)
+        self.assertEqual(
+            [(f['project_name'], f['file_path']) for f in everywhere],
+            [('Alpha', 'a.py'), ('Beta', 'a.py')]
+        )
+        self.assertEqual(self.db.get_hot_files(project='Missing'), [])
+
+    def test_hot_files_window_partial_day(self):
+        """Test the first day of a window only counts changes after the cutoff"""
+        cutoff = datetime.now() - timedelta(days=3)
+        for i, offset in enumerate((-1, 1)):
+            self.db.insert_session({
+                'session_id': f'edge-{i}',
+                'timestamp': (cutoff + timedelta(minutes=offset)).isoformat(),
+                'file_changes': ['edge.py'],
+                'project': {'name': 'Edge'}
+            })
+
+        # Small drift between the inserts and the query's own cutoff is fine
+        hot = self.db.get_hot_files(days=3)
+        self.assertEqual(hot[0]['changes'], 1)
+
+    def test_file_rollup_maintenance(self):
+        """Test the file rollup follows deletes and matches a rebuild"""
+        for i in range(4):
+            self.db.insert_session({
+                'session_id': f'files-{i}',
+                'timestamp': (datetime.now() - timedelta(days=i // 2)).isoformat(),
+                'file_changes': ['x.py', 'y.py', 'x.py'][:i + 1],
+                'project': {'name': 'Files'}
+            })
+
+        self.db.conn.execute(
+            "DELETE FROM file_changes WHERE id = "
+            "(SELECT MAX(id) FROM file_changes WHERE session_id = 'files-3')"
+        )
+        self.db.conn.execute("DELETE FROM file_changes WHERE session_id = 'files-0'")
+        self.db.conn.commit()
+
+        cursor = self.db.conn.cursor()
+        cursor.execute("SELECT * FROM file_changes_daily ORDER BY day, file_path_id")
+        incremental = [tuple(row) for row in cursor.fetchall()]
+
+        self.assertEqual(self.db.rebuild_file_rollup(), len(incremental))
+        cursor.execute("SELECT * FROM file_changes_daily ORDER BY day, file_path_id")
+        rebuilt = [tuple(row) for row in cursor.fetchall()]
+
+        self.assertEqual(incremental, rebuilt)
+        hot = {f['file_path']: f for f in self.db.get_hot_files()}
+        self.assertEqual((hot['x.py']['changes'], hot['x.py']['sessions']), (4, 3))
+        self.assertEqual((hot['y.py']['changes'], hot['y.py']['sessions']), (3, 3))
+
+    def _insert_retention_sessions(self, db):
+        """Insert sessions 400, 100 and 0 days old with file changes and decisions"""
+        now = datetime.now()
+        for i, age in enumerate((400, 100, 0)):
+            db.insert_session({
+                'session_id': f'ret-{i}',
+                'timestamp': (now - timedelta(days=age)).isoformat(),
+                'file_changes': ['old.py', 'old.py', f'f{i}.py'],
+                'decisions': [{'decision': f'Keep sqlite {i}', 'rationale': 'Retention test'}],
+                'metrics': {'session_duration_seconds': 60},
+                'project': {'name': 'Keep'}
+            })
+
+    def test_apply_retention(self):
+        """Test retention prunes old raw rows but keeps rollups and lifetime stats"""
+        self._insert_retention_sessions(self.db)
+        hot_before = self.db.get_hot_files()
+        hot_window_before = self.db.get_hot_files(days=365)
+        stats_before = self.db.get_aggregate_stats()
+
+        result = self.db.apply_retention(days=365, batch_size=1, vacuum_pages=2)
+        self.assertEqual(result['sessions_scanned'], 1)
+        self.assertEqual(result['file_changes'], 3)
+        self.assertEqual(result['decisions'], 1)
+        self.assertEqual(result['batches'], 1)
+        self.assertEqual(
+            result['horizon'],
+            (datetime.now() - timedelta(days=365)).date().isoformat()
+        )
+
+        cursor = self.db.conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM file_changes WHERE session_id = 'ret-0'")
+        self.assertEqual(cursor.fetchone()[0], 0)
+        cursor.execute("SELECT COUNT(*) FROM sessions")
+        self.assertEqual(cursor.fetchone()[0], 3)
+
+        self.assertEqual(self.db.get_hot_files(), hot_before)
+        self.assertEqual(self.db.get_hot_files(days=365), hot_window_before)
+        self.assertEqual(self.db.get_aggregate_stats(), stats_before)
+        self.assertEqual(
+            sorted(r['session_id'] for r in self.db.search_decisions('sqlite')),
+            ['ret-1', 'ret-2']
+        )
+
+        # A rebuild keeps the pruned days, and nothing is left to prune
+        self.db.rebuild_file_rollup()
+        self.assertEqual(self.db.get_hot_files(), hot_before)
+        again = self.db.apply_retention(days=365)
+        self.assertEqual((again['file_changes'], again['decisions']), (0, 0))
+
+    def test_retention_horizon_never_moves_back(self):
+        """Test a longer retention period does not resurrect pruned days"""
+        self._insert_retention_sessions(self.db)
+        first = self.db.apply_retention(days=30)
+        second = self.db.apply_retention(days=365)
+
+        self.assertEqual(second['horizon'], first['horizon'])
+        self.assertEqual(second['sessions_scanned'], 2)
+        self.assertEqual(second['file_changes'], 0)
+        self.assertEqual(self.db.get_hot_files(days=365)[0]['file_path'], 'old.py')
+
+        with self.assertRaises(ValueError):
+            self.db.apply_retention(days=0)
+
+    def test_retention_releases_pages(self):
+        """Test new databases use incremental auto_vacuum and retention shrinks the file"""
+        self.assertEqual(self.db.conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+        self.assertFalse(self.db.enable_incremental_vacuum())
+
+        now = datetime.now()
+        self.db.insert_sessions_bulk([{
+            'session_id': f'bulk-{i}',
+            'timestamp': (now - timedelta(days=500)).isoformat(),
+            'file_changes': [f'src/module_{i}_{j}.py' for j in range(20)],
+            'project': {'name': 'Bulk'}
+        } for i in range(100)])
+
+        result = self.db.apply_retention(days=30, batch_size=25, vacuum_pages=10)
+        self.assertEqual(result['batches'], 4)
+        self.assertGreater(result['pages_vacuumed'], 0)
+        self.assertEqual(self.db.conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+
+    def test_enable_incremental_vacuum(self):
+        """Test an older database without auto_vacuum can be converted"""
+        self.db.close()
+        Path(self.db_path).unlink()
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE placeholder (id INTEGER)")
+        conn.close()
+
+        self.db = AnalyticsDB(db_path=self.db_path)
+        self.assertEqual(self.db.conn.execute("PRAGMA auto_vacuum").fetchone()[0], 0)
+        self.assertTrue(self.db.enable_incremental_vacuum())
+        self.assertEqual(self.db.conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+
     def test_aggregate_stats(self):
         """Test aggregate statistics"""
         # Insert sessions
@@ -175,6 +965,222 @@ class TestAnalyticsDB(unittest.TestCase):
         self.assertEqual(stats['success_rate'], 100.0)
         self.assertGreater(stats['time_saved_hours'], 0)
 
+    def test_aggregate_stats_running_totals(self):
+        """Test trigger-maintained totals match a rebuild from raw sessions"""
+        self.db.insert_sessions_bulk(
+            {
+                'session_id': f'running-{i}',
+                'timestamp': (datetime.now() - timedelta(days=i)).isoformat(),
+                'file_changes': [f'file{j}.py' for j in range(i)],
+                'decisions': ['Decision'] * (i % 3),
+                'resume_points': ['Resume'],
+                'project': {'name': f'Project{i % 4}'}
+            }
+            for i in range(12)
+        )
+
+        incremental = self.db.get_aggregate_stats()
+        rebuilt = self.db.rebuild_aggregates()
+
+        self.assertEqual(incremental, rebuilt)
+        self.assertEqual(incremental['total_sessions'], 12)
+        self.assertEqual(incremental['total_projects'], 4)
+        self.assertEqual(incremental['total_files_changed'], sum(range(12)))
+        self.assertEqual(incremental['total_resume_points'], 12)
+        self.assertLess(incremental['first_session'], incremental['last_session'])
+
+    def test_aggregate_stats_after_delete(self):
+        """Test removing sessions adjusts totals, projects and boundaries"""
+        for i, project in enumerate(['Solo', 'Shared', 'Shared']):
+            self.db.insert_session({
+                'session_id': f'delete-{i}',
+                'timestamp': (datetime.now() - timedelta(days=i)).isoformat(),
+                'file_changes': ['file.py'],
+                'project': {'name': project}
+            })
+
+        self.db.conn.execute("DELETE FROM sessions WHERE session_id IN ('delete-0', 'delete-2')")
+        self.db.conn.commit()
+
+        stats = self.db.get_aggregate_stats()
+        self.assertEqual(stats['total_sessions'], 1)
+        self.assertEqual(stats['total_files_changed'], 1)
+        self.assertEqual(stats['total_projects'], 1)
+        self.assertEqual(stats['first_session'], stats['last_session'])
+
+        self.db.conn.execute("DELETE FROM sessions")
+        self.db.conn.commit()
+
+        stats = self.db.get_aggregate_stats()
+        self.assertEqual(stats['total_sessions'], 0)
+        self.assertIsNone(stats['first_session'])
+
+    def test_rebuild_aggregates_repairs_drift(self):
+        """Test rebuild_aggregates fixes drifted running totals"""
+        self.db.insert_session({'session_id': 'drift', 'project': {'name': 'P'}})
+        self.db.conn.execute(
+            "UPDATE aggregate_stats SET stat_value = 99 WHERE stat_key = 'total_sessions'"
+        )
+        self.db.conn.commit()
+
+        self.assertEqual(self.db.rebuild_aggregates()['total_sessions'], 1)
+
+    def test_legacy_database_migration(self):
+        """Test a pre-versioning database with ISO text timestamps is migrated"""
+        self.db.close()
+        Path(self.db_path).unlink()
+
+        # Original schema and adapter-written timestamps
+        conn = sqlite3.connect(self.db_path)
+        AnalyticsDB._migrate_base_schema(None, conn.cursor())
+        conn.executemany(
+            "INSERT INTO sessions (session_id, timestamp, started_at, duration_seconds, "
+            "files_changed, decisions_logged, project_name) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                ('legacy-1', '2025-03-01 10:00:00.250000', '2025-03-01 09:30:00', 1800, 2, 1, 'Old'),
+                ('legacy-2', '2025-03-02T23:59:59', None, None, 1, 0, 'Old'),
+            ]
+        )
+        conn.execute(
+            "INSERT INTO decisions (session_id, decision_text, timestamp) "
+            "VALUES ('legacy-1', 'Keep it', '2025-03-01 10:00:00')"
+        )
+        conn.commit()
+        conn.close()
+
+        self.db = AnalyticsDB(db_path=self.db_path)
+
+        cursor = self.db.conn.cursor()
+        cursor.execute("SELECT timestamp_ms, started_at_ms FROM sessions WHERE session_id = 'legacy-1'")
+        row = cursor.fetchone()
+        self.assertEqual(row['timestamp_ms'], to_epoch_ms(datetime(2025, 3, 1, 10, 0, 0, 250000)))
+        self.assertEqual(row['started_at_ms'], to_epoch_ms(datetime(2025, 3, 1, 9, 30)))
+
+        cursor.execute("SELECT timestamp_ms FROM decisions")
+        self.assertEqual(cursor.fetchone()['timestamp_ms'], to_epoch_ms('2025-03-01T10:00:00'))
+
+        stats = self.db.get_aggregate_stats()
+        self.assertEqual(stats['total_sessions'], 2)
+        self.assertEqual(stats['total_files_changed'], 3)
+        self.assertEqual(stats['first_session'], '2025-03-01T10:00:00.250000')
+        self.assertEqual(stats['last_session'], '2025-03-02T23:59:59')
+
+        cursor.execute("SELECT COUNT(*) as count FROM sessions_daily")
+        self.assertEqual(cursor.fetchone()['count'], 2)
+        self.assertEqual(self.db.get_distribution('duration')['histogram'],
+                         [{'lower': 1800, 'upper': 2400, 'sessions': 1}])
+
+        # Existing decisions are indexed by the migration
+        self.assertEqual(len(self.db.search_decisions('keep')), 1)
+
+    def test_text_columns_migration(self):
+        """Test a version 6 database with text columns is dictionary-encoded"""
+        self.db.close()
+        Path(self.db_path).unlink()
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        for migration in AnalyticsDB.MIGRATIONS[:6]:
+            getattr(AnalyticsDB, migration)(None, cursor)
+        conn.executemany(
+            "INSERT INTO sessions (session_id, timestamp_ms, files_changed, project_name, "
+            "git_branch, tool_triggered) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                ('v6-1', to_epoch_ms('2025-05-01T10:00:00'), 2, 'Encoded', 'main', 'hook'),
+                ('v6-2', to_epoch_ms('2025-05-02T10:00:00'), 1, 'Encoded', 'main', 'manual'),
+                ('v6-3', to_epoch_ms('2025-05-02T11:00:00'), 1, None, None, None),
+            ]
+        )
+        conn.executemany(
+            "INSERT INTO file_changes (session_id, file_path, change_type) VALUES (?, ?, 'modified')",
+            [('v6-1', 'src/long/path/a.py'), ('v6-1', 'src/long/path/b.py'),
+             ('v6-2', 'src/long/path/a.py'), ('v6-3', 'src/long/path/a.py')]
+        )
+        conn.execute("PRAGMA user_version = 6")
+        conn.commit()
+        conn.close()
+
+        self.db = AnalyticsDB(db_path=self.db_path)
+
+        cursor = self.db.conn.cursor()
+        cursor.execute("SELECT name FROM projects ORDER BY id")
+        self.assertEqual([row['name'] for row in cursor.fetchall()], ['Unknown', 'Encoded'])
+        cursor.execute("SELECT COUNT(*) as count FROM file_paths")
+        self.assertEqual(cursor.fetchone()['count'], 2)
+        cursor.execute("SELECT COUNT(*) as count FROM tools")
+        self.assertEqual(cursor.fetchone()['count'], 2)
+
+        columns = [row['name'] for row in cursor.execute("PRAGMA table_info(sessions)")]
+        self.assertIn('project_id', columns)
+        self.assertNotIn('project_name', columns)
+
+        breakdown = {p['project_name']: p['total_sessions'] for p in self.db.get_project_breakdown()}
+        self.assertEqual(breakdown, {'Encoded': 2, 'Unknown': 1})
+        self.assertEqual(self.db.get_aggregate_stats()['total_projects'], 1)
+        hot = self.db.get_hot_files(project='Encoded')
+        self.assertEqual([(f['file_path'], f['changes']) for f in hot],
+                         [('src/long/path/a.py', 2), ('src/long/path/b.py', 1)])
+        self.assertIsNone(self.db.get_recent_sessions(limit=1)[0]['project_name'])
+
+        # Ingest continues with the migrated dictionaries
+        self.db.insert_session({
+            'session_id': 'v7-1',
+            'file_changes': ['src/long/path/a.py', 'src/new.py'],
+            'project': {'name': 'Encoded'}
+        })
+        cursor.execute("SELECT COUNT(*) as count FROM file_paths")
+        self.assertEqual(cursor.fetchone()['count'], 3)
+        self.assertEqual(self.db.get_hot_files(project='Encoded', top_k=1)[0]['changes'], 3)
+
+    def test_dictionary_encoding(self):
+        """Test repeated strings are stored once and queries return names"""
+        for i in range(20):
+            self.db.insert_session({
+                'session_id': f'dict-{i}',
+                'timestamp': datetime.now().isoformat(),
+                'file_changes': ['src/app/models.py', f'src/app/view_{i % 3}.py'],
+                'project': {'name': 'Alpha' if i % 2 else 'Beta'},
+                'git_branch': 'main',
+                'context': {'tool': 'hook'}
+            })
+
+        cursor = self.db.conn.cursor()
+        counts = {
+            table: cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in AnalyticsDB.DIMENSIONS
+        }
+        # 'Unknown' is always present
+        self.assertEqual(counts, {'projects': 3, 'file_paths': 4, 'git_branches': 1, 'tools': 1})
+        cache = self.db._intern_caches['file_paths']
+        self.assertEqual((len(cache), cache.misses), (4, 4))
+
+        self.assertEqual({p['project_name'] for p in self.db.get_project_breakdown()}, {'Alpha', 'Beta'})
+        self.assertEqual(self.db.get_hot_files(project='Alpha', top_k=1)[0]['file_path'], 'src/app/models.py')
+        self.assertEqual(self.db.get_hot_files(project='Nowhere'), [])
+        self.assertIn(self.db.get_recent_sessions(limit=1)[0]['project_name'], {'Alpha', 'Beta'})
+
+    def test_intern_cache_cleared_on_rollback(self):
+        """Test ids interned by a rolled-back transaction are not reused from cache"""
+        cursor = self.db.conn.cursor()
+        self.db._intern(cursor, 'projects', 'Discarded')
+        self.db._rollback()
+
+        self.db.insert_session({'session_id': 'after-1', 'project': {'name': 'Kept'}})
+        self.db.insert_session({'session_id': 'after-2', 'project': {'name': 'Discarded'}})
+
+        breakdown = {p['project_name']: p['total_sessions'] for p in self.db.get_project_breakdown()}
+        self.assertEqual(breakdown, {'Kept': 1, 'Discarded': 1})
+
+    def test_epoch_ms_conversion(self):
+        """Test timestamp conversion at the API boundary"""
+        naive = datetime(2025, 6, 1, 12, 30, 15, 123000)
+        self.assertEqual(from_epoch_ms(to_epoch_ms(naive)), naive)
+        self.assertEqual(to_epoch_ms(naive.isoformat()), to_epoch_ms(naive))
+        self.assertEqual(to_epoch_ms('1970-01-02T00:00:00'), AnalyticsDB.MS_PER_DAY)
+        self.assertEqual(to_epoch_ms('1970-01-01T02:00:00+02:00'), 0)
+        self.assertIsNone(to_epoch_ms(None))
+        self.assertIsNone(from_epoch_ms(None))
+
     def test_calculate_time_saved(self):
         """Test time saved calculation"""
         # Insert sessions with known counts
@@ -241,6 +1247,253 @@ class TestAnalyticsDB(unittest.TestCase):
             self.assertEqual(project_stats['successful_sessions'], 2)
             self.assertEqual(project_stats['success_rate'], 100.0)
 
+    def test_recent_sessions(self):
+        """Test recent sessions are newest first with datetime timestamps"""
+        for i in range(4):
+            self.db.insert_session({
+                'session_id': f'recent-{i}',
+                'timestamp': (datetime.now() - timedelta(hours=i)).isoformat(),
+                'project': {'name': 'TestProject'}
+            })
+
+        recent = self.db.get_recent_sessions(limit=3)
+
+        self.assertEqual([r['session_id'] for r in recent], ['recent-0', 'recent-1', 'recent-2'])
+        self.assertIsInstance(recent[0]['timestamp'], datetime)
+        self.assertTrue(recent[0]['checkpoint_success'])
+
+    def _insert_decisions(self):
+        """Insert sessions with decisions for the search tests"""
+        now = datetime.now()
+        self.db.insert_session({
+            'session_id': 'search-1',
+            'timestamp': (now - timedelta(days=40)).isoformat(),
+            'decisions': [
+                'Picked SQLite over Postgres because the tool runs locally',
+                'Use a connection pool for the worker threads'
+            ],
+            'project': {'name': 'Alpha'}
+        })
+        self.db.insert_session({
+            'session_id': 'search-2',
+            'timestamp': (now - timedelta(days=2)).isoformat(),
+            'decisions': [
+                'SQLite WAL mode lets readers run during writes; SQLite wins again',
+                'Renamed the configuration module'
+            ],
+            'project': {'name': 'Beta'}
+        })
+
+    def test_search_decisions(self):
+        """Test ranked full-text search over decisions"""
+        self._insert_decisions()
+
+        results = self.db.search_decisions('sqlite')
+        self.assertEqual(len(results), 2)
+        # More occurrences in a shorter text ranks first
+        self.assertEqual(results[0]['session_id'], 'search-2')
+        self.assertLessEqual(results[0]['rank'], results[1]['rank'])
+        self.assertIn('[SQLite]', results[0]['snippet'])
+        self.assertEqual(results[0]['project_name'], 'Beta')
+        self.assertIsInstance(results[0]['timestamp'], datetime)
+
+        # Prefix, phrase and boolean queries
+        self.assertEqual(len(self.db.search_decisions('config*')), 1)
+        self.assertEqual(len(self.db.search_decisions('"connection pool"')), 1)
+        self.assertEqual(len(self.db.search_decisions('"pool connection"')), 0)
+        self.assertEqual(len(self.db.search_decisions('sqlite NOT postgres')), 1)
+
+        # Filters
+        self.assertEqual(len(self.db.search_decisions('sqlite', project='Alpha')), 1)
+        recent = self.db.search_decisions('sqlite', since=datetime.now() - timedelta(days=7))
+        self.assertEqual([r['session_id'] for r in recent], ['search-2'])
+        older = self.db.search_decisions('sqlite', until=datetime.now() - timedelta(days=7))
+        self.assertEqual([r['session_id'] for r in older], ['search-1'])
+        self.assertEqual(len(self.db.search_decisions('sqlite', limit=1)), 1)
+
+    def test_search_decisions_plain_text(self):
+        """Test text that is not valid query syntax is searched as words"""
+        self._insert_decisions()
+
+        results = self.db.search_decisions('why did we pick SQLite over Postgres?')
+        self.assertEqual(results, [])
+
+        results = self.db.search_decisions('SQLite over Postgres?')
+        self.assertEqual([r['session_id'] for r in results], ['search-1'])
+        self.assertEqual(self.db.search_decisions('???'), [])
+
+    def test_search_index_follows_deletes(self):
+        """Test the index stays in sync when decisions are removed"""
+        self._insert_decisions()
+        self.db.conn.execute("DELETE FROM decisions WHERE session_id = 'search-1'")
+        self.db.conn.commit()
+
+        self.assertEqual(len(self.db.search_decisions('sqlite')), 1)
+        self.assertEqual(self.db.search_decisions('postgres'), [])
+
+        self.assertEqual(self.db.rebuild_search_index(), 2)
+        self.assertEqual(len(self.db.search_decisions('sqlite')), 1)
+
+    def test_search_without_fts(self):
+        """Test search falls back to LIKE scans without the FTS5 index"""
+        self._insert_decisions()
+        for name in ('trg_decisions_fts_insert', 'trg_decisions_fts_delete',
+                     'trg_decisions_fts_update'):
+            self.db.conn.execute(f"DROP TRIGGER {name}")
+        self.db.conn.execute("DROP TABLE decisions_fts")
+        self.db.conn.commit()
+
+        results = self.db.search_decisions('sqlite readers')
+        self.assertEqual([r['session_id'] for r in results], ['search-2'])
+        self.assertIsNone(results[0]['rank'])
+        self.assertEqual(len(self.db.search_decisions('sqlite', project='Alpha')), 1)
+        self.assertEqual(self.db.rebuild_search_index(), 0)
+
+    def test_iter_raw_rows(self):
+        """Test raw rows stream oldest first with session filters"""
+        now = datetime.now()
+        self.db.insert_sessions_bulk([
+            {
+                'session_id': f'raw-{i}',
+                'timestamp': (now - timedelta(days=i)).isoformat(),
+                'started_at': (now - timedelta(days=i, hours=1)).isoformat(),
+                'file_changes': [f'file_{j}.py' for j in range(i % 3)],
+                'decisions': [f'Decision {i}'],
+                'project': {'name': 'Alpha' if i % 2 else 'Beta'},
+                'git_branch': 'main'
+            }
+            for i in range(10)
+        ])
+
+        sessions = list(self.db.iter_raw_rows(batch_size=3))
+        self.assertEqual([row['session_id'] for row in sessions], [f'raw-{i}' for i in range(9, -1, -1)])
+        self.assertEqual(tuple(sessions[0]), AnalyticsDB.RAW_EXPORT_COLUMNS['sessions'])
+        self.assertEqual(sessions[0]['project_name'], 'Alpha')
+        self.assertEqual(sessions[0]['git_branch'], 'main')
+        self.assertEqual(sessions[0]['duration_seconds'], 3600)
+        self.assertIs(sessions[0]['checkpoint_success'], True)
+        self.assertIsInstance(sessions[0]['timestamp'], str)
+
+        files = list(self.db.iter_raw_rows('file_changes', project='Beta'))
+        self.assertEqual(len(files), sum(i % 3 for i in range(0, 10, 2)))
+        self.assertEqual({row['project_name'] for row in files}, {'Beta'})
+        self.assertEqual(files, sorted(files, key=lambda row: row['session_timestamp']))
+
+        decisions = list(self.db.iter_raw_rows(
+            'decisions', since=now - timedelta(days=5, hours=12), until=now - timedelta(days=1, hours=12)
+        ))
+        self.assertEqual([row['decision_text'] for row in decisions],
+                         [f'Decision {i}' for i in (5, 4, 3, 2)])
+
+        with self.assertRaises(ValueError):
+            self.db.iter_raw_rows('aggregate_stats')
+
+    def test_iter_raw_rows_plans(self):
+        """Test raw exports read in index order without sorting"""
+        statements = []
+        self.db.conn.set_trace_callback(statements.append)
+        for table in AnalyticsDB.RAW_EXPORT_COLUMNS:
+            list(self.db.iter_raw_rows(table, since=0, project='Alpha'))
+            list(self.db.iter_raw_rows(table))
+        self.db.conn.set_trace_callback(None)
+
+        selects = [sql for sql in statements if 'ORDER BY s.timestamp_ms' in sql]
+        self.assertEqual(len(selects), 6)
+        for sql in selects:
+            plan = ' '.join(row[3] for row in self.db.conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+            self.assertIn('idx_sessions_timestamp', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    @staticmethod
+    def _merge_checkpoints(indexes, projects):
+        """Checkpoints over a few weeks for the merge tests"""
+        now = datetime.now()
+        return [
+            {
+                'session_id': f'merge-{i}',
+                'timestamp': (now - timedelta(hours=5 * i)).isoformat(),
+                'started_at': (now - timedelta(hours=5 * i, minutes=i % 60)).isoformat(),
+                'file_changes': [f'src/module_{i % 4}.py', 'README.md'],
+                'decisions': [f'Merge decision {i}'],
+                'project': {'name': projects[i % len(projects)]},
+                'git_branch': f'branch-{i % 3}',
+                'success': i % 5 != 0
+            }
+            for i in indexes
+        ]
+
+    def test_merge_from(self):
+        """Test merging another database matches ingesting its checkpoints here"""
+        local = self._merge_checkpoints(range(0, 60), ['Alpha', 'Beta'])
+        # Overlapping sessions, a new project and names interned in another order
+        remote = self._merge_checkpoints(range(40, 100), ['Gamma', 'Beta', 'Alpha'])
+        self.db.insert_sessions_bulk(local)
+
+        temp_dir = tempfile.mkdtemp()
+        try:
+            other = AnalyticsDB(db_path=str(Path(temp_dir) / 'other.db'))
+            other.insert_sessions_bulk(list(reversed(remote)))
+            other.close()
+
+            expected = AnalyticsDB(db_path=str(Path(temp_dir) / 'expected.db'))
+            expected.insert_sessions_bulk(local + remote[20:])
+
+            counts = self.db.merge_from(str(Path(temp_dir) / 'other.db'))
+            self.assertEqual(counts, {'inserted': 40, 'skipped': 20, 'file_changes': 80, 'decisions': 40})
+
+            for name, args in (
+                ('get_aggregate_stats', ()),
+                ('get_session_stats', (7,)),
+                ('get_project_breakdown', ()),
+                ('get_hot_files', ()),
+                ('get_distribution', ()),
+                ('get_timeseries', ('files', 'day', 30)),
+            ):
+                with self.subTest(method=name):
+                    self.assertEqual(getattr(self.db, name)(*args), getattr(expected, name)(*args))
+            self.assertEqual(len(self.db.search_decisions('merge', limit=1000)), 100)
+            self.assertEqual(
+                [row['project_name'] for row in self.db.iter_raw_rows() if row['session_id'] == 'merge-99'],
+                ['Gamma']
+            )
+            expected.close()
+
+            # Merging again finds nothing new
+            counts = self.db.merge_from(str(Path(temp_dir) / 'other.db'))
+            self.assertEqual(counts, {'inserted': 0, 'skipped': 60, 'file_changes': 0, 'decisions': 0})
+            self.assertEqual(self.db.get_aggregate_stats()['total_sessions'], 100)
+        finally:
+            shutil.rmtree(temp_dir)
+
+        attached = [row['name'] for row in self.db.conn.execute("PRAGMA database_list")]
+        self.assertNotIn('merge_source', attached)
+
+    def test_merge_from_rejects_bad_source(self):
+        """Test a missing file or another schema version merges nothing"""
+        self.db.insert_session({'session_id': 'kept'})
+
+        with self.assertRaises(sqlite3.OperationalError):
+            self.db.merge_from(self.db_path + '.missing')
+        self.assertFalse(Path(self.db_path + '.missing').exists())
+
+        temp_dir = tempfile.mkdtemp()
+        try:
+            old_path = str(Path(temp_dir) / 'old.db')
+            conn = sqlite3.connect(old_path)
+            conn.execute("CREATE TABLE sessions (session_id TEXT PRIMARY KEY)")
+            conn.execute("INSERT INTO sessions VALUES ('old')")
+            conn.execute("PRAGMA user_version = 3")
+            conn.commit()
+            conn.close()
+
+            with self.assertRaises(sqlite3.DatabaseError):
+                self.db.merge_from(old_path)
+        finally:
+            shutil.rmtree(temp_dir)
+
+        self.assertEqual(self.db.get_aggregate_stats()['total_sessions'], 1)
+        self.assertEqual(len(list(self.db.conn.execute("PRAGMA database_list"))), 2)
+
     def test_tokens_estimation(self):
         """Test token estimation calculation"""
         # Create session with known counts
@@ -262,6 +1515,40 @@ class TestAnalyticsDB(unittest.TestCase):
         # Connection should be closed after context
         # Note: We can't easily test this without implementation details
 
+    def test_connection_profiles(self):
+        """Test profile PRAGMAs are applied to the connection"""
+        self.db.close()
+        self.db = AnalyticsDB(db_path=self.db_path, profile='ingest')
+
+        pragma = lambda name: self.db.conn.execute(f"PRAGMA {name}").fetchone()[0]
+        self.assertEqual(pragma('journal_mode'), 'wal')
+        self.assertEqual(pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(pragma('busy_timeout'), 10000)
+        self.assertEqual(pragma('cache_size'), -65536)
+        self.assertEqual(pragma('temp_store'), 2)  # MEMORY
+
+    def test_unknown_profile(self):
+        """Test an unknown profile name is rejected"""
+        with self.assertRaises(ValueError):
+            AnalyticsDB(db_path=self.db_path, profile='turbo')
+
+    def test_reader_not_blocked_by_writer(self):
+        """Test a reader sees committed data while a write transaction is open"""
+        self.db.insert_session({'session_id': 'committed', 'project': {'name': 'P'}})
+
+        self.db.conn.execute("BEGIN IMMEDIATE")
+        self.db.conn.execute(
+            "INSERT INTO sessions (session_id, timestamp_ms) VALUES ('pending', ?)",
+            (to_epoch_ms(datetime.now()),)
+        )
+
+        reader = AnalyticsDB(db_path=self.db_path, profile='read')
+        try:
+            self.assertEqual(reader.get_aggregate_stats()['total_sessions'], 1)
+        finally:
+            reader.close()
+            self.db.conn.rollback()
+
     def test_missing_fields(self):
         """Test handling of checkpoint data with missing fields"""
         # Minimal checkpoint data
@@ -282,6 +1569,220 @@ class TestAnalyticsDB(unittest.TestCase):
         self.assertEqual(row['resume_points_generated'], 0)
 
 
+class TestThreadSafeAnalyticsDB(unittest.TestCase):
+    """Test cases for ThreadSafeAnalyticsDB class"""
+
+    def setUp(self):
+        """Set up test database"""
+        self.temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+        self.temp_db.close()
+        self.db_path = self.temp_db.name
+
+        self.db = ThreadSafeAnalyticsDB(db_path=self.db_path)
+
+    def tearDown(self):
+        """Clean up test database"""
+        self.db.close()
+        Path(self.db_path).unlink(missing_ok=True)
+
+    def _run_threads(self, target, count):
+        """Run target(index) on count threads and re-raise the first failure"""
+        errors = []
+
+        def wrapper(index):
+            try:
+                target(index)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=wrapper, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise errors[0]
+
+    def test_concurrent_inserts(self):
+        """Test inserts from many threads are serialized by the writer"""
+        def insert(index):
+            for j in range(20):
+                self.assertTrue(self.db.insert_session({
+                    'session_id': f'thread-{index}-{j}',
+                    'timestamp': datetime.now().isoformat(),
+                    'decisions': ['d'],
+                    'project': {'name': f'project-{index % 3}'}
+                }))
+
+        self._run_threads(insert, 8)
+
+        stats = self.db.get_aggregate_stats()
+        self.assertEqual(stats['total_sessions'], 160)
+        self.assertEqual(stats['total_decisions'], 160)
+        self.assertEqual(stats['total_projects'], 3)
+        self.assertEqual(self.db.get_session_stats(days=1)['total_sessions'], 160)
+
+    def test_concurrent_bulk_inserts_and_reads(self):
+        """Test readers run alongside bulk writes from other threads"""
+        def work(index):
+            if index % 2 == 0:
+                counts = self.db.insert_sessions_bulk(
+                    {'session_id': f'bulk-{index}-{j}'} for j in range(50)
+                )
+                self.assertEqual(counts['inserted'], 50)
+            else:
+                for _ in range(20):
+                    stats = self.db.get_aggregate_stats()
+                    self.assertLessEqual(stats['total_sessions'], 200)
+                    self.db.get_recent_sessions(limit=5)
+
+        self._run_threads(work, 8)
+
+        self.assertEqual(self.db.get_aggregate_stats()['total_sessions'], 200)
+
+    def test_reader_connections_per_thread(self):
+        """Test each thread reads through its own read-only connection"""
+        connections = {}
+
+        def read(index):
+            connections[index] = self.db._reader()
+            self.assertIs(self.db._reader(), connections[index])
+            with self.assertRaises(sqlite3.OperationalError):
+                connections[index].execute("DELETE FROM sessions")
+
+        self._run_threads(read, 3)
+
+        self.assertEqual(len({id(conn) for conn in connections.values()}), 3)
+        self.assertIsNot(self.db._reader(), self.db.conn)
+
+    def test_apply_retention(self):
+        """Test retention runs its write steps on the writer thread"""
+        TestAnalyticsDB._insert_retention_sessions(self, self.db)
+        result = self.db.apply_retention(days=365)
+        self.assertEqual((result['sessions_scanned'], result['file_changes']), (1, 3))
+        self.assertEqual(self.db.get_hot_files()[0]['changes'], 6)
+
+    def test_merge_from(self):
+        """Test merges run on the writer thread"""
+        source = AnalyticsDB(db_path=self.db_path + '.source')
+        try:
+            source.insert_sessions_bulk(TestAnalyticsDB._merge_checkpoints(range(10), ['Alpha']))
+        finally:
+            source.close()
+
+        try:
+            counts = self.db.merge_from(self.db_path + '.source')
+            self.assertEqual(counts['inserted'], 10)
+            self.assertEqual(self.db.get_aggregate_stats()['total_sessions'], 10)
+        finally:
+            for suffix in ('.source', '.source-wal', '.source-shm'):
+                Path(self.db_path + suffix).unlink(missing_ok=True)
+
+    def test_result_cache_invalidated_by_writer(self):
+        """Test cached reads see writes committed by the writer thread"""
+        self.db.insert_session({'session_id': 'cached-1'})
+        self.assertEqual(self.db.get_aggregate_stats()['total_sessions'], 1)
+        self.assertEqual(self.db.get_aggregate_stats()['total_sessions'], 1)
+        self.assertEqual(self.db.cache_info()['hits'], 1)
+
+        self.db.insert_session({'session_id': 'cached-2'})
+        self.assertEqual(self.db.get_aggregate_stats()['total_sessions'], 2)
+
+    def test_dashboard_snapshot(self):
+        """Test the snapshot is read on the calling thread's reader connection"""
+        self.db.insert_session({'session_id': 'dash-thread', 'project': {'name': 'Threads'}})
+        snapshot = self.db.get_dashboard_snapshot(days=7)
+        self.assertEqual(snapshot['summary']['total_sessions'], 1)
+        self.assertEqual(snapshot['projects'][0]['project_name'], 'Threads')
+        self.assertEqual(snapshot['recent_sessions'][0]['session_id'], 'dash-thread')
+        self.assertFalse(self.db._reader().in_transaction)
+
+    def test_query_profile(self):
+        """Test tracing records the writer thread and every reader thread"""
+        db = ThreadSafeAnalyticsDB(db_path=self.db_path, trace=True)
+        try:
+            db.query_profile_clear()
+            db.insert_session({'session_id': 'traced-thread'})
+
+            def read():
+                db.get_recent_sessions(limit=5)
+
+            threads = [threading.Thread(target=read) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            statements = db.query_profile()['statements']
+            self.assertTrue(any(s['sql'].startswith('INSERT OR IGNORE INTO sessions (') for s in statements))
+            select = next(s for s in statements if 'FROM sessions s' in s['sql'] and 'LIMIT' in s['sql'])
+            self.assertEqual((select['calls'], select['rows']), (3, 3))
+        finally:
+            db.close()
+
+    def test_write_errors_propagate(self):
+        """Test exceptions raised on the writer thread reach the caller"""
+        with self.assertRaises(ValueError):
+            self.db._write(int, 'not a number')
+        with self.assertRaises(ValueError):
+            self.db.insert_sessions_bulk([], batch_size=0)
+
+    def test_bulk_generator_does_not_hold_writer(self):
+        """Test a slow checkpoint generator is consumed on the calling thread"""
+        paused = threading.Event()
+        resume = threading.Event()
+
+        def checkpoints():
+            yield {'session_id': 'generated-1'}
+            paused.set()
+            resume.wait(10)
+            yield {'session_id': 'generated-2'}
+
+        counts = {}
+        bulk = threading.Thread(
+            target=lambda: counts.update(self.db.insert_sessions_bulk(checkpoints(), batch_size=1))
+        )
+        bulk.start()
+        try:
+            self.assertTrue(paused.wait(10))
+
+            # The generator is blocked mid-iteration; another thread's write still completes
+            other = threading.Thread(target=self.db.insert_session, args=({'session_id': 'concurrent'},))
+            other.start()
+            other.join(5)
+            self.assertFalse(other.is_alive())
+        finally:
+            resume.set()
+            bulk.join(10)
+
+        self.assertEqual(counts, {'inserted': 2, 'updated': 0, 'skipped': 0, 'errors': 0})
+        self.assertEqual(self.db.get_aggregate_stats()['total_sessions'], 3)
+
+    def test_memory_database_rejected(self):
+        """Test in-memory databases are rejected"""
+        with self.assertRaises(ValueError):
+            ThreadSafeAnalyticsDB(db_path=':memory:')
+
+    def test_close(self):
+        """Test close stops the writer and rejects further use"""
+        self.db.insert_session({'session_id': 'before-close'})
+        self.db.close()
+
+        self.assertFalse(self.db._writer.is_alive())
+        with self.assertRaises(sqlite3.ProgrammingError):
+            self.db.insert_session({'session_id': 'after-close'})
+
+        # Closing twice is harmless
+        self.db.close()
+
+        reopened = AnalyticsDB(db_path=self.db_path)
+        try:
+            self.assertEqual(reopened.get_aggregate_stats()['total_sessions'], 1)
+        finally:
+            reopened.close()
+
+
 class TestCheckpointBackfiller(unittest.TestCase):
     """Test cases for CheckpointBackfiller class"""
 
@@ -419,6 +1920,44 @@ class TestCheckpointBackfiller(unittest.TestCase):
         count = cursor.fetchone()['count']
         self.assertEqual(count, 5)
 
+    def test_backfill_skips_duplicates(self):
+        """Test bulk backfill reports already-loaded sessions as skipped"""
+        for i in range(3):
+            self.create_test_checkpoint(f'rerun-{i}', days_ago=i)
+
+        backfiller = CheckpointBackfiller(self.db, self.checkpoints_dir)
+        backfiller.backfill(days=None)
+        stats = backfiller.backfill(days=None)
+
+        self.assertEqual(stats['processed'], 3)
+        self.assertEqual(stats['inserted'], 0)
+        self.assertEqual(stats['skipped'], 3)
+
+    def test_backfill_without_bulk(self):
+        """Test backfill with one transaction per session"""
+        for i in range(3):
+            self.create_test_checkpoint(f'single-{i}', days_ago=i)
+
+        backfiller = CheckpointBackfiller(self.db, self.checkpoints_dir)
+        stats = backfiller.backfill(days=None, bulk=False)
+
+        self.assertEqual(stats['inserted'], 3)
+        self.assertEqual(stats['skipped'], 0)
+
+        # Rewritten and failing checkpoints are counted as in bulk mode
+        rewritten = sorted(self.checkpoints_dir.glob('checkpoint-*.json'))[0]
+        data = json.loads(rewritten.read_text(encoding='utf-8'))
+        rewritten.write_text(json.dumps(dict(data, decisions=['Changed later'])), encoding='utf-8')
+
+        broken = self.checkpoints_dir / 'checkpoint-broken.json'
+        broken.write_text(json.dumps({'session_id': 'broken', 'timestamp': 'not a date'}), encoding='utf-8')
+        stats = backfiller.backfill(days=None, bulk=False)
+
+        self.assertEqual(
+            {key: stats[key] for key in ('inserted', 'updated', 'skipped', 'errors')},
+            {'inserted': 0, 'updated': 1, 'skipped': 2, 'errors': 1}
+        )
+
     def test_backfill_with_date_filter(self):
         """Test backfill with date filtering"""
         # Create checkpoints at different dates
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Tests for the Asyncio Analytics Front-End
+
+Tests awaitable query methods, batching of concurrent inserts, event loop
+responsiveness under load and shutdown semantics of analytics_async.py.
+"""
+
+import sys
+import time
+import sqlite3
+import asyncio
+import unittest
+import tempfile
+from pathlib import Path
+
+# Add scripts to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+from analytics_async import AsyncAnalyticsDB
+from analytics_db import AnalyticsDB
+from analytics_fixtures import make_checkpoint
+
+
+class TestAsyncAnalyticsDB(unittest.IsolatedAsyncioTestCase):
+    """Test cases for AsyncAnalyticsDB class"""
+
+    # Every session: one file change and one decision
+    FIELDS = {'project': 'async-project', 'file_changes': ['file.py'], 'decisions': ['Decision']}
+
+    async def asyncSetUp(self):
+        """Set up test database"""
+        self.temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+        self.temp_db.close()
+        self.db_path = self.temp_db.name
+
+        self.db = AsyncAnalyticsDB(db_path=self.db_path, max_workers=4, max_batch=100)
+        await self.db.open()
+
+    async def asyncTearDown(self):
+        """Clean up test database"""
+        await self.db.aclose()
+        Path(self.db_path).unlink(missing_ok=True)
+
+    async def test_query_methods_awaitable(self):
+        """Test public AnalyticsDB methods are available as coroutines"""
+        checkpoint = make_checkpoint('async-1', **self.FIELDS)
+        self.assertTrue(await self.db.insert_session(checkpoint))
+
+        stats = await self.db.get_session_stats(days=30)
+        self.assertEqual(stats['total_sessions'], 1)
+
+        aggregate = await self.db.get_aggregate_stats()
+        self.assertEqual(aggregate['total_files_changed'], 1)
+
+        self.assertEqual(await self.db.get_success_rate(), 100.0)
+        self.assertEqual(len(await self.db.get_project_breakdown()), 1)
+        self.assertEqual(len(await self.db.get_recent_sessions(limit=5)), 1)
+
+        counts = await self.db.insert_sessions_bulk([
+            make_checkpoint('async-2', **self.FIELDS), checkpoint
+        ])
+        self.assertEqual(counts, {'inserted': 1, 'updated': 0, 'skipped': 1, 'errors': 0})
+
+        rebuilt = await self.db.rebuild_aggregates()
+        self.assertEqual(rebuilt['total_sessions'], 2)
+
+    async def test_private_and_unknown_attributes(self):
+        """Test only public database methods are wrapped"""
+        with self.assertRaises(AttributeError):
+            self.db.no_such_method
+        with self.assertRaises(AttributeError):
+            self.db._prepare_session
+        with self.assertRaises(AttributeError):
+            self.db.close
+
+    async def test_concurrent_inserts_are_batched(self):
+        """Test many concurrent insert_session calls share transactions"""
+        results = await asyncio.gather(
+            *(self.db.insert_session(make_checkpoint(f'async-{i}', **self.FIELDS)) for i in range(1000))
+        )
+
+        self.assertTrue(all(results))
+        self.assertEqual(self.db.batched_inserts, 1000)
+        self.assertLess(self.db.batches, 1000)
+
+        stats = await self.db.get_aggregate_stats()
+        self.assertEqual(stats['total_sessions'], 1000)
+        self.assertEqual(stats['total_decisions'], 1000)
+
+    async def test_duplicate_in_batch(self):
+        """Test duplicates report False without failing the rest of the batch"""
+        checkpoint = make_checkpoint('async-1', **self.FIELDS)
+        results = await asyncio.gather(
+            self.db.insert_session(checkpoint),
+            self.db.insert_session(checkpoint),
+            self.db.insert_session(make_checkpoint('async-2', **self.FIELDS)),
+        )
+
+        self.assertEqual(results, [True, False, True])
+
+    async def test_event_loop_responsive_under_load(self):
+        """Test inserts and queries from many coroutines do not stall the loop"""
+        max_lag = 0.0
+        done = asyncio.Event()
+
+        async def ticker():
+            nonlocal max_lag
+            while not done.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(0.005)
+                max_lag = max(max_lag, time.perf_counter() - start - 0.005)
+
+        async def writer(worker):
+            for i in range(50):
+                checkpoint = make_checkpoint(f'async-{worker * 50 + i}', **self.FIELDS)
+                self.assertTrue(await self.db.insert_session(checkpoint))
+
+        async def reader():
+            latencies = []
+            for _ in range(20):
+                start = time.perf_counter()
+                await self.db.get_session_stats(days=30)
+                latencies.append(time.perf_counter() - start)
+            return latencies
+
+        tick = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        outcome = await asyncio.gather(
+            *(writer(w) for w in range(40)),
+            *(reader() for _ in range(10))
+        )
+        elapsed = time.perf_counter() - start
+        done.set()
+        await tick
+
+        read_latencies = sorted(lat for latencies in outcome[40:] for lat in latencies)
+        self.assertEqual((await self.db.get_aggregate_stats())['total_sessions'], 2000)
+        # Generous bounds: the loop never blocks on disk I/O itself
+        self.assertLess(max_lag, 0.25)
+        self.assertLess(read_latencies[len(read_latencies) // 2], 0.5)
+        self.assertGreater(2000 / elapsed, 100)
+
+    async def test_aclose_writes_pending_inserts(self):
+        """Test aclose completes queued inserts before closing"""
+        pending = [
+            asyncio.create_task(self.db.insert_session(make_checkpoint(f'async-{i}', **self.FIELDS)))
+            for i in range(300)
+        ]
+        await asyncio.sleep(0)
+
+        await self.db.aclose()
+
+        self.assertTrue(all(task.result() for task in pending))
+        self.assertFalse(self.db.db._writer.is_alive())
+
+        with self.assertRaises(sqlite3.ProgrammingError):
+            await self.db.insert_session(make_checkpoint('async-999', **self.FIELDS))
+        with self.assertRaises(sqlite3.ProgrammingError):
+            await self.db.get_session_stats()
+
+        db = AnalyticsDB(db_path=self.db_path)
+        try:
+            self.assertEqual(db.get_aggregate_stats()['total_sessions'], 300)
+        finally:
+            db.close()
+
+    async def test_opens_on_first_use(self):
+        """Test the database opens lazily and through async with"""
+        async with AsyncAnalyticsDB(db_path=self.db_path) as other:
+            self.assertIsNotNone(other.db)
+
+        lazy = AsyncAnalyticsDB(db_path=self.db_path)
+        try:
+            self.assertIsNone(lazy.db)
+            self.assertEqual((await lazy.get_aggregate_stats())['total_sessions'], 0)
+        finally:
+            await lazy.aclose()
+
+    def test_invalid_arguments(self):
+        """Test invalid pool and batch sizes are rejected"""
+        with self.assertRaises(ValueError):
+            AsyncAnalyticsDB(db_path=self.db_path, max_workers=0)
+        with self.assertRaises(ValueError):
+            AsyncAnalyticsDB(db_path=self.db_path, max_batch=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Tests for the Analytics Storage Backends
+
+A shared conformance suite run against every AnalyticsBackend
+implementation (SQLite, in-memory and segment log), plus replay,
+rotation and compaction tests for the log backend in analytics_backends.py.
+"""
+
+import sys
+import json
+import shutil
+import unittest
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add scripts to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+from analytics_db import AnalyticsBackend, AnalyticsDB
+from analytics_backends import LogAnalyticsBackend, MemoryAnalyticsBackend, open_backend
+from analytics_fixtures import make_checkpoint
+
+
+# (age in days, project, files changed, decisions)
+SESSIONS = (
+    (0.5, 'alpha', ['app.py', 'db.py'], ['Use WAL']),
+    (3, 'alpha', ['app.py'], []),
+    (10, 'beta', ['README.md', 'app.py', 'app.py'], ['Pin deps', 'Add CI']),
+    (45, 'alpha', ['db.py'], ['Index timestamps']),
+    (100, 'gamma', [], []),
+)
+
+
+class BackendConformance:
+    """Behaviour every AnalyticsBackend must share
+
+    Mixed into one TestCase per backend, which provides make_backend().
+    """
+
+    def make_backend(self) -> AnalyticsBackend:
+        raise NotImplementedError
+
+    def setUp(self):
+        """Set up a backend holding SESSIONS"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.db = self.make_backend()
+        now = datetime.now()
+        self.checkpoints = [
+            make_checkpoint(f'backend-{i}', age, minutes=30, project=project, now=now,
+                            file_changes=files, decisions=decisions, resume_points=['resume'])
+            for i, (age, project, files, decisions) in enumerate(SESSIONS)
+        ]
+        self.assertEqual(self.db.insert_sessions_bulk(self.checkpoints, batch_size=2)['inserted'], 5)
+
+    def tearDown(self):
+        """Clean up"""
+        self.db.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_is_backend(self):
+        """Test the implementation satisfies the interface"""
+        self.assertIsInstance(self.db, AnalyticsBackend)
+
+    def test_duplicates_and_errors(self):
+        """Test duplicates are skipped and unconvertible checkpoints counted"""
+        self.assertFalse(self.db.insert_session(self.checkpoints[0]))
+
+        bad = {'session_id': 'bad', 'timestamp': 'not a timestamp'}
+        new = dict(self.checkpoints[1], session_id='backend-new')
+        counts = self.db.insert_sessions_bulk([self.checkpoints[2], bad, new, new])
+        self.assertEqual(counts, {'inserted': 1, 'updated': 0, 'skipped': 2, 'errors': 1})
+
+        newer = dict(self.checkpoints[1], session_id='backend-newer')
+        self.assertEqual(self.db.insert_sessions([newer, self.checkpoints[3]]), [True, False])
+        self.assertTrue(self.db.insert_session(dict(newer, session_id='backend-newest')))
+        self.assertEqual(self.db.get_aggregate_stats()['total_sessions'], 8)
+
+        with self.assertRaises(ValueError):
+            self.db.insert_sessions_bulk([], batch_size=0)
+
+    def test_rewrites(self):
+        """Test changed checkpoints replace their sessions, matching a fresh load of the final versions"""
+        final = list(self.checkpoints)
+        final[0] = dict(final[0], file_changes=['app.py', 'db.py', 'cli.py'], decisions=[])
+        final[3] = dict(final[3], timestamp=(datetime.now() - timedelta(days=40)).isoformat())
+        # gamma's only session moves to a new project
+        final[4] = dict(final[4], project={'name': 'delta'}, file_changes=['app.py'])
+
+        self.assertTrue(self.db.insert_session(final[0]))
+        counts = self.db.insert_sessions_bulk(final[1:] + [dict(final[3], decisions=[]), final[3]])
+        self.assertEqual(counts, {'inserted': 0, 'updated': 4, 'skipped': 2, 'errors': 0})
+        self.assertEqual(self.db.insert_sessions(final), [False] * 5)
+
+        expected = AnalyticsDB(db_path=str(Path(self.temp_dir) / 'expected.db'))
+        expected.insert_sessions_bulk(final)
+        for name, args in (
+            ('get_aggregate_stats', ()),
+            ('get_session_stats', (7,)),
+            ('get_session_stats', (60,)),
+            ('get_project_breakdown', ()),
+            ('get_hot_files', ('alpha',)),
+            ('get_hot_files', ('delta', 200)),
+            ('get_recent_sessions', (10,)),
+        ):
+            with self.subTest(method=name, args=args):
+                self.assertEqual(getattr(self.db, name)(*args), getattr(expected, name)(*args))
+        expected.close()
+
+    def test_aggregate_stats(self):
+        """Test lifetime totals and derived values"""
+        stats = self.db.get_aggregate_stats()
+
+        self.assertEqual(stats['total_sessions'], 5)
+        self.assertEqual(stats['successful_sessions'], 5)
+        self.assertEqual(stats['total_files_changed'], 7)
+        self.assertEqual(stats['total_decisions'], 4)
+        self.assertEqual(stats['total_resume_points'], 5)
+        self.assertEqual(stats['total_projects'], 3)
+        self.assertEqual(stats['success_rate'], 100.0)
+        self.assertEqual(stats['first_session'][:10], self.checkpoints[-1]['timestamp'][:10])
+        self.assertEqual(stats['last_session'][:10], self.checkpoints[0]['timestamp'][:10])
+        self.assertAlmostEqual(stats['time_saved_hours'], (5 * 15 + 4 * 5 + 7 * 2) / 60)
+        self.assertAlmostEqual(self.db.calculate_time_saved(), stats['time_saved_hours'])
+
+    def test_session_stats_window(self):
+        """Test windowed stats include exactly the sessions after the cutoff"""
+        week = self.db.get_session_stats(days=7)
+        self.assertEqual(week['period_days'], 7)
+        self.assertEqual(week['total_sessions'], 2)
+        self.assertEqual(week['total_files_changed'], 3)
+        self.assertEqual(week['total_decisions'], 1)
+        self.assertEqual(week['total_resume_points'], 2)
+        self.assertEqual(week['total_problems'], 0)
+        self.assertEqual(week['avg_duration_seconds'], 1800)
+        self.assertEqual(week['total_tokens_saved'], 3 * 200 + 150 + 2 * 100)
+        self.assertEqual(week['time_saved_minutes'], 2 * 15 + 5 + 3 * 2)
+
+        self.assertEqual(self.db.get_session_stats(days=30)['total_sessions'], 3)
+        self.assertEqual(self.db.get_session_stats(days=365)['total_sessions'], 5)
+
+        empty = self.db.get_session_stats(days=0)
+        self.assertEqual(empty['total_sessions'], 0)
+        self.assertEqual(empty['success_rate'], 0.0)
+        self.assertEqual(empty['avg_duration_seconds'], 0)
+
+        self.assertEqual(self.db.get_success_rate(days=7), 100.0)
+        self.assertEqual(self.db.get_success_rate(), 100.0)
+
+    def test_project_breakdown(self):
+        """Test per-project totals, most sessions first"""
+        projects = self.db.get_project_breakdown()
+
+        self.assertEqual([p['project_name'] for p in projects], ['alpha', 'beta', 'gamma'])
+        alpha = projects[0]
+        self.assertEqual(alpha['total_sessions'], 3)
+        self.assertEqual(alpha['total_files_changed'], 4)
+        self.assertEqual(alpha['total_decisions'], 2)
+        self.assertEqual(alpha['success_rate'], 100.0)
+        self.assertEqual(alpha['first_session'][:10], self.checkpoints[3]['timestamp'][:10])
+        self.assertEqual(alpha['last_session'][:10], self.checkpoints[0]['timestamp'][:10])
+
+    def test_hot_files(self):
+        """Test file rankings for all time, a window and one project"""
+        hot = self.db.get_hot_files()
+        # Ties on (changes, file_path) may come in any order
+        self.assertCountEqual(
+            [(f['project_name'], f['file_path'], f['changes'], f['sessions']) for f in hot[:2]],
+            [('alpha', 'app.py', 2, 2), ('beta', 'app.py', 2, 1)]
+        )
+        self.assertEqual(
+            [(f['project_name'], f['file_path'], f['changes'], f['sessions']) for f in hot[2:]],
+            [('alpha', 'db.py', 2, 2), ('beta', 'README.md', 1, 1)]
+        )
+        alpha_app = next(f for f in hot if f['project_name'] == 'alpha' and f['file_path'] == 'app.py')
+        self.assertEqual(alpha_app['last_changed'], self.checkpoints[0]['timestamp'][:10])
+
+        week = self.db.get_hot_files(days=7)
+        self.assertEqual([(f['file_path'], f['changes']) for f in week], [('app.py', 2), ('db.py', 1)])
+
+        beta = self.db.get_hot_files(project='beta', top_k=1)
+        self.assertEqual([(f['file_path'], f['changes']) for f in beta], [('app.py', 2)])
+        self.assertEqual(self.db.get_hot_files(project='missing'), [])
+
+    def test_recent_sessions(self):
+        """Test the newest sessions come first"""
+        recent = self.db.get_recent_sessions(limit=2)
+
+        self.assertEqual([s['session_id'] for s in recent], ['backend-0', 'backend-1'])
+        self.assertIsInstance(recent[0]['timestamp'], datetime)
+        self.assertEqual(recent[0]['project_name'], 'alpha')
+        self.assertEqual(recent[0]['files_changed'], 2)
+        self.assertEqual(recent[0]['decisions_logged'], 1)
+        self.assertTrue(recent[0]['checkpoint_success'])
+        self.assertEqual(len(self.db.get_recent_sessions(limit=50)), 5)
+
+    def test_out_of_order_inserts(self):
+        """Test late-arriving older sessions land in their place in time"""
+        old = dict(self.checkpoints[-1], session_id='backend-old',
+                   timestamp=(datetime.now() - timedelta(days=2)).isoformat(), started_at=None)
+        self.assertTrue(self.db.insert_session(old))
+
+        recent = self.db.get_recent_sessions(limit=3)
+        self.assertEqual([s['session_id'] for s in recent], ['backend-0', 'backend-old', 'backend-1'])
+        self.assertEqual(self.db.get_session_stats(days=7)['total_sessions'], 3)
+        self.assertEqual(self.db.get_session_stats(days=7)['avg_duration_seconds'], 1800)
+
+    def test_dashboard_snapshot(self):
+        """Test the snapshot combines the summary, projects and recent sessions"""
+        snapshot = self.db.get_dashboard_snapshot(days=30, recent=2)
+
+        self.assertEqual(snapshot['period_days'], 30)
+        self.assertEqual(snapshot['summary'], self.db.get_session_stats(days=30))
+        self.assertEqual(snapshot['projects'], self.db.get_project_breakdown())
+        self.assertEqual(snapshot['recent_sessions'], self.db.get_recent_sessions(limit=2))
+
+        lifetime = self.db.get_dashboard_snapshot(recent=0)
+        self.assertEqual(lifetime['summary'], self.db.get_aggregate_stats())
+        self.assertEqual(lifetime['recent_sessions'], [])
+
+    def test_context_manager(self):
+        """Test the backend closes on leaving a with block"""
+        with self.make_backend() as db:
+            self.assertIsInstance(db.get_aggregate_stats(), dict)
+
+
+class TestSQLiteBackend(BackendConformance, unittest.TestCase):
+    """Conformance of AnalyticsDB"""
+
+    def make_backend(self):
+        return AnalyticsDB(db_path=str(Path(self.temp_dir) / 'stats.db'))
+
+
+class TestMemoryBackend(BackendConformance, unittest.TestCase):
+    """Conformance of MemoryAnalyticsBackend"""
+
+    def make_backend(self):
+        return MemoryAnalyticsBackend()
+
+    def test_matches_sqlite(self):
+        """Test every shared query returns what AnalyticsDB returns"""
+        sqlite_db = AnalyticsDB(db_path=str(Path(self.temp_dir) / 'compare.db'))
+        sqlite_db.insert_sessions_bulk(self.checkpoints)
+
+        for name, args in (
+            ('get_aggregate_stats', ()),
+            ('get_session_stats', (7,)),
+            ('get_session_stats', (60,)),
+            ('get_success_rate', (30,)),
+            ('calculate_time_saved', ()),
+            ('get_project_breakdown', ()),
+            ('get_hot_files', ()),
+            ('get_hot_files', ('alpha', 60, 1)),
+            ('get_recent_sessions', (3,)),
+            ('get_dashboard_snapshot', (30, 5)),
+        ):
+            with self.subTest(method=name, args=args):
+                self.assertEqual(getattr(self.db, name)(*args), getattr(sqlite_db, name)(*args))
+
+        sqlite_db.close()
+
+
+class TestLogBackend(BackendConformance, unittest.TestCase):
+    """Conformance of LogAnalyticsBackend, plus replay, rotation and compaction"""
+
+    def make_backend(self, **options):
+        return LogAnalyticsBackend(log_dir=str(Path(self.temp_dir) / 'stats.log'), **options)
+
+    def _segments(self):
+        return sorted(path.name for path in (Path(self.temp_dir) / 'stats.log').glob('segment-*'))
+
+    def test_reopen_replays_log(self):
+        """Test a reopened log holds the same sessions"""
+        expected = (self.db.get_aggregate_stats(), self.db.get_project_breakdown(),
+                    self.db.get_hot_files(), self.db.get_recent_sessions(limit=10))
+        self.db.close()
+
+        self.db = self.make_backend()
+        self.assertEqual(
+            (self.db.get_aggregate_stats(), self.db.get_project_breakdown(),
+             self.db.get_hot_files(), self.db.get_recent_sessions(limit=10)),
+            expected
+        )
+        self.assertFalse(self.db.insert_session(self.checkpoints[0]))
+
+    def test_rewrites_replayed(self):
+        """Test the last record of a session wins on replay and compaction keeps only it"""
+        def state():
+            # Compaction writes in time order, which can reorder breakdown ties
+            projects = sorted(self.db.get_project_breakdown(), key=lambda p: p['project_name'])
+            return (self.db.get_aggregate_stats(), projects,
+                    self.db.get_hot_files(), self.db.get_recent_sessions(limit=10))
+
+        rewritten = dict(self.checkpoints[2], decisions=[], file_changes=['README.md'])
+        self.assertTrue(self.db.insert_session(rewritten))
+        expected = state()
+        self.db.close()
+
+        for _ in range(2):
+            self.db = self.make_backend()
+            self.assertEqual(state(), expected)
+            self.assertFalse(self.db.insert_session(rewritten))
+            self.assertEqual(self.db.compact()['sessions'], 5)
+            self.db.close()
+
+        compacted = Path(self.temp_dir) / 'stats.log' / self._segments()[0]
+        self.assertEqual(len(compacted.read_bytes().splitlines()), 5)
+        self.db = self.make_backend()
+
+    def test_torn_tail_truncated(self):
+        """Test a half-written last record is dropped and appends continue cleanly"""
+        self.db.close()
+        segment = Path(self.temp_dir) / 'stats.log' / self._segments()[-1]
+        with open(segment, 'ab') as f:
+            f.write(b'{"session_id": "torn", "timesta')
+
+        self.db = self.make_backend()
+        self.assertEqual(self.db.get_aggregate_stats()['total_sessions'], 5)
+        self.assertTrue(self.db.insert_session(dict(self.checkpoints[0], session_id='after-torn')))
+        self.db.close()
+
+        self.db = self.make_backend()
+        self.assertEqual(self.db.get_recent_sessions(limit=1)[0]['session_id'], 'after-torn')
+        self.assertEqual(self.db.get_aggregate_stats()['total_sessions'], 6)
+
+    def test_unreadable_record_skipped(self):
+        """Test a corrupt line is skipped without losing the rest of the segment"""
+        self.db.close()
+        segment = Path(self.temp_dir) / 'stats.log' / self._segments()[-1]
+        lines = segment.read_bytes().splitlines(keepends=True)
+        segment.write_bytes(lines[0] + b'not json\n' + b'[1, 2]\n' + b''.join(lines[1:]))
+
+        self.db = self.make_backend()
+        self.assertEqual(self.db.get_aggregate_stats()['total_sessions'], 5)
+
+    def test_rotation_and_compaction(self):
+        """Test full segments are sealed and compacted once enough pile up"""
+        self.db.close()
+        shutil.rmtree(Path(self.temp_dir) / 'stats.log')
+        self.db = self.make_backend(segment_bytes=1, compact_segments=4, sync=False)
+
+        for checkpoint in self.checkpoints:
+            self.assertTrue(self.db.insert_session(checkpoint))
+
+        # Every commit seals its segment; the fourth triggered a compaction,
+        # then one more sealed segment and the active one followed
+        self.assertEqual(len(self._segments()), 3)
+        self.assertEqual(self.db.get_aggregate_stats()['total_sessions'], 5)
+
+        result = self.db.compact()
+        self.assertEqual(result['sessions'], 5)
+        self.assertEqual(result['segments'], 3)
+        self.assertEqual(len(self._segments()), 2)
+        compacted = Path(self.temp_dir) / 'stats.log' / self._segments()[0]
+        self.assertEqual(len(compacted.read_bytes().splitlines()), 5)
+
+        expected = self.db.get_recent_sessions(limit=10)
+        self.db.close()
+        self.db = self.make_backend()
+        self.assertEqual(self.db.get_recent_sessions(limit=10), expected)
+
+    def test_interrupted_compaction_recovers(self):
+        """Test leftovers of a compaction that crashed part way replay correctly"""
+        self.db.close()
+        log_dir = Path(self.temp_dir) / 'stats.log'
+        original = log_dir / self._segments()[0]
+
+        # Compacted copy renamed into place, old segment not yet removed,
+        # plus a temporary file from a later attempt
+        (log_dir / 'segment-00000002.jsonl').write_bytes(original.read_bytes())
+        (log_dir / 'segment-00000003.tmp').write_bytes(b'{"session_id": "partial"')
+
+        self.db = self.make_backend()
+        self.assertEqual(self.db.get_aggregate_stats()['total_sessions'], 5)
+        self.assertNotIn('segment-00000003.tmp', self._segments())
+
+    def test_records_are_json_lines(self):
+        """Test each session is one self-contained JSON line"""
+        segment = Path(self.temp_dir) / 'stats.log' / self._segments()[-1]
+        records = [json.loads(line) for line in segment.read_bytes().splitlines()]
+
+        self.assertEqual([r['session_id'] for r in records], [f'backend-{i}' for i in range(5)])
+        self.assertEqual(records[2]['file_changes'][0], ['README.md', 'modified'])
+        self.assertEqual(records[2]['decisions'][0][0], 'Pin deps')
+
+
+class TestOpenBackend(unittest.TestCase):
+    """Test cases for open_backend"""
+
+    def test_kinds(self):
+        """Test each backend name opens its class"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            for kind, cls, path in (
+                ('sqlite', AnalyticsDB, str(Path(temp_dir) / 'stats.db')),
+                ('memory', MemoryAnalyticsBackend, None),
+                ('log', LogAnalyticsBackend, str(Path(temp_dir) / 'stats.log')),
+            ):
+                with open_backend(kind, path) as db:
+                    self.assertIs(type(db), cls)
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_invalid_arguments(self):
+        """Test unknown names and a path for the memory backend are rejected"""
+        with self.assertRaises(ValueError):
+            open_backend('redis')
+        with self.assertRaises(ValueError):
+            open_backend('memory', '/tmp/stats')
+
+
+if __name__ == '__main__':
+    unittest.main()
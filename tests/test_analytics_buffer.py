@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Tests for the Write-Behind Ingest Buffer
+
+Tests size- and time-triggered flushing, the flush() barrier, metrics and
+flushing on close, interpreter exit and SIGTERM in analytics_buffer.py.
+"""
+
+import os
+import sys
+import time
+import signal
+import sqlite3
+import unittest
+import tempfile
+import subprocess
+from pathlib import Path
+
+# Add scripts to path
+SCRIPTS_DIR = Path(__file__).parent.parent / 'scripts'
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from analytics_buffer import BufferedAnalyticsWriter
+from analytics_db import AnalyticsDB, ThreadSafeAnalyticsDB
+
+
+class TestBufferedAnalyticsWriter(unittest.TestCase):
+    """Test cases for BufferedAnalyticsWriter class"""
+
+    def setUp(self):
+        """Set up test database"""
+        self.temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+        self.temp_db.close()
+        self.db_path = self.temp_db.name
+
+        self.db = ThreadSafeAnalyticsDB(db_path=self.db_path)
+
+    def tearDown(self):
+        """Clean up test database"""
+        self.db.close()
+        Path(self.db_path).unlink(missing_ok=True)
+
+    def _session_count(self) -> int:
+        return self.db.get_aggregate_stats()['total_sessions']
+
+    def _wait_for(self, condition, timeout: float = 5.0) -> bool:
+        """Poll condition() until it is true or the timeout expires"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if condition():
+                return True
+            time.sleep(0.01)
+        return condition()
+
+    def test_flush_by_size(self):
+        """Test a flush is triggered every max_records checkpoints"""
+        writer = BufferedAnalyticsWriter(self.db, max_records=10, max_delay_ms=60000,
+                                         handle_signals=False)
+        try:
+            for i in range(25):
+                writer.add({'session_id': f'size-{i}'})
+
+            self.assertTrue(self._wait_for(
+                lambda: writer.metrics()['records_flushed'] == 20
+                and writer.metrics()['queue_depth'] == 5
+            ))
+            self.assertEqual(self._session_count(), 20)
+        finally:
+            writer.close()
+
+        metrics = writer.metrics()
+        self.assertEqual(metrics['flushes'], 3)
+        self.assertEqual(metrics['inserted'], 25)
+        self.assertEqual(metrics['queue_depth'], 0)
+        self.assertEqual(self._session_count(), 25)
+
+    def test_flush_by_age(self):
+        """Test buffered checkpoints are written after max_delay_ms"""
+        writer = BufferedAnalyticsWriter(self.db, max_records=1000, max_delay_ms=50,
+                                         handle_signals=False)
+        try:
+            for i in range(3):
+                writer.add({'session_id': f'age-{i}'})
+
+            self.assertTrue(self._wait_for(lambda: writer.metrics()['records_flushed'] == 3))
+            self.assertEqual(writer.metrics()['flushes'], 1)
+            self.assertEqual(self._session_count(), 3)
+        finally:
+            writer.close()
+
+    def test_flush_barrier(self):
+        """Test flush() returns only after earlier checkpoints are committed"""
+        with BufferedAnalyticsWriter(self.db, max_records=1000, max_delay_ms=60000,
+                                     handle_signals=False) as writer:
+            for i in range(5):
+                writer.add({'session_id': f'barrier-{i}'})
+            writer.add({'session_id': 'barrier-0'})
+
+            writer.flush()
+
+            self.assertEqual(self._session_count(), 5)
+            metrics = writer.metrics()
+            self.assertEqual(metrics['inserted'], 5)
+            self.assertEqual(metrics['skipped'], 1)
+            self.assertGreater(metrics['last_flush_ms'], 0)
+            self.assertGreaterEqual(metrics['max_flush_ms'], metrics['avg_flush_ms'])
+
+            # Nothing buffered: returns immediately
+            writer.flush()
+
+    def test_close_flushes_and_rejects_adds(self):
+        """Test close writes buffered checkpoints and stops accepting more"""
+        writer = BufferedAnalyticsWriter(self.db, max_records=1000, max_delay_ms=60000,
+                                         handle_signals=False)
+        writer.add({'session_id': 'close-1'})
+        writer.close()
+        writer.close()
+
+        self.assertEqual(self._session_count(), 1)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            writer.add({'session_id': 'close-2'})
+
+    def test_failed_flush_counted(self):
+        """Test checkpoints lost to a database error are reported"""
+        writer = BufferedAnalyticsWriter(self.db, max_records=1000, max_delay_ms=60000,
+                                         handle_signals=False)
+        writer.add({'session_id': 'lost'})
+        self.db.close()
+        writer.close()
+
+        self.assertEqual(writer.metrics()['failed'], 1)
+
+    def test_requires_thread_safe_db(self):
+        """Test plain AnalyticsDB instances and bad limits are rejected"""
+        db = AnalyticsDB(db_path=self.db_path)
+        try:
+            with self.assertRaises(TypeError):
+                BufferedAnalyticsWriter(db)
+        finally:
+            db.close()
+
+        with self.assertRaises(ValueError):
+            BufferedAnalyticsWriter(self.db, max_records=0)
+
+    def test_sigterm_flushes_and_chains(self):
+        """Test SIGTERM flushes, restores and calls the previous handler"""
+        received = []
+
+        def previous(signum, frame):
+            received.append(signum)
+
+        original = signal.signal(signal.SIGTERM, previous)
+        try:
+            writer = BufferedAnalyticsWriter(self.db, max_records=1000, max_delay_ms=60000)
+            writer.add({'session_id': 'sigterm-1'})
+
+            os.kill(os.getpid(), signal.SIGTERM)
+            self.assertTrue(self._wait_for(lambda: received == [signal.SIGTERM]))
+
+            self.assertEqual(self._session_count(), 1)
+            self.assertIs(signal.getsignal(signal.SIGTERM), previous)
+            with self.assertRaises(sqlite3.ProgrammingError):
+                writer.add({'session_id': 'sigterm-2'})
+        finally:
+            signal.signal(signal.SIGTERM, original)
+
+    def _run_child(self, body: str) -> subprocess.CompletedProcess:
+        """Run a child process that buffers two checkpoints, then runs body"""
+        script = (
+            "import os, signal\n"
+            "from analytics_db import ThreadSafeAnalyticsDB\n"
+            "from analytics_buffer import BufferedAnalyticsWriter\n"
+            f"db = ThreadSafeAnalyticsDB(db_path={self.db_path!r})\n"
+            "writer = BufferedAnalyticsWriter(db, max_records=1000, max_delay_ms=60000)\n"
+            "writer.add({'session_id': 'child-1'})\n"
+            "writer.add({'session_id': 'child-2'})\n"
+            + body
+        )
+        return subprocess.run(
+            [sys.executable, '-c', script],
+            cwd=str(SCRIPTS_DIR),
+            capture_output=True,
+            timeout=60
+        )
+
+    def test_flush_at_exit(self):
+        """Test buffered checkpoints are written at interpreter exit"""
+        result = self._run_child("")
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(self._session_count(), 2)
+
+    def test_flush_on_default_sigterm(self):
+        """Test SIGTERM flushes before the default handler terminates the process"""
+        result = self._run_child(
+            "os.kill(os.getpid(), signal.SIGTERM)\n"
+            "import time; time.sleep(30)\n"
+        )
+
+        self.assertEqual(result.returncode, -signal.SIGTERM)
+        self.assertEqual(self._session_count(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
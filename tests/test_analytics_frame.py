@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Tests for the Columnar NumPy Session Cache
+
+Tests the incremental refresh, memory-mapped loading, rebuild on a stale
+cache, vectorized filters and group-bys, and that AnalyticsFrame reproduces
+the AnalyticsDB session stats and project breakdown (analytics_frame.py).
+Skipped when numpy is not installed.
+"""
+
+import sys
+import json
+import shutil
+import unittest
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add scripts to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+from analytics_db import AnalyticsDB
+from analytics_frame import NUMPY_AVAILABLE, AnalyticsFrame
+from analytics_fixtures import make_checkpoint
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+
+def make_checkpoints(start: int, count: int):
+    """Checkpoints spread over about 100 days and three projects"""
+    now = datetime.now()
+    return [
+        make_checkpoint(
+            f'frame-{i}', i % 100 + (i % 24) / 24,
+            # Every fifth session has no start time, so no duration
+            minutes=None if i % 5 == 0 else i % 90,
+            # Sessions per project differ, so the breakdown order is unambiguous
+            project=('alpha', 'alpha', 'alpha', 'beta', 'beta', 'gamma')[i % 6],
+            now=now,
+            file_changes=[f'file_{j}.py' for j in range(i % 4)],
+            decisions=['Decision'] * (i % 3),
+            problems_encountered=['Problem'] * (i % 2)
+        )
+        for i in range(start, start + count)
+    ]
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "numpy is not installed")
+class TestAnalyticsFrame(unittest.TestCase):
+    """Test cases for AnalyticsFrame class"""
+
+    def setUp(self):
+        """Set up a database with sessions and its frame"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.db = AnalyticsDB(db_path=str(Path(self.temp_dir) / 'stats.db'))
+        self.db.insert_sessions_bulk(make_checkpoints(0, 300))
+        self.frame = AnalyticsFrame(self.db)
+
+    def tearDown(self):
+        """Clean up"""
+        self.db.close()
+        shutil.rmtree(self.temp_dir)
+
+    def assertMatchesDatabase(self, frame):
+        for days in (1, 7, 30, 90, 365):
+            with self.subTest(days=days):
+                self.assertEqual(frame.get_session_stats(days), self.db.get_session_stats(days))
+        self.assertEqual(frame.get_project_breakdown(), self.db.get_project_breakdown())
+
+    def test_matches_database(self):
+        """Test the frame reproduces get_session_stats and get_project_breakdown"""
+        self.assertEqual(len(self.frame), 300)
+        self.assertMatchesDatabase(self.frame)
+
+    def test_columns_memory_mapped(self):
+        """Test columns are read-only memory maps of the .npy files"""
+        self.assertEqual(self.frame.frame_dir, Path(self.temp_dir) / 'stats.frame')
+        for name in AnalyticsFrame.COLUMNS:
+            self.assertTrue((self.frame.frame_dir / f'{name}.npy').exists())
+
+        timestamps = self.frame.column('timestamp_ms')
+        self.assertIsInstance(timestamps, np.memmap)
+        self.assertFalse(timestamps.flags.writeable)
+        self.assertEqual(self.frame.column('duration_seconds').dtype, np.float64)
+        self.assertEqual(int(np.isnan(self.frame.column('duration_seconds')).sum()), 60)
+
+        with self.assertRaises(ValueError):
+            self.frame.column('session_id')
+
+    def test_incremental_refresh(self):
+        """Test refresh appends only new sessions and a reopened frame loads them"""
+        self.assertEqual(self.frame.refresh(), 0)
+
+        self.db.insert_sessions_bulk(make_checkpoints(300, 150))
+        self.assertEqual(self.frame.refresh(), 150)
+        self.assertEqual(len(self.frame), 450)
+        self.assertTrue(np.all(np.diff(self.frame.column('rowid')) > 0))
+        self.assertMatchesDatabase(self.frame)
+
+        reopened = AnalyticsFrame(self.db, refresh=False)
+        self.assertEqual(len(reopened), 450)
+        self.assertMatchesDatabase(reopened)
+
+    def test_stale_cache_rebuilt(self):
+        """Test a cache that no longer matches the table is rebuilt"""
+        # Rowids renumbered (as VACUUM may do): same count, different rows
+        self.db.conn.execute("UPDATE sessions SET rowid = rowid + 1000")
+        self.db.conn.commit()
+        self.assertEqual(self.frame.refresh(), 300)
+        self.assertEqual(len(self.frame), 300)
+        self.assertEqual(int(self.frame.column('rowid').min()), 1001)
+
+        # A refresh interrupted after appending to some columns only
+        self.db.insert_sessions_bulk(make_checkpoints(300, 10))
+        np.save(self.frame.frame_dir / 'files_changed.npy', np.zeros(305, dtype=np.int32))
+        self.assertEqual(self.frame.refresh(), 310)
+        self.assertMatchesDatabase(self.frame)
+
+        # Lost metadata: column files are started over, not appended to
+        (self.frame.frame_dir / 'meta.json').unlink()
+        self.assertEqual(AnalyticsFrame(self.db).refresh(), 0)
+        self.assertEqual(len(AnalyticsFrame(self.db, refresh=False)), 310)
+
+        meta = json.loads((self.frame.frame_dir / 'meta.json').read_text())
+        self.assertEqual(meta['rows'], 310)
+
+    def test_rewritten_session_rebuilds_cache(self):
+        """Test a session replaced in place (same rowid) is not served stale"""
+        checkpoint = dict(make_checkpoints(7, 1)[0], file_changes=['a.py'] * 40)
+        self.assertTrue(self.db.insert_session(checkpoint))
+
+        self.assertEqual(self.frame.refresh(), 300)
+        self.assertEqual(int(self.frame.column('files_changed').max()), 40)
+        self.assertMatchesDatabase(self.frame)
+        self.assertEqual(self.frame.refresh(), 0)
+
+    def test_select_and_totals(self):
+        """Test masks and grouped totals against plain Python over the checkpoints"""
+        checkpoints = make_checkpoints(0, 300)
+        cutoff = datetime.now() - timedelta(days=30)
+        expected = [c for c in checkpoints
+                    if datetime.fromisoformat(c['timestamp']) >= cutoff and c['project']['name'] == 'beta']
+
+        mask = self.frame.select(days=30, project='beta')
+        totals = self.frame.totals(mask)
+        self.assertEqual(totals['sessions'], len(expected))
+        self.assertEqual(totals['files_changed'], sum(len(c['file_changes']) for c in expected))
+        self.assertEqual(totals['duration_count'], sum(1 for c in expected if c.get('started_at')))
+        self.assertFalse(self.frame.select(project='missing').any())
+
+        until = datetime.now() - timedelta(days=50)
+        self.assertEqual(
+            int(self.frame.select(since=until - timedelta(days=10), until=until).sum()),
+            sum(1 for c in checkpoints
+                if until - timedelta(days=10) <= datetime.fromisoformat(c['timestamp']) < until)
+        )
+
+        by_project = self.frame.totals(by='project')
+        names = self.frame.project_names()
+        self.assertEqual(
+            {names[int(key)]: int(count) for key, count in zip(by_project['keys'], by_project['sessions'])},
+            {'alpha': 150, 'beta': 100, 'gamma': 50}
+        )
+
+        by_day = self.frame.totals(mask, by='day')
+        self.assertEqual(int(by_day['sessions'].sum()), len(expected))
+        self.assertTrue(np.all(np.diff(by_day['keys']) > 0))
+        self.assertTrue(np.all(by_day['first_session_ms'] <= by_day['last_session_ms']))
+        self.assertTrue(np.all(by_day['first_session_ms'] // AnalyticsDB.MS_PER_DAY == by_day['keys']))
+
+        with self.assertRaises(ValueError):
+            self.frame.totals(by='week')
+
+    def test_empty_database(self):
+        """Test a frame over an empty database"""
+        empty = AnalyticsDB(db_path=str(Path(self.temp_dir) / 'empty.db'))
+        frame = AnalyticsFrame(empty)
+
+        self.assertEqual(len(frame), 0)
+        self.assertEqual(frame.get_session_stats(30), empty.get_session_stats(30))
+        self.assertEqual(frame.get_project_breakdown(), [])
+        self.assertEqual(frame.totals(by='day')['sessions'].tolist(), [])
+        empty.close()
+
+    def test_memory_database_needs_frame_dir(self):
+        """Test an in-memory database has no default frame location"""
+        db = AnalyticsDB(db_path=':memory:')
+        with self.assertRaises(ValueError):
+            AnalyticsFrame(db)
+
+        frame = AnalyticsFrame(db, frame_dir=str(Path(self.temp_dir) / 'memory.frame'))
+        self.assertEqual(len(frame), 0)
+        db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
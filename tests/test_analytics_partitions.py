@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Tests for Monthly Partitioned Storage
+
+Tests routing of sessions to monthly files, federated queries against a
+single-file database holding the same sessions, ATTACH scoping, freezing,
+compression and catalog resync in analytics_partitions.py.
+"""
+
+import sys
+import shutil
+import sqlite3
+import unittest
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add scripts to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+from analytics_db import AnalyticsDB
+from analytics_partitions import PartitionedAnalyticsDB
+from analytics_fixtures import make_checkpoint
+
+
+# Session ages (days) spread over several months; session i is i hours older still
+SESSION_AGES = (0, 1, 3, 20, 29, 31, 45, 60, 100, 200, 400)
+
+
+def month_of(days_ago: int) -> str:
+    return (datetime.now() - timedelta(days=days_ago)).strftime('%Y-%m')
+
+
+class TestPartitionedAnalyticsDB(unittest.TestCase):
+    """Test cases for PartitionedAnalyticsDB class"""
+
+    def setUp(self):
+        """Set up a partitioned and a single-file database"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.db = PartitionedAnalyticsDB(db_path=str(Path(self.temp_dir) / 'stats.db'))
+        self.single = AnalyticsDB(db_path=str(Path(self.temp_dir) / 'single.db'))
+
+        now = datetime.now()
+        self.checkpoints = [
+            make_checkpoint(f'part-{i}', age + i / 24, minutes=60, project=f'Project-{i % 2}', now=now,
+                            file_changes=[f'module_{i % 3}.py', 'common.py'],
+                            decisions=[f'Store month {i} in sqlite'], git_branch='main')
+            for i, age in enumerate(SESSION_AGES)
+        ]
+        for checkpoint in self.checkpoints[:4]:
+            self.assertTrue(self.db.insert_session(checkpoint))
+        self.db.insert_sessions_bulk(self.checkpoints[4:], batch_size=2)
+        self.single.insert_sessions_bulk(self.checkpoints)
+
+    def tearDown(self):
+        """Clean up"""
+        self.db.close()
+        self.single.close()
+        for path in Path(self.temp_dir).iterdir():
+            path.chmod(0o644)
+        shutil.rmtree(self.temp_dir)
+
+    def _partition_months(self):
+        return [partition['month'] for partition in self.db.list_partitions()]
+
+    def _attached(self):
+        return [
+            row['name'] for row in self.db._reader_conn.execute("PRAGMA database_list")
+            if row['name'] not in ('main', 'temp')
+        ]
+
+    def test_sessions_written_per_month(self):
+        """Test each month's sessions go to their own file and the catalog holds none"""
+        expected = sorted({checkpoint['timestamp'][:7] for checkpoint in self.checkpoints})
+        self.assertEqual(self._partition_months(), expected)
+
+        total = 0
+        for partition in self.db.list_partitions():
+            conn = sqlite3.connect(partition['path'])
+            rows = conn.execute("SELECT timestamp_ms FROM sessions").fetchall()
+            conn.close()
+            self.assertTrue(rows)
+            total += len(rows)
+        self.assertEqual(total, len(self.checkpoints))
+
+        cursor = self.db.conn.execute("SELECT COUNT(*) FROM sessions")
+        self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_dictionary_ids_shared(self):
+        """Test a name has the same id in the catalog and every partition"""
+        catalog = dict(self.db.conn.execute("SELECT name, id FROM projects").fetchall())
+
+        for partition in self.db.list_partitions():
+            conn = sqlite3.connect(partition['path'])
+            for name, project_id in conn.execute("SELECT name, id FROM projects"):
+                self.assertEqual(catalog[name], project_id)
+            conn.close()
+
+    def test_queries_match_single_file(self):
+        """Test federated queries return what a single-file database returns"""
+        for name, args in (
+            ('get_aggregate_stats', ()),
+            ('calculate_time_saved', ()),
+            ('get_session_stats', (7,)),
+            ('get_session_stats', (30,)),
+            ('get_session_stats', (365,)),
+            ('get_success_rate', ()),
+            ('get_success_rate', (90,)),
+            ('get_project_breakdown', ()),
+            ('get_hot_files', ()),
+            ('get_distribution', ()),
+            ('get_distribution', ('files', 50)),
+            ('get_distribution', ('duration', 100, 'Project-1')),
+            ('get_timeseries', ()),
+            ('get_timeseries', ('files', 'week', 100, 'Project-0')),
+            ('get_timeseries', ('sessions', 'month', None)),
+            ('get_dashboard_snapshot', ()),
+            ('get_dashboard_snapshot', (45, 20)),
+            ('get_recent_sessions', (3,)),
+            ('get_recent_sessions', (20,)),
+        ):
+            with self.subTest(method=name, args=args):
+                self.assertEqual(getattr(self.db, name)(*args), getattr(self.single, name)(*args))
+
+        for days in (15, 50, 120):
+            self.assertEqual(
+                self.db.get_hot_files(project='Project-1', days=days),
+                self.single.get_hot_files(project='Project-1', days=days)
+            )
+
+        since = datetime.now() - timedelta(days=50)
+        for kwargs in ({}, {'since': since}, {'until': since, 'project': 'Project-0'}):
+            self.assertEqual(
+                sorted(r['session_id'] for r in self.db.search_decisions('sqlite', **kwargs)),
+                sorted(r['session_id'] for r in self.single.search_decisions('sqlite', **kwargs))
+            )
+        self.assertEqual(len(self.db.search_decisions('sqlite', limit=3)), 3)
+
+    def test_search_leaves_result_cache_alone(self):
+        """Test per-partition searches add no entries keyed by their throwaway connections"""
+        self.db.cache_clear()
+        for _ in range(3):
+            self.assertTrue(self.db.search_decisions('sqlite'))
+        self.assertEqual(self.db.cache_info()['size'], 0)
+
+    def test_raw_rows_match_single_file(self):
+        """Test raw exports stream the same rows as a single-file database, oldest first"""
+        since = datetime.now() - timedelta(days=50)
+        for table in AnalyticsDB.RAW_EXPORT_COLUMNS:
+            for kwargs in ({}, {'since': since}, {'until': since, 'project': 'Project-0'}):
+                with self.subTest(table=table, kwargs=kwargs):
+                    rows = list(self.db.iter_raw_rows(table, batch_size=2, **kwargs))
+                    expected = list(self.single.iter_raw_rows(table, **kwargs))
+                    # decision_id is only unique within a partition
+                    for row in rows + expected:
+                        row.pop('decision_id', None)
+                    self.assertEqual(rows, expected)
+
+    def test_queries_attach_only_needed_partitions(self):
+        """Test lifetime queries attach nothing and windows attach the cutoff month"""
+        self.db.get_aggregate_stats()
+        self.db.get_project_breakdown()
+        self.assertEqual(self._attached(), [])
+
+        self.db.get_session_stats(days=45)
+        self.assertEqual(self._attached(), ['p_' + month_of(45).replace('-', '_')])
+
+        self.db.get_recent_sessions(limit=1)
+        self.assertEqual(len(self._attached()), 1)
+
+    def test_duplicates_skipped(self):
+        """Test duplicates are detected within their partition"""
+        self.assertFalse(self.db.insert_session(self.checkpoints[0]))
+        counts = self.db.insert_sessions_bulk(self.checkpoints)
+        self.assertEqual(counts, {'inserted': 0, 'updated': 0, 'skipped': len(self.checkpoints), 'errors': 0})
+        self.assertEqual(self.db.insert_sessions(self.checkpoints[:2]), [False, False])
+        self.assertEqual(self.db.get_aggregate_stats()['total_sessions'], len(self.checkpoints))
+
+    def test_rewrites_sync_catalog(self):
+        """Test changed checkpoints replace their sessions and the catalog drops their old days"""
+        rewritten = []
+        for i in (0, 5, 8):
+            checkpoint = self.checkpoints[i]
+            timestamp = datetime.fromisoformat(checkpoint['timestamp'])
+            # Another day of the same month, so the old day's rollups must be synced too
+            moved = timestamp.replace(day=2 if timestamp.day == 1 else 1)
+            rewritten.append(dict(
+                checkpoint,
+                timestamp=moved.isoformat(),
+                started_at=(moved - timedelta(minutes=10)).isoformat(),
+                file_changes=['moved.py'],
+                decisions=[]
+            ))
+
+        self.assertTrue(self.db.insert_session(rewritten[0]))
+        self.assertEqual(self.db.insert_sessions(rewritten[1:2]), [True])
+        counts = self.db.insert_sessions_bulk(self.checkpoints[6:] + rewritten[2:])
+        self.assertEqual(counts, {'inserted': 0, 'updated': 1, 'skipped': 5, 'errors': 0})
+        self.single.insert_sessions_bulk(rewritten)
+
+        for name, args in (
+            ('get_aggregate_stats', ()),
+            ('get_session_stats', (30,)),
+            ('get_session_stats', (365,)),
+            ('get_project_breakdown', ()),
+            ('get_hot_files', ()),
+            ('get_distribution', ('duration',)),
+            ('get_timeseries', ('files', 'day', 100)),
+            ('get_recent_sessions', (20,)),
+        ):
+            with self.subTest(method=name, args=args):
+                self.assertEqual(getattr(self.db, name)(*args), getattr(self.single, name)(*args))
+
+        expected = self.db.get_project_breakdown()
+        self.db.resync()
+        self.assertEqual(self.db.get_project_breakdown(), expected)
+
+    def test_frozen_partition_of_older_schema_readable(self):
+        """Test a partition frozen before a column was added still reads through the views"""
+        old_month = self.checkpoints[-1]['timestamp'][:7]
+        conn = sqlite3.connect(str(Path(self.temp_dir, f'stats.{old_month}.db')))
+        conn.execute("ALTER TABLE sessions DROP COLUMN content_hash")
+        conn.execute(f"PRAGMA user_version = {AnalyticsDB.SCHEMA_VERSION - 1}")
+        conn.commit()
+        conn.close()
+        self.assertTrue(self.db.freeze_partition(old_month))
+
+        for name, args in (
+            ('get_session_stats', (401,)),
+            ('get_hot_files', (None, 401)),
+            ('get_recent_sessions', (20,)),
+        ):
+            with self.subTest(method=name, args=args):
+                self.assertEqual(getattr(self.db, name)(*args), getattr(self.single, name)(*args))
+        old = self.db.search_decisions('sqlite', until=datetime.now() - timedelta(days=300))
+        self.assertEqual([r['session_id'] for r in old], ['part-10'])
+
+        # Thawing migrates it
+        self.assertTrue(self.db.thaw_partition(old_month))
+        self.assertTrue(self.db.insert_session(dict(self.checkpoints[-1], decisions=[])))
+        self.assertEqual(self.db.get_aggregate_stats()['total_decisions'], len(self.checkpoints) - 1)
+
+    def test_frozen_partition_missing_rollup_synced(self):
+        """Test a partition frozen before session_histograms_daily existed still syncs"""
+        old_month = self.checkpoints[-1]['timestamp'][:7]
+        conn = sqlite3.connect(str(Path(self.temp_dir, f'stats.{old_month}.db')))
+        for (trigger,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND sql LIKE '%session_histograms_daily%'"
+        ).fetchall():
+            conn.execute(f"DROP TRIGGER {trigger}")
+        conn.execute("DROP TABLE session_histograms_daily")
+        conn.execute("ALTER TABLE sessions DROP COLUMN content_hash")
+        conn.execute(f"PRAGMA user_version = {AnalyticsDB.SCHEMA_VERSION - 2}")
+        conn.commit()
+        conn.close()
+        self.assertTrue(self.db.freeze_partition(old_month))
+
+        # A catalog migration resyncs every partition when the database opens
+        self.db.close()
+        catalog = sqlite3.connect(str(Path(self.temp_dir, 'stats.db')))
+        catalog.execute("ALTER TABLE sessions DROP COLUMN content_hash")
+        catalog.execute(f"PRAGMA user_version = {AnalyticsDB.SCHEMA_VERSION - 1}")
+        catalog.close()
+        self.db = PartitionedAnalyticsDB(db_path=str(Path(self.temp_dir) / 'stats.db'))
+
+        for metric in ('duration', 'files'):
+            with self.subTest(metric=metric):
+                self.assertEqual(self.db.get_distribution(metric, days=None),
+                                 self.single.get_distribution(metric, days=None))
+        self.assertEqual(self.db.get_aggregate_stats(), self.single.get_aggregate_stats())
+        self.assertEqual(self.db.resync(), len(self.db.list_partitions()))
+
+    def test_freeze_and_compress(self):
+        """Test frozen and compressed partitions stay readable but refuse writes"""
+        old_month = self.checkpoints[-1]['timestamp'][:7]
+        before = (self.db.get_aggregate_stats(), self.db.get_hot_files(),
+                  self.db.get_session_stats(days=401))
+
+        self.assertTrue(self.db.freeze_partition(old_month))
+        self.assertFalse(self.db.freeze_partition(old_month))
+        self.assertEqual(self.db.list_partitions()[0]['state'], 'frozen')
+
+        late = dict(self.checkpoints[-1], session_id='late-arrival')
+        self.assertFalse(self.db.insert_session(late))
+        self.assertEqual(self.db.insert_sessions_bulk([late])['errors'], 1)
+
+        self.assertTrue(self.db.compress_partition(old_month))
+        self.assertFalse(Path(self.temp_dir, f'stats.{old_month}.db').exists())
+        self.assertTrue(Path(self.temp_dir, f'stats.{old_month}.db.gz').exists())
+
+        after = (self.db.get_aggregate_stats(), self.db.get_hot_files(),
+                 self.db.get_session_stats(days=401))
+        self.assertEqual(after, before)
+        old = self.db.search_decisions('sqlite', until=datetime.now() - timedelta(days=300))
+        self.assertEqual([r['session_id'] for r in old], ['part-10'])
+
+        self.assertTrue(self.db.thaw_partition(old_month))
+        self.assertTrue(self.db.insert_session(late))
+        self.assertEqual(self.db.get_aggregate_stats()['total_sessions'], len(self.checkpoints) + 1)
+
+    def test_freeze_current_month_rejected(self):
+        """Test the month still being written cannot be frozen"""
+        with self.assertRaises(ValueError):
+            self.db.freeze_partition(month_of(0))
+        with self.assertRaises(ValueError):
+            self.db.freeze_partition('1999-01')
+
+        frozen = self.db.freeze_cold_partitions(keep_months=2)
+        self.assertIn(self.checkpoints[-1]['timestamp'][:7], frozen)
+        self.assertNotIn(month_of(0), frozen)
+        states = {p['month']: p['state'] for p in self.db.list_partitions()}
+        self.assertEqual(states[month_of(0)], 'active')
+
+    def test_resync_repairs_catalog(self):
+        """Test resync rebuilds the catalog rollups from the partitions"""
+        expected = self.db.get_project_breakdown()
+        self.db.conn.execute("DELETE FROM sessions_daily")
+        self.db.conn.execute("DELETE FROM partition_aggregates")
+        self.db.conn.commit()
+        self.assertEqual(self.db.get_project_breakdown(), [])
+
+        self.assertEqual(self.db.resync(), len(self.db.list_partitions()))
+        self.assertEqual(self.db.get_project_breakdown(), expected)
+        self.assertEqual(self.db.rebuild_aggregates(), self.single.get_aggregate_stats())
+
+    def test_reopen(self):
+        """Test a reopened catalog finds its partitions"""
+        expected = self.db.get_aggregate_stats()
+        self.db.close()
+        self.db = PartitionedAnalyticsDB(db_path=str(Path(self.temp_dir) / 'stats.db'))
+        self.assertEqual(self.db.get_aggregate_stats(), expected)
+
+    def test_memory_database_rejected(self):
+        """Test partitions need a catalog file to sit next to"""
+        with self.assertRaises(ValueError):
+            PartitionedAnalyticsDB(db_path=':memory:')
+
+    def test_retention_not_supported(self):
+        """Test apply_retention points to partition maintenance instead"""
+        with self.assertRaisesRegex(sqlite3.NotSupportedError, 'freeze_partition'):
+            self.db.apply_retention(days=30)
+
+    def test_merge_not_supported(self):
+        """Test merge_from points to single-file databases instead"""
+        with self.assertRaisesRegex(sqlite3.NotSupportedError, 'single-file database'):
+            self.db.merge_from(str(Path(self.temp_dir) / 'single.db'))
+
+
+if __name__ == '__main__':
+    unittest.main()
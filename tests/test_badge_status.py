@@ -9,10 +9,12 @@ and export functionality.
 import unittest
 import json
 import csv
+import gzip
+import shutil
 import tempfile
 import sys
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 from unittest.mock import Mock, patch, MagicMock
 
 # Add scripts to path
@@ -26,9 +28,12 @@ from badge_generator import (
 )
 
 from status import (
+    ZSTD_AVAILABLE,
+    export_raw,
     export_stats_json,
     export_stats_csv,
-    export_stats_markdown
+    export_stats_markdown,
+    export_query_profile
 )
 
 from analytics_db import AnalyticsDB
@@ -255,6 +260,18 @@ class TestExportFunctions(unittest.TestCase):
                 'last_session': '2025-01-05T00:00:00'
             }
         ]
+        self.db.get_session_stats.return_value = {}
+        self.db.get_dashboard_snapshot.side_effect = self._snapshot
+
+    def _snapshot(self, days=None, recent=5):
+        """Dashboard snapshot assembled from the mocked query methods"""
+        summary = self.db.get_session_stats(days=days) if days else self.db.get_aggregate_stats()
+        return {
+            'period_days': days,
+            'summary': summary,
+            'projects': self.db.get_project_breakdown(),
+            'recent_sessions': []
+        }
 
     def test_export_stats_json_structure(self):
         """Test JSON export creates valid JSON with correct structure"""
@@ -342,6 +359,28 @@ class TestExportFunctions(unittest.TestCase):
         finally:
             Path(output_path).unlink(missing_ok=True)
 
+    def test_export_query_profile(self):
+        """Test the SQL profile of a traced database exports as JSON"""
+        tmp = tempfile.mkdtemp()
+        db = AnalyticsDB(db_path=str(Path(tmp) / 'traced.db'), trace=True)
+        try:
+            db.insert_session({'session_id': 'traced', 'project': {'name': 'Traced'}})
+            db.get_project_breakdown()
+            output_path = str(Path(tmp) / 'profile.json')
+            with patch('builtins.print'):
+                export_query_profile(db, output_path)
+
+            with open(output_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.assertIn('generated_at', data)
+            self.assertEqual(data['calls'], sum(s['calls'] for s in data['statements']))
+            breakdown = next(s for s in data['statements'] if 'p.name as project_name' in s['sql'])
+            self.assertEqual((breakdown['calls'], breakdown['rows']), (1, 1))
+            self.assertTrue(any(s.get('plan') for s in data['statements']))
+        finally:
+            db.close()
+            shutil.rmtree(tmp)
+
     def test_export_json_with_days_filter(self):
         """Test JSON export with days filter"""
         self.db.get_session_stats.return_value = {
@@ -366,11 +405,100 @@ class TestExportFunctions(unittest.TestCase):
             # Check period is set correctly
             self.assertEqual(data['period_days'], 30)
             self.assertEqual(data['summary']['total_sessions'], 20)
+            self.db.get_dashboard_snapshot.assert_called_once_with(days=30, recent=0)
 
         finally:
             Path(output_path).unlink(missing_ok=True)
 
 
+class TestRawExport(unittest.TestCase):
+    """Test streamed raw row exports"""
+
+    def setUp(self):
+        """Set up a database with sessions"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.db = AnalyticsDB(db_path=str(Path(self.temp_dir) / 'stats.db'))
+        now = datetime.now()
+        self.db.insert_sessions_bulk([
+            {
+                'session_id': f'raw-{i}',
+                'timestamp': (now - timedelta(days=i)).isoformat(),
+                'file_changes': ['a.py', 'b.py'],
+                'decisions': [f'Use "quotes", commas\nand newlines {i}'],
+                'project': {'name': 'Project A' if i % 2 else 'Project B'}
+            }
+            for i in range(20)
+        ])
+
+    def tearDown(self):
+        """Clean up"""
+        self.db.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_export_raw_ndjson(self):
+        """Test NDJSON export writes one object per row, oldest first"""
+        output_path = Path(self.temp_dir) / 'sessions.ndjson'
+        with patch('builtins.print'):
+            count = export_raw(self.db, str(output_path))
+
+        lines = output_path.read_text(encoding='utf-8').splitlines()
+        self.assertEqual(count, 20)
+        self.assertEqual(len(lines), 20)
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(rows[0]['session_id'], 'raw-19')
+        self.assertEqual(list(rows[0]), list(AnalyticsDB.RAW_EXPORT_COLUMNS['sessions']))
+
+    def test_export_raw_csv_gzip_with_filters(self):
+        """Test compressed CSV export of a filtered child table"""
+        output_path = Path(self.temp_dir) / 'decisions.csv.gz'
+        with patch('builtins.print'):
+            count = export_raw(self.db, str(output_path), fmt='csv', table='decisions',
+                               since=datetime.now() - timedelta(days=9, hours=12),
+                               project='Project A', compress='gzip')
+
+        with gzip.open(output_path, 'rt', encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(count, 5)
+        self.assertEqual([row['session_id'] for row in rows], [f'raw-{i}' for i in (9, 7, 5, 3, 1)])
+        self.assertEqual(rows[0]['decision_text'], 'Use "quotes", commas\nand newlines 9')
+
+    @unittest.skipUnless(ZSTD_AVAILABLE, "zstandard is not installed")
+    def test_export_raw_zstd(self):
+        """Test zstd-compressed export"""
+        import zstandard
+
+        output_path = Path(self.temp_dir) / 'files.ndjson.zst'
+        with patch('builtins.print'):
+            count = export_raw(self.db, str(output_path), table='file_changes', compress='zstd')
+
+        with open(output_path, 'rb') as f:
+            text = zstandard.ZstdDecompressor().stream_reader(f).read().decode('utf-8')
+        self.assertEqual(count, 40)
+        self.assertEqual(len(text.splitlines()), 40)
+
+    def test_export_raw_rejects_bad_arguments(self):
+        """Test bad arguments fail before an output file is created"""
+        output_path = Path(self.temp_dir) / 'bad.ndjson'
+        with self.assertRaises(ValueError):
+            export_raw(self.db, str(output_path), table='aggregate_stats')
+        with self.assertRaises(ValueError):
+            export_raw(self.db, str(output_path), fmt='xml')
+        self.assertFalse(output_path.exists())
+
+    def test_export_raw_failure_removes_output(self):
+        """Test an export that fails part way leaves no partial file"""
+        output_path = Path(self.temp_dir) / 'partial.ndjson'
+
+        def failing_rows(*args, **kwargs):
+            yield {'session_id': 'first'}
+            raise OSError("disk full")
+
+        with patch.object(self.db, 'iter_raw_rows', side_effect=failing_rows):
+            with self.assertRaises(OSError):
+                export_raw(self.db, str(output_path))
+        self.assertFalse(output_path.exists())
+
+
 class TestStatusDisplayFunctions(unittest.TestCase):
     """Test status display helper functions"""
 
@@ -425,6 +553,13 @@ class TestStatusDisplayFunctions(unittest.TestCase):
             }
         ]
 
+        self.db.get_dashboard_snapshot.return_value = {
+            'period_days': None,
+            'summary': self.db.get_aggregate_stats.return_value,
+            'projects': self.db.get_project_breakdown.return_value,
+            'recent_sessions': []
+        }
+
         # These should not raise exceptions
         try:
             display_current_session(self.db)
@@ -433,6 +568,204 @@ class TestStatusDisplayFunctions(unittest.TestCase):
         except Exception as e:
             self.fail(f"Display function raised exception: {e}")
 
+    def test_display_sections_share_snapshot(self):
+        """Test sections render from a given snapshot without querying again"""
+        from status import (
+            display_lifetime_stats,
+            display_project_breakdown,
+            display_recent_activity
+        )
+
+        snapshot = {
+            'period_days': 7,
+            'summary': {'total_sessions': 12, 'successful_sessions': 9, 'success_rate': 75.0},
+            'projects': [{
+                'project_name': 'Snapshot Project',
+                'total_sessions': 12,
+                'success_rate': 75.0,
+                'total_files_changed': 30,
+                'total_decisions': 4
+            }],
+            'recent_sessions': [{
+                'session_id': 'abcdef123456',
+                'timestamp': datetime(2025, 3, 1, 9, 30),
+                'project_name': 'Snapshot Project',
+                'files_changed': 3,
+                'decisions_logged': 1,
+                'checkpoint_success': True
+            }]
+        }
+
+        with patch('builtins.print') as mock_print:
+            display_lifetime_stats(self.db, days=7, snapshot=snapshot)
+            display_project_breakdown(self.db, snapshot=snapshot)
+            display_recent_activity(self.db, limit=5, snapshot=snapshot)
+        output = ' '.join(str(call.args[0]) for call in mock_print.call_args_list if call.args)
+
+        self.assertIn('75.0% (9/12 successful)', output)
+        self.assertIn('Snapshot Project', output)
+        self.assertIn('abcdef12', output)
+        self.db.get_dashboard_snapshot.assert_not_called()
+        self.db.get_aggregate_stats.assert_not_called()
+
+
+    def test_display_search_results(self):
+        """Test search results render and an empty result is reported"""
+        from status import display_search_results
+
+        self.db.search_decisions.return_value = [
+            {
+                'decision_id': 1,
+                'session_id': 'abc',
+                'project_name': None,
+                'timestamp': datetime(2025, 3, 1, 10, 0),
+                'decision_text': 'Picked SQLite',
+                'snippet': 'Picked [SQLite]',
+                'rank': -1.2
+            }
+        ]
+
+        with patch('builtins.print') as mock_print:
+            display_search_results(self.db, 'sqlite', project='P', days=7, limit=5)
+
+        output = ' '.join(str(call.args[0]) for call in mock_print.call_args_list if call.args)
+        self.assertIn('Picked [SQLite]', output)
+        _, kwargs = self.db.search_decisions.call_args
+        self.assertEqual(kwargs['project'], 'P')
+        self.assertEqual(kwargs['limit'], 5)
+        self.assertIsNotNone(kwargs['since'])
+
+        self.db.search_decisions.return_value = []
+        with patch('builtins.print') as mock_print:
+            display_search_results(self.db, 'nothing')
+        output = ' '.join(str(call.args[0]) for call in mock_print.call_args_list if call.args)
+        self.assertIn("No decisions match 'nothing'", output)
+
+
+    def test_display_hot_files(self):
+        """Test hot files render with and without a project filter"""
+        from status import display_hot_files
+
+        self.db.get_hot_files.return_value = [
+            {
+                'project_name': 'Alpha',
+                'file_path': 'scripts/analytics_db.py',
+                'changes': 42,
+                'sessions': 17,
+                'last_changed': '2025-03-01'
+            }
+        ]
+
+        with patch('builtins.print') as mock_print:
+            display_hot_files(self.db, days=30)
+        output = ' '.join(str(call.args[0]) for call in mock_print.call_args_list if call.args)
+        self.assertIn('scripts/analytics_db.py', output)
+        self.assertIn('Alpha', output)
+        self.db.get_hot_files.assert_called_with(project=None, days=30, top_k=20)
+
+        with patch('builtins.print') as mock_print:
+            display_hot_files(self.db, project='Alpha', top_k=5)
+        self.db.get_hot_files.assert_called_with(project='Alpha', days=None, top_k=5)
+
+        self.db.get_hot_files.return_value = []
+        with patch('builtins.print') as mock_print:
+            display_hot_files(self.db)
+        output = ' '.join(str(call.args[0]) for call in mock_print.call_args_list if call.args)
+        self.assertIn('No file changes recorded', output)
+
+    def test_display_distribution(self):
+        """Test duration and files distributions render percentiles and bins"""
+        from status import display_distribution, format_duration
+
+        def distribution(metric, days, project):
+            if metric == 'duration':
+                return {
+                    'count': 3,
+                    'percentiles': {'p50': 1350.0, 'p90': 5400.0, 'p99': 90000.0},
+                    'histogram': [
+                        {'lower': 1200, 'upper': 1500, 'sessions': 2},
+                        {'lower': 1500, 'upper': 1800, 'sessions': 0},
+                        {'lower': 86400, 'upper': None, 'sessions': 1},
+                    ]
+                }
+            return {'count': 0, 'percentiles': {'p50': None}, 'histogram': []}
+
+        self.db.get_distribution.side_effect = distribution
+        with patch('builtins.print') as mock_print:
+            display_distribution(self.db, project='Alpha', days=30)
+        output = ' '.join(str(call.args[0]) for call in mock_print.call_args_list if call.args)
+
+        self.assertIn('SESSION DURATION - Alpha (LAST 30 DAYS)', output)
+        self.assertIn('22.5m', output)
+        self.assertIn('20m-25m', output)
+        self.assertIn('24h+', output)
+        self.assertIn('No files per session data available', output)
+        self.db.get_distribution.assert_called_with(metric='files', days=30, project='Alpha')
+
+        self.assertEqual(
+            [format_duration(s) for s in (45, 90, 5400)],
+            ['45s', '1.5m', '1.5h']
+        )
+
+
+    def test_display_trend(self):
+        """Test a trend renders every bucket, including empty ones"""
+        from status import display_trend
+
+        self.db.get_timeseries.return_value = [
+            {'start': '2025-03-03', 'value': 12.5},
+            {'start': '2025-03-10', 'value': None},
+            {'start': '2025-03-17', 'value': 50.0},
+        ]
+
+        with patch('builtins.print') as mock_print:
+            display_trend(self.db, metric='success_rate', bucket='week', days=21)
+        output = ' '.join(str(call.args[0]) for call in mock_print.call_args_list if call.args)
+        self.assertIn('SUCCESS RATE PER WEEK - ALL PROJECTS (LAST 21 DAYS)', output)
+        self.assertIn('2025-03-10', output)
+        self.assertIn('12.5', output)
+        self.db.get_timeseries.assert_called_with(
+            metric='success_rate', bucket='week', days=21, project=None
+        )
+
+        self.db.get_timeseries.return_value = []
+        with patch('builtins.print') as mock_print:
+            display_trend(self.db)
+        output = ' '.join(str(call.args[0]) for call in mock_print.call_args_list if call.args)
+        self.assertIn('No sessions recorded', output)
+
+    def test_display_query_profile(self):
+        """Test the SQL profile renders statements and their query plans"""
+        from status import display_query_profile
+
+        statement = {
+            'sql': 'SELECT stat_key, stat_value FROM aggregate_stats', 'calls': 2,
+            'total_ms': 1.5, 'mean_ms': 0.75, 'p50_ms': 0.5, 'p95_ms': 1.0, 'p99_ms': 1.0,
+            'max_ms': 1.0, 'rows': 20, 'sqlite_statements': 2
+        }
+        self.db.query_profile.return_value = {
+            'calls': 3,
+            'total_ms': 1.75,
+            'statements': [
+                dict(statement, plan=['SCAN aggregate_stats']),
+                dict(statement, sql='COMMIT', calls=1, total_ms=0.25, rows=0, sqlite_statements=1)
+            ]
+        }
+
+        with patch('builtins.print') as mock_print:
+            display_query_profile(self.db)
+        output = ' '.join(str(call.args[0]) for call in mock_print.call_args_list if call.args)
+        self.assertIn('SQL PROFILE - 3 CALLS, 1.8 MS', output)
+        self.assertIn('COMMIT', output)
+        self.assertIn('QUERY PLANS', output)
+        self.assertIn('  SCAN aggregate_stats', output)
+
+        self.db.query_profile.return_value = {'calls': 0, 'total_ms': 0.0, 'statements': []}
+        with patch('builtins.print') as mock_print:
+            display_query_profile(self.db)
+        output = ' '.join(str(call.args[0]) for call in mock_print.call_args_list if call.args)
+        self.assertIn('No SQL statements recorded', output)
+
 
 class TestCLIArgumentParsing(unittest.TestCase):
     """Test CLI argument parsing (without executing main)"""
@@ -504,6 +837,12 @@ class TestEdgeCases(unittest.TestCase):
             'total_files_changed': 200
         }
         db.get_project_breakdown.return_value = []
+        db.get_dashboard_snapshot.return_value = {
+            'period_days': None,
+            'summary': db.get_aggregate_stats.return_value,
+            'projects': [],
+            'recent_sessions': []
+        }
 
         with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json') as f:
             output_path = f.name